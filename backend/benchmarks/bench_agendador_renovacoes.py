@@ -0,0 +1,83 @@
+"""
+Benchmark do agendador de renovações
+
+Popula SQLites temporários de tamanhos crescentes com o mesmo volume de
+renovações vencendo nos próximos meses (o resto já renovado ou vencendo
+em anos futuros) e mede 30 ticks diários: o custo por tick deve
+acompanhar os avisos devidos, não o tamanho da tabela.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_agendador_renovacoes --tamanhos 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+from datetime import date, timedelta
+
+from src.infrastructure.repositories.sqlite_renovacao_repository import SQLiteRenovacaoRepository
+from src.infrastructure.services.agendador_renovacoes import AgendadorRenovacoes
+
+HOJE = date(2026, 10, 19)
+
+
+async def popular(repo: SQLiteRenovacaoRepository, total: int, proximas: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    lote = []
+    for i in range(total):
+        if i < proximas:
+            vencimento, status = HOJE + timedelta(days=aleatorio.randint(0, 120)), "pendente"
+        elif i % 2:
+            vencimento, status = HOJE - timedelta(days=aleatorio.randint(1, 1500)), "renovado"
+        else:
+            vencimento, status = HOJE + timedelta(days=aleatorio.randint(400, 1500)), "pendente"
+        lote.append({
+            "id": f"renovacao-{i:08d}",
+            "corretor_id": f"corretor-{aleatorio.randrange(2000):05d}",
+            "nome_cliente": f"Cliente {i}",
+            "operadora_nome": "AMIL",
+            "valor_atual": round(aleatorio.uniform(300, 6000), 2),
+            "data_vencimento": vencimento.isoformat(),
+            "status": status,
+            "metadata": {"idades": [aleatorio.randint(0, 80) for _ in range(aleatorio.randint(1, 5))]},
+        })
+        if len(lote) == 50000:
+            await repo.inserir_renovacoes(lote)
+            lote = []
+    if lote:
+        await repo.inserir_renovacoes(lote)
+
+
+async def executar(args):
+    for total in args.tamanhos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            repo = SQLiteRenovacaoRepository(os.path.join(diretorio, "renovacoes.db"))
+            await popular(repo, total, min(args.proximas, total))
+
+            agendador = AgendadorRenovacoes(repositorio=repo, intervalo_recarga=float("inf"))
+            primeiro = await agendador.tick(HOJE)
+            diarios = [await agendador.tick(HOJE + timedelta(days=d)) for d in range(1, 31)]
+            duracoes = [t["duracao_ms"] for t in diarios]
+            avisos = sum(t["avisos_60d"] + t["avisos_30d"] for t in diarios)
+
+            print(
+                f"{total:>9} renovações | carga inicial: {primeiro['carregadas']} em "
+                f"{primeiro['duracao_ms']:.0f} ms ({primeiro['avisos_60d'] + primeiro['avisos_30d']} avisos) | "
+                f"ticks diários: mediana {statistics.median(duracoes):.1f} ms, "
+                f"máx {max(duracoes):.1f} ms, {avisos / len(diarios):.0f} avisos/tick"
+            )
+            repo.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--proximas", type=int, default=5000,
+                        help="Renovações em aberto vencendo nos próximos 120 dias")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark da análise do funil
+
+Gera leads sintéticos com histórico de status e mede a coleta
+(achatamento em colunas) e o cálculo vetorizado das métricas.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_analise_funil --leads 400000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.infrastructure.services.analise_funil import ColetorEventos, calcular_metricas
+
+OPERADORAS = ["Amil", "Bradesco", "SulAmérica", "Unimed", None]
+ORIGENS = ["scanner_pdf", "meta_ads", "manual"]
+ETAPAS = ["contatado", "negociacao", "proposta_enviada", "ganho"]
+
+
+def gerar_leads(quantidade: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    inicio = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    for i in range(quantidade):
+        criado = inicio + timedelta(minutes=i)
+        momento = criado
+        historico = []
+        avancos = aleatorio.randint(0, len(ETAPAS))
+        for etapa in ETAPAS[:avancos]:
+            momento += timedelta(hours=aleatorio.random() * 72)
+            historico.append({
+                "timestamp": momento.isoformat(),
+                "evento": "mudanca_status",
+                "status_novo": etapa
+            })
+        status = ETAPAS[avancos - 1] if avancos else "novo"
+        if status != "ganho" and aleatorio.random() < 0.3:
+            momento += timedelta(hours=aleatorio.random() * 72)
+            historico.append({"timestamp": momento.isoformat(), "evento": "mudanca_status", "status_novo": "perdido"})
+            status = "perdido"
+
+        yield {
+            "id": str(i),
+            "created_at": criado.isoformat(),
+            "status": status,
+            "operadora_atual": aleatorio.choice(OPERADORAS),
+            "origem": aleatorio.choice(ORIGENS),
+            "historico": historico
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=400000)
+    args = parser.parse_args()
+
+    leads = list(gerar_leads(args.leads))
+
+    inicio = time.perf_counter()
+    coletor = ColetorEventos()
+    for pagina in range(0, len(leads), 5000):
+        coletor.adicionar(leads[pagina:pagina + 5000])
+    colunas = coletor.colunas()
+    coleta = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultado = calcular_metricas(colunas)
+    calculo = time.perf_counter() - inicio
+
+    print(f"leads: {resultado['total_leads']}  eventos: {resultado['total_eventos']}")
+    print(f"coleta: {coleta:.2f} s  cálculo: {calculo:.2f} s  "
+          f"({resultado['total_eventos'] / (coleta + calculo):,.0f} eventos/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark dos endpoints de catálogo: banda e latência em visitas repetidas
+
+Chama a aplicação diretamente (ASGI, sem rede) em GET /api/v1/info e
+GET /api/v1/cotacao/operadoras simulando:
+- primeira visita sem compressão (corpo inteiro, como antes do cache)
+- primeira visita com Accept-Encoding (corpo pré-comprimido)
+- visita repetida com If-None-Match (304 sem corpo)
+
+e compara o custo do handler com o de montar e serializar o JSON a cada
+requisição (comportamento anterior). Os tempos ponta a ponta incluem
+roteamento e middlewares, iguais com ou sem cache.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_catalogo --requisicoes 5000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from main import _informacoes_api, app
+from src.presentation.respostas import representacoes
+from src.presentation.routers.cotacao_router import cotacao_controller
+
+ROTAS = {
+    "/api/v1/info": ("info", lambda: app.version, _informacoes_api),
+    "/api/v1/cotacao/operadoras": (
+        "operadoras", cotacao_controller.versao_catalogo, cotacao_controller.listar_operadoras
+    ),
+}
+
+
+async def _receber():
+    return {"type": "http.request", "body": b""}
+
+
+async def requisitar(aplicacao, caminho: str, cabecalhos=()):
+    """(status, cabeçalhos da resposta, bytes do corpo, segundos)"""
+    resposta = {"corpo": 0}
+
+    async def enviar(mensagem):
+        if mensagem["type"] == "http.response.start":
+            resposta["status"] = mensagem["status"]
+            resposta["cabecalhos"] = {k.decode(): v.decode() for k, v in mensagem["headers"]}
+        elif mensagem["type"] == "http.response.body":
+            resposta["corpo"] += len(mensagem.get("body", b""))
+
+    scope = _escopo(caminho, cabecalhos)
+    inicio = time.perf_counter()
+    await aplicacao(scope, _receber, enviar)
+    return resposta["status"], resposta["cabecalhos"], resposta["corpo"], time.perf_counter() - inicio
+
+
+def _escopo(caminho: str, cabecalhos=()):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": caminho, "raw_path": caminho.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "headers": [(k.encode(), v.encode()) for k, v in cabecalhos],
+    }
+
+
+async def medir(aplicacao, caminho: str, cabecalhos, requisicoes: int):
+    tempos, corpo, status = [], 0, None
+    for _ in range(requisicoes):
+        status, _, corpo, segundos = await requisitar(aplicacao, caminho, cabecalhos)
+        tempos.append(segundos)
+    tempos.sort()
+    return {
+        "status": status,
+        "bytes": corpo,
+        "p50_us": statistics.median(tempos) * 1e6,
+        "p99_us": tempos[int(len(tempos) * 0.99) - 1] * 1e6,
+    }
+
+
+async def medir_handler(executar, requisicoes: int) -> float:
+    """Mediana em µs de uma chamada do handler"""
+    tempos = []
+    for _ in range(requisicoes):
+        inicio = time.perf_counter()
+        await executar()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1e6
+
+
+async def executar(args):
+    for caminho, (recurso, versao, montar) in ROTAS.items():
+        # Aquecimento: monta a representação e descobre as ETags
+        await requisitar(app, caminho)
+        _, identidade, _, _ = await requisitar(app, caminho, [("accept-encoding", "identity")])
+        _, comprimida, _, _ = await requisitar(app, caminho, [("accept-encoding", args.accept_encoding)])
+
+        cenarios = {
+            "1ª visita, sem compressão": (app, [("accept-encoding", "identity")]),
+            f"1ª visita, {comprimida.get('content-encoding', 'identity')}": (
+                app, [("accept-encoding", args.accept_encoding)]
+            ),
+            "visita repetida (304)": (
+                app, [("accept-encoding", args.accept_encoding), ("if-none-match", comprimida["etag"])]
+            ),
+        }
+        print(f"\n{caminho}  (ETag {identidade['etag']}, ponta a ponta)")
+        for nome, (aplicacao, cabecalhos) in cenarios.items():
+            resultado = await medir(aplicacao, caminho, cabecalhos, args.requisicoes)
+            print(
+                f"  {nome:28s} {resultado['status']}  {resultado['bytes']:5d} bytes  "
+                f"p50 {resultado['p50_us']:7.1f} µs  p99 {resultado['p99_us']:7.1f} µs"
+            )
+
+        async def antes():
+            JSONResponse(await montar()).body
+
+        repetida = Request(_escopo(caminho, [("if-none-match", comprimida["etag"])]))
+
+        async def depois():
+            await representacoes.responder(repetida, recurso, versao(), montar)
+
+        print(
+            f"  handler: {await medir_handler(antes, args.requisicoes):.1f} µs montando o JSON, "
+            f"{await medir_handler(depois, args.requisicoes):.1f} µs com cache (304)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=5000)
+    parser.add_argument("--accept-encoding", default="br, gzip", help="Accept-Encoding dos cenários comprimidos")
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark da exportação de leads (GET /api/v1/leads/export)
+
+Popula um banco SQLite temporário com leads sintéticos e consome a
+resposta em streaming do controller em CSV e NDJSON, como um cliente
+faria, medindo linhas/s e MB/s de cada formato.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_exportacao --leads 200000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.presentation.controllers import lead_controller
+
+OPERADORAS = ["Amil", "Bradesco", "SulAmérica", "Unimed", "Porto Seguro"]
+
+
+async def popular(repo: SQLiteLeadRepository, quantidade: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    lote = []
+    for i in range(quantidade):
+        lote.append(novo_lead(
+            nome=f"Lead {i}",
+            whatsapp=f"+5511{i:09d}",
+            email=f"lead{i}@exemplo.com",
+            operadora_atual=aleatorio.choice(OPERADORAS),
+            valor_atual=round(aleatorio.uniform(300, 3000), 2),
+            idades=[aleatorio.randint(0, 90) for _ in range(aleatorio.randint(1, 4))],
+            economia_estimada=round(aleatorio.uniform(0, 800), 2)
+        ))
+        if len(lote) == 10000:
+            await repo.criar_leads_lote(lote)
+            lote = []
+    if lote:
+        await repo.criar_leads_lote(lote)
+
+
+async def medir_formato(formato: str, leads: int) -> dict:
+    inicio = time.perf_counter()
+    resposta = await lead_controller.exportar_leads(formato=formato)
+    total_bytes = 0
+    async for chunk in resposta.body_iterator:
+        total_bytes += len(chunk)
+    duracao = time.perf_counter() - inicio
+
+    return {
+        "formato": formato,
+        "linhas": leads,
+        "mb": round(total_bytes / 1e6, 1),
+        "duracao_s": round(duracao, 2),
+        "linhas_s": round(leads / duracao),
+        "mb_s": round(total_bytes / 1e6 / duracao, 1)
+    }
+
+
+async def executar(args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        repo = SQLiteLeadRepository(os.path.join(diretorio, "leads.db"))
+        await repo.iniciar()
+        lead_controller.lead_repository = repo
+
+        inicio = time.perf_counter()
+        await popular(repo, args.leads)
+        print(f"população: {args.leads} leads em {time.perf_counter() - inicio:.1f} s")
+
+        for formato in ("csv", "ndjson"):
+            resultado = await medir_formato(formato, args.leads)
+            print(
+                f"{resultado['formato']:>6}: {resultado['linhas']} linhas ({resultado['mb']} MB) em "
+                f"{resultado['duracao_s']} s -> {resultado['linhas_s']:,} linhas/s, {resultado['mb_s']} MB/s"
+            )
+
+        await repo.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200000)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark do tempo de import da aplicação (partida a frio)
+
+Roda `python -X importtime -c "import main"` em processos novos, sem
+OPENAI_API_KEY nem Supabase configurados, e mostra o tempo total e os
+módulos que mais pesam (tempo acumulado, com dependências). Lista
+também quais dependências pesadas foram carregadas: nenhuma delas
+deveria, porque os serviços vêm do container sob demanda.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_importacao --repeticoes 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carregadas só quando o serviço que as usa é criado
+DEPENDENCIAS_TARDIAS = ("pandas", "openai", "pypdf", "supabase")
+
+VARIAVEIS_REMOVIDAS = ("OPENAI_API_KEY", "SUPABASE_URL", "SUPABASE_KEY")
+
+
+def medir_importacao(modulo: str = "main") -> Dict[str, object]:
+    """
+    Importa `modulo` num interpretador novo com -X importtime
+
+    Returns:
+        {"total_ms", "modulos": [(nome, acumulado_ms)], "tardias_carregadas": [...]}
+
+    Raises:
+        RuntimeError: O import falhou
+    """
+    ambiente = {k: v for k, v in os.environ.items() if k not in VARIAVEIS_REMOVIDAS}
+    codigo = (
+        f"import sys; import {modulo}; "
+        f"print(','.join(m for m in {DEPENDENCIAS_TARDIAS!r} if m in sys.modules))"
+    )
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"import {modulo} falhou:\n{processo.stderr[-2000:]}")
+
+    modulos: List[Tuple[str, float]] = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        if acumulado.strip().isdigit():
+            modulos.append((nome.strip(), int(acumulado) / 1000))
+
+    total = next((ms for nome, ms in reversed(modulos) if nome == modulo), 0.0)
+    carregadas = [m for m in processo.stdout.strip().split(",") if m]
+    return {
+        "total_ms": total,
+        "modulos": sorted(modulos, key=lambda m: m[1], reverse=True),
+        "tardias_carregadas": carregadas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="main")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    medicoes = [medir_importacao(args.modulo) for _ in range(args.repeticoes)]
+    totais = [m["total_ms"] for m in medicoes]
+    print(
+        f"import {args.modulo}: mediana {statistics.median(totais):.0f} ms "
+        f"(mín {min(totais):.0f}, máx {max(totais):.0f}, {args.repeticoes} processos)"
+    )
+    print(f"dependências tardias carregadas: {medicoes[-1]['tardias_carregadas'] or 'nenhuma'}")
+    print(f"\nmódulos mais pesados (acumulado, última execução):")
+    for nome, ms in medicoes[-1]["modulos"][:args.top]:
+        print(f"  {ms:8.1f} ms  {nome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark dos backends de leads
+
+Roda a mesma carga (criação, leituras por ID e WhatsApp, listagem,
+varredura keyset, mudanças de status, busca e estatísticas) contra o
+SQLite embarcado e, se SUPABASE_URL/SUPABASE_KEY estiverem no ambiente,
+contra o Supabase.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_lead_repository --leads 2000
+    python -m benchmarks.bench_lead_repository --backend sqlite --concorrencia 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from src.infrastructure.repositories.lead_repository import LeadRepository
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Íris", "João"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Rocha"]
+OPERADORAS = ["Amil", "Bradesco", "SulAmérica", "Unimed", "Porto Seguro"]
+STATUS = ["contatado", "negociacao", "proposta_enviada", "ganho", "perdido"]
+
+
+def percentil(amostras: List[float], p: float) -> float:
+    ordenadas = sorted(amostras)
+    indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+    return ordenadas[indice]
+
+
+async def medir(
+    nome: str,
+    operacoes: List[Callable[[], Awaitable]],
+    concorrencia: int
+) -> Dict[str, float]:
+    """Executa as operações com no máximo `concorrencia` simultâneas"""
+    latencias: List[float] = []
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def executar(operacao):
+        async with semaforo:
+            inicio = time.perf_counter()
+            await operacao()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(executar(op) for op in operacoes))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        "operacao": nome,
+        "quantidade": len(operacoes),
+        "ops_s": round(len(operacoes) / duracao, 1),
+        "p50_ms": round(statistics.median(latencias), 3),
+        "p99_ms": round(percentil(latencias, 99), 3)
+    }
+
+
+async def executar_carga(repo: LeadRepository, leads: int, concorrencia: int) -> List[Dict[str, float]]:
+    """Mesma sequência de operações para qualquer backend"""
+    aleatorio = random.Random(42)
+    prefixo = f"{int(time.time()) % 100000:05d}"
+    resultados = []
+    criados = []
+
+    async def criar(i):
+        lead = await repo.criar_lead(
+            nome=f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {i}",
+            whatsapp=f"+55119{prefixo}{i:04d}",
+            email=f"bench{prefixo}{i}@exemplo.com",
+            operadora_atual=aleatorio.choice(OPERADORAS),
+            valor_atual=round(aleatorio.uniform(300, 3000), 2),
+            idades=[aleatorio.randint(0, 80) for _ in range(aleatorio.randint(1, 4))],
+            economia_estimada=round(aleatorio.uniform(0, 800), 2),
+            valor_proposto=round(aleatorio.uniform(250, 2500), 2)
+        )
+        if lead:
+            criados.append(lead)
+
+    await repo.iniciar()
+    resultados.append(await medir("criar_lead", [lambda i=i: criar(i) for i in range(leads)], concorrencia))
+    if not criados:
+        raise RuntimeError("Nenhum lead criado; verifique a conexão com o backend")
+
+    amostra = [aleatorio.choice(criados) for _ in range(leads)]
+    resultados.append(await medir(
+        "buscar_lead_por_id",
+        [lambda l=l: repo.buscar_lead_por_id(l["id"]) for l in amostra],
+        concorrencia
+    ))
+    resultados.append(await medir(
+        "buscar_lead_por_whatsapp",
+        [lambda l=l: repo.buscar_lead_por_whatsapp(l["whatsapp"]) for l in amostra],
+        concorrencia
+    ))
+    resultados.append(await medir(
+        "listar_leads",
+        [lambda o=o: repo.listar_leads(limite=50, offset=o) for o in range(0, min(leads, 5000), 50)],
+        concorrencia
+    ))
+
+    async def varrer():
+        async for _ in repo.iterar_leads(tamanho_pagina=500, colunas="id,created_at,nome,status"):
+            pass
+
+    resultados.append(await medir("iterar_leads", [varrer], 1))
+    resultados.append(await medir(
+        "atualizar_status_lead",
+        [lambda l=l: repo.atualizar_status_lead(l["id"], aleatorio.choice(STATUS)) for l in amostra[:leads // 2]],
+        concorrencia
+    ))
+    resultados.append(await medir(
+        "buscar_leads",
+        [lambda t=t: repo.buscar_leads(t, limite=20) for t in (SOBRENOMES * 25)],
+        concorrencia
+    ))
+    resultados.append(await medir(
+        "obter_dashboard_stats",
+        [repo.obter_dashboard_stats for _ in range(200)],
+        concorrencia
+    ))
+    await repo.encerrar()
+    return resultados
+
+
+def criar_repositorios(backend: str) -> Dict[str, LeadRepository]:
+    repositorios: Dict[str, LeadRepository] = {}
+
+    if backend in ("sqlite", "todos"):
+        from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+        caminho = os.path.join(tempfile.mkdtemp(prefix="bench-leads-"), "leads.db")
+        repositorios["sqlite"] = SQLiteLeadRepository(caminho)
+
+    if backend in ("supabase", "todos") and os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"):
+        from src.infrastructure.repositories.supabase_lead_repository import SupabaseLeadRepository
+        repositorios["supabase"] = SupabaseLeadRepository()
+
+    return repositorios
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["sqlite", "supabase", "todos"], default="todos")
+    parser.add_argument("--leads", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    args = parser.parse_args()
+
+    relatorio = {}
+    for nome, repo in criar_repositorios(args.backend).items():
+        print(f"▶ {nome}: {args.leads} leads, concorrência {args.concorrencia}")
+        relatorio[nome] = await executar_carga(repo, args.leads, args.concorrencia)
+        for linha in relatorio[nome]:
+            print(
+                f"  {linha['operacao']:<26} {linha['ops_s']:>10.1f} ops/s"
+                f"  p50 {linha['p50_ms']:>8.3f} ms  p99 {linha['p99_ms']:>8.3f} ms"
+            )
+
+    print(json.dumps(relatorio, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
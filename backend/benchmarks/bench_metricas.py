@@ -0,0 +1,99 @@
+"""
+Benchmark do custo das métricas por requisição
+
+Chama diretamente (ASGI, sem rede nem servidor) uma aplicação trivial
+com e sem o MetricasHTTPMiddleware, espalhando as requisições por
+algumas dezenas de rotas, e mede o acréscimo por requisição; mede
+também uma observação isolada de histograma e o decorator cronometrado.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_metricas --requisicoes 200000 --rotas 40
+"""
+import argparse
+import asyncio
+import time
+
+from src.infrastructure.services.metricas import RegistroMetricas, cronometrado
+from src.presentation.middlewares.metricas_http import MetricasHTTPMiddleware
+
+
+class _Rota:
+    def __init__(self, path: str):
+        self.path = path
+
+
+async def aplicacao(scope, receive, send):
+    """Aplicação mínima que só marca a rota e responde 200"""
+    scope["route"] = scope["_rota"]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _receber():
+    return {"type": "http.request", "body": b""}
+
+
+async def _enviar(mensagem):
+    pass
+
+
+async def medir(app, escopos) -> float:
+    inicio = time.perf_counter()
+    for scope in escopos:
+        await app(scope, _receber, _enviar)
+    return time.perf_counter() - inicio
+
+
+async def executar(args):
+    rotas = [_Rota(f"/api/v1/recurso{i}/{{item_id}}") for i in range(args.rotas)]
+    escopos = [
+        {"type": "http", "method": "GET", "path": f"/api/v1/recurso{i % args.rotas}/{i}",
+         "_rota": rotas[i % args.rotas]}
+        for i in range(args.requisicoes)
+    ]
+
+    registro = RegistroMetricas()
+    com_metricas = MetricasHTTPMiddleware(aplicacao, registro)
+
+    # Aquecimento (cria as séries) e melhor de 3 para cada variante
+    await medir(com_metricas, escopos[:1000])
+    sem = min([await medir(aplicacao, escopos) for _ in range(3)])
+    com = min([await medir(com_metricas, escopos) for _ in range(3)])
+
+    acrescimo = (com - sem) / args.requisicoes * 1e6
+    print(f"sem middleware: {sem / args.requisicoes * 1e6:.2f} µs/requisição")
+    print(f"com middleware: {com / args.requisicoes * 1e6:.2f} µs/requisição (+{acrescimo:.2f} µs)")
+
+    histograma = registro.histograma("bench_seconds", "Benchmark", ("operacao",))
+    serie = histograma.rotulado("observar")
+    inicio = time.perf_counter()
+    for i in range(args.requisicoes):
+        serie.observar(i * 1e-6)
+    print(f"observação de histograma: {(time.perf_counter() - inicio) / args.requisicoes * 1e9:.0f} ns")
+
+    @cronometrado(histograma, "decorator")
+    def funcao():
+        return None
+
+    inicio = time.perf_counter()
+    for _ in range(args.requisicoes):
+        funcao()
+    print(f"chamada cronometrada: {(time.perf_counter() - inicio) / args.requisicoes * 1e9:.0f} ns")
+
+    inicio = time.perf_counter()
+    texto = registro.renderizar()
+    print(
+        f"coleta /metrics: {(time.perf_counter() - inicio) * 1000:.2f} ms "
+        f"({len(texto.splitlines())} linhas)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=200000)
+    parser.add_argument("--rotas", type=int, default=40)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark do motor de comissões
+
+Popula um SQLite temporário com um mês de produções sintéticas e mede o
+processamento completo (leitura paginada, cálculo vetorizado e gravação
+em lote), duas vezes para cobrir o reprocessamento do mesmo mês.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_motor_comissoes --producoes 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from src.infrastructure.repositories.sqlite_comissao_repository import SQLiteComissaoRepository
+from src.infrastructure.services.motor_comissoes import JobComissoes
+
+MODALIDADES = ["Individual", "Familiar", "PME", "Adesão", "Individual Odonto"]
+STATUS = ["Implantada"] * 8 + ["Em análise", "Cancelada"]
+
+
+async def popular(repo: SQLiteComissaoRepository, producoes: int, corretores: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    await repo.inserir_corretores([
+        {"id": f"corretor-{i:05d}", "nome": f"Corretor {i}", "comissao_padrao_pct": aleatorio.choice([50, 80, 100])}
+        for i in range(corretores)
+    ])
+    lote = []
+    for i in range(producoes):
+        lote.append({
+            "id": f"producao-{i:08d}",
+            "corretor_id": f"corretor-{aleatorio.randrange(corretores):05d}",
+            "nome_segurado": f"Segurado {i}",
+            "modalidade": aleatorio.choice(MODALIDADES),
+            "valor_mensalidade": round(aleatorio.uniform(150, 5000), 2),
+            "data_vigencia": f"2026-09-{aleatorio.randint(1, 30):02d}",
+            "status": aleatorio.choice(STATUS),
+        })
+        if len(lote) == 20000:
+            await repo.inserir_producoes(lote)
+            lote = []
+    if lote:
+        await repo.inserir_producoes(lote)
+
+
+async def executar(args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        repo = SQLiteComissaoRepository(os.path.join(diretorio, "comissoes.db"))
+        inicio = time.perf_counter()
+        await popular(repo, args.producoes, args.corretores)
+        print(f"população: {args.producoes} produções em {time.perf_counter() - inicio:.1f} s")
+
+        job = JobComissoes(repositorio=repo)
+        for passada in ("primeira", "reprocessamento"):
+            r = await job.executar("2026-09")
+            print(
+                f"{passada}: {r['producoes']} produções -> {r['parcelas']} parcelas, "
+                f"{r['corretores']} corretores em {r['duracao_segundos']} s "
+                f"(leitura {r['leitura_segundos']} s, cálculo {r['calculo_segundos']} s, "
+                f"gravação {r['gravacao_segundos']} s)"
+            )
+        repo.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--producoes", type=int, default=100000)
+    parser.add_argument("--corretores", type=int, default=2000)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
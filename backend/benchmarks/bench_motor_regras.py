@@ -0,0 +1,130 @@
+"""
+Benchmark do motor de regras de automação
+
+Cadastra num SQLite temporário centenas de automações e regras de IA
+sintéticas (gatilhos do painel e condições sobre o lead), compila o
+índice e mede a vazão de eventos de leads: só a avaliação e depois com
+as ações executadas pelos trabalhadores e a gravação dos contadores.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_motor_regras --regras 500 --eventos 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from src.infrastructure.repositories.sqlite_regra_repository import SQLiteRegraRepository
+from src.infrastructure.services.motor_regras import MotorRegras
+
+STATUS = ["novo", "contatado", "negociacao", "proposta_enviada", "ganho", "perdido", "pausado"]
+OPERADORAS = ["AMIL", "BRADESCO", "SULAMERICA", "UNIMED", "PORTO", "HAPVIDA"]
+GATILHOS = ["Novo lead cadastrado", "Lead marcado como perdido", "Lead marcado como ganho", "Lead arquivado"]
+CONDICOES = [
+    "valor_atual >= {n} and operadora_atual == '{operadora}'",
+    "status == '{status}' and economia_estimada > {m}",
+    "operadora_atual in ['{operadora}', 'AMIL'] and vidas >= 4",
+    "status_anterior == '{status}' and status in ['ganho', 'perdido']",
+    "Lead status = {status}",
+    "score > {s} and tipo_contratacao == 'PME' and not origem == 'site'",
+]
+EVENTOS = ["lead_criado"] * 5 + ["lead_status"] * 4 + ["lead_arquivado"]
+
+
+def gerar_regras(quantidade: int, aleatorio: random.Random):
+    automacoes, regras_ia = [], []
+    for i in range(quantidade):
+        condicao = aleatorio.choice(CONDICOES).format(
+            n=aleatorio.randint(500, 5000), m=aleatorio.randint(100, 1500), s=aleatorio.randint(20, 90),
+            status=aleatorio.choice(STATUS), operadora=aleatorio.choice(OPERADORAS)
+        )
+        if i % 2:
+            automacoes.append({
+                "id": f"automacao-{i}", "nome": f"Automação {i}",
+                "trigger_evento": aleatorio.choice(GATILHOS),
+                "acoes": [f"Notificação: Alerta {i}", f"Tarefa: Follow-up {i}"],
+                "metadata": {"condicao": condicao} if aleatorio.random() < 0.95 else {},
+            })
+        else:
+            regras_ia.append({
+                "id": f"regra-{i}", "nome": f"Regra {i}", "condicao": condicao, "acao": f"Webhook: Regra {i}"
+            })
+    return automacoes, regras_ia
+
+
+def gerar_eventos(quantidade: int, aleatorio: random.Random):
+    return [
+        (aleatorio.choice(EVENTOS), {
+            "id": f"lead-{i}",
+            "status": aleatorio.choice(STATUS),
+            "operadora_atual": aleatorio.choice(OPERADORAS),
+            "valor_atual": round(aleatorio.uniform(300, 8000), 2),
+            "economia_estimada": round(aleatorio.uniform(0, 2500), 2),
+            "idades": [aleatorio.randint(0, 80) for _ in range(aleatorio.randint(1, 5))],
+            "tipo_contratacao": aleatorio.choice(["ADESAO", "PME", "EMPRESARIAL"]),
+            "score": round(aleatorio.uniform(0, 100), 1),
+        }, aleatorio.choice(STATUS))
+        for i in range(quantidade)
+    ]
+
+
+async def executar(args):
+    aleatorio = random.Random(42)
+    automacoes, regras_ia = gerar_regras(args.regras, aleatorio)
+    eventos = gerar_eventos(args.eventos, aleatorio)
+
+    async def nada(acao, regra, contexto):
+        return None
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        repo = SQLiteRegraRepository(os.path.join(diretorio, "regras.db"))
+        await repo.inserir_regras("automacoes", automacoes)
+        await repo.inserir_regras("regras_ia", regras_ia)
+
+        motor = MotorRegras(repositorio=repo, capacidade_fila=len(eventos) * 4, intervalo_gravacao=1.0)
+        for tipo in ("Notificação", "Tarefa", "Webhook"):
+            motor.registrar_acao(tipo, nada)
+        resumo = await motor.carregar()
+        print(
+            f"compilação: {resumo['regras']} regras em {resumo['duracao_ms']} ms "
+            f"(por evento: {resumo['indexadas']}, sem evento: {resumo['nao_suportadas']})"
+        )
+
+        inicio = time.perf_counter()
+        disparos = sum(motor.processar(tipo, lead, anterior) for tipo, lead, anterior in eventos)
+        decorrido = time.perf_counter() - inicio
+        print(
+            f"avaliação: {len(eventos)} eventos em {decorrido:.2f} s "
+            f"({len(eventos) / decorrido:,.0f} eventos/s, {disparos / len(eventos):.1f} disparos/evento)"
+        )
+
+        # Com trabalhadores: ações executadas e contadores gravados em lote
+        await motor.iniciar(intervalo_recarga=3600)
+        inicio = time.perf_counter()
+        for n, (tipo, lead, anterior) in enumerate(eventos, 1):
+            motor.processar(tipo, lead, anterior)
+            if n % 1000 == 0:
+                await asyncio.sleep(0)
+        await motor.aguardar_acoes()
+        await motor.encerrar()
+        decorrido = time.perf_counter() - inicio
+        metricas = motor.metricas()
+        print(
+            f"com ações: {len(eventos)} eventos em {decorrido:.2f} s "
+            f"({len(eventos) / decorrido:,.0f} eventos/s, "
+            f"{sum(metricas['acoes_executadas'].values())} ações, {metricas['gravacoes']} gravações em lote)"
+        )
+        repo.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regras", type=int, default=500)
+    parser.add_argument("--eventos", type=int, default=100000)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
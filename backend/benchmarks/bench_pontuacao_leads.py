@@ -0,0 +1,99 @@
+"""
+Benchmark do score de leads
+
+Mede o recálculo completo (só o cálculo vetorizado e o fluxo inteiro
+sobre um SQLite temporário: leitura keyset + gravação em lote) e o
+custo por atualização incremental (score de um lead e mudança de
+status gravada com o novo score).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_pontuacao_leads --leads 200000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.infrastructure.services.pontuacao_leads import pontuar_lead, pontuar_leads, recalcular_scores
+
+OPERADORAS = ["Amil", "Bradesco", "SulAmérica", "Unimed", None]
+
+
+def gerar_leads(quantidade: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    inicio = datetime.now(timezone.utc) - timedelta(days=90)
+    for i in range(quantidade):
+        lead = novo_lead(
+            nome=f"Lead {i}",
+            whatsapp=f"+55119{i:08d}",
+            operadora_atual=aleatorio.choice(OPERADORAS),
+            valor_atual=round(aleatorio.uniform(300, 6000), 2),
+            economia_estimada=round(aleatorio.uniform(0, 1500), 2),
+            idades=[aleatorio.randint(0, 90) for _ in range(aleatorio.randint(1, 6))]
+        )
+        lead["created_at"] = (inicio + timedelta(minutes=i % 129600)).isoformat()
+        lead["score"] = None
+        yield lead
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+async def executar(args):
+    leads = list(gerar_leads(args.leads))
+
+    inicio = time.perf_counter()
+    pontuar_leads(leads)
+    calculo = time.perf_counter() - inicio
+    print(f"cálculo vetorizado: {args.leads} leads em {calculo:.2f} s ({args.leads / calculo:,.0f} leads/s)")
+
+    tempos = []
+    for lead in leads[:5000]:
+        inicio = time.perf_counter()
+        pontuar_lead(lead)
+        tempos.append((time.perf_counter() - inicio) * 1e6)
+    print(f"score de um lead: p50 {statistics.median(tempos):.0f} µs  p99 {percentil(tempos, 0.99):.0f} µs")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        repo = SQLiteLeadRepository(os.path.join(diretorio, "leads.db"))
+        await repo.iniciar()
+        for pagina in range(0, len(leads), 10000):
+            await repo.criar_leads_lote(leads[pagina:pagina + 10000])
+
+        for passada in ("sem score", "sem mudanças"):
+            resultado = await recalcular_scores(repo)
+            print(
+                f"recálculo completo ({passada}): {resultado['processados']} leads, "
+                f"{resultado['atualizados']} gravados em {resultado['duracao_segundos']} s"
+            )
+
+        tempos = []
+        for lead in leads[:args.atualizacoes]:
+            inicio = time.perf_counter()
+            await repo.atualizar_status_lead(lead["id"], "contatado")
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        print(
+            f"mudança de status com score: p50 {statistics.median(tempos):.2f} ms  "
+            f"p99 {percentil(tempos, 0.99):.2f} ms"
+        )
+
+        await repo.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200000)
+    parser.add_argument("--atualizacoes", type=int, default=2000)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
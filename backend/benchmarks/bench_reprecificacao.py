@@ -0,0 +1,76 @@
+"""
+Benchmark da reprecificação de leads
+
+Popula um banco SQLite temporário com leads sintéticos e mede a
+reprecificação completa (leitura keyset, cálculo vetorizado e gravação
+em lote), e uma segunda passada em que nada muda.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_reprecificacao --leads 500000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.infrastructure.services.reprecificacao_leads import JobReprecificacao
+
+TIPOS = ["PF", "PME", "EMPRESARIAL", None]
+
+
+async def popular(repo: SQLiteLeadRepository, quantidade: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    lote = []
+    for i in range(quantidade):
+        idades = [aleatorio.randint(0, 90) for _ in range(aleatorio.randint(1, 6))]
+        lote.append(novo_lead(
+            nome=f"Lead {i}",
+            whatsapp=f"+55119{i:08d}",
+            valor_atual=round(aleatorio.uniform(300, 6000), 2) if aleatorio.random() > 0.05 else None,
+            idades=idades,
+            tipo_contratacao=aleatorio.choice(TIPOS)
+        ))
+        if len(lote) == 10000:
+            await repo.criar_leads_lote(lote)
+            lote = []
+    if lote:
+        await repo.criar_leads_lote(lote)
+
+
+async def executar(args):
+    with tempfile.TemporaryDirectory() as diretorio:
+        repo = SQLiteLeadRepository(os.path.join(diretorio, "leads.db"))
+        await repo.iniciar()
+
+        inicio = time.perf_counter()
+        await popular(repo, args.leads)
+        print(f"população: {args.leads} leads em {time.perf_counter() - inicio:.1f} s")
+
+        job = JobReprecificacao(
+            caminho_checkpoint=os.path.join(diretorio, "checkpoint.json"),
+            tamanho_lote=args.lote
+        )
+        for passada in ("primeira", "segunda"):
+            resultado = await job.executar(repo)
+            print(
+                f"{passada} passada: {resultado['processados']} leads, "
+                f"{resultado['atualizados']} atualizados, {resultado['ignorados']} ignorados em "
+                f"{resultado['duracao_segundos']} s ({resultado['leads_por_segundo']:,.0f} leads/s)"
+            )
+
+        await repo.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=500000)
+    parser.add_argument("--lote", type=int, default=5000)
+    asyncio.run(executar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
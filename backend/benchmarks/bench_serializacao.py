@@ -0,0 +1,142 @@
+"""
+Benchmark da serialização das respostas JSON
+
+Para cada payload mede o corpo gerado pelo caminho anterior e pelo atual:
+- cotacao: CotacaoOutputDTO de uma família (POST /api/v1/cotacao/calcular)
+- lote: lista de cotações da mesma família em todas as operadoras
+- leads: página de GET /api/v1/leads com dados_pdf e historico
+
+Caminhos:
+- anterior: jsonable_encoder/dump_python + json.dumps (JSONResponse)
+- pydantic: bytes direto do pydantic-core (referência: o FastAPI fixado
+  não usa este caminho, só versões mais novas)
+- orjson: RespostaJSON (dicts do repositório; modelos após dump_python,
+  como o FastAPI fixado faz nas rotas com response_model)
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_serializacao --repeticoes 2000 --leads 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks.carga.gerador import OPERADORAS, gerar_documento, gerar_lead
+from src.application.dtos.cotacao_dto import CotacaoInputDTO, CotacaoOutputDTO
+from src.application.use_cases.calcular_cotacao_use_case import CalcularCotacaoUseCase
+from src.infrastructure.services.servico_calculo_cotacao import ServicoCalculoCotacao
+from src.presentation.serializacao import RespostaJSON, orjson
+
+FAMILIA = CotacaoInputDTO(idades=[41, 38, 12, 9, 4], tipo="PME", operadora="AMIL")
+
+
+def montar_cotacoes() -> List[CotacaoOutputDTO]:
+    use_case = CalcularCotacaoUseCase(ServicoCalculoCotacao())
+
+    async def calcular():
+        return [
+            await use_case.execute(FAMILIA.model_copy(update={"operadora": operadora}))
+            for operadora in OPERADORAS
+        ]
+
+    return asyncio.run(calcular())
+
+
+def montar_leads(quantidade: int, semente: int = 42) -> Dict[str, Any]:
+    """Página de leads como o repositório devolve (JSON já decodificado)"""
+    rng = random.Random(semente)
+    leads = []
+    for i in range(quantidade):
+        lead = gerar_lead(rng, i)
+        documento = gerar_documento(rng)
+        texto = "\n".join(documento.linhas())
+        lead.update({
+            "id": f"00000000-0000-4000-8000-{i:012d}",
+            "created_at": f"2026-03-{1 + i % 28:02d}T12:00:00+00:00",
+            "status": rng.choice(("novo", "contatado", "negociacao")),
+            "score": round(rng.uniform(0, 100), 2),
+            "dados_pdf": {
+                "operadora": documento.operadora,
+                "idades": documento.idades,
+                "valor_atual": documento.valor_atual,
+                "nome_beneficiarios": documento.nome_beneficiarios,
+                "tipo_plano": documento.tipo_plano,
+                "confianca": "alta",
+                "texto_extraido_preview": texto[:500],
+                "total_caracteres": len(texto),
+            },
+            "historico": [
+                {
+                    "timestamp": f"2026-03-{1 + j:02d}T09:{j:02d}:00",
+                    "evento": "mudanca_status",
+                    "status_anterior": "novo",
+                    "status_novo": "contatado",
+                    "observacao": f"Contato {j} por WhatsApp",
+                }
+                for j in range(rng.randint(0, 10))
+            ],
+        })
+        leads.append(lead)
+    return {"total": len(leads), "limite": quantidade, "offset": 0, "ordenar": "recentes", "leads": leads}
+
+
+def cronometrar(funcao: Callable[[], bytes], repeticoes: int) -> float:
+    """Mediana de 5 blocos, em microssegundos por chamada"""
+    blocos = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        blocos.append((time.perf_counter() - inicio) / repeticoes * 1e6)
+    return sorted(blocos)[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialização das respostas JSON")
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    parser.add_argument("--leads", type=int, default=100, help="Leads na página listada")
+    args = parser.parse_args()
+
+    cotacoes = montar_cotacoes()
+    pagina = montar_leads(args.leads)
+    modelo = TypeAdapter(CotacaoOutputDTO)
+    lote = TypeAdapter(List[CotacaoOutputDTO])
+
+    casos = {
+        "cotacao": {
+            "anterior": lambda: JSONResponse(modelo.dump_python(cotacoes[0], mode="json")).body,
+            "pydantic": lambda: modelo.dump_json(cotacoes[0]),
+            "orjson": lambda: RespostaJSON(modelo.dump_python(cotacoes[0], mode="json")).body,
+        },
+        "lote": {
+            "anterior": lambda: JSONResponse(lote.dump_python(cotacoes, mode="json")).body,
+            "pydantic": lambda: lote.dump_json(cotacoes),
+            "orjson": lambda: RespostaJSON(lote.dump_python(cotacoes, mode="json")).body,
+        },
+        "leads": {
+            "anterior": lambda: JSONResponse(jsonable_encoder(pagina)).body,
+            "orjson": lambda: RespostaJSON(pagina).body,
+        },
+    }
+
+    print(f"orjson: {'sim' if orjson is not None else 'não (fallback json)'}")
+    print(f"{'payload':<8} {'caminho':<9} {'bytes':>9} {'µs/resposta':>12} {'ganho':>7}")
+    for payload, caminhos in casos.items():
+        referencia = json.loads(caminhos["anterior"]())
+        base = None
+        for caminho, funcao in caminhos.items():
+            corpo = funcao()
+            assert json.loads(corpo) == referencia, f"{payload}/{caminho} difere do caminho anterior"
+            micros = cronometrar(funcao, args.repeticoes)
+            base = base or micros
+            print(f"{payload:<8} {caminho:<9} {len(corpo):>9} {micros:>12.1f} {base / micros:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
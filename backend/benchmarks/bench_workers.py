@@ -0,0 +1,117 @@
+"""
+Benchmark de escala por número de workers (gunicorn.conf.py)
+
+Sobe o servidor de produção com 1, 2, ... N workers numa porta local e,
+para cada configuração, dispara requisições com keep-alive a partir de
+vários processos clientes durante alguns segundos, medindo a vazão
+(req/s) e a aceleração em relação a 1 worker.
+
+A rota padrão é o cálculo de cotação (CPU no servidor, sem banco nem
+LLM). Os clientes disputam CPU com o servidor: use --clientes de acordo
+com a máquina e, para números de produção, rode a carga de outra máquina.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_workers --max-workers 4 --segundos 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORPO = json.dumps({"idades": [34, 31, 8, 5], "tipo": "PME", "operadora": "AMIL"})
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(porta: int, limite: float = 60.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conexao.request("GET", "/health")
+            if conexao.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu a tempo")
+
+
+def _cliente(argumentos) -> int:
+    porta, rota, segundos = argumentos
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+    cabecalhos = {"Content-Type": "application/json"}
+    feitas, fim = 0, time.monotonic() + segundos
+    while time.monotonic() < fim:
+        if rota == "/health":
+            conexao.request("GET", rota)
+        else:
+            conexao.request("POST", rota, body=CORPO, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        resposta.read()
+        if resposta.status == 200:
+            feitas += 1
+    conexao.close()
+    return feitas
+
+
+def medir(workers: int, args) -> float:
+    porta = _porta_livre()
+    ambiente = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{porta}",
+        "TAREFAS_GLOBAIS_LOCK": os.path.join(tempfile.gettempdir(), f"bench-workers-{porta}.lock"),
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-benchmark"),
+        "LOG_LEVEL": "warning",
+    }
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _aguardar(porta)
+        # Aquecimento: todos os workers aceitando conexões
+        with multiprocessing.Pool(args.clientes) as pool:
+            pool.map(_cliente, [(porta, args.rota, 1.0)] * args.clientes)
+            inicio = time.perf_counter()
+            totais = pool.map(_cliente, [(porta, args.rota, args.segundos)] * args.clientes)
+            decorrido = time.perf_counter() - inicio
+        return sum(totais) / decorrido
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        servidor.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clientes", type=int, default=8, help="Processos clientes (uma conexão cada)")
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--rota", default="/api/v1/cotacao/calcular")
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()} | clientes: {args.clientes} | rota: {args.rota}")
+
+    base = None
+    for workers in range(1, args.max_workers + 1):
+        vazao = medir(workers, args)
+        base = base or vazao
+        print(f"{workers:3d} worker(s): {vazao:9,.0f} req/s  (x{vazao / base:.2f})")
+
+
+if __name__ == "__main__":
+    main()
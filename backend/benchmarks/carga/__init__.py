@@ -0,0 +1 @@
+"""Testes de carga com dublês locais dos serviços externos (ver executar.py)"""
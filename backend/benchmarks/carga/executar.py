@@ -0,0 +1,370 @@
+"""
+Teste de carga da API com dublês locais dos serviços externos
+
+Sobe o servidor de produção (gunicorn.conf.py, ou uvicorn com
+--servidor uvicorn) apontado para:
+- um LLM falso compatível com a OpenAI (llm_falso.py), com latência e
+  taxa de erro configuráveis;
+- os bancos SQLite no lugar do Supabase (LEADS_BACKEND=sqlite e afins),
+  num diretório temporário;
+
+semeia leads, e então usuários virtuais repetem cenários sorteados por
+peso entre /cotacao, /pdf e /leads (cotações e PDFs de gerador.py).
+Reporta vazão e p50/p95/p99 por cenário e grava tudo em JSON
+(benchmarks/resultados/) para comparar execuções (--comparar).
+
+Os clientes rodam na mesma máquina e disputam CPU com o servidor; para
+planejamento de capacidade, rode a carga de outra máquina com --url.
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga.executar --usuarios 32 --segundos 60 --workers 2
+    python -m benchmarks.carga.executar --cenario pdf_extrair=0 --comparar benchmarks/resultados/anterior.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from .gerador import SOBRENOMES, documento_para_pdf, gerar_cotacao, gerar_documento, gerar_lead
+from .llm_falso import ServidorLLMFalso
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+STATUS_RECUSA = (429, 503)
+
+
+@dataclass
+class Cenario:
+    nome: str
+    peso: float
+    # (rng, estado) → argumentos de httpx.AsyncClient.request
+    montar: Callable[[random.Random, "EstadoCarga"], Dict]
+
+
+class EstadoCarga:
+    """O que os cenários compartilham: PDFs prontos, leads criados, ETag do catálogo"""
+
+    def __init__(self, pdfs: List[bytes]):
+        self.pdfs = pdfs
+        self.leads: List[str] = []
+        self.sequencia = 0
+        self.etag_operadoras: Optional[str] = None
+
+    def proximo(self) -> int:
+        self.sequencia += 1
+        return self.sequencia
+
+
+def _lead_existente(rng: random.Random, estado: EstadoCarga) -> str:
+    return rng.choice(estado.leads) if estado.leads else "00000000-0000-0000-0000-000000000000"
+
+
+CENARIOS = [
+    Cenario("cotacao_calcular", 35, lambda rng, e: {
+        "method": "POST", "url": "/api/v1/cotacao/calcular", "json": gerar_cotacao(rng)}),
+    Cenario("cotacao_operadoras", 8, lambda rng, e: {
+        "method": "GET", "url": "/api/v1/cotacao/operadoras",
+        "headers": {"If-None-Match": e.etag_operadoras} if e.etag_operadoras else {}}),
+    Cenario("pdf_extrair", 4, lambda rng, e: {
+        "method": "POST", "url": "/api/v1/pdf/extrair",
+        "files": {"file": ("proposta.pdf", rng.choice(e.pdfs), "application/pdf")}}),
+    Cenario("leads_criar", 12, lambda rng, e: {
+        "method": "POST", "url": "/api/v1/leads/", "json": gerar_lead(rng, e.proximo())}),
+    Cenario("leads_listar", 15, lambda rng, e: {
+        "method": "GET", "url": "/api/v1/leads/",
+        "params": {"limite": 50, "ordenar": rng.choice(("recentes", "score"))}}),
+    Cenario("leads_buscar", 8, lambda rng, e: {
+        "method": "GET", "url": "/api/v1/leads/search", "params": {"q": rng.choice(SOBRENOMES)}}),
+    Cenario("leads_detalhe", 8, lambda rng, e: {
+        "method": "GET", "url": f"/api/v1/leads/{_lead_existente(rng, e)}"}),
+    Cenario("leads_status", 5, lambda rng, e: {
+        "method": "PATCH", "url": f"/api/v1/leads/{_lead_existente(rng, e)}/status",
+        "json": {"novo_status": rng.choice(("contatado", "negociacao", "proposta_enviada"))}}),
+    Cenario("leads_dashboard", 5, lambda rng, e: {
+        "method": "GET", "url": "/api/v1/leads/estatisticas/dashboard"}),
+]
+
+
+def percentil(ordenados: List[float], p: float) -> Optional[float]:
+    """Percentil por posição mais próxima (valores já ordenados)"""
+    if not ordenados:
+        return None
+    posicao = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[posicao]
+
+
+def resumir(amostras: Dict[str, List], segundos: float) -> Dict:
+    """Vazão, status e p50/p95/p99 (ms) por cenário e no total"""
+    def resumo(lista):
+        latencias = sorted(latencia for _, latencia in lista)
+        status = Counter(str(s) for s, _ in lista)
+        return {
+            "requisicoes": len(lista),
+            "vazao_rps": round(len(lista) / segundos, 2),
+            "erros": sum(1 for s, _ in lista if s == 0 or s >= 500 and s not in STATUS_RECUSA),
+            "recusadas": sum(1 for s, _ in lista if s in STATUS_RECUSA),
+            "status": dict(sorted(status.items())),
+            **{f"p{p}_ms": round(percentil(latencias, p) * 1000, 2) if latencias else None for p in (50, 95, 99)},
+            "max_ms": round(latencias[-1] * 1000, 2) if latencias else None,
+        }
+
+    todos = [amostra for lista in amostras.values() for amostra in lista]
+    return {
+        "total": resumo(todos),
+        "cenarios": {nome: resumo(lista) for nome, lista in sorted(amostras.items())},
+    }
+
+
+async def _registrar_resposta(estado: EstadoCarga, cenario: str, resposta: httpx.Response):
+    if cenario == "leads_criar" and resposta.status_code == 200:
+        lead = (resposta.json() or {}).get("lead") or resposta.json()
+        if isinstance(lead, dict) and lead.get("id"):
+            estado.leads.append(str(lead["id"]))
+    elif cenario == "cotacao_operadoras" and "etag" in resposta.headers:
+        estado.etag_operadoras = resposta.headers["etag"]
+
+
+async def usuario(
+    cliente: httpx.AsyncClient,
+    cenarios: List[Cenario],
+    estado: EstadoCarga,
+    rng: random.Random,
+    ate: float,
+    medir_desde: float,
+    amostras: Dict[str, List],
+    pausa: float
+):
+    """Um usuário virtual: sorteia cenário, envia, registra (status, segundos)"""
+    pesos = [c.peso for c in cenarios]
+    while time.monotonic() < ate:
+        cenario = rng.choices(cenarios, pesos)[0]
+        inicio = time.monotonic()
+        try:
+            resposta = await cliente.request(**cenario.montar(rng, estado))
+            status = resposta.status_code
+            await _registrar_resposta(estado, cenario.nome, resposta)
+        except httpx.HTTPError:
+            status = 0
+        if inicio >= medir_desde:
+            amostras[cenario.nome].append((status, time.monotonic() - inicio))
+        if pausa:
+            await asyncio.sleep(rng.uniform(0, 2 * pausa))
+
+
+async def gerar_carga(url: str, cenarios: List[Cenario], estado: EstadoCarga, args) -> Dict[str, List]:
+    amostras: Dict[str, List] = defaultdict(list)
+    limites = httpx.Limits(max_connections=args.usuarios, max_keepalive_connections=args.usuarios)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limites) as cliente:
+        # Leads iniciais, para listagens, buscas e detalhes terem o que ler
+        semente = random.Random(args.semente)
+        for inicio in range(0, args.leads_iniciais, 20):
+            respostas = await asyncio.gather(*[
+                cliente.post("/api/v1/leads/", json=gerar_lead(semente, estado.proximo()))
+                for _ in range(min(20, args.leads_iniciais - inicio))
+            ])
+            for resposta in respostas:
+                await _registrar_resposta(estado, "leads_criar", resposta)
+
+        agora = time.monotonic()
+        medir_desde = agora + args.aquecimento
+        ate = medir_desde + args.segundos
+        await asyncio.gather(*[
+            usuario(cliente, cenarios, estado, random.Random(args.semente + i), ate, medir_desde, amostras,
+                    args.pausa_ms / 1000)
+            for i in range(args.usuarios)
+        ])
+    return amostras
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(url: str, processo: subprocess.Popen, limite: float = 60.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise RuntimeError(f"servidor encerrou ao subir (código {processo.returncode})")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu a tempo")
+
+
+def subir_servidor(args, diretorio: str, llm: ServidorLLMFalso):
+    porta = _porta_livre()
+    ambiente = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-carga",
+        "OPENAI_BASE_URL": llm.url,
+        "LEADS_BACKEND": "sqlite",
+        "COMISSOES_BACKEND": "sqlite",
+        "RENOVACOES_BACKEND": "sqlite",
+        "REGRAS_BACKEND": "sqlite",
+        "SQLITE_LEADS_PATH": os.path.join(diretorio, "leads.db"),
+        "SQLITE_COMISSOES_PATH": os.path.join(diretorio, "comissoes.db"),
+        "SQLITE_RENOVACOES_PATH": os.path.join(diretorio, "renovacoes.db"),
+        "SQLITE_REGRAS_PATH": os.path.join(diretorio, "regras.db"),
+        "SQLITE_IDEMPOTENCIA_PATH": os.path.join(diretorio, "idempotencia.db"),
+        "TAREFAS_GLOBAIS_LOCK": os.path.join(diretorio, "tarefas-globais.lock"),
+        # Todos os usuários virtuais saem do mesmo IP
+        "ADMISSAO_PDF_POR_MINUTO": "0",
+        "ADMISSAO_BARATAS_POR_MINUTO": "0",
+        "LOG_LEVEL": "warning",
+        "WEB_CONCURRENCY": str(args.workers),
+        "BIND": f"127.0.0.1:{porta}",
+    }
+    for nome in ("SUPABASE_URL", "SUPABASE_KEY"):
+        ambiente.pop(nome, None)
+
+    if args.servidor == "gunicorn":
+        comando = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"]
+    else:
+        comando = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(porta), "--log-level", "warning"]
+    saida = open(os.path.join(diretorio, "servidor.log"), "wb")
+    processo = subprocess.Popen(comando, cwd=RAIZ, env=ambiente, stdout=saida, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{porta}"
+    try:
+        _aguardar(url, processo)
+    except RuntimeError:
+        processo.kill()
+        saida.close()
+        with open(os.path.join(diretorio, "servidor.log"), encoding="utf-8", errors="replace") as log:
+            sys.stderr.write(log.read()[-4000:])
+        raise
+    return processo, url
+
+
+def _versao_codigo() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultado: Dict, anterior: Optional[Dict] = None):
+    print(f"\n{'cenário':22s} {'req':>7s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} "
+          f"{'erros':>6s} {'429/503':>7s}" + ("  Δp95      Δreq/s" if anterior else ""))
+    linhas = list(resultado["cenarios"].items()) + [("TOTAL", resultado["total"])]
+    for nome, r in linhas:
+        linha = (f"{nome:22s} {r['requisicoes']:7d} {r['vazao_rps']:8.1f} "
+                 f"{r['p50_ms'] or 0:8.1f} {r['p95_ms'] or 0:8.1f} {r['p99_ms'] or 0:8.1f} "
+                 f"{r['erros']:6d} {r['recusadas']:7d}")
+        antes = anterior["total"] if nome == "TOTAL" and anterior else (anterior or {}).get("cenarios", {}).get(nome)
+        if antes and antes.get("p95_ms") and r["p95_ms"]:
+            linha += (f"  {(r['p95_ms'] / antes['p95_ms'] - 1) * 100:+6.1f}%"
+                      f"  {(r['vazao_rps'] / antes['vazao_rps'] - 1) * 100 if antes['vazao_rps'] else 0:+7.1f}%")
+        print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=16, help="Usuários virtuais simultâneos")
+    parser.add_argument("--segundos", type=float, default=30.0, help="Duração da medição")
+    parser.add_argument("--aquecimento", type=float, default=5.0, help="Segundos iniciais não medidos")
+    parser.add_argument("--pausa-ms", type=float, default=0.0, help="Pausa média entre requisições de um usuário")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--leads-iniciais", type=int, default=200)
+    parser.add_argument("--pdfs", type=int, default=20, help="PDFs distintos gerados para o cenário de upload")
+    parser.add_argument("--paginas-pdf", type=int, default=2)
+    parser.add_argument("--cenario", action="append", default=[], metavar="NOME=PESO",
+                        help="Ajusta o peso de um cenário (0 desliga); pode repetir")
+    parser.add_argument("--servidor", choices=("gunicorn", "uvicorn"), default="gunicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--url", help="Servidor já em execução (não sobe servidor nem LLM falso)")
+    parser.add_argument("--llm-latencia-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=400)
+    parser.add_argument("--llm-taxa-erro", type=float, default=0.0)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="Arquivo JSON do resultado (padrão: benchmarks/resultados/carga-<data>.json)")
+    parser.add_argument("--comparar", help="Resultado JSON anterior para comparar")
+    args = parser.parse_args()
+
+    pesos = {c.nome: c.peso for c in CENARIOS}
+    for ajuste in args.cenario:
+        nome, _, peso = ajuste.partition("=")
+        if nome not in pesos:
+            parser.error(f"cenário desconhecido: {nome} (use {', '.join(pesos)})")
+        pesos[nome] = float(peso)
+    cenarios = [Cenario(c.nome, pesos[c.nome], c.montar) for c in CENARIOS if pesos[c.nome] > 0]
+
+    rng = random.Random(args.semente)
+    estado = EstadoCarga([
+        documento_para_pdf(gerar_documento(rng), args.paginas_pdf) for _ in range(args.pdfs)
+    ])
+
+    llm = processo = None
+    diretorio = tempfile.TemporaryDirectory(prefix="carga-")
+    try:
+        url = args.url
+        if url is None:
+            llm = ServidorLLMFalso(
+                latencia=args.llm_latencia_ms / 1000, jitter=args.llm_jitter_ms / 1000,
+                taxa_erro=args.llm_taxa_erro, semente=args.semente
+            ).iniciar()
+            processo, url = subir_servidor(args, diretorio.name, llm)
+
+        print(f"Carga em {url}: {args.usuarios} usuários, {args.segundos:.0f} s "
+              f"(+{args.aquecimento:.0f} s de aquecimento), cenários: "
+              + ", ".join(f"{c.nome}={c.peso:g}" for c in cenarios))
+        amostras = asyncio.run(gerar_carga(url, cenarios, estado, args))
+    finally:
+        if processo is not None:
+            processo.send_signal(signal.SIGTERM)
+            try:
+                processo.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+        if llm is not None:
+            llm.parar()
+        diretorio.cleanup()
+
+    resultado = {
+        "data": datetime.now(timezone.utc).isoformat(),
+        "codigo": _versao_codigo(),
+        "ambiente": {"python": platform.python_version(), "cpus": os.cpu_count(), "maquina": platform.node()},
+        "parametros": {**vars(args), "pesos": {c.nome: c.peso for c in cenarios}},
+        "llm_chamadas": llm.chamadas if llm else None,
+        **resumir(amostras, args.segundos),
+    }
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            anterior = json.load(arquivo)
+    imprimir(resultado, anterior)
+
+    saida = args.saida or os.path.join(
+        RESULTADOS, f"carga-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultado gravado em {saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Gerador de dados sintéticos para os testes de carga
+Propostas/apólices em PDF (texto real, extraível pelo pypdf), cotações
+com a mistura de perfis que o comercial atende e leads para o funil.
+
+O PDF é escrito à mão (objetos, content streams e xref), sem depender
+de biblioteca de geração: Helvetica com WinAnsiEncoding cobre os
+acentos do português.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+OPERADORAS = ("AMIL", "BRADESCO", "SULAMERICA", "UNIMED", "NOTREDAME", "HAPVIDA")
+
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Heitor",
+         "Isabela", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael",
+         "Sofia", "Thiago", "Valéria", "Wagner")
+SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho",
+              "Ferreira", "Rodrigues", "Almeida", "Gomes", "Ribeiro", "Martins", "Araújo")
+
+CLAUSULAS = (
+    "A operadora garante a cobertura assistencial prevista no Rol de Procedimentos da ANS vigente.",
+    "Os reajustes anuais observam a variação de custos médico-hospitalares e a faixa etária.",
+    "Carências: 24 horas para urgência e emergência, 180 dias para demais procedimentos.",
+    "Doenças e lesões preexistentes declaradas estão sujeitas a cobertura parcial temporária.",
+    "A rede credenciada pode ser consultada no aplicativo ou no site da operadora.",
+    "O contrato tem vigência de 12 meses com renovação automática por prazo indeterminado.",
+    "Coparticipação de 30% em consultas eletivas, limitada ao teto mensal do contrato.",
+    "A inclusão de dependentes deve ser solicitada em até 30 dias do evento (nascimento, casamento).",
+)
+
+# Páginas de 60 linhas de corpo 10 pt numa folha A4
+LINHAS_POR_PAGINA = 60
+
+
+@dataclass
+class DocumentoSintetico:
+    """Conteúdo de uma proposta/apólice (o que a extração deveria encontrar)"""
+    operadora: str
+    tipo_plano: str
+    idades: List[int]
+    nome_beneficiarios: List[str]
+    valor_atual: float
+    clausulas: List[str] = field(default_factory=list)
+
+    def linhas(self) -> List[str]:
+        linhas = [
+            "PROPOSTA DE CONTRATAÇÃO - PLANO DE SAÚDE",
+            "",
+            f"Operadora: {self.operadora}",
+            f"Tipo de contratação: {self.tipo_plano}",
+            f"Valor mensal atual: R$ {self.valor_atual:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."),
+            "",
+            "Beneficiários:",
+        ]
+        linhas += [f"  {i}. {nome} - {idade} anos"
+                   for i, (nome, idade) in enumerate(zip(self.nome_beneficiarios, self.idades), 1)]
+        linhas += ["", "Condições gerais:"]
+        linhas += [f"  {i}. {clausula}" for i, clausula in enumerate(self.clausulas, 1)]
+        return linhas
+
+
+def _idades_perfil(rng: random.Random) -> Tuple[List[int], str]:
+    """Idades e tipo de contratação na proporção de perfis atendidos"""
+    perfil = rng.random()
+    if perfil < 0.45:  # individual ou casal
+        idades = [rng.randint(22, 70) for _ in range(rng.choice((1, 1, 2)))]
+        return idades, "ADESAO"
+    if perfil < 0.80:  # família
+        idades = [rng.randint(28, 50), rng.randint(26, 50)] + [rng.randint(0, 17) for _ in range(rng.randint(1, 3))]
+        return idades, rng.choice(("ADESAO", "PME"))
+    # empresa
+    idades = [rng.randint(19, 62) for _ in range(rng.randint(3, 30))]
+    return idades, rng.choice(("PME", "PME", "EMPRESARIAL"))
+
+
+def gerar_cotacao(rng: random.Random) -> Dict:
+    """Corpo de POST /api/v1/cotacao/calcular"""
+    idades, tipo = _idades_perfil(rng)
+    return {"idades": idades, "tipo": tipo, "operadora": rng.choice(OPERADORAS)}
+
+
+def gerar_documento(rng: random.Random, clausulas: int = 6) -> DocumentoSintetico:
+    idades, tipo = _idades_perfil(rng)
+    sobrenome = rng.choice(SOBRENOMES)
+    return DocumentoSintetico(
+        operadora=rng.choice(OPERADORAS),
+        tipo_plano=tipo,
+        idades=idades,
+        nome_beneficiarios=[f"{rng.choice(NOMES)} {sobrenome}" for _ in idades],
+        valor_atual=round(sum(180 + idade * 9.5 for idade in idades) * rng.uniform(0.9, 1.3), 2),
+        clausulas=[rng.choice(CLAUSULAS) for _ in range(clausulas)],
+    )
+
+
+def gerar_lead(rng: random.Random, sequencia: int) -> Dict:
+    """Corpo de POST /api/v1/leads (telefone único por sequência)"""
+    documento = gerar_documento(rng, clausulas=0)
+    valor_proposto = round(documento.valor_atual * rng.uniform(0.7, 0.95), 2)
+    return {
+        "nome": documento.nome_beneficiarios[0],
+        "whatsapp": f"+55119{sequencia % 100000000:08d}",
+        "email": f"carga{sequencia}@exemplo.com.br",
+        "operadora_atual": documento.operadora,
+        "valor_atual": documento.valor_atual,
+        "idades": documento.idades,
+        "economia_estimada": round(documento.valor_atual - valor_proposto, 2),
+        "valor_proposto": valor_proposto,
+        "tipo_contratacao": "PME" if documento.tipo_plano != "ADESAO" else "PF",
+    }
+
+
+def _texto_pdf(linha: str) -> bytes:
+    codificado = linha.encode("cp1252", errors="replace")
+    return codificado.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def documento_para_pdf(documento: DocumentoSintetico, paginas_minimas: int = 1) -> bytes:
+    """PDF de uma ou mais páginas com as linhas do documento"""
+    linhas = documento.linhas()
+    while len(linhas) < paginas_minimas * LINHAS_POR_PAGINA:
+        linhas += [""] + [f"  {c}" for c in documento.clausulas]
+    paginas = [linhas[i:i + LINHAS_POR_PAGINA] for i in range(0, len(linhas), LINHAS_POR_PAGINA)]
+
+    # 1: catálogo, 2: árvore de páginas, 3: fonte; depois (página, conteúdo) por página
+    objetos: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    filhos = []
+    for pagina in paginas:
+        fluxo = b"BT /F1 10 Tf 12 TL 50 800 Td " + b" ".join(b"(" + _texto_pdf(l) + b") '" for l in pagina) + b" ET"
+        numero_pagina = len(objetos) + 1
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {numero_pagina + 1} 0 R >>".encode()
+        )
+        objetos.append(f"<< /Length {len(fluxo)} >>\nstream\n".encode() + fluxo + b"\nendstream")
+        filhos.append(f"{numero_pagina} 0 R")
+    objetos[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objetos[1] = f"<< /Type /Pages /Kids [{' '.join(filhos)}] /Count {len(filhos)} >>".encode()
+
+    saida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, 1):
+        posicoes.append(len(saida))
+        saida += f"{numero} 0 obj\n".encode() + objeto + b"\nendobj\n"
+    inicio_xref = len(saida)
+    saida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    saida += b"".join(f"{posicao:010d} 00000 n \n".encode() for posicao in posicoes)
+    saida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+    return bytes(saida)
@@ -0,0 +1,193 @@
+"""
+Servidor falso da API da OpenAI (chat completions)
+
+Responde POST /v1/chat/completions no formato da OpenAI, com latência
+configurável (base + jitter) e taxa de erros. O JSON devolvido vem de
+uma lista fixa de respostas (ciclada) ou, por padrão, é lido do próprio
+documento no prompt (operadora, tipo, valor e "Nome - N anos" do
+gerador), para a extração de ponta a ponta devolver dados coerentes.
+
+A aplicação usa o servidor com OPENAI_BASE_URL=<url> (o SDK lê a variável).
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga.llm_falso --porta 8900 --latencia-ms 800 --jitter-ms 400
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+PADRAO_BENEFICIARIO = re.compile(r"^\s*\d+\.\s+(.+?)\s+-\s+(\d+)\s+anos\s*$", re.MULTILINE)
+
+
+def extrair_do_prompt(prompt: str) -> Dict:
+    """O que um modelo bem-comportado extrairia do documento gerado"""
+    documento = prompt.split("DOCUMENTO:", 1)[-1]
+
+    def campo(rotulo: str) -> Optional[str]:
+        encontrado = re.search(rf"{rotulo}:\s*(.+)", documento)
+        return encontrado.group(1).strip() if encontrado else None
+
+    valor = campo("Valor mensal atual")
+    beneficiarios = PADRAO_BENEFICIARIO.findall(documento)
+    return {
+        "idades": [int(idade) for _, idade in beneficiarios],
+        "operadora": campo("Operadora"),
+        "valor_atual": valor.replace("R$", "").replace(".", "").replace(",", ".").strip() if valor else None,
+        "tipo_plano": campo("Tipo de contratação"),
+        "nome_beneficiarios": [nome for nome, _ in beneficiarios],
+        "observacoes": None,
+    }
+
+
+class ServidorLLMFalso:
+    """Servidor HTTP em thread própria; uma thread por requisição (como a API real, concorrente)"""
+
+    def __init__(
+        self,
+        porta: int = 0,
+        latencia: float = 0.8,
+        jitter: float = 0.0,
+        respostas: Optional[List[Dict]] = None,
+        taxa_erro: float = 0.0,
+        semente: Optional[int] = None
+    ):
+        """
+        Args:
+            porta: Porta local (0: qualquer livre)
+            latencia: Segundos de "geração" por chamada
+            jitter: Segundos extras aleatórios (uniforme entre 0 e jitter)
+            respostas: JSONs devolvidos em ciclo (padrão: extraído do prompt)
+            taxa_erro: Fração das chamadas que respondem 500
+            semente: Semente do sorteio de jitter/erros
+        """
+        self.latencia = latencia
+        self.jitter = jitter
+        self.taxa_erro = taxa_erro
+        self.chamadas = 0
+        self._respostas = itertools.cycle(respostas) if respostas else None
+        self._rng = random.Random(semente)
+        self._lock = threading.Lock()
+        self._conexoes = set()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), self._handler())
+        self._servidor.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/v1"
+
+    def _sortear(self):
+        with self._lock:
+            self.chamadas += 1
+            atraso = self.latencia + self._rng.uniform(0, self.jitter)
+            erro = self._rng.random() < self.taxa_erro
+            fixa = next(self._respostas) if self._respostas else None
+        return atraso, erro, fixa
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                servidor._conexoes.add(self.connection)
+
+            def finish(self):
+                servidor._conexoes.discard(self.connection)
+                super().finish()
+
+            def _responder(self, status: int, corpo: Dict):
+                dados = json.dumps(corpo, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def do_POST(self):
+                pedido = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._responder(404, {"error": {"message": f"Rota não simulada: {self.path}"}})
+                    return
+
+                atraso, erro, fixa = servidor._sortear()
+                time.sleep(atraso)
+                if erro:
+                    self._responder(500, {"error": {"message": "Erro simulado", "type": "server_error"}})
+                    return
+
+                prompt = (pedido.get("messages") or [{}])[-1].get("content", "")
+                conteudo = json.dumps(fixa if fixa is not None else extrair_do_prompt(prompt), ensure_ascii=False)
+                self._responder(200, {
+                    "id": f"chatcmpl-falso-{servidor.chamadas}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": pedido.get("model", "gpt-4o-mini"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": conteudo},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {
+                        "prompt_tokens": len(prompt) // 4,
+                        "completion_tokens": len(conteudo) // 4,
+                        "total_tokens": (len(prompt) + len(conteudo)) // 4,
+                    },
+                })
+
+        return Handler
+
+    def iniciar(self) -> "ServidorLLMFalso":
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="llm-falso", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        # Conexões keep-alive do cliente prendem as threads de atendimento
+        for conexao in list(self._conexoes):
+            try:
+                conexao.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--porta", type=int, default=8900)
+    parser.add_argument("--latencia-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=400)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--respostas", help="Arquivo JSON com a lista de respostas a devolver em ciclo")
+    args = parser.parse_args()
+
+    respostas = None
+    if args.respostas:
+        with open(args.respostas, encoding="utf-8") as arquivo:
+            respostas = json.load(arquivo)
+
+    servidor = ServidorLLMFalso(
+        args.porta, args.latencia_ms / 1000, args.jitter_ms / 1000, respostas, args.taxa_erro
+    ).iniciar()
+    print(f"LLM falso em {servidor.url} (OPENAI_BASE_URL)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
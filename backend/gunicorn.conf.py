@@ -0,0 +1,134 @@
+"""
+Configuração do gunicorn (produção)
+
+    gunicorn -c gunicorn.conf.py main:app
+
+N workers uvicorn (WEB_CONCURRENCY, padrão: núcleos disponíveis para o
+processo), cada um com o próprio loop de eventos. Antes do primeiro fork
+o master importa só as bibliotecas de terceiros pesadas, que os workers
+herdam prontas (copy-on-write); nenhum módulo src.* é importado no
+master. Catálogo de preços, clientes com conexões (Supabase, OpenAI) e
+bancos SQLite são montados por cada worker no lifespan.
+
+Cada worker é reciclado depois de MAX_REQUESTS (+ jitter) requisições.
+
+Sinais para o master:
+- HUP: relê esta configuração, sobe workers novos (com o código atual
+  da aplicação e o catálogo relido) e encerra os antigos graciosamente
+  (reload sem downtime)
+- TTIN / TTOU: um worker a mais / a menos
+- TERM: desligamento gracioso (até GRACEFUL_TIMEOUT)
+
+As bibliotecas de MODULOS_PRECARREGADOS ficam as do primeiro carregamento
+do master: atualizar dependências pede reinício completo, não HUP.
+
+Estado por processo com mais de um worker (padrões definidos abaixo):
+- /metrics: cada worker exporta o registro em METRICAS_WORKERS_DIR e
+  qualquer um responde a soma
+- perfis (/debug/perfis): gravados em PERFILAMENTO_DIR, legíveis por
+  todos; a sessão de perfilamento vale só no worker que a iniciou
+- stream SSE de leads: diário SQLite compartilhado
+  (EVENTOS_LEADS_SQLITE_PATH), IDs globais
+- contadores do funil: desligados (FUNIL_CONTADORES=false), o dashboard
+  lê as views com o cache de estatísticas
+- cache de leads: TTL curto (LEAD_CACHE_TTL), escritas de outro worker
+  aparecem em até TTL segundos
+- jobs de comissões e reprecificação: flock, 409 em qualquer worker
+- backend de leads SQLite (contadores e índice de busca em memória):
+  só com um worker, forçado abaixo
+"""
+import importlib
+import multiprocessing
+import os
+import shutil
+import time
+
+# Bibliotecas importadas no master para os workers herdarem já carregadas
+MODULOS_PRECARREGADOS = ("numpy", "pandas", "pypdf", "openai", "supabase", "fastapi", "pydantic")
+
+
+def _inteiro(nome: str, padrao: int) -> int:
+    valor = os.getenv(nome)
+    return int(valor) if valor else padrao
+
+
+def _nucleos() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = _inteiro("WEB_CONCURRENCY", _nucleos())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Fila de conexões pendentes no socket e keep-alive HTTP (segundos)
+backlog = _inteiro("BACKLOG", 2048)
+keepalive = _inteiro("KEEPALIVE", 5)
+
+# Reciclagem dos workers
+max_requests = _inteiro("MAX_REQUESTS", 10000)
+max_requests_jitter = _inteiro("MAX_REQUESTS_JITTER", 1000)
+
+# Extração de PDF + LLM pode levar dezenas de segundos
+timeout = _inteiro("TIMEOUT", 120)
+graceful_timeout = _inteiro("GRACEFUL_TIMEOUT", 30)
+
+# O app é importado em cada worker (não no master) para o HUP trazer código novo
+preload_app = False
+
+# Heartbeat dos workers em memória (evita travar em disco lento de container)
+worker_tmp_dir = os.getenv("WORKER_TMP_DIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+loglevel = os.getenv("LOG_LEVEL", "info")
+accesslog = os.getenv("ACCESS_LOG") or None
+
+# Só um worker executa as tarefas periódicas globais (src/infrastructure/services/lideranca.py)
+os.environ.setdefault("TAREFAS_GLOBAIS_LOCK", "/tmp/humano-saude-tarefas-globais.lock")
+
+# O backend SQLite de leads mantém contadores e índice de busca em memória
+if os.getenv("LEADS_BACKEND", "supabase").lower() == "sqlite":
+    workers = 1
+
+# Estado que precisa ser compartilhado (ou desligado) com vários workers
+if workers > 1:
+    # A repetição de um POST pode cair em outro worker: chaves de idempotência no SQLite
+    os.environ.setdefault("IDEMPOTENCIA_BACKEND", "sqlite")
+    os.environ.setdefault("METRICAS_WORKERS_DIR", "/tmp/humano-saude-metricas")
+    os.environ.setdefault("PERFILAMENTO_DIR", "/tmp/humano-saude-perfis")
+    os.environ.setdefault("EVENTOS_LEADS_SQLITE_PATH", "data/eventos_leads.db")
+    os.environ.setdefault("FUNIL_CONTADORES", "false")
+    os.environ.setdefault("LEAD_CACHE_TTL", "5")
+
+
+def on_starting(server):
+    # Exportações de métricas de uma execução anterior não entram na soma
+    diretorio = os.getenv("METRICAS_WORKERS_DIR")
+    if diretorio:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def _precarregar(server):
+    """Bibliotecas de terceiros importadas no master e herdadas pelos workers"""
+    inicio = time.perf_counter()
+    for modulo in MODULOS_PRECARREGADOS:
+        try:
+            importlib.import_module(modulo)
+        except ImportError as e:
+            server.log.warning(f"Pré-carga de {modulo} falhou: {e}")
+
+    server.log.info(
+        f"Bibliotecas pré-carregadas em {(time.perf_counter() - inicio) * 1000:.0f} ms "
+        f"({workers} workers, backlog {backlog}, keepalive {keepalive}s, "
+        f"max_requests {max_requests}±{max_requests_jitter})"
+    )
+
+
+def when_ready(server):
+    _precarregar(server)
+
+
+def on_reload(server):
+    # Módulos já importados não são relidos: só os workers novos trazem código novo
+    server.log.info("HUP: subindo workers novos; dependências atualizadas pedem reinício completo")
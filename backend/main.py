@@ -8,11 +8,129 @@ Arquitetura: Clean Architecture
 - Infrastructure: Serviços e Repositórios
 - Presentation: Controllers e Routers (FastAPI)
 """
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
-from src.presentation.routers import cotacao_router, pdf_router, lead_router
+from src.presentation.routers import (
+    cotacao_router, pdf_router, lead_router, comissao_router, renovacao_router, regra_router,
+    perfil_router
+)
+from src.infrastructure.container import container
+from src.infrastructure.repositories.lead_repository import lead_repository
+from src.infrastructure.repositories.renovacao_repository import renovacao_repository
+from src.infrastructure.repositories.regra_repository import regra_repository
+from src.infrastructure.services.filtro_telefones import filtro_telefones
+from src.infrastructure.services.analise_funil import analise_funil
+from src.infrastructure.services.reprecificacao_leads import job_reprecificacao
+from src.infrastructure.services.pontuacao_leads import recalcular_periodicamente
+from src.infrastructure.services.agendador_renovacoes import agendador_renovacoes
+from src.infrastructure.services.motor_regras import motor_regras
+from src.infrastructure.services.metricas import metricas
+from src.infrastructure.services.metricas_workers import MetricasWorkers
+from src.infrastructure.services.eventos_leads import DiarioEventosSQLite, eventos_leads
+from src.infrastructure.services.perfilador import perfilador
+from src.infrastructure.services.lideranca import TravaLideranca
+from src.presentation.middlewares.admissao import AdmissaoMiddleware
+from src.presentation.middlewares.idempotencia import IdempotenciaMiddleware
+from src.presentation.middlewares.metricas_http import MetricasHTTPMiddleware
+from src.presentation.middlewares.perfilamento import PerfilamentoMiddleware
+from src.presentation.respostas import representacoes
+from src.presentation.serializacao import RespostaJSON
+
+# Soma das métricas dos workers (só com METRICAS_WORKERS_DIR, montada no lifespan)
+metricas_workers: Optional[MetricasWorkers] = None
+
+
+async def iniciar_tarefas_globais() -> List[asyncio.Task]:
+    """Tarefas periódicas que devem rodar em um só processo da implantação"""
+    tarefas = []
+    
+    # Recálculo completo do score (a recência decai mesmo sem escritas)
+    if lead_repository.is_connected():
+        intervalo = float(os.getenv("PONTUACAO_RECALCULO_SEGUNDOS", "3600"))
+        tarefas.append(asyncio.create_task(recalcular_periodicamente(lead_repository, intervalo)))
+    
+    # Avisos de 60/30 dias das renovações, com oferta de reprecificação
+    if os.getenv("AGENDADOR_RENOVACOES", "true").lower() == "true" and renovacao_repository.is_connected():
+        intervalo = float(os.getenv("AGENDADOR_RENOVACOES_SEGUNDOS", "3600"))
+        tarefas.append(asyncio.create_task(agendador_renovacoes.executar_periodicamente(intervalo)))
+    
+    return tarefas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicialização e encerramento da aplicação"""
+    # Serviços pesados (pandas, OpenAI, Supabase) criados antes da primeira
+    # requisição; o import do módulo não constrói nenhum deles
+    if os.getenv("AQUECIMENTO_SERVICOS", "true").lower() == "true":
+        await container.aquecer()
+    
+    # Contadores do funil, índices e tarefas de manutenção do backend de leads
+    await lead_repository.iniciar()
+    tarefas = []
+    
+    # Com vários workers, /metrics soma os registros de todos (gunicorn.conf.py)
+    global metricas_workers
+    if os.getenv("METRICAS_WORKERS_DIR"):
+        metricas_workers = MetricasWorkers(
+            os.getenv("METRICAS_WORKERS_DIR"),
+            intervalo=float(os.getenv("METRICAS_WORKERS_INTERVALO", "5"))
+        )
+        tarefas.append(asyncio.create_task(metricas_workers.exportar_periodicamente()))
+    
+    # Stream SSE: com vários workers, os eventos de leads passam pelo diário compartilhado
+    diario_eventos = None
+    if os.getenv("EVENTOS_LEADS_SQLITE_PATH"):
+        diario_eventos = DiarioEventosSQLite(os.getenv("EVENTOS_LEADS_SQLITE_PATH"))
+        tarefas.append(asyncio.create_task(eventos_leads.conectar(
+            diario_eventos, float(os.getenv("EVENTOS_LEADS_INTERVALO", "0.1"))
+        )))
+    
+    # Filtro de telefones conhecidos (pula a consulta de duplicidade de números novos)
+    if os.getenv("FILTRO_TELEFONES", "true").lower() == "true" and lead_repository.is_connected():
+        await filtro_telefones.reconstruir(lead_repository)
+        intervalo = float(os.getenv("FILTRO_TELEFONES_RECONSTRUCAO_SEGUNDOS", "600"))
+        tarefas.append(asyncio.create_task(
+            filtro_telefones.reconstruir_periodicamente(lead_repository, intervalo)
+        ))
+    
+    # Tarefas que escrevem no banco inteiro: com vários workers (gunicorn.conf.py
+    # define TAREFAS_GLOBAIS_LOCK) só o worker que segura o lock as executa
+    trava = os.getenv("TAREFAS_GLOBAIS_LOCK")
+    if trava:
+        lideranca = TravaLideranca(trava)
+        agendador_renovacoes.trava = lideranca
+        tarefas.append(asyncio.create_task(
+            lideranca.executar_como_lider(iniciar_tarefas_globais)
+        ))
+    else:
+        tarefas.extend(await iniciar_tarefas_globais())
+    
+    # Automações e regras de IA avaliadas sobre os eventos de leads
+    if regra_repository.is_connected():
+        await motor_regras.iniciar(float(os.getenv("REGRAS_RECARGA_SEGUNDOS", "300")))
+    
+    yield
+    
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await job_reprecificacao.cancelar()
+    await motor_regras.encerrar()
+    perfilador.encerrar_sessao()
+    analise_funil.encerrar()
+    await lead_repository.encerrar()
+    if metricas_workers is not None:
+        metricas_workers.encerrar()
+    if diario_eventos is not None:
+        diario_eventos.encerrar()
+
 
 # Configuração da aplicação
 app = FastAPI(
@@ -20,9 +138,26 @@ app = FastAPI(
     description="API para cálculo de cotações e processamento de documentos de seguros",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    # Bytes gerados pelo orjson; o conteúdo chega convertido pelo FastAPI
+    # (pydantic nas rotas com response_model, jsonable_encoder nas demais)
+    default_response_class=Default(RespostaJSON)
 )
 
+# Controle de admissão: teto de extrações de PDF simultâneas, capacidade reservada
+# às rotas baratas e 429/503 com Retry-After (dentro do CORS, para o frontend ler)
+if os.getenv("ADMISSAO_CONTROLE", "true").lower() == "true":
+    app.add_middleware(
+        AdmissaoMiddleware,
+        confiar_proxy=os.getenv("ADMISSAO_CONFIAR_PROXY", "false").lower() == "true"
+    )
+
+# Idempotency-Key nos POSTs: repetições recebem a primeira resposta (fora da admissão,
+# para não ocuparem vaga); IDEMPOTENCIA_BACKEND=sqlite compartilha as chaves entre workers
+if os.getenv("IDEMPOTENCIA_HABILITADA", "true").lower() == "true":
+    app.add_middleware(IdempotenciaMiddleware)
+
 # Configuração de CORS para integração com frontend
 app.add_middleware(
     CORSMiddleware,
@@ -35,12 +170,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "Idempotency-Replayed"],
 )
 
+# Perfil de requisições sob demanda (X-Perfil + X-Perfil-Token); só com PERFILAMENTO_TOKEN
+if perfilador.habilitado:
+    app.add_middleware(PerfilamentoMiddleware)
+
+# Latência, requisições em andamento e status por rota (GET /metrics)
+app.add_middleware(MetricasHTTPMiddleware)
+
 # Registrar routers
 app.include_router(cotacao_router.router, prefix="/api/v1")
 app.include_router(pdf_router.router, prefix="/api/v1")
 app.include_router(lead_router.router)  # Já tem prefix="/api/v1/leads" no router
+app.include_router(comissao_router.router)  # prefix="/api/v1/comissoes"
+app.include_router(renovacao_router.router)  # prefix="/api/v1/renovacoes"
+app.include_router(regra_router.router)  # prefix="/api/v1/regras"
+app.include_router(perfil_router.router)  # prefix="/api/v1/debug/perfis"
 
 
 # Rotas principais
@@ -66,9 +213,8 @@ async def health_check():
     }
 
 
-@app.get("/api/v1/info", tags=["Info"])
-async def api_info():
-    """Informações sobre a API"""
+async def _informacoes_api():
+    """Conteúdo de /api/v1/info (montado uma vez por versão da API)"""
     return {
         "name": "Humano Saúde Backend",
         "version": "1.0.0",
@@ -87,6 +233,21 @@ async def api_info():
     }
 
 
+@app.get("/api/v1/info", tags=["Info"])
+async def api_info(request: Request):
+    """Informações sobre a API (com ETag; If-None-Match → 304)"""
+    return await representacoes.responder(request, "info", app.version, _informacoes_api)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    return PlainTextResponse(
+        await metricas_workers.renderizar() if metricas_workers else metricas.renderizar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Exception handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
@@ -113,7 +274,7 @@ async def internal_error_handler(request, exc):
     )
 
 
-# Execução direta
+# Execução direta (desenvolvimento); em produção: gunicorn -c gunicorn.conf.py main:app
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
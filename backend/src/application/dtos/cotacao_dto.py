@@ -2,10 +2,13 @@
 DTOs para Cotação
 Data Transfer Objects para entrada e saída de dados
 """
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, PlainSerializer, validator
+from typing import Annotated, List, Optional
 from decimal import Decimal
 
+# Valores em reais: Decimal nos cálculos, número no JSON (o frontend espera number)
+ValorMonetario = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+
 
 class BeneficiarioInputDTO(BaseModel):
     """DTO para entrada de dados de beneficiário"""
@@ -46,7 +49,7 @@ class CotacaoInputDTO(BaseModel):
 class ValorBeneficiarioDTO(BaseModel):
     """DTO para valor individual de beneficiário"""
     idade: int
-    valor: Decimal
+    valor: ValorMonetario
     faixa_etaria: str
 
 
@@ -57,12 +60,7 @@ class CotacaoOutputDTO(BaseModel):
     plano: Optional[str] = None
     quantidade_beneficiarios: int
     valores_individuais: List[ValorBeneficiarioDTO]
-    valor_total: Decimal
-    desconto_aplicado: Decimal = Decimal("0.00")
-    valor_final: Decimal
+    valor_total: ValorMonetario
+    desconto_aplicado: ValorMonetario = Decimal("0.00")
+    valor_final: ValorMonetario
     observacoes: Optional[List[str]] = []
-    
-    class Config:
-        json_encoders = {
-            Decimal: lambda v: float(v)
-        }
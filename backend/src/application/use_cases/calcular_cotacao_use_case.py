@@ -5,7 +5,7 @@ Caso de uso responsável por calcular o valor de uma cotação de plano de saúd
 from typing import List
 from decimal import Decimal
 from ..dtos.cotacao_dto import CotacaoInputDTO, CotacaoOutputDTO, ValorBeneficiarioDTO
-from ...domain.entities.cotacao import Cotacao, Beneficiario
+from ...domain.entities.cotacao import Cotacao, Beneficiario, DESCONTOS_POR_QUANTIDADE
 
 
 class CalcularCotacaoUseCase:
@@ -14,12 +14,15 @@ class CalcularCotacaoUseCase:
     Aplica regras de negócio e utiliza serviços de cálculo.
     """
     
-    def __init__(self, servico_calculo):
+    def __init__(self, servico_calculo, coalescencia=None):
         """
         Args:
             servico_calculo: Serviço responsável pelo cálculo dos valores
+            coalescencia: Opcional; cotações idênticas simultâneas (picos de
+                campanha) compartilham um cálculo
         """
         self.servico_calculo = servico_calculo
+        self.coalescencia = coalescencia
     
     async def execute(self, input_dto: CotacaoInputDTO) -> CotacaoOutputDTO:
         """
@@ -29,8 +32,16 @@ class CalcularCotacaoUseCase:
             input_dto: Dados de entrada da cotação
             
         Returns:
-            CotacaoOutputDTO: Resultado do cálculo
+            CotacaoOutputDTO: Resultado do cálculo (compartilhado entre
+            chamadas concorrentes com os mesmos dados: não modificar)
         """
+        if self.coalescencia is None:
+            return await self._calcular(input_dto)
+        chave = (tuple(input_dto.idades), input_dto.tipo, input_dto.operadora, input_dto.plano)
+        return await self.coalescencia.executar(chave, lambda: self._calcular(input_dto))
+    
+    async def _calcular(self, input_dto: CotacaoInputDTO) -> CotacaoOutputDTO:
+        """Cálculo da cotação (uma vez por grupo de chamadas concorrentes)"""
         # Converter idades para beneficiários
         beneficiarios = [
             Beneficiario(idade=idade, tipo_vinculo="TITULAR" if i == 0 else "DEPENDENTE")
@@ -79,15 +90,12 @@ class CalcularCotacaoUseCase:
     
     def _calcular_desconto(self, cotacao: Cotacao, valor_total: Decimal) -> Decimal:
         """Calcula desconto baseado em regras de negócio"""
-        desconto = Decimal("0.00")
-        
         # Desconto progressivo por quantidade de beneficiários
-        if cotacao.quantidade_beneficiarios >= 5:
-            desconto = valor_total * Decimal("0.10")  # 10% de desconto
-        elif cotacao.quantidade_beneficiarios >= 3:
-            desconto = valor_total * Decimal("0.05")  # 5% de desconto
+        for minimo, percentual in DESCONTOS_POR_QUANTIDADE:
+            if cotacao.quantidade_beneficiarios >= minimo:
+                return valor_total * percentual
         
-        return desconto
+        return Decimal("0.00")
     
     def _gerar_observacoes(self, cotacao: Cotacao) -> List[str]:
         """Gera observações sobre a cotação"""
@@ -6,6 +6,12 @@ from datetime import datetime
 from typing import List, Optional
 from decimal import Decimal
 
+# Desconto progressivo: (mínimo de beneficiários, percentual), do maior para o menor
+DESCONTOS_POR_QUANTIDADE = [
+    (5, Decimal("0.10")),
+    (3, Decimal("0.05")),
+]
+
 
 @dataclass
 class Beneficiario:
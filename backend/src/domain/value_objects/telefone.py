@@ -0,0 +1,88 @@
+"""
+Value Object - Telefone
+Normalização de telefones brasileiros para E.164 (+55 DDD número)
+"""
+import re
+
+# DDDs em uso no Brasil (Anatel)
+DDDS_VALIDOS = frozenset({
+    11, 12, 13, 14, 15, 16, 17, 18, 19,
+    21, 22, 24, 27, 28,
+    31, 32, 33, 34, 35, 37, 38,
+    41, 42, 43, 44, 45, 46, 47, 48, 49,
+    51, 53, 54, 55,
+    61, 62, 63, 64, 65, 66, 67, 68, 69,
+    71, 73, 74, 75, 77, 79,
+    81, 82, 83, 84, 85, 86, 87, 88, 89,
+    91, 92, 93, 94, 95, 96, 97, 98, 99
+})
+
+
+def normalizar_telefone(telefone: str) -> str:
+    """
+    Converte um telefone brasileiro para E.164
+
+    Aceita as formas usuais de digitação: com ou sem +55/0055, com zero
+    de longa distância (e código de prestadora), com pontuação e
+    celulares no formato antigo de 8 dígitos (recebem o 9 inicial).
+
+    Exemplos:
+        "+55 (11) 99999-9999" -> "+5511999999999"
+        "011 9999-9999"       -> "+5511999999999"
+        "(21) 3333-4444"      -> "+552133334444"
+
+    Raises:
+        ValueError: Se não for um telefone brasileiro válido
+    """
+    digitos = re.sub(r"\D", "", telefone or "")
+
+    if digitos.startswith("00"):
+        digitos = digitos[2:]
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    elif len(digitos) in (11, 12) and digitos.startswith("0"):
+        digitos = digitos[1:]
+    elif len(digitos) in (13, 14) and digitos.startswith("0"):
+        # 0 + código da prestadora + DDD + número
+        digitos = digitos[3:]
+
+    if len(digitos) not in (10, 11):
+        raise ValueError(f"Telefone inválido: '{telefone}'")
+
+    ddd, numero = int(digitos[:2]), digitos[2:]
+    if ddd not in DDDS_VALIDOS:
+        raise ValueError(f"DDD inválido: {digitos[:2]}")
+
+    if len(numero) == 9:
+        if numero[0] != "9":
+            raise ValueError(f"Celular deve começar com 9: '{telefone}'")
+    elif numero[0] in "6789":
+        # Celular no formato anterior ao nono dígito
+        numero = "9" + numero
+    elif numero[0] not in "2345":
+        raise ValueError(f"Telefone inválido: '{telefone}'")
+
+    return f"+55{ddd}{numero}"
+
+
+def telefone_para_busca(telefone: str) -> str:
+    """
+    Forma usada nas consultas por WhatsApp: E.164 quando possível, senão
+    o valor como veio (registros antigos que não são telefones brasileiros
+    ficaram sem normalizar no banco)
+    """
+    try:
+        return normalizar_telefone(telefone)
+    except ValueError:
+        return telefone
+
+
+def chave_telefone(telefone: str) -> str:
+    """
+    Forma normalizada para comparação: E.164 quando possível, senão só
+    os dígitos (registros antigos que não são telefones brasileiros)
+    """
+    try:
+        return normalizar_telefone(telefone)
+    except ValueError:
+        return re.sub(r"\D", "", telefone or "")
@@ -0,0 +1,117 @@
+"""
+Container de serviços
+Os serviços pesados (pandas, cliente OpenAI, cliente Supabase) só são
+construídos no primeiro uso ou no aquecimento do lifespan, nunca no
+import: subir o processo (e coletar os testes) não paga por eles, e um
+serviço mal configurado (ex.: sem OPENAI_API_KEY) falha só nas rotas
+que o usam.
+
+Cada fábrica importa o próprio módulo, então importar o container não
+importa nenhum serviço.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _servico_calculo_cotacao():
+    from .services.servico_calculo_cotacao import ServicoCalculoCotacao
+    return ServicoCalculoCotacao()
+
+
+def _calcular_cotacao_use_case():
+    from ..application.use_cases.calcular_cotacao_use_case import CalcularCotacaoUseCase
+    from .services.coalescencia import Coalescencia
+    return CalcularCotacaoUseCase(container.servico_calculo_cotacao, Coalescencia("cotacao"))
+
+
+def _ai_service():
+    from .services.ai_service import AIService
+    return AIService()
+
+
+def _supabase_service():
+    from .services.supabase_service import SupabaseService
+    return SupabaseService()
+
+
+class Container:
+    """Singletons criados sob demanda, uma vez só (seguro entre threads)"""
+
+    def __init__(self):
+        self._fabricas: Dict[str, Callable[[], Any]] = {}
+        self._instancias: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def registrar(self, nome: str, fabrica: Callable[[], Any]):
+        self._fabricas[nome] = fabrica
+
+    def obter(self, nome: str) -> Any:
+        """
+        Instância do serviço, criada na primeira chamada
+
+        Raises:
+            KeyError: Serviço não registrado
+            Exception: O que a fábrica levantar (a próxima chamada tenta de novo)
+        """
+        instancia = self._instancias.get(nome)
+        if instancia is not None:
+            return instancia
+
+        fabrica = self._fabricas[nome]
+        with self._lock:
+            if nome not in self._instancias:
+                inicio = time.perf_counter()
+                self._instancias[nome] = fabrica()
+                logger.info(f"🧩 {nome} criado em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+            return self._instancias[nome]
+
+    def __getattr__(self, nome: str) -> Any:
+        if nome.startswith("_") or nome not in self._fabricas:
+            raise AttributeError(nome)
+        return self.obter(nome)
+
+    def criado(self, nome: str) -> bool:
+        return nome in self._instancias
+
+    def substituir(self, nome: str, instancia: Optional[Any]):
+        """Troca (ou descarta, com None) a instância de um serviço; para testes"""
+        with self._lock:
+            if instancia is None:
+                self._instancias.pop(nome, None)
+            else:
+                self._instancias[nome] = instancia
+
+    async def aquecer(self, nomes: Optional[Iterable[str]] = None) -> Dict[str, Optional[float]]:
+        """
+        Cria os serviços fora do loop de eventos (imports e construção são
+        bloqueantes), para a primeira requisição não pagar por eles
+
+        Falhas são registradas e não interrompem a subida: o serviço será
+        tentado de novo no primeiro uso.
+
+        Returns:
+            Segundos gastos em cada serviço (None se falhou)
+        """
+        tempos: Dict[str, Optional[float]] = {}
+        for nome in list(nomes or self._fabricas):
+            inicio = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.obter, nome)
+                tempos[nome] = time.perf_counter() - inicio
+            except Exception as e:
+                logger.warning(f"⚠️ {nome} não pôde ser criado no aquecimento: {e}")
+                tempos[nome] = None
+        return tempos
+
+
+# Container global da aplicação
+container = Container()
+container.registrar("servico_calculo_cotacao", _servico_calculo_cotacao)
+container.registrar("calcular_cotacao_use_case", _calcular_cotacao_use_case)
+container.registrar("supabase_service", _supabase_service)
+container.registrar("ai_service", _ai_service)
@@ -0,0 +1,534 @@
+"""
+Repositório de Leads - gravação write-behind
+Leads novos são confirmados assim que chegam a um journal local e
+gravados no banco em lotes por uma tarefa em segundo plano
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..services.metricas import metricas
+from .lead_repository import LeadDuplicadoError, LeadRepository, novo_lead
+from ...domain.value_objects.telefone import telefone_para_busca
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_JOURNAL = """
+CREATE TABLE IF NOT EXISTS journal_leads (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    lead TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS journal_leads_rejeitados (
+    seq INTEGER PRIMARY KEY,
+    lead TEXT NOT NULL,
+    erro TEXT NOT NULL,
+    rejeitado_em TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+# Leads que o banco recusou (ficam no journal para correção manual)
+LEADS_REJEITADOS = metricas.contador(
+    "leads_journal_rejeitados_total",
+    "Leads recusados pelo banco e movidos para journal_leads_rejeitados"
+)
+
+
+class BufferCheioError(Exception):
+    """O journal atingiu a capacidade e não liberou espaço a tempo"""
+
+
+class GravacaoPendenteError(Exception):
+    """O lead ainda não chegou ao banco depois da espera máxima"""
+
+
+def erro_de_dados(erro: Exception) -> bool:
+    """
+    Recusa causada pelo conteúdo da linha (CHECK, tipo inválido, ...),
+    que se repetiria em toda tentativa, e não por falha do banco/rede
+
+    SQLSTATE classes 22 (data exception) e 23 (integrity constraint
+    violation) do PostgREST, e os equivalentes do SQLite.
+    """
+    if isinstance(erro, (sqlite3.IntegrityError, sqlite3.DataError, ValueError, TypeError)):
+        return True
+    codigo = str(getattr(erro, "code", "") or "")
+    return codigo.startswith(("22", "23"))
+
+
+@dataclass
+class EntradaJournal:
+    """Lead aguardando gravação no banco"""
+    seq: int
+    lead: Dict[str, Any]
+    recebido_em: float
+    tentativas: int = 0
+    proxima_tentativa: float = 0.0
+
+
+class LeadRepositoryComBuffer(LeadRepository):
+    """
+    Envolve outro LeadRepository e torna criar_lead assíncrono em relação
+    ao banco.
+
+    - criar_lead monta o lead (ID e created_at definitivos), grava no
+      journal SQLite com fsync e só então responde. Chamadas simultâneas
+      compartilham o mesmo commit (group commit).
+    - Uma tarefa descarrega o journal em lotes via criar_leads_lote; o
+      registro só sai do journal depois que o banco confirmou. Uma queda
+      entre as duas etapas reenvia o lote, o que é seguro porque a
+      inserção em lote ignora IDs já gravados.
+    - Falhas do banco/rede são repetidas com backoff exponencial, sem
+      descartar leads. Se o banco recusa o conteúdo de alguma linha, o
+      lote é dividido ao meio até isolá-la; o resto é gravado e a linha
+      vai para journal_leads_rejeitados (não bloqueia os demais).
+    - Com o journal cheio, novos leads esperam até `espera_maxima`
+      segundos por espaço e depois recebem BufferCheioError.
+    - Leads pendentes são visíveis nas buscas por ID e WhatsApp (evita
+      duplicidade); estatísticas, listagens e busca textual só os veem
+      após a gravação.
+    """
+
+    def __init__(
+        self,
+        repositorio: LeadRepository,
+        caminho: str,
+        capacidade: int = 20000,
+        lote: int = 500,
+        intervalo: float = 0.2,
+        espera_maxima: float = 2.0,
+        backoff_maximo: float = 60.0
+    ):
+        """
+        Args:
+            repositorio: Backend onde os leads são gravados de fato
+            caminho: Arquivo SQLite do journal
+            capacidade: Leads pendentes acima dos quais criar_lead espera
+            lote: Máximo de leads por INSERT
+            intervalo: Espera máxima entre descargas (segundos)
+            espera_maxima: Quanto criar_lead espera por espaço (segundos)
+            backoff_maximo: Teto do intervalo entre tentativas (segundos)
+        """
+        self.repositorio = repositorio
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.lote = lote
+        self.intervalo = intervalo
+        self.espera_maxima = espera_maxima
+        self.backoff_maximo = backoff_maximo
+
+        self._pendentes: "OrderedDict[int, EntradaJournal]" = OrderedDict()
+        self._por_id: Dict[str, int] = {}
+        self._por_whatsapp: Dict[str, int] = {}
+
+        self._aguardando_journal: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._gravador: Optional[asyncio.Task] = None
+        self._descarregador: Optional[asyncio.Task] = None
+        self._ha_dados = asyncio.Event()
+        self._espaco = asyncio.Event()
+
+        self._leads_gravados = 0
+        self._lotes_gravados = 0
+        self._falhas = 0
+        self._rejeitados = 0
+        self._rejeitados_banco = 0
+        self._latencias: Deque[float] = deque(maxlen=512)
+
+        # Uma única thread usa a conexão do journal
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal-leads")
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._conn = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA_JOURNAL)
+        self._rejeitados_banco = self._conn.execute(
+            "SELECT count(*) FROM journal_leads_rejeitados"
+        ).fetchone()[0]
+
+        # Recupera o que ficou pendente na última execução
+        for seq, lead in self._conn.execute("SELECT seq, lead FROM journal_leads ORDER BY seq"):
+            self._registrar_pendente(seq, json.loads(lead), time.monotonic())
+        if self._pendentes:
+            logger.warning(f"⚠️ {len(self._pendentes)} leads recuperados do journal")
+
+    # ==========================================
+    # Ciclo de vida
+    # ==========================================
+
+    def is_connected(self) -> bool:
+        return self.repositorio.is_connected()
+
+    async def iniciar(self):
+        await self.repositorio.iniciar()
+        self._garantir_descarregador()
+
+    async def encerrar(self):
+        """Para a descarga contínua e tenta gravar o que restou"""
+        if self._descarregador:
+            self._descarregador.cancel()
+            self._descarregador = None
+        if self._gravador:
+            await asyncio.gather(self._gravador, return_exceptions=True)
+
+        try:
+            while await self._descarregar_lote(ignorar_backoff=True):
+                pass
+        except Exception as e:
+            logger.error(f"❌ Leads mantidos no journal para a próxima execução: {e}")
+
+        await self.repositorio.encerrar()
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
+
+    def _garantir_descarregador(self):
+        if self._descarregador is None or self._descarregador.done():
+            self._descarregador = asyncio.create_task(self._descarregar_continuamente())
+        if self._pendentes:
+            self._ha_dados.set()
+
+    # ==========================================
+    # Escrita
+    # ==========================================
+
+    async def criar_lead(self, **campos) -> Optional[Dict[str, Any]]:
+        """
+        Grava o lead no journal e o devolve sem esperar o banco
+
+        O índice único de WhatsApp só é verificado na gravação em lote:
+        aqui se recusam os repetidos que ainda estão no journal; um número
+        criado ao mesmo tempo por outro worker vai para os rejeitados.
+        """
+        if campos["whatsapp"] in self._por_whatsapp:
+            raise LeadDuplicadoError(campos["whatsapp"])
+        self._garantir_descarregador()
+        await self._aguardar_espaco()
+
+        lead = novo_lead(**campos)
+        confirmacao = asyncio.get_running_loop().create_future()
+        self._aguardando_journal.append((lead, confirmacao))
+        if self._gravador is None or self._gravador.done():
+            self._gravador = asyncio.create_task(self._gravar_journal())
+
+        try:
+            seq = await confirmacao
+        except Exception as e:
+            logger.error(f"❌ Erro ao gravar lead no journal: {e}")
+            return None
+
+        self._registrar_pendente(seq, lead, time.monotonic())
+        self._ha_dados.set()
+        logger.info(f"📥 Lead no journal: {lead['id']} - {lead['nome']}")
+        return dict(lead)
+
+    async def criar_leads_lote(self, leads: List[Dict[str, Any]]) -> int:
+        return await self.repositorio.criar_leads_lote(leads)
+
+    async def _aguardar_espaco(self):
+        """Backpressure: segura o chamador enquanto o journal estiver cheio"""
+        limite = time.monotonic() + self.espera_maxima
+        while len(self._pendentes) >= self.capacidade:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                self._rejeitados += 1
+                raise BufferCheioError(
+                    f"Journal de leads cheio ({len(self._pendentes)} pendentes)"
+                )
+            self._espaco.clear()
+            try:
+                await asyncio.wait_for(self._espaco.wait(), restante)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _gravar_journal(self):
+        """Grava no journal, num commit só, todos os leads que chegaram juntos"""
+        loop = asyncio.get_running_loop()
+        while self._aguardando_journal:
+            grupo, self._aguardando_journal = self._aguardando_journal, []
+            try:
+                seqs = await loop.run_in_executor(
+                    self._executor, self._inserir_journal, [lead for lead, _ in grupo]
+                )
+            except Exception as e:
+                for _, confirmacao in grupo:
+                    if not confirmacao.done():
+                        confirmacao.set_exception(e)
+                continue
+            for (_, confirmacao), seq in zip(grupo, seqs):
+                if not confirmacao.done():
+                    confirmacao.set_result(seq)
+
+    def _inserir_journal(self, leads: List[Dict[str, Any]]) -> List[int]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            seqs = [
+                self._conn.execute(
+                    "INSERT INTO journal_leads (lead) VALUES (?)",
+                    (json.dumps(lead, ensure_ascii=False),)
+                ).lastrowid
+                for lead in leads
+            ]
+            self._conn.execute("COMMIT")
+            return seqs
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _remover_journal(self, seqs: List[int]):
+        self._conn.executemany("DELETE FROM journal_leads WHERE seq = ?", [(seq,) for seq in seqs])
+
+    def _mover_para_rejeitados(self, rejeitadas: List[Tuple["EntradaJournal", str]]):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for entrada, erro in rejeitadas:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO journal_leads_rejeitados (seq, lead, erro) VALUES (?, ?, ?)",
+                    (entrada.seq, json.dumps(entrada.lead, ensure_ascii=False), erro)
+                )
+                self._conn.execute("DELETE FROM journal_leads WHERE seq = ?", (entrada.seq,))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    # ==========================================
+    # Descarga para o banco
+    # ==========================================
+
+    async def _descarregar_continuamente(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._ha_dados.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._ha_dados.clear()
+
+            try:
+                while await self._descarregar_lote():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro inesperado na descarga do journal: {e}")
+
+    async def _descarregar_lote(self, ignorar_backoff: bool = False) -> bool:
+        """
+        Grava no banco o próximo lote pronto
+
+        Returns:
+            True se um lote foi gravado (pode haver mais), False caso contrário
+        """
+        agora = time.monotonic()
+        lote = []
+        for entrada in self._pendentes.values():
+            if ignorar_backoff or entrada.proxima_tentativa <= agora:
+                lote.append(entrada)
+                if len(lote) >= self.lote:
+                    break
+        if not lote:
+            return False
+
+        inicio = time.perf_counter()
+        gravadas: List[EntradaJournal] = []
+        rejeitadas: List[Tuple[EntradaJournal, str]] = []
+        try:
+            await self._gravar_bisseccionando(lote, gravadas, rejeitadas)
+        except Exception as e:
+            self._falhas += 1
+            concluidas = {entrada.seq for entrada in gravadas} | {entrada.seq for entrada, _ in rejeitadas}
+            restantes = [entrada for entrada in lote if entrada.seq not in concluidas]
+            for entrada in restantes:
+                entrada.tentativas += 1
+                entrada.proxima_tentativa = agora + min(
+                    self.backoff_maximo, self.intervalo * 2 ** entrada.tentativas
+                )
+            logger.error(
+                f"❌ Falha ao gravar lote de {len(restantes)} leads "
+                f"(tentativa {restantes[0].tentativas}): {e}"
+            )
+            await self._concluir(gravadas, rejeitadas)
+            if ignorar_backoff:
+                raise
+            return False
+
+        await self._concluir(gravadas, rejeitadas)
+        self._latencias.append((time.perf_counter() - inicio) * 1000)
+        self._lotes_gravados += 1
+        return True
+
+    async def _gravar_bisseccionando(
+        self,
+        lote: List[EntradaJournal],
+        gravadas: List[EntradaJournal],
+        rejeitadas: List[Tuple[EntradaJournal, str]]
+    ):
+        """
+        Grava o lote; se o banco recusar o conteúdo, divide ao meio até
+        isolar as linhas recusadas (acumuladas em `rejeitadas`)
+
+        Raises:
+            Exception: Falha do banco/rede (não é culpa de uma linha)
+        """
+        try:
+            await self.repositorio.criar_leads_lote([entrada.lead for entrada in lote])
+        except Exception as e:
+            if not erro_de_dados(e):
+                raise
+            if len(lote) == 1:
+                rejeitadas.append((lote[0], f"{type(e).__name__}: {e}"))
+                return
+            meio = len(lote) // 2
+            await self._gravar_bisseccionando(lote[:meio], gravadas, rejeitadas)
+            await self._gravar_bisseccionando(lote[meio:], gravadas, rejeitadas)
+            return
+        gravadas.extend(lote)
+
+    async def _concluir(self, gravadas: List[EntradaJournal], rejeitadas: List[Tuple[EntradaJournal, str]]):
+        """Tira do journal os leads gravados e move os recusados para journal_leads_rejeitados"""
+        loop = asyncio.get_running_loop()
+        if gravadas:
+            await loop.run_in_executor(
+                self._executor, self._remover_journal, [entrada.seq for entrada in gravadas]
+            )
+        if rejeitadas:
+            await loop.run_in_executor(self._executor, self._mover_para_rejeitados, rejeitadas)
+            for entrada, erro in rejeitadas:
+                logger.error(f"❌ Lead {entrada.lead['id']} recusado pelo banco, movido para rejeitados: {erro}")
+            self._rejeitados_banco += len(rejeitadas)
+            LEADS_REJEITADOS.incrementar(quantidade=len(rejeitadas))
+
+        for entrada in gravadas:
+            self._remover_pendente(entrada)
+        for entrada, _ in rejeitadas:
+            self._remover_pendente(entrada)
+        self._leads_gravados += len(gravadas)
+        if gravadas or rejeitadas:
+            self._espaco.set()
+
+    def _registrar_pendente(self, seq: int, lead: Dict[str, Any], recebido_em: float):
+        self._pendentes[seq] = EntradaJournal(seq=seq, lead=lead, recebido_em=recebido_em)
+        self._por_id[lead["id"]] = seq
+        self._por_whatsapp[lead["whatsapp"]] = seq
+
+    def _remover_pendente(self, entrada: EntradaJournal):
+        self._pendentes.pop(entrada.seq, None)
+        self._por_id.pop(entrada.lead["id"], None)
+        if self._por_whatsapp.get(entrada.lead["whatsapp"]) == entrada.seq:
+            del self._por_whatsapp[entrada.lead["whatsapp"]]
+
+    # ==========================================
+    # Leituras
+    # ==========================================
+
+    async def buscar_lead_por_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        seq = self._por_id.get(lead_id)
+        if seq is not None:
+            return dict(self._pendentes[seq].lead)
+        return await self.repositorio.buscar_lead_por_id(lead_id)
+
+    async def buscar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
+        whatsapp = telefone_para_busca(whatsapp)
+        seq = self._por_whatsapp.get(whatsapp)
+        if seq is not None:
+            return dict(self._pendentes[seq].lead)
+        return await self.repositorio.buscar_lead_por_whatsapp(whatsapp)
+
+    async def listar_leads(self, **filtros) -> List[Dict[str, Any]]:
+        return await self.repositorio.listar_leads(**filtros)
+
+    async def listar_leads_cursor(self, **filtros) -> List[Dict[str, Any]]:
+        return await self.repositorio.listar_leads_cursor(**filtros)
+
+    async def buscar_leads(self, termo: str, limite: int = 20) -> List[Dict[str, Any]]:
+        return await self.repositorio.buscar_leads(termo, limite)
+
+    async def atualizar_status_lead(
+        self,
+        lead_id: str,
+        novo_status: str,
+        observacao: Optional[str] = None
+    ) -> bool:
+        await self._aguardar_gravacao(lead_id)
+        return await self.repositorio.atualizar_status_lead(lead_id, novo_status, observacao)
+
+    async def atualizar_economia_lote(self, atualizacoes: List[Tuple[Dict[str, Any], float]]) -> int:
+        return await self.repositorio.atualizar_economia_lote(atualizacoes)
+
+    async def atualizar_scores_lote(self, scores: List[Tuple[str, float]]) -> int:
+        return await self.repositorio.atualizar_scores_lote(scores)
+
+    async def arquivar_lead(self, lead_id: str) -> bool:
+        await self._aguardar_gravacao(lead_id)
+        return await self.repositorio.arquivar_lead(lead_id)
+
+    async def _aguardar_gravacao(self, lead_id: str):
+        """
+        Atualizações de um lead pendente esperam sua gravação no banco
+
+        Raises:
+            GravacaoPendenteError: O lead continua só no journal após
+                `espera_maxima` (banco fora); atualizar agora não acharia a linha
+        """
+        self._garantir_descarregador()
+        limite = time.monotonic() + self.espera_maxima
+        while lead_id in self._por_id:
+            if time.monotonic() >= limite:
+                raise GravacaoPendenteError(f"Lead {lead_id} ainda não foi gravado no banco")
+            self._ha_dados.set()
+            await asyncio.sleep(self.intervalo / 4)
+
+    # ==========================================
+    # Estatísticas e métricas
+    # ==========================================
+
+    async def obter_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        return await self.repositorio.obter_dashboard_stats()
+
+    async def obter_leads_por_operadora(self) -> List[Dict[str, Any]]:
+        return await self.repositorio.obter_leads_por_operadora()
+
+    async def obter_pipeline_vendas(self) -> List[Dict[str, Any]]:
+        return await self.repositorio.obter_pipeline_vendas()
+
+    def idade_estatisticas(self, chave: str) -> Optional[float]:
+        return self.repositorio.idade_estatisticas(chave)
+
+    async def reconciliar_contadores(self) -> Dict[str, Any]:
+        return await self.repositorio.reconciliar_contadores()
+
+    def metricas_buffer(self) -> Dict[str, Any]:
+        """Profundidade do journal e latência das descargas"""
+        latencias = sorted(self._latencias)
+        mais_antigo = next(iter(self._pendentes.values()), None)
+
+        def percentil(p: float) -> Optional[float]:
+            if not latencias:
+                return None
+            return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))], 2)
+
+        return {
+            "profundidade": len(self._pendentes),
+            "capacidade": self.capacidade,
+            "mais_antigo_segundos": (
+                round(time.monotonic() - mais_antigo.recebido_em, 2) if mais_antigo else 0.0
+            ),
+            "leads_gravados": self._leads_gravados,
+            "lotes_gravados": self._lotes_gravados,
+            "falhas": self._falhas,
+            "rejeitados": self._rejeitados,
+            "recusados_banco": self._rejeitados_banco,
+            "descarga_ultima_ms": round(self._latencias[-1], 2) if self._latencias else None,
+            "descarga_p50_ms": percentil(0.5),
+            "descarga_p99_ms": percentil(0.99)
+        }
+
+    def metricas_cache(self) -> Dict[str, Any]:
+        return {**self.repositorio.metricas_cache(), "buffer_escrita": self.metricas_buffer()}
@@ -0,0 +1,95 @@
+"""
+Repositório de Comissões
+Leitura das produções dos corretores e gravação em lote das parcelas
+de comissão e dos relatórios mensais, com as mesmas duas implementações
+dos leads: Supabase (produção) e SQLite embarcado (local/testes)
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Colunas das produções usadas no cálculo
+COLUNAS_PRODUCAO = "id,corretor_id,valor_mensalidade,data_vigencia,modalidade,status"
+
+
+class ComissaoRepository(ABC):
+    """
+    Contrato de acesso a producoes_corretor, parcelas_comissao e
+    relatorios_comissao para o motor de comissões.
+
+    Linhas geradas pelo motor levam mes_referencia (AAAA-MM); parcelas
+    e relatórios lançados manualmente (mes_referencia nulo) nunca são
+    tocados.
+    """
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Se o backend está configurado e utilizável"""
+
+    @abstractmethod
+    def iterar_producoes(
+        self,
+        inicio: str,
+        fim: str,
+        tamanho_pagina: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Percorre página a página as produções com vigência no período
+
+        Args:
+            inicio: Primeiro dia (AAAA-MM-DD, inclusivo)
+            fim: Último dia (AAAA-MM-DD, exclusivo)
+            tamanho_pagina: Produções por página
+        """
+
+    @abstractmethod
+    async def obter_percentuais_corretores(self, corretor_ids: List[str]) -> Dict[str, float]:
+        """comissao_padrao_pct de cada corretor (ausentes ficam de fora)"""
+
+    @abstractmethod
+    async def gravar_comissoes_mes(
+        self,
+        mes_referencia: str,
+        parcelas: List[Dict[str, Any]],
+        relatorios: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+        Substitui as parcelas pendentes e os relatórios não pagos do mês
+
+        Atômico: remoção e inserção numa única transação, então uma falha
+        no meio mantém as comissões anteriores do mês. Idempotente: os IDs
+        são determinísticos e reprocessar o mês regrava o mesmo conteúdo;
+        parcelas já pagas e relatórios já pagos são preservados.
+
+        Returns:
+            Quantidade de parcelas e relatórios gravados
+        """
+
+
+def criar_comissao_repository() -> ComissaoRepository:
+    """
+    Cria o repositório configurado em COMISSOES_BACKEND (padrão: o
+    mesmo de LEADS_BACKEND)
+
+    - supabase: tabelas do Supabase
+    - sqlite: banco embarcado em SQLITE_COMISSOES_PATH
+    """
+    backend = os.getenv("COMISSOES_BACKEND", os.getenv("LEADS_BACKEND", "supabase")).lower()
+
+    if backend == "sqlite":
+        from .sqlite_comissao_repository import SQLiteComissaoRepository
+        caminho = os.getenv("SQLITE_COMISSOES_PATH", "data/comissoes.db")
+        logger.info(f"🗄️ Comissões no SQLite embarcado: {caminho}")
+        return SQLiteComissaoRepository(caminho)
+
+    if backend != "supabase":
+        logger.warning(f"⚠️ COMISSOES_BACKEND desconhecido '{backend}', usando supabase")
+    from .supabase_comissao_repository import SupabaseComissaoRepository
+    return SupabaseComissaoRepository()
+
+
+# Instância global do repositório
+comissao_repository = criar_comissao_repository()
@@ -0,0 +1,313 @@
+"""
+Repositório de Leads
+Abstração sobre o armazenamento de insurance_leads, com duas
+implementações: Supabase (produção) e SQLite embarcado (local/edge)
+"""
+import os
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..services.pontuacao_leads import pontuar_lead
+
+logger = logging.getLogger(__name__)
+
+
+# Ordenações aceitas por listar_leads
+ORDENACOES = ("recentes", "score")
+
+
+class LeadDuplicadoError(Exception):
+    """Já existe lead ativo com o mesmo WhatsApp (índice único do banco)"""
+
+    def __init__(self, whatsapp: str):
+        super().__init__(f"Já existe lead ativo com o WhatsApp {whatsapp}")
+        self.whatsapp = whatsapp
+
+
+class LeadRepository(ABC):
+    """
+    Contrato de acesso aos leads.
+
+    Cobre todas as operações que os controllers usam: CRUD, paginação
+    (offset e keyset), busca, estatísticas e manutenção dos caches e
+    contadores de cada backend. Os métodos seguem as convenções do
+    SupabaseService: erros de consulta retornam None/False/[] e são
+    registrados no log.
+    """
+
+    # ==========================================
+    # Ciclo de vida
+    # ==========================================
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Indica se o backend está disponível"""
+
+    async def iniciar(self):
+        """Aquecimento na inicialização da aplicação (contadores, índices)"""
+
+    async def encerrar(self):
+        """Libera recursos no encerramento da aplicação"""
+
+    # ==========================================
+    # CRUD
+    # ==========================================
+
+    @abstractmethod
+    async def criar_lead(
+        self,
+        nome: str,
+        whatsapp: str,
+        email: Optional[str] = None,
+        operadora_atual: Optional[str] = None,
+        valor_atual: Optional[float] = None,
+        idades: Optional[List[int]] = None,
+        economia_estimada: Optional[float] = None,
+        valor_proposto: Optional[float] = None,
+        tipo_contratacao: Optional[str] = None,
+        observacoes: Optional[str] = None,
+        dados_pdf: Optional[Dict] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cria um lead e retorna o registro gravado
+
+        Raises:
+            LeadDuplicadoError: Se já houver lead ativo com o mesmo WhatsApp
+        """
+
+    @abstractmethod
+    async def criar_leads_lote(self, leads: List[Dict[str, Any]]) -> int:
+        """
+        Grava num único INSERT leads montados por novo_lead()
+
+        Deve ser idempotente por ID (reenvio não duplica) e levantar
+        exceção em caso de falha, para que quem chamou possa repetir.
+        WhatsApp repetido entre leads ativos é erro de dados (o lote falha).
+
+        Returns:
+            Quantidade de leads efetivamente inseridos
+        """
+
+    @abstractmethod
+    async def buscar_lead_por_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        """Busca um lead pelo ID"""
+
+    @abstractmethod
+    async def buscar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
+        """Busca o lead ativo de um WhatsApp (normalizado antes da consulta)"""
+
+    @abstractmethod
+    async def listar_leads(
+        self,
+        status: Optional[str] = None,
+        limite: int = 50,
+        offset: int = 0,
+        ordenar: str = "recentes"
+    ) -> List[Dict[str, Any]]:
+        """Lista leads ativos (mais recentes ou maior score primeiro) com paginação por offset"""
+
+    @abstractmethod
+    async def listar_leads_cursor(
+        self,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        cursor: Optional[Tuple[str, str]] = None,
+        limite: int = 1000,
+        colunas: str = "*"
+    ) -> List[Dict[str, Any]]:
+        """Lista uma página de leads ativos com cursor (created_at, id)"""
+
+    async def iterar_leads(
+        self,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        tamanho_pagina: int = 1000,
+        colunas: str = "*"
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Percorre todos os leads ativos página a página (keyset)"""
+        cursor: Optional[Tuple[str, str]] = None
+
+        while True:
+            pagina = await self.listar_leads_cursor(
+                status=status,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                cursor=cursor,
+                limite=tamanho_pagina,
+                colunas=colunas
+            )
+            if not pagina:
+                return
+
+            yield pagina
+
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo = pagina[-1]
+            cursor = (ultimo["created_at"], ultimo["id"])
+
+    @abstractmethod
+    async def buscar_leads(self, termo: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """Busca por fragmento de nome, e-mail ou telefone (colunas enxutas)"""
+
+    @abstractmethod
+    async def atualizar_status_lead(
+        self,
+        lead_id: str,
+        novo_status: str,
+        observacao: Optional[str] = None
+    ) -> bool:
+        """Atualiza o status e registra o evento no histórico"""
+
+    @abstractmethod
+    async def atualizar_economia_lote(self, atualizacoes: List[Tuple[Dict[str, Any], float]]) -> int:
+        """
+        Grava a nova economia_estimada de vários leads num único comando
+
+        Args:
+            atualizacoes: Pares (lead como foi lido, nova economia); o lead
+                precisa das colunas usadas pelos contadores do funil
+
+        Returns:
+            Quantidade de leads atualizados
+
+        Raises:
+            Exception: Se a escrita falhar (o lote inteiro é descartado)
+        """
+
+    @abstractmethod
+    async def atualizar_scores_lote(self, scores: List[Tuple[str, float]]) -> int:
+        """
+        Grava o score de vários leads (recálculo completo)
+
+        Args:
+            scores: Pares (id do lead, novo score)
+
+        Returns:
+            Quantidade de leads atualizados
+        """
+
+    @abstractmethod
+    async def arquivar_lead(self, lead_id: str) -> bool:
+        """Arquiva um lead (idempotente)"""
+
+    # ==========================================
+    # Estatísticas
+    # ==========================================
+
+    @abstractmethod
+    async def obter_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        """Estatísticas no formato da view dashboard_stats"""
+
+    @abstractmethod
+    async def obter_leads_por_operadora(self) -> List[Dict[str, Any]]:
+        """Estatísticas no formato da view leads_por_operadora"""
+
+    @abstractmethod
+    async def obter_pipeline_vendas(self) -> List[Dict[str, Any]]:
+        """Funil no formato da view pipeline_vendas"""
+
+    @abstractmethod
+    def idade_estatisticas(self, chave: str) -> Optional[float]:
+        """Idade em segundos das estatísticas servidas"""
+
+    @abstractmethod
+    async def reconciliar_contadores(self) -> Dict[str, Any]:
+        """Confere os contadores do funil contra o banco"""
+
+    @abstractmethod
+    def metricas_cache(self) -> Dict[str, Any]:
+        """Métricas dos caches e índices em memória"""
+
+
+def novo_lead(
+    nome: str,
+    whatsapp: str,
+    email: Optional[str] = None,
+    operadora_atual: Optional[str] = None,
+    valor_atual: Optional[float] = None,
+    idades: Optional[List[int]] = None,
+    economia_estimada: Optional[float] = None,
+    valor_proposto: Optional[float] = None,
+    tipo_contratacao: Optional[str] = None,
+    observacoes: Optional[str] = None,
+    dados_pdf: Optional[Dict] = None
+) -> Dict[str, Any]:
+    """
+    Registro completo de um lead novo, com ID e created_at gerados aqui
+
+    Usado quando o lead precisa existir antes de chegar ao banco
+    (SQLite embarcado, gravação em lote).
+    """
+    agora = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+    lead = {
+        "id": str(uuid.uuid4()),
+        "created_at": agora,
+        "updated_at": agora,
+        "nome": nome,
+        "whatsapp": whatsapp,
+        "email": email,
+        "operadora_atual": operadora_atual,
+        "valor_atual": valor_atual,
+        "idades": idades or [],
+        "economia_estimada": economia_estimada,
+        "valor_proposto": valor_proposto,
+        "tipo_contratacao": tipo_contratacao,
+        "status": "novo",
+        "origem": "scanner_pdf",
+        "prioridade": "media",
+        "observacoes": observacoes,
+        "dados_pdf": dados_pdf or {},
+        "historico": [],
+        "atribuido_a": None,
+        "arquivado": False
+    }
+    lead["score"] = pontuar_lead(lead, agora)
+    return lead
+
+
+def criar_lead_repository() -> LeadRepository:
+    """
+    Cria o repositório configurado em LEADS_BACKEND
+
+    - supabase (padrão): SupabaseService
+    - sqlite: banco embarcado em SQLITE_LEADS_PATH
+
+    Com LEADS_WRITE_BEHIND=true, a criação passa por um journal local
+    e é gravada no backend em lotes (ver buffer_escrita_leads).
+    """
+    backend = os.getenv("LEADS_BACKEND", "supabase").lower()
+
+    if backend == "sqlite":
+        from .sqlite_lead_repository import SQLiteLeadRepository
+        caminho = os.getenv("SQLITE_LEADS_PATH", "data/leads.db")
+        logger.info(f"🗄️ Leads no SQLite embarcado: {caminho}")
+        repositorio = SQLiteLeadRepository(caminho)
+    else:
+        if backend != "supabase":
+            logger.warning(f"⚠️ LEADS_BACKEND desconhecido '{backend}', usando supabase")
+        from .supabase_lead_repository import SupabaseLeadRepository
+        repositorio = SupabaseLeadRepository()
+
+    if os.getenv("LEADS_WRITE_BEHIND", "false").lower() == "true":
+        from .buffer_escrita_leads import LeadRepositoryComBuffer
+        caminho = os.getenv("LEADS_JOURNAL_PATH", "data/leads_journal.db")
+        logger.info(f"📥 Criação de leads em write-behind (journal: {caminho})")
+        repositorio = LeadRepositoryComBuffer(
+            repositorio,
+            caminho=caminho,
+            capacidade=int(os.getenv("LEADS_BUFFER_CAPACIDADE", "20000")),
+            lote=int(os.getenv("LEADS_BUFFER_LOTE", "500")),
+            intervalo=float(os.getenv("LEADS_BUFFER_INTERVALO", "0.2"))
+        )
+
+    return repositorio
+
+
+# Instância global do repositório
+lead_repository = criar_lead_repository()
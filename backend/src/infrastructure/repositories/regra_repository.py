@@ -0,0 +1,70 @@
+"""
+Repositório de Regras de Automação
+Leitura das automações e regras de IA ativas e gravação em lote dos
+contadores de execução, com as mesmas duas implementações dos leads:
+Supabase (produção) e SQLite embarcado (local/testes)
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+TABELAS_REGRAS = ("automacoes", "regras_ia")
+
+
+class RegraRepository(ABC):
+    """Contrato de acesso a automacoes e regras_ia para o motor de regras"""
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Se o backend está configurado e utilizável"""
+
+    @abstractmethod
+    async def listar_regras_ativas(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Automações e regras de IA ativas
+
+        Returns:
+            {"automacoes": [...], "regras_ia": [...]}
+        """
+
+    @abstractmethod
+    async def incrementar_execucoes(self, contagens: List[Dict[str, Any]]) -> int:
+        """
+        Soma execuções e grava ultima_execucao de várias regras de uma vez
+
+        Args:
+            contagens: Itens com tabela, id, execucoes (a somar) e
+                ultima_execucao (ISO 8601)
+
+        Returns:
+            Quantidade de regras atualizadas
+        """
+
+
+def criar_regra_repository() -> RegraRepository:
+    """
+    Cria o repositório configurado em REGRAS_BACKEND (padrão: o mesmo
+    de LEADS_BACKEND)
+
+    - supabase: tabelas do Supabase
+    - sqlite: banco embarcado em SQLITE_REGRAS_PATH
+    """
+    backend = os.getenv("REGRAS_BACKEND", os.getenv("LEADS_BACKEND", "supabase")).lower()
+
+    if backend == "sqlite":
+        from .sqlite_regra_repository import SQLiteRegraRepository
+        caminho = os.getenv("SQLITE_REGRAS_PATH", "data/regras.db")
+        logger.info(f"🗄️ Regras de automação no SQLite embarcado: {caminho}")
+        return SQLiteRegraRepository(caminho)
+
+    if backend != "supabase":
+        logger.warning(f"⚠️ REGRAS_BACKEND desconhecido '{backend}', usando supabase")
+    from .supabase_regra_repository import SupabaseRegraRepository
+    return SupabaseRegraRepository()
+
+
+# Instância global do repositório
+regra_repository = criar_regra_repository()
@@ -0,0 +1,93 @@
+"""
+Repositório de Renovações
+Consulta por faixa de data_vencimento (índice) das renovações ainda a
+notificar e marcação em lote dos avisos de 60/30 dias, com as mesmas
+duas implementações dos leads: Supabase (produção) e SQLite embarcado
+(local/testes)
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Colunas lidas pelo agendador
+COLUNAS_RENOVACAO = (
+    "id,corretor_id,lead_id,nome_cliente,operadora_nome,valor_atual,"
+    "data_vencimento,status,notificacao_30d,notificacao_60d,metadata"
+)
+
+# Renovações ainda em aberto (as demais nunca são notificadas)
+STATUS_ATIVOS = ("pendente", "contato_feito", "negociando")
+
+
+class RenovacaoRepository(ABC):
+    """
+    Contrato de acesso a renovacoes para o agendador de avisos.
+
+    Os avisos gravam as flags notificacao_60d/notificacao_30d,
+    notificacao_enviada_em e a oferta de reprecificação em
+    metadata.oferta_renovacao; o restante do metadata é preservado.
+    """
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Se o backend está configurado e utilizável"""
+
+    @abstractmethod
+    async def listar_renovacoes_janela(
+        self,
+        inicio: str,
+        fim: str,
+        inicio_exclusivo: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Renovações em aberto, com o aviso de 30 dias ainda não enviado,
+        que vencem no período (uma consulta pelo índice de data_vencimento)
+
+        Args:
+            inicio: Primeiro dia (AAAA-MM-DD)
+            fim: Último dia (AAAA-MM-DD, inclusivo)
+            inicio_exclusivo: Exclui o próprio dia de início (carga incremental)
+        """
+
+    @abstractmethod
+    async def marcar_notificacoes(self, avisos: List[Dict[str, Any]]) -> List[str]:
+        """
+        Marca em lote os avisos enviados
+
+        Args:
+            avisos: Itens com id, notificacao_60d, notificacao_30d e oferta
+                (dict ou None, gravada em metadata.oferta_renovacao)
+
+        Returns:
+            IDs das renovações marcadas agora; as que já tinham o aviso
+            marcado (ou saíram de aberto) ficam de fora e não são regravadas
+        """
+
+
+def criar_renovacao_repository() -> RenovacaoRepository:
+    """
+    Cria o repositório configurado em RENOVACOES_BACKEND (padrão: o
+    mesmo de LEADS_BACKEND)
+
+    - supabase: tabela renovacoes do Supabase
+    - sqlite: banco embarcado em SQLITE_RENOVACOES_PATH
+    """
+    backend = os.getenv("RENOVACOES_BACKEND", os.getenv("LEADS_BACKEND", "supabase")).lower()
+
+    if backend == "sqlite":
+        from .sqlite_renovacao_repository import SQLiteRenovacaoRepository
+        caminho = os.getenv("SQLITE_RENOVACOES_PATH", "data/renovacoes.db")
+        logger.info(f"🗄️ Renovações no SQLite embarcado: {caminho}")
+        return SQLiteRenovacaoRepository(caminho)
+
+    if backend != "supabase":
+        logger.warning(f"⚠️ RENOVACOES_BACKEND desconhecido '{backend}', usando supabase")
+    from .supabase_renovacao_repository import SupabaseRenovacaoRepository
+    return SupabaseRenovacaoRepository()
+
+
+# Instância global do repositório
+renovacao_repository = criar_renovacao_repository()
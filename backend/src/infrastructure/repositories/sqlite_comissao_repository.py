@@ -0,0 +1,239 @@
+"""
+Repositório de Comissões - SQLite embarcado
+Mesmas tabelas do Supabase (só as colunas usadas pelo motor), para
+desenvolvimento local, testes e benchmarks
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .comissao_repository import COLUNAS_PRODUCAO, ComissaoRepository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS corretores (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    comissao_padrao_pct REAL DEFAULT 100
+);
+
+CREATE TABLE IF NOT EXISTS producoes_corretor (
+    id TEXT PRIMARY KEY,
+    corretor_id TEXT NOT NULL,
+    nome_segurado TEXT NOT NULL,
+    modalidade TEXT,
+    operadora TEXT,
+    valor_mensalidade REAL DEFAULT 0,
+    data_vigencia TEXT,
+    status TEXT DEFAULT 'Implantada'
+);
+CREATE INDEX IF NOT EXISTS idx_producoes_vigencia ON producoes_corretor (data_vigencia, id);
+
+CREATE TABLE IF NOT EXISTS parcelas_comissao (
+    id TEXT PRIMARY KEY,
+    producao_id TEXT NOT NULL,
+    corretor_id TEXT NOT NULL,
+    numero_parcela INTEGER NOT NULL,
+    valor_parcela REAL NOT NULL,
+    data_vencimento TEXT NOT NULL,
+    percentual_comissao REAL DEFAULT 100,
+    status_comissao TEXT DEFAULT 'pendente',
+    mes_referencia TEXT,
+    metadata TEXT DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_parcelas_mes ON parcelas_comissao (mes_referencia, status_comissao);
+
+CREATE TABLE IF NOT EXISTS relatorios_comissao (
+    id TEXT PRIMARY KEY,
+    corretor_id TEXT NOT NULL,
+    numero_relatorio TEXT NOT NULL,
+    data_geracao TEXT NOT NULL,
+    data_previsao TEXT,
+    valor_bruto REAL DEFAULT 0,
+    valor_liquido REAL DEFAULT 0,
+    status TEXT DEFAULT 'gerado',
+    mes_referencia TEXT,
+    metadata TEXT DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_relatorios_mes ON relatorios_comissao (mes_referencia, status);
+"""
+
+COLUNAS_PARCELA = [
+    "id", "producao_id", "corretor_id", "numero_parcela", "valor_parcela",
+    "data_vencimento", "percentual_comissao", "status_comissao", "mes_referencia", "metadata"
+]
+COLUNAS_RELATORIO = [
+    "id", "corretor_id", "numero_relatorio", "data_geracao", "data_previsao",
+    "valor_bruto", "valor_liquido", "status", "mes_referencia", "metadata"
+]
+
+
+def _inserir(tabela: str, colunas: List[str]) -> str:
+    return (
+        f"INSERT OR IGNORE INTO {tabela} ({', '.join(colunas)}) "
+        f"VALUES ({', '.join('?' for _ in colunas)})"
+    )
+
+
+def _linhas(registros: List[Dict[str, Any]], colunas: List[str]) -> List[tuple]:
+    return [
+        tuple(json.dumps(r.get(c) or {}) if c == "metadata" else r.get(c) for c in colunas)
+        for r in registros
+    ]
+
+
+class SQLiteComissaoRepository(ComissaoRepository):
+    """Comissões num arquivo SQLite; uma conexão numa thread dedicada"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-comissoes")
+        self._conn: Optional[sqlite3.Connection] = None
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._executor.submit(self._abrir).result()
+
+    def _abrir(self):
+        self._conn = sqlite3.connect(self.caminho, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    async def _executar(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, funcao, self._conn)
+
+    async def _transacao(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        def executar(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcao(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return resultado
+
+        return await self._executar(executar)
+
+    def is_connected(self) -> bool:
+        return True
+
+    def encerrar(self):
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
+
+    # ==========================================
+    # Carga (desenvolvimento, testes e benchmark)
+    # ==========================================
+
+    async def inserir_corretores(self, corretores: List[Dict[str, Any]]):
+        colunas = ["id", "nome", "comissao_padrao_pct"]
+        await self._transacao(lambda conn: conn.executemany(
+            _inserir("corretores", colunas), _linhas(corretores, colunas)
+        ))
+
+    async def inserir_producoes(self, producoes: List[Dict[str, Any]]):
+        colunas = [
+            "id", "corretor_id", "nome_segurado", "modalidade", "operadora",
+            "valor_mensalidade", "data_vigencia", "status"
+        ]
+        await self._transacao(lambda conn: conn.executemany(
+            _inserir("producoes_corretor", colunas), _linhas(producoes, colunas)
+        ))
+
+    async def listar_parcelas(self, mes_referencia: str) -> List[Dict[str, Any]]:
+        def consultar(conn: sqlite3.Connection):
+            linhas = conn.execute(
+                "SELECT * FROM parcelas_comissao WHERE mes_referencia = ? "
+                "ORDER BY producao_id, numero_parcela", (mes_referencia,)
+            )
+            return [{**dict(l), "metadata": json.loads(l["metadata"])} for l in linhas]
+
+        return await self._executar(consultar)
+
+    async def listar_relatorios(self, mes_referencia: str) -> List[Dict[str, Any]]:
+        def consultar(conn: sqlite3.Connection):
+            linhas = conn.execute(
+                "SELECT * FROM relatorios_comissao WHERE mes_referencia = ? ORDER BY corretor_id",
+                (mes_referencia,)
+            )
+            return [{**dict(l), "metadata": json.loads(l["metadata"])} for l in linhas]
+
+        return await self._executar(consultar)
+
+    async def marcar_parcela_paga(self, parcela_id: str):
+        await self._transacao(lambda conn: conn.execute(
+            "UPDATE parcelas_comissao SET status_comissao = 'paga' WHERE id = ?", (parcela_id,)
+        ))
+
+    # ==========================================
+    # ComissaoRepository
+    # ==========================================
+
+    async def iterar_producoes(
+        self,
+        inicio: str,
+        fim: str,
+        tamanho_pagina: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        sql = (
+            f"SELECT {COLUNAS_PRODUCAO} FROM producoes_corretor "
+            "WHERE data_vigencia >= ? AND data_vigencia < ? AND id > ? ORDER BY id LIMIT ?"
+        )
+        ultimo_id = ""
+
+        while True:
+            parametros = (inicio, fim, ultimo_id, tamanho_pagina)
+            pagina = await self._executar(
+                lambda conn: [dict(l) for l in conn.execute(sql, parametros)]
+            )
+            if not pagina:
+                return
+            yield pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo_id = pagina[-1]["id"]
+
+    async def obter_percentuais_corretores(self, corretor_ids: List[str]) -> Dict[str, float]:
+        def consultar(conn: sqlite3.Connection):
+            percentuais = {}
+            for inicio in range(0, len(corretor_ids), 500):
+                ids = corretor_ids[inicio:inicio + 500]
+                linhas = conn.execute(
+                    f"SELECT id, comissao_padrao_pct FROM corretores "
+                    f"WHERE id IN ({', '.join('?' for _ in ids)})", ids
+                )
+                percentuais.update({l["id"]: float(l["comissao_padrao_pct"] or 0) for l in linhas})
+            return percentuais
+
+        return await self._executar(consultar)
+
+    async def gravar_comissoes_mes(
+        self,
+        mes_referencia: str,
+        parcelas: List[Dict[str, Any]],
+        relatorios: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        def gravar(conn: sqlite3.Connection):
+            conn.execute(
+                "DELETE FROM parcelas_comissao WHERE mes_referencia = ? AND status_comissao = 'pendente'",
+                (mes_referencia,)
+            )
+            conn.execute(
+                "DELETE FROM relatorios_comissao WHERE mes_referencia = ? AND status = 'gerado'",
+                (mes_referencia,)
+            )
+            conn.executemany(
+                _inserir("parcelas_comissao", COLUNAS_PARCELA), _linhas(parcelas, COLUNAS_PARCELA)
+            )
+            conn.executemany(
+                _inserir("relatorios_comissao", COLUNAS_RELATORIO), _linhas(relatorios, COLUNAS_RELATORIO)
+            )
+
+        await self._transacao(gravar)
+        return {"parcelas": len(parcelas), "relatorios": len(relatorios)}
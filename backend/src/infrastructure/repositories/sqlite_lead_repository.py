@@ -0,0 +1,592 @@
+"""
+Repositório de Leads - SQLite embarcado
+Permite rodar (e testar carga de) a API de leads sem Supabase
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .lead_repository import LeadDuplicadoError, LeadRepository, novo_lead
+from ..services.contadores_funil import ContadoresFunil
+from ..services.indice_busca_leads import IndiceBuscaLeads
+from ..services.pontuacao_leads import pontuar_lead
+from ...domain.value_objects.telefone import telefone_para_busca
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = [
+    "id", "created_at", "updated_at", "nome", "whatsapp", "email",
+    "operadora_atual", "valor_atual", "idades", "economia_estimada",
+    "valor_proposto", "tipo_contratacao", "status", "origem", "prioridade",
+    "observacoes", "dados_pdf", "historico", "atribuido_a", "arquivado", "score"
+]
+COLUNAS_JSON = {"idades", "dados_pdf", "historico"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS insurance_leads (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT,
+    nome TEXT NOT NULL,
+    whatsapp TEXT NOT NULL,
+    email TEXT,
+    operadora_atual TEXT,
+    valor_atual REAL,
+    idades TEXT NOT NULL DEFAULT '[]',
+    economia_estimada REAL,
+    valor_proposto REAL,
+    tipo_contratacao TEXT,
+    status TEXT NOT NULL DEFAULT 'novo',
+    origem TEXT DEFAULT 'scanner_pdf',
+    prioridade TEXT DEFAULT 'media',
+    observacoes TEXT,
+    dados_pdf TEXT,
+    historico TEXT DEFAULT '[]',
+    atribuido_a TEXT,
+    arquivado INTEGER NOT NULL DEFAULT 0,
+    score REAL
+);
+
+-- Keyset (listagem, exportação) e filtros mais usados
+CREATE INDEX IF NOT EXISTS idx_leads_keyset
+    ON insurance_leads (arquivado, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_status_keyset
+    ON insurance_leads (arquivado, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_whatsapp
+    ON insurance_leads (whatsapp, arquivado, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_operadora
+    ON insurance_leads (operadora_atual);
+"""
+
+# Bancos criados antes do score: coluna adicionada em _migrar
+INDICES_SCORE = """
+CREATE INDEX IF NOT EXISTS idx_leads_score
+    ON insurance_leads (arquivado, score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_status_score
+    ON insurance_leads (arquivado, status, score DESC, created_at DESC);
+"""
+
+# Um lead ativo por WhatsApp: a verificação de duplicidade da API não é
+# atômica (e o filtro de telefones de cada worker pode dispensá-la), então
+# o banco decide entre criações simultâneas do mesmo número
+INDICE_WHATSAPP_UNICO = """
+CREATE UNIQUE INDEX IF NOT EXISTS uq_leads_whatsapp_ativo
+    ON insurance_leads (whatsapp) WHERE arquivado = 0;
+"""
+
+# SQL fixo: o sqlite3 mantém os statements compilados em cache por conexão
+SQL_INSERIR = (
+    f"INSERT INTO insurance_leads ({', '.join(COLUNAS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUNAS)})"
+)
+SQL_INSERIR_SE_NOVO = SQL_INSERIR + " ON CONFLICT (id) DO NOTHING"
+SQL_POR_ID = "SELECT * FROM insurance_leads WHERE id = ?"
+SQL_POR_WHATSAPP = (
+    "SELECT * FROM insurance_leads WHERE whatsapp = ? AND arquivado = 0 "
+    "ORDER BY created_at DESC LIMIT 1"
+)
+SQL_LISTAR = (
+    "SELECT * FROM insurance_leads WHERE arquivado = 0 "
+    "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+)
+SQL_LISTAR_STATUS = (
+    "SELECT * FROM insurance_leads WHERE arquivado = 0 AND status = ? "
+    "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+)
+SQL_LISTAR_SCORE = (
+    "SELECT * FROM insurance_leads WHERE arquivado = 0 "
+    "ORDER BY score DESC, created_at DESC LIMIT ? OFFSET ?"
+)
+SQL_LISTAR_STATUS_SCORE = (
+    "SELECT * FROM insurance_leads WHERE arquivado = 0 AND status = ? "
+    "ORDER BY score DESC, created_at DESC LIMIT ? OFFSET ?"
+)
+SQL_ATUALIZAR_STATUS = (
+    "UPDATE insurance_leads SET status = ?, historico = ?, score = ?, updated_at = ? WHERE id = ?"
+)
+SQL_ATUALIZAR_SCORE = "UPDATE insurance_leads SET score = ? WHERE id = ? AND arquivado = 0"
+SQL_ATUALIZAR_ECONOMIA = (
+    "UPDATE insurance_leads SET economia_estimada = ?, updated_at = ? WHERE id = ? AND arquivado = 0"
+)
+SQL_ARQUIVAR = (
+    "UPDATE insurance_leads SET arquivado = 1, updated_at = ? WHERE id = ? AND arquivado = 0"
+)
+SQL_PIPELINE = """
+SELECT status,
+       COUNT(*) AS quantidade,
+       SUM(valor_proposto) AS valor_total,
+       AVG(valor_proposto) AS ticket_medio
+FROM insurance_leads
+WHERE arquivado = 0
+GROUP BY status
+"""
+SQL_CARGA_MEMORIA = (
+    "SELECT id, created_at, updated_at, nome, whatsapp, email, status, origem, "
+    "operadora_atual, valor_atual, economia_estimada, valor_proposto "
+    "FROM insurance_leads WHERE arquivado = 0 ORDER BY created_at, id"
+)
+
+
+def _agora() -> str:
+    """Timestamp UTC em ISO 8601 (ordenável como texto)"""
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _para_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Converte uma linha no formato devolvido pelo Supabase"""
+    lead = dict(row)
+    for coluna in COLUNAS_JSON & lead.keys():
+        if lead[coluna] is not None:
+            lead[coluna] = json.loads(lead[coluna])
+    if "arquivado" in lead:
+        lead["arquivado"] = bool(lead["arquivado"])
+    return lead
+
+
+class SQLiteLeadRepository(LeadRepository):
+    """
+    Leads num arquivo SQLite local.
+
+    - WAL: leitores não bloqueiam o escritor nem vice-versa.
+    - Conexão por thread; leituras num pool de threads e escritas numa
+      thread única (o SQLite serializa escritores de qualquer forma),
+      então o event loop nunca bloqueia em I/O de disco.
+    - Contadores do funil e índice de busca ficam em memória, montados
+      em iniciar() e atualizados a cada escrita deste processo.
+    """
+
+    def __init__(self, caminho: str, leitores: int = 4):
+        """
+        Args:
+            caminho: Arquivo do banco (criado se não existir)
+            leitores: Threads dedicadas às leituras
+        """
+        self.caminho = caminho
+        self.leitores = leitores
+        self._local = threading.local()
+        self._leitura: Optional[ThreadPoolExecutor] = None
+        self._escrita: Optional[ThreadPoolExecutor] = None
+        self.contadores = ContadoresFunil()
+        self.indice_busca = IndiceBuscaLeads()
+        self._iniciado = False
+        self._inicio: Optional[asyncio.Task] = None
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        conexao = self._conexao()
+        conexao.executescript(SCHEMA)
+        self._migrar(conexao)
+
+    @staticmethod
+    def _migrar(conn: sqlite3.Connection):
+        """Atualiza bancos criados por versões anteriores do schema"""
+        colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(insurance_leads)")}
+        if "score" not in colunas:
+            conn.execute("ALTER TABLE insurance_leads ADD COLUMN score REAL")
+        conn.executescript(INDICES_SCORE)
+        try:
+            conn.executescript(INDICE_WHATSAPP_UNICO)
+        except sqlite3.IntegrityError:
+            logger.warning(
+                "⚠️ Há leads ativos com WhatsApp repetido: índice único não criado "
+                "(arquive os duplicados e reinicie)"
+            )
+
+    def is_connected(self) -> bool:
+        return True
+
+    # ==========================================
+    # Ciclo de vida
+    # ==========================================
+
+    async def iniciar(self):
+        """Monta contadores do funil e índice de busca a partir do banco"""
+        if self._inicio is None:
+            self._inicio = asyncio.ensure_future(self._carregar_memoria())
+        await asyncio.shield(self._inicio)
+
+    async def encerrar(self):
+        """
+        Para as threads; o repositório continua utilizável (ex.: lifespan
+        reiniciado nos testes): as threads são recriadas no próximo uso e
+        a memória é recarregada do banco
+        """
+        leitura, escrita = self._leitura, self._escrita
+        self._leitura = self._escrita = None
+        self._inicio = None
+        self._iniciado = False
+        for executor in (leitura, escrita):
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    async def _carregar_memoria(self):
+        contadores = ContadoresFunil()
+        indice = IndiceBuscaLeads()
+
+        def carregar(conn: sqlite3.Connection):
+            cursor = conn.execute(SQL_CARGA_MEMORIA)
+            while True:
+                linhas = cursor.fetchmany(5000)
+                if not linhas:
+                    break
+                pagina = [_para_dict(linha) for linha in linhas]
+                contadores.incluir_existentes(pagina)
+                indice.adicionar_varios(pagina)
+
+        await self._ler(carregar)
+        contadores.carregado = True
+        self.contadores = contadores
+        self.indice_busca = indice
+        self._iniciado = True
+        logger.info(f"🗄️ SQLite carregado: {contadores.total.quantidade} leads ativos")
+
+    async def _garantir_iniciado(self):
+        if not self._iniciado:
+            await self.iniciar()
+
+    # ==========================================
+    # Execução nas threads
+    # ==========================================
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (criada na primeira utilização)"""
+        conn = getattr(self._local, "conexao", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, isolation_level=None, cached_statements=128)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA cache_size=-32000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conexao = conn
+        return conn
+
+    def _executores(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        """(leitura, escrita), criados no primeiro uso e de novo depois de encerrar()"""
+        if self._leitura is None:
+            self._leitura = ThreadPoolExecutor(max_workers=self.leitores, thread_name_prefix="sqlite-leitura")
+        if self._escrita is None:
+            self._escrita = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-escrita")
+        return self._leitura, self._escrita
+
+    async def _ler(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        leitura, _ = self._executores()
+        return await loop.run_in_executor(leitura, lambda: funcao(self._conexao()))
+
+    async def _escrever(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Executa `funcao` numa transação na thread de escrita"""
+        def em_transacao():
+            conn = self._conexao()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcao(conn)
+                conn.execute("COMMIT")
+                return resultado
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        loop = asyncio.get_running_loop()
+        _, escrita = self._executores()
+        return await loop.run_in_executor(escrita, em_transacao)
+
+    # ==========================================
+    # CRUD
+    # ==========================================
+
+    async def criar_lead(
+        self,
+        nome: str,
+        whatsapp: str,
+        email: Optional[str] = None,
+        operadora_atual: Optional[str] = None,
+        valor_atual: Optional[float] = None,
+        idades: Optional[List[int]] = None,
+        economia_estimada: Optional[float] = None,
+        valor_proposto: Optional[float] = None,
+        tipo_contratacao: Optional[str] = None,
+        observacoes: Optional[str] = None,
+        dados_pdf: Optional[Dict] = None
+    ) -> Optional[Dict[str, Any]]:
+        await self._garantir_iniciado()
+        lead = novo_lead(
+            nome=nome,
+            whatsapp=whatsapp,
+            email=email,
+            operadora_atual=operadora_atual,
+            valor_atual=valor_atual,
+            idades=idades,
+            economia_estimada=economia_estimada,
+            valor_proposto=valor_proposto,
+            tipo_contratacao=tipo_contratacao,
+            observacoes=observacoes,
+            dados_pdf=dados_pdf
+        )
+
+        try:
+            await self._escrever(lambda conn: conn.execute(SQL_INSERIR, self._parametros(lead)))
+        except sqlite3.IntegrityError as e:
+            if "whatsapp" not in str(e):
+                logger.error(f"❌ Erro ao criar lead: {e}")
+                return None
+            raise LeadDuplicadoError(whatsapp) from e
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar lead: {e}")
+            return None
+
+        self.contadores.registrar_criacao(lead)
+        self.indice_busca.adicionar(lead)
+        logger.info(f"✅ Lead criado: {lead['id']} - {nome}")
+        return lead
+
+    async def criar_leads_lote(self, leads: List[Dict[str, Any]]) -> int:
+        await self._garantir_iniciado()
+
+        def inserir(conn: sqlite3.Connection):
+            inseridos = []
+            for lead in leads:
+                if conn.execute(SQL_INSERIR_SE_NOVO, self._parametros(lead)).rowcount:
+                    inseridos.append(lead)
+            return inseridos
+
+        inseridos = await self._escrever(inserir)
+        for lead in inseridos:
+            self.contadores.registrar_criacao(lead)
+            self.indice_busca.adicionar(lead)
+        return len(inseridos)
+
+    async def buscar_lead_por_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        return await self._buscar_um(SQL_POR_ID, (lead_id,))
+
+    async def buscar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
+        return await self._buscar_um(SQL_POR_WHATSAPP, (telefone_para_busca(whatsapp),))
+
+    async def listar_leads(
+        self,
+        status: Optional[str] = None,
+        limite: int = 50,
+        offset: int = 0,
+        ordenar: str = "recentes"
+    ) -> List[Dict[str, Any]]:
+        por_score = ordenar == "score"
+        if status:
+            sql = SQL_LISTAR_STATUS_SCORE if por_score else SQL_LISTAR_STATUS
+            return await self._buscar_varios(sql, (status, limite, offset))
+        return await self._buscar_varios(SQL_LISTAR_SCORE if por_score else SQL_LISTAR, (limite, offset))
+
+    async def listar_leads_cursor(
+        self,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        cursor: Optional[Tuple[str, str]] = None,
+        limite: int = 1000,
+        colunas: str = "*"
+    ) -> List[Dict[str, Any]]:
+        selecao = "*"
+        if colunas != "*":
+            pedidas = [c.strip() for c in colunas.split(",") if c.strip()]
+            invalidas = set(pedidas) - set(COLUNAS)
+            if invalidas:
+                raise ValueError(f"Colunas inválidas: {', '.join(sorted(invalidas))}")
+            selecao = ", ".join(pedidas)
+
+        filtros = ["arquivado = 0"]
+        parametros: List[Any] = []
+        if status:
+            filtros.append("status = ?")
+            parametros.append(status)
+        if data_inicio:
+            filtros.append("created_at >= ?")
+            parametros.append(data_inicio)
+        if data_fim:
+            filtros.append("created_at < ?")
+            parametros.append(data_fim)
+        if cursor:
+            filtros.append("(created_at, id) < (?, ?)")
+            parametros.extend(cursor)
+        parametros.append(limite)
+
+        sql = (
+            f"SELECT {selecao} FROM insurance_leads WHERE {' AND '.join(filtros)} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?"
+        )
+
+        def consultar(conn: sqlite3.Connection):
+            return [_para_dict(linha) for linha in conn.execute(sql, parametros)]
+
+        return await self._ler(consultar)
+
+    async def buscar_leads(self, termo: str, limite: int = 20) -> List[Dict[str, Any]]:
+        await self._garantir_iniciado()
+        return self.indice_busca.buscar(termo, limite=min(limite, 50))
+
+    async def atualizar_status_lead(
+        self,
+        lead_id: str,
+        novo_status: str,
+        observacao: Optional[str] = None
+    ) -> bool:
+        await self._garantir_iniciado()
+
+        def atualizar(conn: sqlite3.Connection):
+            linha = conn.execute(SQL_POR_ID, (lead_id,)).fetchone()
+            if linha is None:
+                return None
+            lead_atual = _para_dict(linha)
+            historico = list(lead_atual.get("historico") or [])
+            historico.append({
+                "timestamp": datetime.now().isoformat(),
+                "evento": "mudanca_status",
+                "status_anterior": lead_atual["status"],
+                "status_novo": novo_status,
+                "observacao": observacao
+            })
+            score = pontuar_lead({**lead_atual, "status": novo_status, "historico": historico})
+            conn.execute(
+                SQL_ATUALIZAR_STATUS,
+                (novo_status, json.dumps(historico, ensure_ascii=False), score, _agora(), lead_id)
+            )
+            return lead_atual
+
+        try:
+            lead_atual = await self._escrever(atualizar)
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar status: {e}")
+            return False
+
+        if lead_atual is None:
+            return False
+
+        self.contadores.registrar_mudanca_status(lead_atual, novo_status)
+        self.indice_busca.atualizar(lead_id, status=novo_status)
+        logger.info(f"✅ Status atualizado: {lead_id} -> {novo_status}")
+        return True
+
+    async def atualizar_economia_lote(self, atualizacoes: List[Tuple[Dict[str, Any], float]]) -> int:
+        await self._garantir_iniciado()
+        agora = _agora()
+        parametros = [(economia, agora, lead["id"]) for lead, economia in atualizacoes]
+
+        atualizados = await self._escrever(
+            lambda conn: conn.executemany(SQL_ATUALIZAR_ECONOMIA, parametros).rowcount
+        )
+        for lead, economia in atualizacoes:
+            self.contadores.registrar_atualizacao(lead, economia_estimada=economia)
+        return atualizados
+
+    async def atualizar_scores_lote(self, scores: List[Tuple[str, float]]) -> int:
+        parametros = [(score, lead_id) for lead_id, score in scores]
+        return await self._escrever(
+            lambda conn: conn.executemany(SQL_ATUALIZAR_SCORE, parametros).rowcount
+        )
+
+    async def arquivar_lead(self, lead_id: str) -> bool:
+        await self._garantir_iniciado()
+
+        def arquivar(conn: sqlite3.Connection):
+            linha = conn.execute(SQL_POR_ID, (lead_id,)).fetchone()
+            if linha is None:
+                return None, False
+            lead = _para_dict(linha)
+            if lead["arquivado"]:
+                return lead, False
+            conn.execute(SQL_ARQUIVAR, (_agora(), lead_id))
+            return lead, True
+
+        try:
+            lead, arquivado_agora = await self._escrever(arquivar)
+        except Exception as e:
+            logger.error(f"❌ Erro ao arquivar lead: {e}")
+            return False
+
+        if lead is None:
+            return False
+        if arquivado_agora:
+            self.contadores.registrar_arquivamento(lead)
+            self.indice_busca.remover(lead_id)
+        return True
+
+    # ==========================================
+    # Estatísticas
+    # ==========================================
+
+    async def obter_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        await self._garantir_iniciado()
+        return self.contadores.dashboard_stats()
+
+    async def obter_leads_por_operadora(self) -> List[Dict[str, Any]]:
+        await self._garantir_iniciado()
+        return self.contadores.leads_por_operadora()
+
+    async def obter_pipeline_vendas(self) -> List[Dict[str, Any]]:
+        await self._garantir_iniciado()
+        return self.contadores.pipeline_vendas()
+
+    def idade_estatisticas(self, chave: str) -> Optional[float]:
+        return 0.0 if self._iniciado else None
+
+    async def reconciliar_contadores(self) -> Dict[str, Any]:
+        """Confere os contadores contra um GROUP BY na tabela"""
+        await self._garantir_iniciado()
+        pipeline = await self._buscar_varios(SQL_PIPELINE, ())
+        divergencias = self.contadores.divergencias(pipeline)
+
+        if divergencias:
+            logger.warning(f"⚠️ Contadores do funil divergentes: {divergencias}")
+            self._inicio = None
+            self._iniciado = False
+            await self.iniciar()
+
+        return {"consistente": not divergencias, "divergencias": divergencias}
+
+    def metricas_cache(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "busca": {"leads_indexados": len(self.indice_busca)},
+            "estatisticas": {"fonte": "contadores" if self._iniciado else None}
+        }
+
+    # ==========================================
+    # Auxiliares
+    # ==========================================
+
+    async def _buscar_um(self, sql: str, parametros: tuple) -> Optional[Dict[str, Any]]:
+        def consultar(conn: sqlite3.Connection):
+            linha = conn.execute(sql, parametros).fetchone()
+            return _para_dict(linha) if linha else None
+
+        try:
+            return await self._ler(consultar)
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar lead: {e}")
+            return None
+
+    async def _buscar_varios(self, sql: str, parametros: tuple) -> List[Dict[str, Any]]:
+        def consultar(conn: sqlite3.Connection):
+            return [_para_dict(linha) for linha in conn.execute(sql, parametros)]
+
+        try:
+            return await self._ler(consultar)
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar leads: {e}")
+            return []
+
+    @staticmethod
+    def _parametros(lead: Dict[str, Any]) -> tuple:
+        """Valores do lead na ordem de COLUNAS, com JSON serializado"""
+        return tuple(
+            json.dumps(lead[c], ensure_ascii=False) if c in COLUNAS_JSON
+            else int(lead[c]) if c == "arquivado"
+            else lead.get(c)
+            for c in COLUNAS
+        )
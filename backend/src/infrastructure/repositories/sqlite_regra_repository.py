@@ -0,0 +1,162 @@
+"""
+Repositório de Regras de Automação - SQLite embarcado
+Mesmas tabelas do Supabase (só as colunas usadas pelo motor), para
+desenvolvimento local, testes e benchmarks
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .regra_repository import TABELAS_REGRAS, RegraRepository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS automacoes (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    trigger_evento TEXT NOT NULL,
+    acoes TEXT DEFAULT '[]',
+    ativa INTEGER NOT NULL DEFAULT 1,
+    execucoes INTEGER NOT NULL DEFAULT 0,
+    ultima_execucao TEXT,
+    metadata TEXT DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS regras_ia (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    categoria TEXT NOT NULL DEFAULT 'automacao',
+    ativa INTEGER NOT NULL DEFAULT 1,
+    condicao TEXT NOT NULL,
+    acao TEXT NOT NULL,
+    execucoes INTEGER NOT NULL DEFAULT 0,
+    ultima_execucao TEXT,
+    metadata TEXT DEFAULT '{}'
+);
+"""
+
+COLUNAS = {
+    "automacoes": ["id", "nome", "trigger_evento", "acoes", "ativa", "metadata"],
+    "regras_ia": ["id", "nome", "categoria", "condicao", "acao", "ativa", "metadata"],
+}
+CAMPOS_JSON = ("acoes", "metadata")
+
+
+def _regra(linha: sqlite3.Row) -> Dict[str, Any]:
+    regra = dict(linha)
+    for campo in CAMPOS_JSON:
+        if campo in regra:
+            regra[campo] = json.loads(regra[campo] or "null")
+    return regra
+
+
+class SQLiteRegraRepository(RegraRepository):
+    """Regras num arquivo SQLite; uma conexão numa thread dedicada"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-regras")
+        self._conn: Optional[sqlite3.Connection] = None
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._executor.submit(self._abrir).result()
+
+    def _abrir(self):
+        self._conn = sqlite3.connect(self.caminho, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    async def _executar(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, funcao, self._conn)
+
+    async def _transacao(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        def executar(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcao(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return resultado
+
+        return await self._executar(executar)
+
+    def is_connected(self) -> bool:
+        return True
+
+    def encerrar(self):
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
+
+    # ==========================================
+    # Carga (desenvolvimento, testes e benchmark)
+    # ==========================================
+
+    async def inserir_regras(self, tabela: str, regras: List[Dict[str, Any]]):
+        colunas = COLUNAS[tabela]
+        sql = (
+            f"INSERT OR REPLACE INTO {tabela} ({', '.join(colunas)}) "
+            f"VALUES ({', '.join('?' for _ in colunas)})"
+        )
+        linhas = [
+            tuple(
+                str(r.get("id") or uuid.uuid4()) if c == "id"
+                else int(r.get("ativa", True)) if c == "ativa"
+                else json.dumps(r.get(c) or ([] if c == "acoes" else {})) if c in CAMPOS_JSON
+                else r.get(c)
+                for c in colunas
+            )
+            for r in regras
+        ]
+        await self._transacao(lambda conn: conn.executemany(sql, linhas))
+
+    async def obter_contadores(self, tabela: str) -> Dict[str, Dict[str, Any]]:
+        return await self._executar(lambda conn: {
+            l["id"]: {"execucoes": l["execucoes"], "ultima_execucao": l["ultima_execucao"]}
+            for l in conn.execute(f"SELECT id, execucoes, ultima_execucao FROM {tabela}")
+        })
+
+    # ==========================================
+    # RegraRepository
+    # ==========================================
+
+    async def listar_regras_ativas(self) -> Dict[str, List[Dict[str, Any]]]:
+        def consultar(conn: sqlite3.Connection):
+            return {
+                tabela: [
+                    _regra(l) for l in conn.execute(
+                        f"SELECT {', '.join(c for c in COLUNAS[tabela] if c != 'ativa')} "
+                        f"FROM {tabela} WHERE ativa = 1 ORDER BY rowid"
+                    )
+                ]
+                for tabela in TABELAS_REGRAS
+            }
+
+        return await self._executar(consultar)
+
+    async def incrementar_execucoes(self, contagens: List[Dict[str, Any]]) -> int:
+        def gravar(conn: sqlite3.Connection):
+            atualizadas = 0
+            for tabela in TABELAS_REGRAS:
+                linhas = [
+                    (c["execucoes"], c["ultima_execucao"], c["id"])
+                    for c in contagens if c["tabela"] == tabela
+                ]
+                if linhas:
+                    atualizadas += conn.executemany(
+                        f"UPDATE {tabela} SET execucoes = execucoes + ?, ultima_execucao = ? WHERE id = ?",
+                        linhas
+                    ).rowcount
+            return atualizadas
+
+        if not contagens:
+            return 0
+        return await self._transacao(gravar)
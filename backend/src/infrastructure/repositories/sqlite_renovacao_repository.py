@@ -0,0 +1,182 @@
+"""
+Repositório de Renovações - SQLite embarcado
+Mesma tabela do Supabase (só as colunas usadas pelo agendador), para
+desenvolvimento local, testes e benchmarks
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .renovacao_repository import COLUNAS_RENOVACAO, STATUS_ATIVOS, RenovacaoRepository
+
+_ATIVOS = ", ".join(f"'{s}'" for s in STATUS_ATIVOS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS renovacoes (
+    id TEXT PRIMARY KEY,
+    corretor_id TEXT NOT NULL,
+    proposta_id TEXT,
+    lead_id TEXT,
+    nome_cliente TEXT NOT NULL,
+    operadora_nome TEXT,
+    valor_atual REAL,
+    data_vencimento TEXT NOT NULL,
+    status TEXT DEFAULT 'pendente',
+    notificacao_30d INTEGER DEFAULT 0,
+    notificacao_60d INTEGER DEFAULT 0,
+    notificacao_enviada_em TEXT,
+    metadata TEXT DEFAULT '{{}}'
+);
+CREATE INDEX IF NOT EXISTS idx_renovacoes_a_notificar
+    ON renovacoes (data_vencimento, id)
+    WHERE notificacao_30d = 0 AND status IN ({_ATIVOS});
+"""
+
+COLUNAS_CARGA = [
+    "id", "corretor_id", "proposta_id", "lead_id", "nome_cliente", "operadora_nome",
+    "valor_atual", "data_vencimento", "status", "notificacao_30d", "notificacao_60d", "metadata"
+]
+
+SQL_JANELA = (
+    f"SELECT {COLUNAS_RENOVACAO.replace(',', ', ')} FROM renovacoes "
+    f"WHERE notificacao_30d = 0 AND status IN ({_ATIVOS}) "
+    "AND data_vencimento {operador} ? AND data_vencimento <= ? "
+    "ORDER BY data_vencimento, id"
+)
+
+SQL_MARCAR = (
+    "UPDATE renovacoes SET "
+    "notificacao_60d = MAX(notificacao_60d, ?), "
+    "notificacao_30d = MAX(notificacao_30d, ?), "
+    "notificacao_enviada_em = strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), "
+    "metadata = CASE WHEN ? IS NULL THEN metadata "
+    "ELSE json_set(COALESCE(metadata, '{}'), '$.oferta_renovacao', json(?)) END "
+    f"WHERE id = ? AND status IN ({_ATIVOS}) "
+    # Só se o aviso ainda não foi marcado (tick repetido ou de outro worker)
+    "AND NOT CASE WHEN ? THEN notificacao_30d ELSE notificacao_60d END "
+    "RETURNING id"
+)
+
+
+def _renovacao(linha: sqlite3.Row) -> Dict[str, Any]:
+    renovacao = dict(linha)
+    renovacao["notificacao_30d"] = bool(renovacao["notificacao_30d"])
+    renovacao["notificacao_60d"] = bool(renovacao["notificacao_60d"])
+    renovacao["metadata"] = json.loads(renovacao["metadata"] or "{}")
+    return renovacao
+
+
+class SQLiteRenovacaoRepository(RenovacaoRepository):
+    """Renovações num arquivo SQLite; uma conexão numa thread dedicada"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-renovacoes")
+        self._conn: Optional[sqlite3.Connection] = None
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._executor.submit(self._abrir).result()
+
+    def _abrir(self):
+        self._conn = sqlite3.connect(self.caminho, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    async def _executar(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, funcao, self._conn)
+
+    async def _transacao(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        def executar(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcao(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return resultado
+
+        return await self._executar(executar)
+
+    def is_connected(self) -> bool:
+        return True
+
+    def encerrar(self):
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
+
+    # ==========================================
+    # Carga (desenvolvimento, testes e benchmark)
+    # ==========================================
+
+    async def inserir_renovacoes(self, renovacoes: List[Dict[str, Any]]):
+        sql = (
+            f"INSERT OR REPLACE INTO renovacoes ({', '.join(COLUNAS_CARGA)}) "
+            f"VALUES ({', '.join('?' for _ in COLUNAS_CARGA)})"
+        )
+        linhas = [
+            tuple(
+                json.dumps(r.get(c) or {}) if c == "metadata"
+                else r.get(c, "pendente") if c == "status"
+                else int(bool(r.get(c))) if c.startswith("notificacao_")
+                else r.get(c)
+                for c in COLUNAS_CARGA
+            )
+            for r in renovacoes
+        ]
+        await self._transacao(lambda conn: conn.executemany(sql, linhas))
+
+    async def buscar_renovacao(self, renovacao_id: str) -> Optional[Dict[str, Any]]:
+        def consultar(conn: sqlite3.Connection):
+            linha = conn.execute(
+                f"SELECT {COLUNAS_RENOVACAO}, notificacao_enviada_em FROM renovacoes WHERE id = ?",
+                (renovacao_id,)
+            ).fetchone()
+            return _renovacao(linha) if linha else None
+
+        return await self._executar(consultar)
+
+    # ==========================================
+    # RenovacaoRepository
+    # ==========================================
+
+    async def listar_renovacoes_janela(
+        self,
+        inicio: str,
+        fim: str,
+        inicio_exclusivo: bool = False
+    ) -> List[Dict[str, Any]]:
+        sql = SQL_JANELA.format(operador=">" if inicio_exclusivo else ">=")
+        return await self._executar(
+            lambda conn: [_renovacao(l) for l in conn.execute(sql, (inicio, fim))]
+        )
+
+    async def marcar_notificacoes(self, avisos: List[Dict[str, Any]]) -> List[str]:
+        linhas = []
+        for aviso in avisos:
+            oferta = json.dumps(aviso["oferta"]) if aviso.get("oferta") is not None else None
+            linhas.append((
+                int(bool(aviso.get("notificacao_60d"))),
+                int(bool(aviso.get("notificacao_30d"))),
+                oferta, oferta, aviso["id"],
+                int(bool(aviso.get("notificacao_30d")))
+            ))
+
+        def marcar(conn: sqlite3.Connection):
+            marcadas = []
+            for linha in linhas:
+                marcada = conn.execute(SQL_MARCAR, linha).fetchone()
+                if marcada:
+                    marcadas.append(marcada["id"])
+            return marcadas
+
+        if not linhas:
+            return []
+        return await self._transacao(marcar)
@@ -0,0 +1,108 @@
+"""
+Repositório de Comissões - Supabase
+producoes_corretor, corretores, parcelas_comissao e relatorios_comissao
+via PostgREST. O cliente do Supabase é síncrono: cada chamada roda numa
+thread para o job em background não travar o event loop.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .comissao_repository import COLUNAS_PRODUCAO, ComissaoRepository
+from ..container import container
+from ..services.supabase_service import SupabaseService
+
+logger = logging.getLogger(__name__)
+
+# Linhas por INSERT na preparação (o corpo da requisição cresce linearmente)
+LOTE_ESCRITA = 5000
+
+
+class SupabaseComissaoRepository(ComissaoRepository):
+    """Comissões nas tabelas do módulo do corretor no Supabase"""
+
+    def __init__(self, service: Optional[SupabaseService] = None):
+        self._service = service
+
+    @property
+    def service(self) -> SupabaseService:
+        """SupabaseService do container, criado no primeiro uso"""
+        if self._service is None:
+            self._service = container.supabase_service
+        return self._service
+
+    @property
+    def client(self):
+        return self.service.client
+
+    def is_connected(self) -> bool:
+        return self.service.is_connected()
+
+    async def iterar_producoes(
+        self,
+        inicio: str,
+        fim: str,
+        tamanho_pagina: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        ultimo_id: Optional[str] = None
+
+        while True:
+            query = self.client.table("producoes_corretor")\
+                .select(COLUNAS_PRODUCAO)\
+                .gte("data_vigencia", inicio)\
+                .lt("data_vigencia", fim)\
+                .order("id")\
+                .limit(tamanho_pagina)
+            if ultimo_id:
+                query = query.gt("id", ultimo_id)
+
+            pagina = (await asyncio.to_thread(query.execute)).data or []
+            if not pagina:
+                return
+            yield pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo_id = pagina[-1]["id"]
+
+    async def obter_percentuais_corretores(self, corretor_ids: List[str]) -> Dict[str, float]:
+        percentuais: Dict[str, float] = {}
+        # IDs vão na URL: blocos pequenos para não estourar o limite do gateway
+        for inicio in range(0, len(corretor_ids), 200):
+            query = self.client.table("corretores")\
+                .select("id,comissao_padrao_pct")\
+                .in_("id", corretor_ids[inicio:inicio + 200])
+            for linha in (await asyncio.to_thread(query.execute)).data or []:
+                percentuais[linha["id"]] = float(linha["comissao_padrao_pct"] or 0)
+        return percentuais
+
+    async def gravar_comissoes_mes(
+        self,
+        mes_referencia: str,
+        parcelas: List[Dict[str, Any]],
+        relatorios: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        def executar():
+            # Os lotes vão para a preparação; a troca do mês é uma transação só
+            # (RPC substituir_comissoes_mes): uma falha no meio não apaga nada
+            geracao = str(uuid.uuid4())
+            try:
+                for tabela, registros in (("parcelas_comissao", parcelas), ("relatorios_comissao", relatorios)):
+                    for inicio in range(0, len(registros), LOTE_ESCRITA):
+                        self.client.table("comissoes_preparacao").insert([
+                            {"geracao": geracao, "tabela": tabela, "registro": registro}
+                            for registro in registros[inicio:inicio + LOTE_ESCRITA]
+                        ]).execute()
+                self.client.rpc("substituir_comissoes_mes", {
+                    "p_mes_referencia": mes_referencia,
+                    "p_geracao": geracao
+                }).execute()
+            except Exception:
+                try:
+                    self.client.table("comissoes_preparacao").delete().eq("geracao", geracao).execute()
+                except Exception as e:
+                    logger.warning(f"⚠️ Preparação de comissões {geracao} não removida (a RPC descarta depois): {e}")
+                raise
+
+        await asyncio.to_thread(executar)
+        return {"parcelas": len(parcelas), "relatorios": len(relatorios)}
@@ -0,0 +1,142 @@
+"""
+Repositório de Leads - Supabase
+Adapta o SupabaseService (com seus caches e contadores) ao LeadRepository
+"""
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lead_repository import LeadDuplicadoError, LeadRepository
+from ..container import container
+from ..services.supabase_service import CODIGO_VIOLACAO_UNICA, SupabaseService
+from ...domain.value_objects.telefone import telefone_para_busca
+
+
+class SupabaseLeadRepository(LeadRepository):
+    """Leads em insurance_leads no Supabase (PostgREST)"""
+
+    def __init__(self, service: Optional[SupabaseService] = None):
+        self._service = service
+        self._tarefas: List[asyncio.Task] = []
+
+    @property
+    def service(self) -> SupabaseService:
+        """SupabaseService do container, criado no primeiro uso"""
+        if self._service is None:
+            self._service = container.supabase_service
+        return self._service
+
+    def is_connected(self) -> bool:
+        return self.service.is_connected()
+
+    async def iniciar(self):
+        """Carrega os contadores do funil e agenda a reconciliação periódica"""
+        if not self.is_connected():
+            return
+        if os.getenv("FUNIL_CONTADORES", "true").lower() != "true":
+            return
+
+        await self.service.reconstruir_contadores()
+        intervalo = float(os.getenv("FUNIL_RECONCILIACAO_SEGUNDOS", "300"))
+        self._tarefas.append(
+            asyncio.create_task(self.service.reconciliar_periodicamente(intervalo))
+        )
+
+    async def encerrar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        self._tarefas.clear()
+
+    async def criar_lead(self, **campos) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.service.criar_lead(**campos)
+        except Exception as e:
+            if getattr(e, "code", None) == CODIGO_VIOLACAO_UNICA:
+                raise LeadDuplicadoError(campos["whatsapp"]) from e
+            raise
+
+    async def criar_leads_lote(self, leads: List[Dict[str, Any]]) -> int:
+        return await self.service.criar_leads_lote(leads)
+
+    async def buscar_lead_por_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        return await self.service.buscar_lead_por_id(lead_id)
+
+    async def buscar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
+        return await self.service.buscar_lead_por_whatsapp(telefone_para_busca(whatsapp))
+
+    async def listar_leads(
+        self,
+        status: Optional[str] = None,
+        limite: int = 50,
+        offset: int = 0,
+        ordenar: str = "recentes"
+    ) -> List[Dict[str, Any]]:
+        return await self.service.listar_leads(status=status, limite=limite, offset=offset, ordenar=ordenar)
+
+    async def listar_leads_cursor(
+        self,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        cursor: Optional[Tuple[str, str]] = None,
+        limite: int = 1000,
+        colunas: str = "*"
+    ) -> List[Dict[str, Any]]:
+        return await self.service.listar_leads_cursor(
+            status=status,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            cursor=cursor,
+            limite=limite,
+            colunas=colunas
+        )
+
+    async def buscar_leads(self, termo: str, limite: int = 20) -> List[Dict[str, Any]]:
+        return await self.service.buscar_leads(termo=termo, limite=limite)
+
+    async def atualizar_status_lead(
+        self,
+        lead_id: str,
+        novo_status: str,
+        observacao: Optional[str] = None
+    ) -> bool:
+        return await self.service.atualizar_status_lead(
+            lead_id=lead_id,
+            novo_status=novo_status,
+            observacao=observacao
+        )
+
+    async def atualizar_economia_lote(self, atualizacoes: List[Tuple[Dict[str, Any], float]]) -> int:
+        return await self.service.atualizar_economia_lote(atualizacoes)
+
+    async def atualizar_scores_lote(self, scores: List[Tuple[str, float]]) -> int:
+        return await self.service.atualizar_scores_lote(scores)
+
+    async def arquivar_lead(self, lead_id: str) -> bool:
+        return await self.service.arquivar_lead(lead_id)
+
+    async def obter_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        return await self.service.obter_dashboard_stats()
+
+    async def obter_leads_por_operadora(self) -> List[Dict[str, Any]]:
+        return await self.service.obter_leads_por_operadora()
+
+    async def obter_pipeline_vendas(self) -> List[Dict[str, Any]]:
+        return await self.service.obter_pipeline_vendas()
+
+    def idade_estatisticas(self, chave: str) -> Optional[float]:
+        return self.service.idade_estatisticas(chave)
+
+    async def reconciliar_contadores(self) -> Dict[str, Any]:
+        return await self.service.reconciliar_contadores()
+
+    def metricas_cache(self) -> Dict[str, Any]:
+        return {
+            "backend": "supabase",
+            "leads": self.service.cache_leads.metricas(),
+            "estatisticas": {
+                "fonte": "contadores" if self.service.contadores.carregado else "cache",
+                "ttl_segundos": self.service.cache_estatisticas.ttl,
+                "stale_segundos": self.service.cache_estatisticas.janela_stale
+            }
+        }
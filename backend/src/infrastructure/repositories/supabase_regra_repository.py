@@ -0,0 +1,58 @@
+"""
+Repositório de Regras de Automação - Supabase
+automacoes e regras_ia via PostgREST. O cliente do Supabase é síncrono:
+cada chamada roda numa thread para o motor não travar o event loop.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .regra_repository import TABELAS_REGRAS, RegraRepository
+from ..container import container
+from ..services.supabase_service import SupabaseService
+
+COLUNAS = {
+    "automacoes": "id,nome,trigger_evento,acoes,metadata",
+    "regras_ia": "id,nome,categoria,condicao,acao,metadata",
+}
+
+
+class SupabaseRegraRepository(RegraRepository):
+    """Regras nas tabelas automacoes e regras_ia do Supabase"""
+
+    def __init__(self, service: Optional[SupabaseService] = None):
+        self._service = service
+
+    @property
+    def service(self) -> SupabaseService:
+        """SupabaseService do container, criado no primeiro uso"""
+        if self._service is None:
+            self._service = container.supabase_service
+        return self._service
+
+    @property
+    def client(self):
+        return self.service.client
+
+    def is_connected(self) -> bool:
+        return self.service.is_connected()
+
+    async def listar_regras_ativas(self) -> Dict[str, List[Dict[str, Any]]]:
+        def consultar():
+            return {
+                tabela: self.client.table(tabela)
+                    .select(COLUNAS[tabela])
+                    .eq("ativa", True)
+                    .order("created_at")
+                    .execute().data or []
+                for tabela in TABELAS_REGRAS
+            }
+
+        return await asyncio.to_thread(consultar)
+
+    async def incrementar_execucoes(self, contagens: List[Dict[str, Any]]) -> int:
+        if not contagens:
+            return 0
+        response = await asyncio.to_thread(
+            self.client.rpc("incrementar_execucoes_regras", {"p_contagens": contagens}).execute
+        )
+        return int(response.data or 0)
@@ -0,0 +1,77 @@
+"""
+Repositório de Renovações - Supabase
+renovacoes via PostgREST. O cliente do Supabase é síncrono: cada chamada
+roda numa thread para o agendador não travar o event loop.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .renovacao_repository import COLUNAS_RENOVACAO, STATUS_ATIVOS, RenovacaoRepository
+from ..container import container
+from ..services.supabase_service import SupabaseService
+
+# Linhas por página (limite de linhas por resposta do PostgREST)
+TAMANHO_PAGINA = 1000
+
+# Avisos por chamada da RPC
+LOTE_ESCRITA = 2000
+
+
+class SupabaseRenovacaoRepository(RenovacaoRepository):
+    """Renovações na tabela renovacoes do Supabase"""
+
+    def __init__(self, service: Optional[SupabaseService] = None):
+        self._service = service
+
+    @property
+    def service(self) -> SupabaseService:
+        """SupabaseService do container, criado no primeiro uso"""
+        if self._service is None:
+            self._service = container.supabase_service
+        return self._service
+
+    @property
+    def client(self):
+        return self.service.client
+
+    def is_connected(self) -> bool:
+        return self.service.is_connected()
+
+    async def listar_renovacoes_janela(
+        self,
+        inicio: str,
+        fim: str,
+        inicio_exclusivo: bool = False
+    ) -> List[Dict[str, Any]]:
+        def consultar():
+            renovacoes: List[Dict[str, Any]] = []
+            while True:
+                query = self.client.table("renovacoes")\
+                    .select(COLUNAS_RENOVACAO)\
+                    .in_("status", list(STATUS_ATIVOS))\
+                    .eq("notificacao_30d", False)\
+                    .lte("data_vencimento", fim)
+                query = query.gt("data_vencimento", inicio) if inicio_exclusivo \
+                    else query.gte("data_vencimento", inicio)
+                pagina = query.order("data_vencimento").order("id")\
+                    .range(len(renovacoes), len(renovacoes) + TAMANHO_PAGINA - 1)\
+                    .execute().data or []
+                renovacoes.extend(pagina)
+                if len(pagina) < TAMANHO_PAGINA:
+                    return renovacoes
+
+        return await asyncio.to_thread(consultar)
+
+    async def marcar_notificacoes(self, avisos: List[Dict[str, Any]]) -> List[str]:
+        def executar():
+            marcadas = []
+            for inicio in range(0, len(avisos), LOTE_ESCRITA):
+                response = self.client.rpc("marcar_notificacoes_renovacoes", {
+                    "p_avisos": avisos[inicio:inicio + LOTE_ESCRITA]
+                }).execute()
+                marcadas.extend(str(linha["renovacao_id"]) for linha in response.data or [])
+            return marcadas
+
+        if not avisos:
+            return []
+        return await asyncio.to_thread(executar)
@@ -0,0 +1,233 @@
+"""
+Controle de admissão
+Limita, por worker, quantas requisições de cada classe rodam ao mesmo
+tempo, para uma rajada de extrações de PDF (CPU + cota do LLM) não
+derrubar as rotas baratas (cotação, leads) do mesmo processo:
+
+- rotas caras têm um teto próprio de concorrência e nunca ocupam a
+  parcela da capacidade reservada às baratas;
+- quem não cabe espera numa fila com prazo; as baratas são atendidas
+  antes das caras quando uma vaga abre;
+- fila cheia → 429, prazo esgotado → 503, ambos com Retry-After;
+- cada cliente tem um balde de tokens por classe (taxa + rajada).
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from .metricas import RegistroMetricas, metricas as registro_padrao
+
+CARA = "cara"
+BARATA = "barata"
+CLASSES = (BARATA, CARA)  # ordem de prioridade ao liberar vagas
+
+# Duração presumida de uma requisição cara antes de haver medições (Retry-After)
+DURACAO_INICIAL_CARA = 10.0
+
+
+class AdmissaoRecusada(Exception):
+    """Requisição não admitida (status HTTP e segundos sugeridos para tentar de novo)"""
+
+    def __init__(self, classe: str, motivo: str, status: int, retry_after: int):
+        super().__init__(f"Requisição {classe} recusada: {motivo}")
+        self.classe = classe
+        self.motivo = motivo
+        self.status = status
+        self.retry_after = retry_after
+
+
+class BaldeTokens:
+    """Limite de taxa por cliente: `taxa` tokens por segundo, até `rajada` acumulados"""
+
+    def __init__(
+        self,
+        taxa: float,
+        rajada: float,
+        maximo_clientes: int = 10000,
+        relogio: Callable[[], float] = time.monotonic
+    ):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.maximo_clientes = maximo_clientes
+        self._relogio = relogio
+        self._baldes: Dict[str, Tuple[float, float]] = {}
+
+    def consumir(self, cliente: str) -> float:
+        """Consome um token; 0 se havia, senão segundos até o próximo"""
+        agora = self._relogio()
+        tokens, instante = self._baldes.get(cliente, (self.rajada, agora))
+        tokens = min(self.rajada, tokens + (agora - instante) * self.taxa)
+        if tokens < 1:
+            self._baldes[cliente] = (tokens, agora)
+            return (1 - tokens) / self.taxa
+
+        self._baldes[cliente] = (tokens - 1, agora)
+        if len(self._baldes) > self.maximo_clientes:
+            self._podar(agora)
+        return 0.0
+
+    def _podar(self, agora: float):
+        """Descarta baldes já cheios (equivalem a cliente novo) e, se preciso, os mais antigos"""
+        for cliente, (tokens, instante) in list(self._baldes.items()):
+            if tokens + (agora - instante) * self.taxa >= self.rajada:
+                del self._baldes[cliente]
+        while len(self._baldes) > self.maximo_clientes:
+            del self._baldes[next(iter(self._baldes))]
+
+
+class ControleAdmissao:
+    """Vagas de execução por classe de rota, com fila priorizada e prazo"""
+
+    def __init__(
+        self,
+        capacidade: int = 64,
+        reserva_baratas: float = 0.25,
+        limite_caras: int = 4,
+        fila_maxima: int = 16,
+        espera_maxima: float = 15.0,
+        registro: RegistroMetricas = None
+    ):
+        """
+        Args:
+            capacidade: Requisições simultâneas no worker (todas as classes)
+            reserva_baratas: Fração da capacidade que as caras nunca ocupam
+            limite_caras: Requisições caras simultâneas no worker
+            fila_maxima: Requisições esperando, por classe; além disso → 429
+            espera_maxima: Segundos na fila antes de desistir com 503
+            registro: Registro de métricas (padrão: o global)
+        """
+        self.capacidade = capacidade
+        self.reserva = math.ceil(capacidade * reserva_baratas)
+        self.limite_caras = max(1, min(limite_caras, capacidade - self.reserva))
+        self.fila_maxima = fila_maxima
+        self.espera_maxima = espera_maxima
+        self.ativos: Dict[str, int] = {classe: 0 for classe in CLASSES}
+        self.filas: Dict[str, Deque[asyncio.Future]] = {classe: deque() for classe in CLASSES}
+        self._duracao_media: Dict[str, Optional[float]] = {CARA: None, BARATA: None}
+
+        registro = registro or registro_padrao
+        self._espera = registro.histograma(
+            "admissao_espera_seconds",
+            "Tempo na fila de admissão por classe de rota",
+            ("classe",)
+        )
+        self._recusas = registro.contador(
+            "admissao_recusas_total",
+            "Requisições recusadas pelo controle de admissão",
+            ("classe", "motivo")
+        )
+        # Gauges lidos na coleta; vale a instância mais nova
+        registro.gauge(
+            "admissao_em_andamento", "Requisições admitidas em execução", ("classe",), self._coletar_ativos
+        ).coletar = self._coletar_ativos
+        registro.gauge(
+            "admissao_fila", "Requisições esperando admissão", ("classe",), self._coletar_filas
+        ).coletar = self._coletar_filas
+
+    def _coletar_ativos(self) -> Dict[Tuple[str, ...], float]:
+        return {(classe,): ativos for classe, ativos in self.ativos.items()}
+
+    def _coletar_filas(self) -> Dict[Tuple[str, ...], float]:
+        return {(classe,): len(fila) for classe, fila in self.filas.items()}
+
+    def _cabe(self, classe: str) -> bool:
+        total = self.ativos[CARA] + self.ativos[BARATA]
+        if classe == CARA:
+            return self.ativos[CARA] < self.limite_caras and total < self.capacidade - self.reserva
+        return total < self.capacidade
+
+    def retry_after(self, classe: str) -> int:
+        """Segundos sugeridos até haver vaga (fila atual / vazão estimada)"""
+        if classe == BARATA:
+            return 1
+        duracao = self._duracao_media[CARA] or DURACAO_INICIAL_CARA
+        return max(1, math.ceil(duracao * (len(self.filas[CARA]) + 1) / self.limite_caras))
+
+    def recusar(self, classe: str, motivo: str, status: int, retry_after: int) -> AdmissaoRecusada:
+        self._recusas.incrementar(classe, motivo)
+        return AdmissaoRecusada(classe, motivo, status, retry_after)
+
+    async def adquirir(self, classe: str):
+        """
+        Ocupa uma vaga da classe, esperando na fila se preciso
+
+        Raises:
+            AdmissaoRecusada: Fila cheia (429) ou prazo esgotado (503)
+        """
+        fila = self.filas[classe]
+        if not fila and self._cabe(classe):
+            self.ativos[classe] += 1
+            self._espera.observar(0.0, classe)
+            return
+
+        if len(fila) >= self.fila_maxima:
+            raise self.recusar(classe, "fila_cheia", 429, self.retry_after(classe))
+
+        vaga = asyncio.get_running_loop().create_future()
+        fila.append(vaga)
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait((vaga,), timeout=self.espera_maxima)
+        except asyncio.CancelledError:
+            self._desistir(classe, vaga)
+            raise
+
+        if not vaga.done():
+            self._desistir(classe, vaga)
+            raise self.recusar(classe, "prazo", 503, self.retry_after(classe))
+        self._espera.observar(time.perf_counter() - inicio, classe)
+
+    def _desistir(self, classe: str, vaga: asyncio.Future):
+        if vaga.done() and not vaga.cancelled():
+            # A vaga chegou junto com a desistência: devolve
+            self.liberar(classe)
+            return
+        vaga.cancel()
+        try:
+            self.filas[classe].remove(vaga)
+        except ValueError:
+            pass
+
+    def liberar(self, classe: str, duracao: Optional[float] = None):
+        """Devolve a vaga (com a duração da requisição, para o Retry-After) e chama a fila"""
+        self.ativos[classe] -= 1
+        if duracao is not None:
+            media = self._duracao_media[classe]
+            self._duracao_media[classe] = duracao if media is None else 0.8 * media + 0.2 * duracao
+
+        for proxima in CLASSES:
+            fila = self.filas[proxima]
+            while fila and self._cabe(proxima):
+                vaga = fila.popleft()
+                if vaga.done():
+                    continue
+                self.ativos[proxima] += 1
+                vaga.set_result(None)
+
+
+def _balde(prefixo: str, por_minuto: str, rajada: str) -> Optional[BaldeTokens]:
+    taxa = float(os.getenv(f"{prefixo}_POR_MINUTO", por_minuto))
+    if taxa <= 0:
+        return None
+    return BaldeTokens(taxa / 60, float(os.getenv(f"{prefixo}_RAJADA", rajada)))
+
+
+# Controle global do worker
+controle_admissao = ControleAdmissao(
+    capacidade=int(os.getenv("ADMISSAO_CAPACIDADE", "64")),
+    reserva_baratas=float(os.getenv("ADMISSAO_RESERVA_BARATAS", "0.25")),
+    limite_caras=int(os.getenv("ADMISSAO_LIMITE_PDF", "4")),
+    fila_maxima=int(os.getenv("ADMISSAO_FILA_MAXIMA", "16")),
+    espera_maxima=float(os.getenv("ADMISSAO_ESPERA_MAXIMA", "15"))
+)
+
+# Limites por cliente (0 desliga): extrações de PDF e demais rotas
+limites_por_cliente: Dict[str, BaldeTokens] = {
+    classe: balde for classe, balde in (
+        (CARA, _balde("ADMISSAO_PDF", "10", "5")),
+        (BARATA, _balde("ADMISSAO_BARATAS", "0", "60")),
+    ) if balde is not None
+}
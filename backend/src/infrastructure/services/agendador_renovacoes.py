@@ -0,0 +1,316 @@
+"""
+Agendador de renovações
+Envia os avisos de 60 e 30 dias antes do vencimento das renovações em
+aberto, cada um com uma oferta pronta para o corretor: o valor_atual do
+contrato comparado à melhor operadora das tabelas de preços atuais.
+
+As renovações dos próximos 60 dias ficam num min-heap pela data de
+disparo do próximo aviso. A cada tick só entram as que acabaram de
+entrar na janela (uma consulta pelo índice de data_vencimento) e só
+saem do heap as que venceram: o custo é O(avisos devidos), não O(tabela).
+Uma recarga completa da janela, de tempos em tempos, pega renovações
+criadas ou alteradas depois de carregadas.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lideranca import TravaLideranca
+from .reprecificacao_leads import calcular_melhores_ofertas
+from .servico_calculo_cotacao import ServicoCalculoCotacao
+
+logger = logging.getLogger(__name__)
+
+# Antecedência (dias) de cada aviso
+AVISOS = {"60d": 60, "30d": 30}
+JANELA_DIAS = max(AVISOS.values())
+
+
+class AgendadorRenovacoes:
+    """Min-heap (data de disparo, vencimento, id, aviso) das renovações da janela"""
+
+    def __init__(
+        self,
+        repositorio=None,
+        servico: Optional[ServicoCalculoCotacao] = None,
+        repositorio_leads=None,
+        intervalo_recarga: float = 6 * 3600,
+        trava: Optional[TravaLideranca] = None
+    ):
+        """
+        Args:
+            repositorio: RenovacaoRepository (padrão: renovacao_repository)
+            servico: Cálculo de preços usado nas ofertas (padrão: o do container)
+            repositorio_leads: De onde vêm as idades das renovações sem
+                metadata.idades (padrão: lead_repository)
+            intervalo_recarga: Segundos entre recargas completas da janela
+            trava: Liderança das tarefas globais; com ela, só o worker que a
+                segura roda ticks (o heap dos outros fica vazio)
+        """
+        self._repositorio = repositorio
+        self._repositorio_leads = repositorio_leads
+        self._servico = servico
+        self.intervalo_recarga = intervalo_recarga
+        self.trava = trava
+        self._lock = asyncio.Lock()
+
+        self._heap: List[Tuple[int, str, str, str]] = []
+        # Próximo aviso válido de cada renovação; entradas do heap que não
+        # batem com ele estão obsoletas e são descartadas ao sair
+        self._agendados: Dict[str, Tuple[int, str]] = {}
+        self._renovacoes: Dict[str, Dict[str, Any]] = {}
+        self._carregado_ate: Optional[date] = None
+        self._ultima_recarga = 0.0
+
+        self._totais = {"ticks": 0, "carregadas": 0, "avisos_60d": 0, "avisos_30d": 0,
+                        "ofertas": 0, "sem_oferta": 0, "vencidas_descartadas": 0}
+        self._ultimo_tick: Dict[str, Any] = {}
+
+    @property
+    def neste_worker(self) -> bool:
+        """Se os ticks rodam neste processo (sem trava, em todos)"""
+        return self.trava is None or self.trava.lider
+
+    @property
+    def repositorio(self):
+        if self._repositorio is None:
+            from ..repositories.renovacao_repository import renovacao_repository
+            self._repositorio = renovacao_repository
+        return self._repositorio
+
+    @property
+    def servico(self) -> ServicoCalculoCotacao:
+        if self._servico is None:
+            from ..container import container
+            self._servico = container.servico_calculo_cotacao
+        return self._servico
+
+    @property
+    def repositorio_leads(self):
+        if self._repositorio_leads is None:
+            from ..repositories.lead_repository import lead_repository
+            self._repositorio_leads = lead_repository
+        return self._repositorio_leads
+
+    # ==========================================
+    # Heap
+    # ==========================================
+
+    def _agendar(self, renovacao: Dict[str, Any], hoje: date):
+        """Empilha o próximo aviso pendente da renovação (se houver)"""
+        vencimento = date.fromisoformat(str(renovacao["data_vencimento"])[:10])
+        if renovacao.get("notificacao_30d") or vencimento < hoje:
+            return
+
+        # Dentro de 30 dias o aviso de 30 dias cobre também o de 60
+        aviso = "30d"
+        if not renovacao.get("notificacao_60d") and vencimento - timedelta(days=AVISOS["30d"]) > hoje:
+            aviso = "60d"
+
+        disparo = (vencimento - timedelta(days=AVISOS[aviso])).toordinal()
+        if self._agendados.get(renovacao["id"]) == (disparo, aviso):
+            self._renovacoes[renovacao["id"]] = renovacao
+            return
+
+        self._renovacoes[renovacao["id"]] = renovacao
+        self._agendados[renovacao["id"]] = (disparo, aviso)
+        heapq.heappush(self._heap, (disparo, vencimento.isoformat(), renovacao["id"], aviso))
+
+    async def _carregar(self, hoje: date, recarregar: bool) -> int:
+        """Traz do banco só a faixa de vencimentos que ainda não está no heap"""
+        limite = hoje + timedelta(days=JANELA_DIAS)
+        completa = (
+            recarregar
+            or self._carregado_ate is None
+            or time.monotonic() - self._ultima_recarga >= self.intervalo_recarga
+        )
+
+        if completa:
+            renovacoes = await self.repositorio.listar_renovacoes_janela(
+                hoje.isoformat(), limite.isoformat()
+            )
+            self._heap, self._agendados, self._renovacoes = [], {}, {}
+            self._ultima_recarga = time.monotonic()
+        elif limite > self._carregado_ate:
+            renovacoes = await self.repositorio.listar_renovacoes_janela(
+                self._carregado_ate.isoformat(), limite.isoformat(), inicio_exclusivo=True
+            )
+        else:
+            renovacoes = []
+
+        self._carregado_ate = limite
+        for renovacao in renovacoes:
+            self._agendar(renovacao, hoje)
+        return len(renovacoes)
+
+    def _retirar_devidos(self, hoje: date) -> List[Tuple[Dict[str, Any], str]]:
+        """Desempilha os avisos com disparo até hoje"""
+        devidos = []
+        limite = hoje.toordinal()
+        while self._heap and self._heap[0][0] <= limite:
+            disparo, vencimento, renovacao_id, aviso = heapq.heappop(self._heap)
+            if self._agendados.get(renovacao_id) != (disparo, aviso):
+                continue
+            del self._agendados[renovacao_id]
+            renovacao = self._renovacoes.pop(renovacao_id)
+            if vencimento < hoje.isoformat():
+                self._totais["vencidas_descartadas"] += 1
+                continue
+            devidos.append((renovacao, aviso))
+        return devidos
+
+    # ==========================================
+    # Ofertas
+    # ==========================================
+
+    async def _dados_cotacao(self, renovacoes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        valor_atual, idades e tipo_contratacao de cada renovação: do
+        metadata ou, se faltar, do lead de origem
+        """
+        lead_ids = sorted({
+            r["lead_id"] for r in renovacoes
+            if r.get("lead_id") and not (r.get("metadata") or {}).get("idades")
+        })
+        leads: Dict[str, Dict[str, Any]] = {}
+        if lead_ids and self.repositorio_leads.is_connected():
+            encontrados = await asyncio.gather(
+                *(self.repositorio_leads.buscar_lead_por_id(i) for i in lead_ids),
+                return_exceptions=True
+            )
+            leads = {
+                i: lead for i, lead in zip(lead_ids, encontrados)
+                if isinstance(lead, dict)
+            }
+
+        registros = []
+        for renovacao in renovacoes:
+            metadata = renovacao.get("metadata") or {}
+            lead = leads.get(renovacao.get("lead_id")) or {}
+            registros.append({
+                "id": renovacao["id"],
+                "valor_atual": renovacao.get("valor_atual"),
+                "idades": metadata.get("idades") or lead.get("idades"),
+                "tipo_contratacao": metadata.get("tipo_contratacao") or lead.get("tipo_contratacao"),
+            })
+        return registros
+
+    def _calcular_ofertas(self, registros: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        validos, ofertas, _ = calcular_melhores_ofertas(registros, self.servico)
+        calculada_em = datetime.now(timezone.utc).isoformat()
+        versao = self.servico.versao_tabelas()
+        return {
+            registro["id"]: {
+                "valor_atual": float(registro["valor_atual"]),
+                "operadora_sugerida": str(ofertas["operadora"][i]),
+                "valor_proposto": float(ofertas["valor_proposto"][i]),
+                "economia": float(ofertas["economia"][i]),
+                "versao_tabelas": versao,
+                "calculada_em": calculada_em,
+            }
+            for i, registro in enumerate(validos)
+        }
+
+    # ==========================================
+    # Tick
+    # ==========================================
+
+    async def tick(self, hoje: Optional[date] = None, recarregar: bool = False) -> Dict[str, Any]:
+        """
+        Carrega o que entrou na janela, envia os avisos devidos e
+        reagenda o de 30 dias de quem recebeu o de 60
+
+        Args:
+            hoje: Data de referência (padrão: hoje)
+            recarregar: Força a recarga completa da janela
+        """
+        hoje = hoje or date.today()
+        async with self._lock:
+            inicio = time.perf_counter()
+            carregadas = await self._carregar(hoje, recarregar)
+            devidos = self._retirar_devidos(hoje)
+
+            ofertas: Dict[str, Dict[str, Any]] = {}
+            if devidos:
+                try:
+                    registros = await self._dados_cotacao([r for r, _ in devidos])
+                    ofertas = await asyncio.to_thread(self._calcular_ofertas, registros)
+
+                    avisos = [
+                        {
+                            "id": renovacao["id"],
+                            "notificacao_60d": True,
+                            "notificacao_30d": aviso == "30d",
+                            "oferta": ofertas.get(renovacao["id"]),
+                        }
+                        for renovacao, aviso in devidos
+                    ]
+                    marcadas = set(await self.repositorio.marcar_notificacoes(avisos))
+                except BaseException:
+                    # Nada foi marcado: os avisos voltam ao heap para o próximo tick
+                    for renovacao, _ in devidos:
+                        self._agendar(renovacao, hoje)
+                    raise
+
+                # Fora de `marcadas`: já avisada (outro worker, tick repetido) ou fechada
+                devidos = [(r, a) for r, a in devidos if r["id"] in marcadas]
+                ofertas = {i: o for i, o in ofertas.items() if i in marcadas}
+                for renovacao, aviso in devidos:
+                    renovacao["notificacao_60d"] = True
+                    renovacao["notificacao_30d"] = aviso == "30d"
+                    self._totais[f"avisos_{aviso}"] += 1
+                    self._agendar(renovacao, hoje)
+
+            resumo = {
+                "data": hoje.isoformat(),
+                "carregadas": carregadas,
+                "avisos_60d": sum(1 for _, a in devidos if a == "60d"),
+                "avisos_30d": sum(1 for _, a in devidos if a == "30d"),
+                "ofertas": len(ofertas),
+                "agendadas": len(self._agendados),
+                "duracao_ms": round((time.perf_counter() - inicio) * 1000, 2),
+            }
+            self._totais["ticks"] += 1
+            self._totais["carregadas"] += carregadas
+            self._totais["ofertas"] += len(ofertas)
+            self._totais["sem_oferta"] += len(devidos) - len(ofertas)
+            self._ultimo_tick = resumo
+
+        if devidos:
+            logger.info(
+                f"🔔 Renovações: {resumo['avisos_60d']} avisos de 60 dias, "
+                f"{resumo['avisos_30d']} de 30 dias, {resumo['ofertas']} ofertas "
+                f"em {resumo['duracao_ms']} ms"
+            )
+        return resumo
+
+    async def executar_periodicamente(self, intervalo: float):
+        """Tick a cada `intervalo` segundos (o primeiro logo na subida)"""
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"❌ Erro no agendador de renovações: {e}")
+            await asyncio.sleep(intervalo)
+
+    def metricas(self) -> Dict[str, Any]:
+        """Totais desde a subida, tamanho do heap e o último tick"""
+        proximo = self._heap[0] if self._heap else None
+        return {
+            **self._totais,
+            "agendadas": len(self._agendados),
+            "heap": len(self._heap),
+            "carregado_ate": self._carregado_ate.isoformat() if self._carregado_ate else None,
+            "proximo_disparo": date.fromordinal(proximo[0]).isoformat() if proximo else None,
+            "ultimo_tick": dict(self._ultimo_tick),
+        }
+
+
+# Instância global do agendador
+agendador_renovacoes = AgendadorRenovacoes(
+    intervalo_recarga=float(os.getenv("AGENDADOR_RENOVACOES_RECARGA_SEGUNDOS", "21600"))
+)
@@ -2,17 +2,26 @@
 Serviço de IA para extração inteligente de dados de PDFs
 Utiliza OpenAI GPT-4 para análise de documentos de planos de saúde
 """
+import asyncio
+import hashlib
 import os
 import json
 from typing import Dict, List, Optional
-from pypdf import PdfReader
-from openai import OpenAI
 from dotenv import load_dotenv
 import io
+from .coalescencia import Coalescencia
+from .metricas import cronometrado, metricas
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Tempo de cada etapa do processamento de PDF (GET /metrics)
+ETAPAS_PDF = metricas.histograma(
+    "pdf_etapa_seconds",
+    "Duração das etapas do processamento de PDF",
+    ("etapa",)
+)
+
 
 class AIService:
     """Serviço de IA para processamento de documentos"""
@@ -23,9 +32,14 @@ class AIService:
         if not api_key:
             raise ValueError("OPENAI_API_KEY não encontrada nas variáveis de ambiente")
         
+        # openai e pypdf só são importados quando o serviço é usado
+        from openai import OpenAI
         self.client = OpenAI(api_key=api_key)
         self.model = "gpt-4o-mini"
+        # Envios concorrentes do mesmo arquivo compartilham uma extração
+        self._coalescencia = Coalescencia("pdf")
     
+    @cronometrado(ETAPAS_PDF, "extracao_texto")
     def extrair_texto_pdf(self, file_bytes: bytes) -> str:
         """
         Extrai texto de um arquivo PDF
@@ -36,6 +50,8 @@ class AIService:
         Returns:
             str: Texto extraído do PDF
         """
+        from pypdf import PdfReader
+        
         try:
             # Criar um objeto de arquivo em memória
             pdf_file = io.BytesIO(file_bytes)
@@ -55,6 +71,7 @@ class AIService:
         except Exception as e:
             raise ValueError(f"Erro ao extrair texto do PDF: {str(e)}")
     
+    @cronometrado(ETAPAS_PDF, "llm")
     def analisar_documento_saude(self, texto_pdf: str) -> Dict:
         """
         Analisa documento de plano de saúde usando OpenAI
@@ -141,12 +158,13 @@ JSON:
             "confianca": "alta"  # Indicador de confiança na extração
         }
         
-        # Validar idades
+        # Validar idades (o modelo devolve 45, 45.0 ou "45")
         if "idades" in dados and isinstance(dados["idades"], list):
-            resultado["idades"] = [
-                int(idade) for idade in dados["idades"] 
-                if isinstance(idade, (int, float, str)) and str(idade).isdigit()
-            ]
+            for idade in dados["idades"]:
+                if isinstance(idade, float) and idade.is_integer():
+                    idade = int(idade)
+                if isinstance(idade, (int, str)) and not isinstance(idade, bool) and str(idade).strip().isdigit():
+                    resultado["idades"].append(int(idade))
         
         # Validar operadora
         if "operadora" in dados and dados["operadora"]:
@@ -182,20 +200,33 @@ JSON:
         """
         Pipeline completo: extrai texto do PDF e analisa com IA
         
+        O mesmo arquivo enviado de novo enquanto a extração anterior ainda
+        roda (duplo clique, reenvio do cliente) aguarda essa extração em
+        vez de chamar o LLM outra vez.
+        
         Args:
             file_bytes: Bytes do arquivo PDF
             
         Returns:
-            Dict: Dados estruturados extraídos
+            Dict: Dados estruturados extraídos (compartilhado entre
+            chamadas concorrentes com o mesmo arquivo: não modificar)
         """
+        chave = hashlib.sha256(file_bytes).digest()
+        return await self._coalescencia.executar(chave, lambda: self._processar_pdf(file_bytes))
+    
+    async def _processar_pdf(self, file_bytes: bytes) -> Dict:
+        """Extração + análise de um arquivo (uma vez por grupo de envios concorrentes)"""
+        # pypdf e o cliente OpenAI são bloqueantes: rodam em threads para
+        # não parar o loop de eventos (e as outras rotas) durante a extração
+        
         # Extrair texto
-        texto = self.extrair_texto_pdf(file_bytes)
+        texto = await asyncio.to_thread(self.extrair_texto_pdf, file_bytes)
         
         if not texto or len(texto.strip()) < 50:
             raise ValueError("PDF vazio ou com pouco conteúdo para análise")
         
         # Analisar com IA
-        dados = self.analisar_documento_saude(texto)
+        dados = await asyncio.to_thread(self.analisar_documento_saude, texto)
         
         # Adicionar metadados
         dados["texto_extraido_preview"] = texto[:500] + "..." if len(texto) > 500 else texto
@@ -203,6 +234,3 @@ JSON:
         
         return dados
 
-
-# Instância singleton do serviço
-ai_service = AIService()
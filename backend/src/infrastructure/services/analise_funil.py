@@ -0,0 +1,322 @@
+"""
+Análise do funil de leads
+Conversão por coorte, tempo em cada status e perdas por etapa (por
+operadora e por origem), calculados de forma vetorizada sobre o
+histórico de mudanças de status dos leads
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .cache_estatisticas import CacheSWR
+from .contadores_funil import ORDEM_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Etapas do funil, na ordem em que um lead avança
+ETAPAS_FUNIL = ["novo", "contatado", "negociacao", "proposta_enviada", "ganho"]
+
+CODIGO_STATUS = {status: codigo for codigo, status in enumerate(ORDEM_STATUS)}
+SEM_STATUS = -1
+
+# Código de status -> índice da etapa no funil (-1 para perdido/pausado)
+ETAPA_DO_CODIGO = np.array(
+    [ETAPAS_FUNIL.index(s) if s in ETAPAS_FUNIL else -1 for s in ORDEM_STATUS],
+    dtype=np.int8
+)
+
+COLUNAS_ANALISE = "id,created_at,status,operadora_atual,origem,historico"
+
+NS_POR_HORA = 3600 * 10**9
+
+
+class ColetorEventos:
+    """
+    Achata leads e seus históricos em colunas, página a página
+
+    Strings de status viram códigos int8 e os leads viram índices
+    inteiros, então o que vai para o processo de cálculo são arrays
+    compactos (rápidos de serializar) em vez de milhares de dicts.
+    """
+
+    def __init__(self):
+        self.lead_criado: List[Optional[str]] = []
+        self.lead_status: List[int] = []
+        self.lead_operadora: List[str] = []
+        self.lead_origem: List[str] = []
+        self.evento_lead: List[int] = []
+        self.evento_momento: List[Optional[str]] = []
+        self.evento_status: List[int] = []
+
+    def adicionar(self, leads: List[Dict[str, Any]]):
+        for lead in leads:
+            indice = len(self.lead_criado)
+            self.lead_criado.append(lead.get("created_at"))
+            self.lead_status.append(CODIGO_STATUS.get(lead.get("status"), SEM_STATUS))
+            self.lead_operadora.append(lead.get("operadora_atual") or "Não informada")
+            self.lead_origem.append(lead.get("origem") or "Não informada")
+
+            for evento in lead.get("historico") or []:
+                if evento.get("evento") != "mudanca_status":
+                    continue
+                self.evento_lead.append(indice)
+                self.evento_momento.append(evento.get("timestamp"))
+                self.evento_status.append(CODIGO_STATUS.get(evento.get("status_novo"), SEM_STATUS))
+
+    def colunas(self) -> Dict[str, np.ndarray]:
+        return {
+            "lead_criado": np.array(self.lead_criado, dtype=object),
+            "lead_status": np.array(self.lead_status, dtype=np.int8),
+            "lead_operadora": np.array(self.lead_operadora, dtype=object),
+            "lead_origem": np.array(self.lead_origem, dtype=object),
+            "evento_lead": np.array(self.evento_lead, dtype=np.int64),
+            "evento_momento": np.array(self.evento_momento, dtype=object),
+            "evento_status": np.array(self.evento_status, dtype=np.int8)
+        }
+
+
+def _momentos_ns(valores: np.ndarray) -> np.ndarray:
+    """ISO 8601 -> int64 em ns UTC (NaT vira o mínimo de int64)"""
+    import pandas as pd
+
+    if not len(valores):
+        return np.empty(0, dtype=np.int64)
+    momentos = pd.to_datetime(pd.Series(valores), utc=True, format="ISO8601", errors="coerce")
+    return momentos.dt.tz_convert(None).astype("datetime64[ns]").to_numpy().view(np.int64)
+
+
+def calcular_metricas(
+    colunas: Dict[str, np.ndarray],
+    coorte: str = "mes",
+    agora: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Calcula todas as métricas (executada no pool de processos)
+
+    Args:
+        colunas: Saída de ColetorEventos.colunas()
+        coorte: "mes" ou "semana" de criação do lead
+        agora: Referência (ISO 8601) para a idade dos status em aberto
+    """
+    import pandas as pd
+
+    nat = np.iinfo(np.int64).min
+    total_leads = len(colunas["lead_status"])
+    lead_ts = _momentos_ns(colunas["lead_criado"])
+    lead_status = colunas["lead_status"]
+    evento_lead = colunas["evento_lead"]
+    evento_ts = _momentos_ns(colunas["evento_momento"])
+    evento_status = colunas["evento_status"]
+    agora_ns = pd.Timestamp(agora or datetime.now(timezone.utc)).value
+
+    ganho = CODIGO_STATUS["ganho"]
+    perdido = CODIGO_STATUS["perdido"]
+
+    # ---- Conversão por coorte de criação ----
+    ganhou = lead_status == ganho
+    ganhou[evento_lead[evento_status == ganho]] = True
+    validos = lead_ts != nat
+    periodo = "M" if coorte == "mes" else "W"
+    coortes = pd.DataFrame({
+        "coorte": pd.to_datetime(lead_ts[validos]).to_period(periodo).astype(str),
+        "ganho": ganhou[validos],
+        "perdido": lead_status[validos] == perdido
+    }).groupby("coorte").agg(
+        leads=("ganho", "size"), ganhos=("ganho", "sum"), perdidos=("perdido", "sum")
+    )
+    coortes["taxa_conversao"] = (coortes["ganhos"] / coortes["leads"]).round(4)
+
+    # ---- Tempo em cada status ----
+    # Cada lead entra em "novo" na criação; cada evento abre o status seguinte
+    trans_lead = np.concatenate([np.arange(total_leads), evento_lead])
+    trans_ts = np.concatenate([lead_ts, evento_ts])
+    trans_status = np.concatenate([np.zeros(total_leads, dtype=np.int8), evento_status])
+    validas = (trans_ts != nat) & (trans_status != SEM_STATUS)
+    trans_lead, trans_ts, trans_status = trans_lead[validas], trans_ts[validas], trans_status[validas]
+
+    ordem = np.lexsort((trans_ts, trans_lead))
+    trans_lead, trans_ts, trans_status = trans_lead[ordem], trans_ts[ordem], trans_status[ordem]
+    mesma = trans_lead[1:] == trans_lead[:-1]
+    duracao = (trans_ts[1:] - trans_ts[:-1])[mesma]
+    status_encerrado = trans_status[:-1][mesma]
+    # Históricos antigos gravam horário local sem fuso: descarta intervalos negativos
+    positivos = duracao >= 0
+    tempos = pd.DataFrame({
+        "status": status_encerrado[positivos],
+        "horas": duracao[positivos] / NS_POR_HORA
+    }).groupby("status")["horas"].agg(
+        mediana="median", p90=lambda h: h.quantile(0.9), transicoes="size"
+    )
+
+    # Status atual (última transição de cada lead) e há quanto tempo está nele
+    ultima = np.ones(len(trans_lead), dtype=bool)
+    ultima[:-1] = ~mesma
+    em_aberto = pd.DataFrame({
+        "status": trans_status[ultima],
+        "horas": (agora_ns - trans_ts[ultima]) / NS_POR_HORA
+    }).groupby("status")["horas"].agg(leads="size", idade_mediana="median")
+
+    # ---- Perdas por etapa do funil ----
+    # Todo lead passou por "novo"; perdido/pausado não avançam a etapa
+    etapa_maxima = np.maximum(ETAPA_DO_CODIGO[lead_status.clip(0)], 0)
+    eventos_funil = evento_status != SEM_STATUS
+    np.maximum.at(
+        etapa_maxima,
+        evento_lead[eventos_funil],
+        ETAPA_DO_CODIGO[evento_status[eventos_funil]].astype(etapa_maxima.dtype)
+    )
+
+    def funil_por(grupos: np.ndarray, nome: str) -> List[Dict[str, Any]]:
+        tabela = pd.crosstab(grupos, etapa_maxima).reindex(
+            columns=range(len(ETAPAS_FUNIL)), fill_value=0
+        )
+        # Chegou à etapa k quem parou em k ou adiante
+        alcancaram = tabela.to_numpy()[:, ::-1].cumsum(axis=1)[:, ::-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            perda = 1 - alcancaram[:, 1:] / alcancaram[:, :-1]
+        resultado = []
+        for linha, grupo in enumerate(tabela.index):
+            resultado.append({
+                nome: grupo,
+                "leads": int(alcancaram[linha, 0]),
+                "etapas": dict(zip(ETAPAS_FUNIL, alcancaram[linha].tolist())),
+                "perda_por_etapa": {
+                    f"{ETAPAS_FUNIL[k]}->{ETAPAS_FUNIL[k + 1]}": (
+                        None if np.isnan(perda[linha, k]) else round(float(perda[linha, k]), 4)
+                    )
+                    for k in range(len(ETAPAS_FUNIL) - 1)
+                }
+            })
+        return sorted(resultado, key=lambda item: -item["leads"])
+
+    return {
+        "total_leads": total_leads,
+        "total_eventos": len(evento_lead),
+        "coortes": [
+            {"coorte": indice, **{k: (float(v) if k == "taxa_conversao" else int(v)) for k, v in linha.items()}}
+            for indice, linha in coortes.iterrows()
+        ],
+        "tempo_em_status": [
+            {
+                "status": ORDEM_STATUS[codigo],
+                "mediana_horas": round(float(linha["mediana"]), 2),
+                "p90_horas": round(float(linha["p90"]), 2),
+                "transicoes": int(linha["transicoes"])
+            }
+            for codigo, linha in tempos.iterrows()
+        ],
+        "em_aberto": [
+            {
+                "status": ORDEM_STATUS[codigo],
+                "leads": int(linha["leads"]),
+                "idade_mediana_horas": round(float(linha["idade_mediana"]), 2)
+            }
+            for codigo, linha in em_aberto.iterrows()
+        ],
+        "funil_por_operadora": funil_por(colunas["lead_operadora"], "operadora"),
+        "funil_por_origem": funil_por(colunas["lead_origem"], "origem")
+    }
+
+
+class AnaliseFunil:
+    """
+    Executa calcular_metricas fora do event loop, com cache por janela.
+
+    A coleta (I/O) acontece no processo da API, paginada por keyset, com
+    a consulta e o achatamento de cada página em threads (o event loop
+    só alterna entre elas); o cálculo vai para um ProcessPoolExecutor (spawn, para não herdar
+    threads nem conexões do processo pai). Resultados ficam num CacheSWR
+    por (data_inicio, data_fim, coorte): dentro do TTL não há consulta
+    nenhuma, e até `janela_stale` o resultado anterior é servido enquanto
+    um único recálculo roda em segundo plano.
+    """
+
+    def __init__(self, processos: int = 1, ttl: float = 300.0, janela_stale: float = 3600.0):
+        """
+        Args:
+            processos: Tamanho do pool (0 executa numa thread do processo atual)
+            ttl: Segundos em que um resultado é considerado atual
+            janela_stale: Segundos em que um resultado vencido ainda é servido
+        """
+        self.processos = processos
+        self.cache = CacheSWR(ttl=ttl, janela_stale=janela_stale, local="analise_funil")
+        self._pool: Optional[Executor] = None
+
+    def _executor(self) -> Optional[Executor]:
+        if self.processos <= 0:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def obter(
+        self,
+        repositorio,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        coorte: str = "mes"
+    ) -> Optional[Dict[str, Any]]:
+        chave = f"{data_inicio}|{data_fim}|{coorte}"
+        return await self.cache.obter(
+            chave, lambda: self._calcular(repositorio, data_inicio, data_fim, coorte)
+        )
+
+    async def _calcular(self, repositorio, data_inicio, data_fim, coorte) -> Optional[Dict[str, Any]]:
+        inicio = time.perf_counter()
+        coletor = ColetorEventos()
+        try:
+            async for pagina in repositorio.iterar_leads(
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                tamanho_pagina=5000,
+                colunas=COLUNAS_ANALISE
+            ):
+                # Achatar 5000 históricos leva dezenas de ms: fora do event loop
+                await asyncio.to_thread(coletor.adicionar, pagina)
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar leads para análise: {e}")
+            return None
+        coleta_ms = (time.perf_counter() - inicio) * 1000
+
+        agora = datetime.now(timezone.utc).isoformat()
+        colunas = await asyncio.to_thread(coletor.colunas)
+        loop = asyncio.get_running_loop()
+        resultado = await loop.run_in_executor(
+            self._executor(), calcular_metricas, colunas, coorte, agora
+        )
+        resultado.update({
+            "periodo": {"data_inicio": data_inicio, "data_fim": data_fim, "coorte": coorte},
+            "gerado_em": agora,
+            "coleta_ms": round(coleta_ms, 1),
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1)
+        })
+        logger.info(
+            f"📊 Análise do funil: {resultado['total_leads']} leads, "
+            f"{resultado['total_eventos']} eventos em {resultado['duracao_ms']} ms"
+        )
+        return resultado
+
+    def idade(self, data_inicio=None, data_fim=None, coorte: str = "mes") -> Optional[float]:
+        return self.cache.idade(f"{data_inicio}|{data_fim}|{coorte}")
+
+    def encerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Instância global da análise
+analise_funil = AnaliseFunil(
+    processos=int(os.getenv("ANALISE_PROCESSOS", "1")),
+    ttl=float(os.getenv("ANALISE_CACHE_TTL", "300"))
+)
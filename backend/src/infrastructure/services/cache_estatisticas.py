@@ -0,0 +1,127 @@
+"""
+Cache em memória para estatísticas agregadas
+Implementa TTL com stale-while-revalidate e coalescência de recargas
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .coalescencia import Coalescencia
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EntradaCache:
+    """Valor armazenado no cache e o instante em que foi carregado"""
+    valor: Any
+    carregado_em: float
+
+
+class CacheSWR:
+    """
+    Cache por chave com TTL e stale-while-revalidate.
+
+    - Até `ttl` segundos o valor é servido direto do cache.
+    - Entre `ttl` e `ttl + janela_stale` o valor antigo é servido na hora
+      e uma única recarga é disparada em segundo plano.
+    - Depois disso (ou sem valor) o chamador aguarda a recarga.
+
+    Chamadas concorrentes para a mesma chave compartilham a mesma recarga
+    (coalescencia.py), então N dashboards abertos geram no máximo uma
+    consulta por chave.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        janela_stale: float = 300.0,
+        relogio: Callable[[], float] = time.monotonic,
+        local: str = "cache_swr"
+    ):
+        """
+        Args:
+            ttl: Segundos em que o valor é considerado fresco
+            janela_stale: Segundos extras em que o valor antigo ainda é servido
+            relogio: Função de tempo (injetável para testes)
+            local: Rótulo das métricas de coalescência das recargas
+        """
+        self.ttl = ttl
+        self.janela_stale = janela_stale
+        self._relogio = relogio
+        self._entradas: Dict[str, EntradaCache] = {}
+        # Recargas vão até o fim mesmo sem ninguém aguardando (servem o próximo)
+        self._recargas = Coalescencia(local, cancelar_sem_interessados=False)
+        self._geracoes: Dict[str, int] = {}
+
+    async def obter(self, chave: str, carregar: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Obtém o valor da chave, carregando-o se necessário
+
+        Args:
+            chave: Identificador do valor
+            carregar: Corrotina que consulta a fonte original. Se retornar
+                None (erro na consulta) o resultado não é armazenado.
+
+        Returns:
+            Valor em cache ou recém-carregado
+        """
+        entrada = self._entradas.get(chave)
+
+        if entrada is not None:
+            idade = self._relogio() - entrada.carregado_em
+            if idade < self.ttl:
+                return entrada.valor
+            if idade < self.ttl + self.janela_stale:
+                recarga = asyncio.ensure_future(self._recarga(chave, carregar))
+                # Recargas em segundo plano podem falhar sem ninguém aguardando
+                recarga.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return entrada.valor
+
+        return await self._recarga(chave, carregar)
+
+    def idade(self, chave: str) -> Optional[float]:
+        """Idade em segundos do valor em cache (None se não houver)"""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        return self._relogio() - entrada.carregado_em
+
+    def invalidar(self, chave: Optional[str] = None):
+        """
+        Descarta uma chave (ou todas) após uma escrita
+
+        Recargas já em andamento não gravam o resultado, pois podem ter
+        lido o banco antes da escrita; o próximo chamador inicia outra.
+        """
+        chaves = [chave] if chave is not None else list(
+            set(self._entradas) | set(self._recargas.chaves())
+        )
+        for c in chaves:
+            self._entradas.pop(c, None)
+            self._recargas.esquecer(c)
+            self._geracoes[c] = self._geracoes.get(c, 0) + 1
+
+    async def _recarga(self, chave: str, carregar: Callable[[], Awaitable[Any]]) -> Any:
+        """Aguarda a recarga em andamento da chave ou inicia uma nova"""
+        return await self._recargas.executar(
+            chave, lambda: self._recarregar(chave, carregar, self._geracoes.get(chave, 0))
+        )
+
+    async def _recarregar(
+        self,
+        chave: str,
+        carregar: Callable[[], Awaitable[Any]],
+        geracao: int
+    ) -> Any:
+        """Executa a consulta e grava o resultado se ainda for válido"""
+        try:
+            valor = await carregar()
+            if valor is not None and self._geracoes.get(chave, 0) == geracao:
+                self._entradas[chave] = EntradaCache(valor=valor, carregado_em=self._relogio())
+            return valor
+        except Exception as e:
+            logger.error(f"❌ Erro ao recarregar cache '{chave}': {e}")
+            raise
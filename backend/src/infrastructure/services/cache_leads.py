@@ -0,0 +1,203 @@
+"""
+Cache LRU de leads individuais
+Read-through por ID e por WhatsApp normalizado, com invalidação nas escritas
+"""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+Lead = Dict[str, Any]
+
+
+def normalizar_whatsapp(whatsapp: str) -> str:
+    """Chave de cache do WhatsApp: apenas os dígitos"""
+    return re.sub(r"\D", "", whatsapp or "")
+
+
+class CacheLeads:
+    """
+    Cache LRU limitado de leads, indexado por ID e por WhatsApp.
+
+    - Leituras concorrentes da mesma chave compartilham uma única consulta.
+    - Escritas atualizam (criar/atualizar) ou removem (arquivar) a entrada.
+    - Uma consulta em andamento quando a chave é invalidada não grava o
+      resultado, evitando que um valor lido antes da escrita volte ao cache.
+    - O TTL limita a defasagem frente a escritas feitas fora deste processo.
+    """
+
+    def __init__(
+        self,
+        capacidade: int = 10000,
+        ttl: float = 60.0,
+        relogio: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            capacidade: Número máximo de leads em memória
+            ttl: Segundos que uma entrada permanece válida
+            relogio: Função de tempo (injetável para testes)
+        """
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._relogio = relogio
+        self._leads: "OrderedDict[str, Tuple[Lead, float]]" = OrderedDict()
+        self._por_whatsapp: Dict[str, str] = {}
+        self._carregando: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._sujos: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+
+    # ==========================================
+    # Leituras
+    # ==========================================
+
+    async def obter_por_id(
+        self,
+        lead_id: str,
+        carregar: Callable[[], Awaitable[Optional[Lead]]]
+    ) -> Optional[Lead]:
+        """Retorna o lead do cache ou o carrega com `carregar`"""
+        lead = self._ler(lead_id)
+        if lead is not None:
+            self.hits += 1
+            return dict(lead)
+
+        self.misses += 1
+        return await self._carregar(("id", lead_id), carregar)
+
+    async def obter_por_whatsapp(
+        self,
+        whatsapp: str,
+        carregar: Callable[[], Awaitable[Optional[Lead]]]
+    ) -> Optional[Lead]:
+        """Retorna o lead ativo mais recente do WhatsApp (cache ou banco)"""
+        chave = normalizar_whatsapp(whatsapp)
+        lead_id = self._por_whatsapp.get(chave)
+        lead = self._ler(lead_id) if lead_id else None
+        if lead is not None:
+            self.hits += 1
+            return dict(lead)
+
+        self.misses += 1
+        return await self._carregar(("whatsapp", chave), carregar)
+
+    # ==========================================
+    # Escritas
+    # ==========================================
+
+    def armazenar(self, lead: Lead, indexar_whatsapp: bool = False):
+        """
+        Grava o estado atual de um lead (após criação ou atualização)
+
+        Args:
+            lead: Lead completo, como retornado pelo banco
+            indexar_whatsapp: Se o lead passa a ser o mais recente do seu
+                WhatsApp (criação ou resultado de busca por WhatsApp)
+        """
+        lead_id = str(lead["id"])
+        self._marcar_sujo(("id", lead_id))
+        self._leads[lead_id] = (lead, self._relogio())
+        self._leads.move_to_end(lead_id)
+
+        if indexar_whatsapp and lead.get("whatsapp") and not lead.get("arquivado"):
+            chave = normalizar_whatsapp(lead["whatsapp"])
+            self._marcar_sujo(("whatsapp", chave))
+            self._por_whatsapp[chave] = lead_id
+
+        while len(self._leads) > self.capacidade:
+            antigo_id, (antigo, _) = self._leads.popitem(last=False)
+            self._remover_indice_whatsapp(antigo_id, antigo)
+
+    def invalidar(self, lead_id: str, whatsapp: Optional[str] = None):
+        """
+        Remove um lead do cache (ex.: após arquivamento)
+
+        Args:
+            lead_id: ID do lead
+            whatsapp: WhatsApp do lead, se conhecido, para descartar também
+                buscas por WhatsApp em andamento
+        """
+        self._marcar_sujo(("id", lead_id))
+        item = self._leads.pop(lead_id, None)
+        if item is not None:
+            lead, _ = item
+            self._remover_indice_whatsapp(lead_id, lead)
+            whatsapp = whatsapp or lead.get("whatsapp")
+        if whatsapp:
+            self._marcar_sujo(("whatsapp", normalizar_whatsapp(whatsapp)))
+
+    def limpar(self):
+        """Esvazia o cache"""
+        for chave in list(self._carregando):
+            self._marcar_sujo(chave)
+        self._leads.clear()
+        self._por_whatsapp.clear()
+
+    def metricas(self) -> Dict[str, Any]:
+        """Métricas de uso do cache"""
+        consultas = self.hits + self.misses
+        return {
+            "capacidade": self.capacidade,
+            "tamanho": len(self._leads),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / consultas, 4) if consultas else None,
+        }
+
+    # ==========================================
+    # Internos
+    # ==========================================
+
+    def _ler(self, lead_id: str) -> Optional[Lead]:
+        item = self._leads.get(lead_id)
+        if item is None:
+            return None
+        lead, gravado_em = item
+        if self._relogio() - gravado_em >= self.ttl:
+            self._leads.pop(lead_id, None)
+            self._remover_indice_whatsapp(lead_id, lead)
+            return None
+        self._leads.move_to_end(lead_id)
+        return lead
+
+    async def _carregar(
+        self,
+        chave: Tuple[str, str],
+        carregar: Callable[[], Awaitable[Optional[Lead]]]
+    ) -> Optional[Lead]:
+        tarefa = self._carregando.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._executar_carga(chave, carregar))
+            self._carregando[chave] = tarefa
+        lead = await asyncio.shield(tarefa)
+        return dict(lead) if lead is not None else None
+
+    async def _executar_carga(
+        self,
+        chave: Tuple[str, str],
+        carregar: Callable[[], Awaitable[Optional[Lead]]]
+    ) -> Optional[Lead]:
+        tarefa = asyncio.current_task()
+        try:
+            lead = await carregar()
+            if lead is not None and tarefa not in self._sujos:
+                self.armazenar(lead, indexar_whatsapp=chave[0] == "whatsapp")
+            return lead
+        finally:
+            self._sujos.discard(tarefa)
+            if self._carregando.get(chave) is tarefa:
+                del self._carregando[chave]
+
+    def _marcar_sujo(self, chave: Tuple[str, str]):
+        """Impede que cargas em andamento da chave gravem valores antigos"""
+        tarefa = self._carregando.pop(chave, None)
+        if tarefa is not None:
+            self._sujos.add(tarefa)
+
+    def _remover_indice_whatsapp(self, lead_id: str, lead: Lead):
+        if lead.get("whatsapp"):
+            chave = normalizar_whatsapp(lead["whatsapp"])
+            if self._por_whatsapp.get(chave) == lead_id:
+                del self._por_whatsapp[chave]
@@ -0,0 +1,105 @@
+"""
+Coalescência de chamadas concorrentes (single-flight)
+Em picos de campanha chegam ao mesmo tempo cotações com o mesmo
+payload, o mesmo PDF reenviado e várias leituras das mesmas
+estatísticas. Chamadas com a mesma chave enquanto uma execução está em
+andamento aguardam essa execução em vez de repetir o trabalho; o
+resultado (ou a exceção) é entregue a todas.
+
+Cancelamento: um chamador cancelado (cliente desconectou) só deixa de
+esperar; a execução segue para os demais. Se todos desistirem, ela é
+cancelada (ou, com cancelar_sem_interessados=False, vai até o fim).
+
+O resultado é o mesmo objeto para todos os chamadores: não deve ser
+modificado por quem o recebe.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from .metricas import RegistroMetricas, metricas as registro_padrao
+
+EXECUTADA = "executada"
+COALESCIDA = "coalescida"
+
+
+@dataclass
+class Voo:
+    """Execução em andamento de uma chave e quantos chamadores a aguardam"""
+    tarefa: asyncio.Task
+    interessados: int = 0
+
+
+class Coalescencia:
+    """Uma execução por chave em andamento, compartilhada pelos chamadores concorrentes"""
+
+    def __init__(
+        self,
+        local: str,
+        cancelar_sem_interessados: bool = True,
+        registro: RegistroMetricas = None
+    ):
+        """
+        Args:
+            local: Nome do ponto de uso (rótulo das métricas)
+            cancelar_sem_interessados: Cancela a execução quando todos os
+                chamadores desistem
+            registro: Registro de métricas (padrão: o global)
+        """
+        self.local = local
+        self.cancelar_sem_interessados = cancelar_sem_interessados
+        self._voos: Dict[Hashable, Voo] = {}
+        self._chamadas = (registro or registro_padrao).contador(
+            "coalescencia_chamadas_total",
+            "Chamadas por ponto de uso: executadas ou coalescidas numa execução em andamento",
+            ("local", "resultado")
+        )
+
+    def chaves(self) -> List[Hashable]:
+        """Chaves com execução em andamento"""
+        return list(self._voos)
+
+    async def executar(self, chave: Hashable, funcao: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Resultado de `funcao()`, executada uma vez para os chamadores concorrentes da chave
+
+        Args:
+            chave: Identifica chamadas equivalentes (tudo que muda o resultado)
+            funcao: Corrotina sem argumentos que faz o trabalho
+        """
+        voo = self._voos.get(chave)
+        if voo is None:
+            voo = Voo(asyncio.ensure_future(funcao()))
+            self._voos[chave] = voo
+            voo.tarefa.add_done_callback(lambda tarefa: self._pousar(chave, voo))
+            self._chamadas.incrementar(self.local, EXECUTADA)
+        else:
+            self._chamadas.incrementar(self.local, COALESCIDA)
+
+        voo.interessados += 1
+        try:
+            # shield: cancelar este chamador não cancela a execução compartilhada
+            return await asyncio.shield(voo.tarefa)
+        finally:
+            voo.interessados -= 1
+            if voo.interessados == 0 and self.cancelar_sem_interessados and not voo.tarefa.done():
+                voo.tarefa.cancel()
+
+    def esquecer(self, chave: Optional[Hashable] = None):
+        """
+        Desvincula a execução em andamento da chave (ou de todas)
+
+        Quem já aguarda recebe o resultado dela; chamadas novas iniciam
+        outra execução (ex.: depois de uma escrita que a tornou obsoleta).
+        """
+        if chave is None:
+            self._voos.clear()
+        else:
+            self._voos.pop(chave, None)
+
+    def _pousar(self, chave: Hashable, voo: Voo):
+        if self._voos.get(chave) is voo:
+            del self._voos[chave]
+        # Exceção sem ninguém aguardando não vira aviso de "never retrieved"
+        if not voo.tarefa.cancelled():
+            voo.tarefa.exception()
@@ -0,0 +1,344 @@
+"""
+Contadores incrementais do funil de leads
+Mantém em memória os agregados das views dashboard_stats,
+pipeline_vendas e leads_por_operadora, atualizados a cada escrita
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Ordem do funil (mesma do ORDER BY da view pipeline_vendas)
+ORDEM_STATUS = [
+    'novo', 'contatado', 'negociacao',
+    'proposta_enviada', 'ganho', 'perdido', 'pausado'
+]
+
+# Colunas de origem da view dashboard_stats
+ORIGENS_DASHBOARD = {
+    "leads_scanner_pdf": "scanner_pdf",
+    "leads_meta_ads": "meta_ads",
+    "leads_manual": "manual",
+    "leads_landing_page": "landing",
+    "leads_calculadora": "calculadora_economia",
+}
+
+
+def _para_datetime(valor: Any) -> Optional[datetime]:
+    """Converte timestamps ISO 8601 do banco em datetime com fuso (UTC)"""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        dt = valor
+    else:
+        dt = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _chave_keyset(lead: Dict[str, Any]) -> Optional[Tuple[datetime, str]]:
+    """Posição do lead na varredura keyset (created_at, id)"""
+    criado = _para_datetime(lead.get("created_at"))
+    return (criado, str(lead["id"])) if criado and lead.get("id") else None
+
+
+@dataclass
+class Soma:
+    """Soma e contagem de valores não nulos (SUM/AVG do SQL)"""
+    total: float = 0.0
+    n: int = 0
+
+    def aplicar(self, valor: Any, sinal: int):
+        if valor is not None:
+            self.total += sinal * float(valor)
+            self.n += sinal
+
+    @property
+    def soma(self) -> Optional[float]:
+        return round(self.total, 2) if self.n else None
+
+    @property
+    def media(self) -> Optional[float]:
+        return self.total / self.n if self.n else None
+
+
+@dataclass
+class Acumulado:
+    """Agregados de um grupo de leads (um status, operadora ou dia)"""
+    quantidade: int = 0
+    ganhos: int = 0
+    economia: Soma = field(default_factory=Soma)
+    proposto: Soma = field(default_factory=Soma)
+    atual: Soma = field(default_factory=Soma)
+
+    def aplicar(self, lead: Dict[str, Any], sinal: int):
+        self.quantidade += sinal
+        if lead.get("status") == "ganho":
+            self.ganhos += sinal
+        self.economia.aplicar(lead.get("economia_estimada"), sinal)
+        self.proposto.aplicar(lead.get("valor_proposto"), sinal)
+        self.atual.aplicar(lead.get("valor_atual"), sinal)
+
+
+class ContadoresFunil:
+    """
+    Agregados do funil mantidos incrementalmente.
+
+    Cada escrita custa O(1) e cada leitura custa O(status + operadoras + 30 dias),
+    independente do tamanho da tabela. Os contadores são reconstruídos na
+    inicialização e conferidos periodicamente contra as views do banco
+    (ver SupabaseService.reconciliar_contadores), o que também corrige
+    escritas feitas por outros processos.
+
+    Durante uma reconstrução (iniciar_reconstrucao), as escritas deste
+    processo também são aplicadas à instância nova quando o lead já
+    passou pela varredura; os que ainda não passaram serão lidos com o
+    valor novo.
+    """
+
+    def __init__(self):
+        self.carregado = False
+        self.total = Acumulado()
+        self.por_status: Dict[str, Acumulado] = defaultdict(Acumulado)
+        self.por_operadora: Dict[str, Acumulado] = defaultdict(Acumulado)
+        self.por_dia: Dict[date, Acumulado] = defaultdict(Acumulado)
+        self.por_origem: Dict[str, int] = defaultdict(int)
+        self.conversao_dias = Soma()
+        self.ultimo_lead_criado: Optional[datetime] = None
+        self.ultima_atualizacao: Optional[datetime] = None
+        self._reconstrucao: Optional["ContadoresFunil"] = None
+        self._lido_ate: Optional[Tuple[datetime, str]] = None
+
+    # ==========================================
+    # Reconstrução
+    # ==========================================
+
+    def iniciar_reconstrucao(self) -> "ContadoresFunil":
+        """
+        Instância vazia para uma nova varredura, que passa a receber as
+        escritas registradas nesta até concluir_reconstrucao()
+
+        A varredura deve incluir as páginas em ordem keyset decrescente
+        (created_at, id), como em iterar_leads.
+        """
+        self._reconstrucao = ContadoresFunil()
+        return self._reconstrucao
+
+    def concluir_reconstrucao(self):
+        self._reconstrucao = None
+
+    def _ja_lido(self, lead: Dict[str, Any]) -> bool:
+        """O lead está numa página já incluída (a varredura não o verá mais)"""
+        chave = _chave_keyset(lead)
+        return self._lido_ate is not None and chave is not None and chave >= self._lido_ate
+
+    def _destinos(self, lead: Dict[str, Any]) -> List["ContadoresFunil"]:
+        """Instâncias que devem receber uma escrita sobre `lead`"""
+        destinos = [self] if self.carregado else []
+        if self._reconstrucao is not None and self._reconstrucao._ja_lido(lead):
+            destinos.append(self._reconstrucao)
+        return destinos
+
+    # ==========================================
+    # Escritas
+    # ==========================================
+
+    def incluir_existentes(self, leads: Iterable[Dict[str, Any]]):
+        """
+        Soma leads já gravados (não arquivados) durante uma reconstrução
+
+        Chamado página a página sobre uma instância nova; a instância só
+        passa a ser usada depois de marcada como carregada.
+        """
+        for lead in leads:
+            self._aplicar(lead, +1)
+            if lead.get("status") == "ganho":
+                self._aplicar_conversao(lead, lead.get("updated_at"), +1)
+            atualizado = _para_datetime(lead.get("updated_at"))
+            if atualizado and (self.ultima_atualizacao is None or atualizado > self.ultima_atualizacao):
+                self.ultima_atualizacao = atualizado
+            self._lido_ate = _chave_keyset(lead) or self._lido_ate
+
+    def registrar_criacao(self, lead: Dict[str, Any]):
+        """Contabiliza um lead recém-criado"""
+        agora = datetime.now(timezone.utc)
+        for contadores in self._destinos(lead):
+            contadores._aplicar(lead, +1)
+            contadores.ultima_atualizacao = agora
+
+    def registrar_mudanca_status(self, lead: Dict[str, Any], novo_status: str):
+        """Move um lead (no estado anterior à escrita) para o novo status"""
+        if lead.get("arquivado"):
+            return
+        agora = datetime.now(timezone.utc)
+        atualizado = {**lead, "status": novo_status}
+
+        for contadores in self._destinos(lead):
+            if lead.get("status") == "ganho":
+                contadores._aplicar_conversao(lead, lead.get("updated_at"), -1)
+            contadores._aplicar(lead, -1)
+            contadores._aplicar(atualizado, +1)
+            if novo_status == "ganho":
+                contadores._aplicar_conversao(atualizado, agora, +1)
+            contadores.ultima_atualizacao = agora
+
+    def registrar_atualizacao(self, lead: Dict[str, Any], **campos):
+        """Troca valores (ex.: economia_estimada) de um lead no estado anterior à escrita"""
+        if lead.get("arquivado"):
+            return
+        agora = datetime.now(timezone.utc)
+        for contadores in self._destinos(lead):
+            contadores._aplicar(lead, -1)
+            contadores._aplicar({**lead, **campos}, +1)
+            contadores.ultima_atualizacao = agora
+
+    def registrar_arquivamento(self, lead: Dict[str, Any]):
+        """Remove dos contadores um lead que acabou de ser arquivado"""
+        if lead.get("arquivado"):
+            return
+        agora = datetime.now(timezone.utc)
+        for contadores in self._destinos(lead):
+            if lead.get("status") == "ganho":
+                contadores._aplicar_conversao(lead, lead.get("updated_at"), -1)
+            contadores._aplicar(lead, -1)
+            contadores.ultima_atualizacao = agora
+
+    def _aplicar(self, lead: Dict[str, Any], sinal: int):
+        criado = _para_datetime(lead.get("created_at")) or datetime.now(timezone.utc)
+
+        self.total.aplicar(lead, sinal)
+        self.por_status[lead.get("status") or "novo"].aplicar(lead, sinal)
+        self.por_dia[criado.date()].aplicar(lead, sinal)
+        if lead.get("operadora_atual"):
+            self.por_operadora[lead["operadora_atual"]].aplicar(lead, sinal)
+        if lead.get("origem"):
+            self.por_origem[lead["origem"]] += sinal
+
+        if sinal > 0 and (self.ultimo_lead_criado is None or criado > self.ultimo_lead_criado):
+            self.ultimo_lead_criado = criado
+
+    def _aplicar_conversao(self, lead: Dict[str, Any], convertido_em: Any, sinal: int):
+        criado = _para_datetime(lead.get("created_at"))
+        convertido = _para_datetime(convertido_em)
+        if criado and convertido:
+            self.conversao_dias.aplicar((convertido - criado).total_seconds() / 86400, sinal)
+
+    # ==========================================
+    # Leituras (mesmo formato das views)
+    # ==========================================
+
+    def dashboard_stats(self, agora: Optional[datetime] = None) -> Dict[str, Any]:
+        """Equivalente à view dashboard_stats (janelas com granularidade diária)"""
+        hoje = (agora or datetime.now(timezone.utc)).date()
+        mes = self._somar_dias(hoje, 30)
+        semana = self._somar_dias(hoje, 7)
+        total = self.total
+
+        return {
+            "total_leads": total.quantidade,
+            "leads_mes_atual": mes.quantidade,
+            "leads_semana_atual": semana.quantidade,
+            "leads_hoje": self.por_dia[hoje].quantidade if hoje in self.por_dia else 0,
+            "leads_novos": self._quantidade_status("novo"),
+            "leads_contatados": self._quantidade_status("contatado"),
+            "leads_em_negociacao": self._quantidade_status("negociacao"),
+            "leads_com_proposta": self._quantidade_status("proposta_enviada"),
+            "leads_ganhos": self._quantidade_status("ganho"),
+            "leads_perdidos": self._quantidade_status("perdido"),
+            "economia_total": total.economia.soma,
+            "economia_mes_atual": mes.economia.soma,
+            "economia_media": total.economia.media,
+            "valor_total_planos_atuais": total.atual.soma,
+            "valor_total_propostas": total.proposto.soma,
+            "ticket_medio_atual": total.atual.media,
+            "ticket_medio_proposto": total.proposto.media,
+            "taxa_conversao": (
+                round(total.ganhos / total.quantidade * 100, 2)
+                if total.quantidade else None
+            ),
+            "tempo_medio_conversao_dias": self.conversao_dias.media,
+            **{coluna: self.por_origem.get(origem, 0) for coluna, origem in ORIGENS_DASHBOARD.items()},
+            "ultimo_lead_criado": self._iso(self.ultimo_lead_criado),
+            "ultima_atualizacao": self._iso(self.ultima_atualizacao),
+        }
+
+    def pipeline_vendas(self) -> List[Dict[str, Any]]:
+        """Equivalente à view pipeline_vendas"""
+        total = self.total.quantidade
+        pipeline = []
+        for status in sorted(self.por_status, key=self._posicao_status):
+            grupo = self.por_status[status]
+            if grupo.quantidade <= 0:
+                continue
+            pipeline.append({
+                "status": status,
+                "quantidade": grupo.quantidade,
+                "valor_total": grupo.proposto.soma,
+                "ticket_medio": grupo.proposto.media,
+                "percentual_total": round(grupo.quantidade / total * 100, 2) if total else None,
+            })
+        return pipeline
+
+    def leads_por_operadora(self) -> List[Dict[str, Any]]:
+        """Equivalente à view leads_por_operadora"""
+        linhas = [
+            {
+                "operadora_atual": operadora,
+                "total_leads": grupo.quantidade,
+                "ticket_medio": grupo.atual.media,
+                "economia_total": grupo.economia.soma,
+                "leads_convertidos": grupo.ganhos,
+            }
+            for operadora, grupo in self.por_operadora.items()
+            if grupo.quantidade > 0
+        ]
+        return sorted(linhas, key=lambda linha: linha["total_leads"], reverse=True)
+
+    def divergencias(self, pipeline_banco: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Compara quantidade e valor_total por status com a view pipeline_vendas
+
+        Returns:
+            {status: {"contadores": (qtd, valor), "banco": (qtd, valor)}}
+            apenas para os status divergentes
+        """
+        def resumo(linhas):
+            return {
+                linha["status"]: (int(linha["quantidade"]), round(float(linha["valor_total"] or 0), 2))
+                for linha in linhas
+            }
+
+        banco = resumo(pipeline_banco)
+        memoria = resumo(self.pipeline_vendas())
+        vazio = (0, 0.0)
+
+        return {
+            status: {"contadores": memoria.get(status, vazio), "banco": banco.get(status, vazio)}
+            for status in set(banco) | set(memoria)
+            if memoria.get(status, vazio)[0] != banco.get(status, vazio)[0]
+            or abs(memoria.get(status, vazio)[1] - banco.get(status, vazio)[1]) > 0.01
+        }
+
+    def _somar_dias(self, hoje: date, dias: int) -> Acumulado:
+        acumulado = Acumulado()
+        # `dias` dias contando hoje (a view usa NOW() - INTERVAL, aqui por data)
+        for i in range(dias):
+            dia = hoje - timedelta(days=i)
+            grupo = self.por_dia.get(dia)
+            if grupo is None:
+                continue
+            acumulado.quantidade += grupo.quantidade
+            acumulado.economia.total += grupo.economia.total
+            acumulado.economia.n += grupo.economia.n
+        return acumulado
+
+    def _quantidade_status(self, status: str) -> int:
+        grupo = self.por_status.get(status)
+        return grupo.quantidade if grupo else 0
+
+    @staticmethod
+    def _posicao_status(status: str) -> int:
+        return ORDEM_STATUS.index(status) if status in ORDEM_STATUS else len(ORDEM_STATUS)
+
+    @staticmethod
+    def _iso(valor: Optional[datetime]) -> Optional[str]:
+        return valor.isoformat() if valor else None
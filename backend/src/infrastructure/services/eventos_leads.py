@@ -0,0 +1,315 @@
+"""
+Eventos de leads
+Barramento em memória de criação, mudança de status e arquivamento de
+leads, consumido pelo stream SSE dos dashboards. Com mais de um worker,
+os barramentos são ligados a um diário SQLite compartilhado
+(EVENTOS_LEADS_SQLITE_PATH), que numera os eventos para todos.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Campos do lead enviados nos eventos (o suficiente para atualizar cards)
+COLUNAS_EVENTO = [
+    "id", "nome", "whatsapp", "operadora_atual", "status",
+    "valor_proposto", "economia_estimada", "created_at"
+]
+
+LEAD_CRIADO = "lead_criado"
+LEAD_STATUS = "lead_status"
+LEAD_ARQUIVADO = "lead_arquivado"
+
+
+@dataclass
+class EventoLead:
+    """Um evento publicado, com ID sequencial (do processo ou do diário)"""
+    id: int
+    tipo: str
+    lead_id: str
+    status: Optional[str]
+    status_anterior: Optional[str] = None
+    lead: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+    def interessa(self, status: Optional[Set[str]]) -> bool:
+        """Filtro por status: vale o status novo ou o anterior"""
+        return not status or self.status in status or self.status_anterior in status
+
+    def para_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "lead_id": self.lead_id,
+            "status": self.status,
+            "status_anterior": self.status_anterior,
+            "lead": self.lead,
+            "timestamp": self.timestamp
+        }
+
+
+class DiarioEventosSQLite:
+    """
+    Diário de eventos compartilhado entre os workers
+
+    Cada worker grava os eventos que publica e lê os de todos em ordem de
+    ID (AUTOINCREMENT: nunca reutilizado, nem após a limpeza). Guarda os
+    últimos `retencao` eventos; o acesso ao banco fica numa única thread.
+    """
+
+    def __init__(self, caminho: str, retencao: int = 10000):
+        self.caminho = caminho
+        self.retencao = retencao
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eventos-leads")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _conexao(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.caminho, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS eventos_leads ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, evento TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _sincronizar(self, novos: List[Dict[str, Any]], ultimo_id: Optional[int], limite: int) -> List[EventoLead]:
+        conn = self._conexao()
+        if novos:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.executemany(
+                    "INSERT INTO eventos_leads (evento) VALUES (?)",
+                    [(json.dumps(evento, default=str),) for evento in novos]
+                )
+                # Limpeza ocasional: só quando o ID cruza um múltiplo de 1000
+                ultimo_inserido = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                if ultimo_inserido // 1000 != (ultimo_inserido - len(novos)) // 1000:
+                    conn.execute("DELETE FROM eventos_leads WHERE id <= ?", (ultimo_inserido - self.retencao,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        if ultimo_id is None:
+            # Primeira leitura: carrega só o que cabe no ring buffer
+            maximo = conn.execute("SELECT COALESCE(MAX(id), 0) FROM eventos_leads").fetchone()[0]
+            ultimo_id = max(0, maximo - limite)
+        linhas = conn.execute(
+            "SELECT id, evento FROM eventos_leads WHERE id > ? ORDER BY id LIMIT ?",
+            (ultimo_id, limite)
+        ).fetchall()
+        return [EventoLead(id=id_, **json.loads(evento)) for id_, evento in linhas]
+
+    async def sincronizar(self, novos: List[Dict[str, Any]], ultimo_id: Optional[int], limite: int) -> List[EventoLead]:
+        """Grava `novos` e devolve os eventos com ID maior que `ultimo_id`"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._sincronizar, novos, ultimo_id, limite)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class BarramentoEventosLeads:
+    """
+    Publica eventos de leads para assinantes assíncronos.
+
+    - Os últimos `capacidade` eventos ficam num ring buffer, permitindo
+      retomar a partir de um Last-Event-ID.
+    - Todos os assinantes esperam a mesma Future, trocada a cada
+      publicação: sem tráfego, uma conexão ociosa é só uma corrotina
+      suspensa, acordada apenas para o heartbeat.
+    - Sem diário, os IDs são sequenciais por processo. Ligado a um
+      diário (`conectar`), publicar só enfileira o evento: ele volta,
+      numerado pelo diário, junto com os dos outros workers, e qualquer
+      worker retoma o Last-Event-ID de qualquer outro.
+    - Um Last-Event-ID acima do último ID conhecido (reinício, ou outro
+      worker depois de um ciclo do diário) ou mais antigo que o ring
+      buffer é sinalizado para que o cliente recarregue os dados.
+    """
+
+    def __init__(self, capacidade: int = 1000):
+        self._eventos: Deque[EventoLead] = deque(maxlen=capacidade)
+        self._ultimo_id = 0
+        self._novidade: Optional[asyncio.Future] = None
+        self._ciclo: Optional[asyncio.Future] = None
+        self._diario: Optional[DiarioEventosSQLite] = None
+        self._a_gravar: List[Dict[str, Any]] = []
+        self.assinantes = 0
+
+    @property
+    def ultimo_id(self) -> int:
+        return self._ultimo_id
+
+    def publicar(
+        self,
+        tipo: str,
+        lead: Dict[str, Any],
+        status_anterior: Optional[str] = None
+    ) -> EventoLead:
+        """Publica o evento; com diário o ID só é atribuído na gravação (fica 0 aqui)"""
+        evento = EventoLead(
+            id=0,
+            tipo=tipo,
+            lead_id=str(lead.get("id")),
+            status=lead.get("status"),
+            status_anterior=status_anterior,
+            lead={coluna: lead.get(coluna) for coluna in COLUNAS_EVENTO if coluna in lead}
+        )
+        if self._diario is not None:
+            dados = evento.para_dict()
+            del dados["id"]
+            self._a_gravar.append(dados)
+            return evento
+
+        self._ultimo_id += 1
+        evento.id = self._ultimo_id
+        self._entregar(evento)
+        return evento
+
+    def _entregar(self, evento: EventoLead):
+        self._eventos.append(evento)
+        self._ultimo_id = evento.id
+        if self._novidade is not None and not self._novidade.done():
+            self._novidade.set_result(None)
+        self._novidade = None
+
+    async def conectar(self, diario: DiarioEventosSQLite, intervalo: float = 0.1):
+        """
+        Sincroniza com o diário compartilhado até ser cancelado
+
+        A cada `intervalo` grava os eventos publicados aqui e entrega os
+        novos de todos os workers (inclusive os próprios, já numerados).
+        """
+        self._diario = diario
+        cursor: Optional[int] = None
+        try:
+            while True:
+                novos, self._a_gravar = self._a_gravar, []
+                try:
+                    eventos = await diario.sincronizar(novos, cursor, self._eventos.maxlen)
+                except Exception as e:
+                    logger.error(f"❌ Erro ao sincronizar eventos de leads: {e}")
+                    self._a_gravar = novos + self._a_gravar
+                    await asyncio.sleep(intervalo)
+                    continue
+                for evento in eventos:
+                    self._entregar(evento)
+                cursor = self._ultimo_id
+
+                if self._ciclo is not None and not self._ciclo.done():
+                    self._ciclo.set_result(None)
+                self._ciclo = None
+                # Com lote cheio ainda há eventos a ler: sem espera
+                if len(eventos) < self._eventos.maxlen:
+                    await asyncio.sleep(intervalo)
+        finally:
+            self._diario = None
+
+    async def _aguardar_ciclo(self, timeout: float):
+        """Espera uma sincronização com o diário (no-op sem diário)"""
+        if self._diario is None:
+            return
+        if self._ciclo is None:
+            self._ciclo = asyncio.get_running_loop().create_future()
+        await asyncio.wait({self._ciclo}, timeout=timeout)
+
+    def eventos_desde(self, ultimo_id: int) -> Tuple[List[EventoLead], bool]:
+        """
+        Eventos com ID maior que `ultimo_id`
+
+        Returns:
+            (eventos, continuidade): continuidade é False quando eventos
+            posteriores a `ultimo_id` já saíram do buffer ou o ID não
+            é conhecido
+        """
+        if ultimo_id > self._ultimo_id:
+            return [], False
+        if not self._eventos or ultimo_id >= self._eventos[-1].id:
+            return [], True
+
+        # IDs do diário podem ter lacunas: percorre do fim em vez de indexar
+        posteriores = []
+        for evento in reversed(self._eventos):
+            if evento.id <= ultimo_id:
+                break
+            posteriores.append(evento)
+        posteriores.reverse()
+        return posteriores, ultimo_id >= self._eventos[0].id - 1
+
+    async def aguardar(self, timeout: float) -> bool:
+        """Espera o próximo evento; False se o timeout venceu antes"""
+        if self._novidade is None:
+            self._novidade = asyncio.get_running_loop().create_future()
+        novidade = self._novidade
+        concluidas, _ = await asyncio.wait({novidade}, timeout=timeout)
+        return bool(concluidas)
+
+    async def assinar(
+        self,
+        ultimo_id: Optional[int] = None,
+        status: Optional[Set[str]] = None,
+        heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[EventoLead]]:
+        """
+        Eventos a partir de `ultimo_id` (ou só os novos), filtrados por status
+
+        Produz None a cada `heartbeat` segundos sem eventos. Se a retomada
+        não for contínua, produz primeiro um evento do tipo "reset".
+        """
+        self.assinantes += 1
+        try:
+            cursor = self._ultimo_id if ultimo_id is None else ultimo_id
+            if cursor > self._ultimo_id:
+                # Pode ser de outro worker que gravou antes do nosso último ciclo
+                await self._aguardar_ciclo(timeout=1.0)
+            pendentes, continuidade = self.eventos_desde(cursor)
+            if not continuidade:
+                yield EventoLead(id=self._ultimo_id, tipo="reset", lead_id="", status=None)
+                pendentes = []
+                cursor = self._ultimo_id
+
+            while True:
+                for evento in pendentes:
+                    cursor = evento.id
+                    if evento.interessa(status):
+                        yield evento
+
+                # Eventos publicados enquanto o anterior era enviado dispensam a espera
+                if self._ultimo_id <= cursor and not await self.aguardar(heartbeat):
+                    yield None
+
+                pendentes, continuidade = self.eventos_desde(cursor)
+                if not continuidade:
+                    # O assinante ficou para trás além do ring buffer
+                    yield EventoLead(id=self._ultimo_id, tipo="reset", lead_id="", status=None)
+                    pendentes = []
+                    cursor = self._ultimo_id
+        finally:
+            self.assinantes -= 1
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "assinantes": self.assinantes,
+            "ultimo_id": self._ultimo_id,
+            "eventos_em_buffer": len(self._eventos),
+            "capacidade": self._eventos.maxlen,
+            "diario": self._diario.caminho if self._diario else None
+        }
+
+
+# Instância global do barramento
+eventos_leads = BarramentoEventosLeads()
@@ -0,0 +1,153 @@
+"""
+Filtro de telefones conhecidos
+Bloom filter dos WhatsApp já cadastrados: se o filtro diz que o número
+nunca foi visto, a verificação de duplicidade dispensa a consulta ao banco
+"""
+import asyncio
+import hashlib
+import logging
+import math
+from typing import Any, Dict, Iterable
+
+from src.domain.value_objects.telefone import chave_telefone
+
+logger = logging.getLogger(__name__)
+
+
+class FiltroBloom:
+    """
+    Bloom filter sobre um bytearray.
+
+    Sem falsos negativos; falsos positivos com probabilidade próxima de
+    `taxa_erro` enquanto o número de itens não passar de `capacidade`.
+    As k posições vêm de double hashing sobre um único blake2b.
+    """
+
+    def __init__(self, capacidade: int, taxa_erro: float = 0.001):
+        self.capacidade = max(1, capacidade)
+        self.bits = max(8, int(-self.capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacidade * math.log(2)))
+        self.itens = 0
+        self._mapa = bytearray((self.bits + 7) // 8)
+
+    def _posicoes(self, chave: str):
+        digest = hashlib.blake2b(chave.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def adicionar(self, chave: str):
+        for posicao in self._posicoes(chave):
+            self._mapa[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+
+    def __contains__(self, chave: str) -> bool:
+        return all(self._mapa[p >> 3] & (1 << (p & 7)) for p in self._posicoes(chave))
+
+    def taxa_erro_estimada(self) -> float:
+        """Probabilidade teórica de falso positivo com os itens atuais"""
+        return (1 - math.exp(-self.hashes * self.itens / self.bits)) ** self.hashes
+
+
+class FiltroTelefones:
+    """
+    Telefones (normalizados) de leads ativos conhecidos por este processo.
+
+    Enquanto não for carregado, responde sempre "pode existir", ou seja,
+    nunca dispensa uma consulta. Leads criados por outros workers só
+    entram no filtro na próxima reconstrução; nessa janela o filtro pode
+    dispensar a consulta de um número já cadastrado, e quem impede o
+    duplicado é o índice único de WhatsApp dos leads ativos
+    (LeadDuplicadoError na criação).
+    """
+
+    def __init__(self, capacidade: int = 1_000_000, taxa_erro: float = 0.001):
+        self.capacidade = capacidade
+        self.taxa_erro = taxa_erro
+        self.carregado = False
+        self._filtro = FiltroBloom(capacidade, taxa_erro)
+        self._verificacoes = 0
+        self._consultas_evitadas = 0
+        self._falsos_positivos = 0
+        self._duplicados = 0
+        self._durante_reconstrucao = None
+
+    def adicionar(self, telefone: str):
+        self._filtro.adicionar(chave_telefone(telefone))
+        if self._durante_reconstrucao is not None:
+            self._durante_reconstrucao.append(telefone)
+
+    def pode_existir(self, telefone: str) -> bool:
+        """False somente se o telefone certamente não está cadastrado"""
+        self._verificacoes += 1
+        if not self.carregado:
+            return True
+        if chave_telefone(telefone) in self._filtro:
+            return True
+        self._consultas_evitadas += 1
+        return False
+
+    def registrar_consulta(self, encontrado: bool):
+        """Resultado da consulta feita após um "pode existir" do filtro"""
+        if not self.carregado:
+            return
+        if encontrado:
+            self._duplicados += 1
+        else:
+            self._falsos_positivos += 1
+
+    async def reconstruir(self, repositorio) -> int:
+        """Monta um filtro novo com os telefones de todos os leads ativos"""
+        telefones = []
+        # Números criados durante a varredura podem não aparecer nela
+        self._durante_reconstrucao = []
+        try:
+            async for pagina in repositorio.iterar_leads(
+                tamanho_pagina=5000, colunas="id,created_at,whatsapp"
+            ):
+                telefones.extend(lead["whatsapp"] for lead in pagina)
+            telefones.extend(self._durante_reconstrucao)
+        finally:
+            self._durante_reconstrucao = None
+
+        self._trocar_filtro(telefones)
+        logger.info(f"📞 Filtro de telefones carregado: {len(telefones)} números")
+        return len(telefones)
+
+    async def reconstruir_periodicamente(self, repositorio, intervalo: float):
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await self.reconstruir(repositorio)
+            except Exception as e:
+                logger.error(f"❌ Erro ao reconstruir filtro de telefones: {e}")
+
+    def _trocar_filtro(self, telefones: Iterable[str]):
+        telefones = list(telefones)
+        # Folga para crescer até a próxima reconstrução sem degradar a taxa
+        filtro = FiltroBloom(max(self.capacidade, 2 * len(telefones)), self.taxa_erro)
+        for telefone in telefones:
+            filtro.adicionar(chave_telefone(telefone))
+        self._filtro = filtro
+        self.carregado = True
+
+    def metricas(self) -> Dict[str, Any]:
+        """Consultas evitadas e taxa de falsos positivos (observada e teórica)"""
+        novos_verificados = self._consultas_evitadas + self._falsos_positivos
+        return {
+            "carregado": self.carregado,
+            "telefones": self._filtro.itens,
+            "memoria_bytes": len(self._filtro._mapa),
+            "verificacoes": self._verificacoes,
+            "consultas_evitadas": self._consultas_evitadas,
+            "duplicados_encontrados": self._duplicados,
+            "falsos_positivos": self._falsos_positivos,
+            "taxa_falso_positivo": (
+                round(self._falsos_positivos / novos_verificados, 5) if novos_verificados else None
+            ),
+            "taxa_falso_positivo_estimada": round(self._filtro.taxa_erro_estimada(), 6)
+        }
+
+
+# Instância global do filtro
+filtro_telefones = FiltroTelefones()
@@ -0,0 +1,329 @@
+"""
+Chaves de idempotência
+Clientes em conexões instáveis repetem POSTs (upload de PDF, criação de
+lead); com o cabeçalho Idempotency-Key a primeira resposta fica guardada
+e as repetições recebem a mesma resposta sem refazer o trabalho (LLM,
+insert). Repetições que chegam enquanto a original ainda roda esperam
+por ela.
+
+Armazéns:
+- memoria: LRU limitado com TTL, por processo (padrão com um worker)
+- sqlite: arquivo compartilhado pelos workers da máquina; a reserva de
+  uma chave é uma transação BEGIN IMMEDIATE com prazo, para um worker
+  que morra no meio não prender a chave para sempre
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .metricas import metricas
+
+REQUISICOES_IDEMPOTENTES = metricas.contador(
+    "idempotencia_requisicoes_total",
+    "Requisições com Idempotency-Key por resultado",
+    ("resultado",)
+)
+
+EXECUTADA = "executada"
+REPETIDA = "repetida"
+CONFLITO = "conflito"
+EM_ANDAMENTO = "em_andamento"
+
+
+@dataclass
+class RespostaGuardada:
+    """Resposta HTTP completa (cabeçalhos como pares de texto)"""
+    status: int
+    cabecalhos: List[Tuple[str, str]]
+    corpo: bytes
+
+
+@dataclass
+class Registro:
+    """Chave já vista: a impressão da requisição e a resposta (None: ainda em execução)"""
+    impressao: str
+    resposta: Optional[RespostaGuardada]
+
+
+class ArmazemIdempotencia(ABC):
+    """Onde as chaves e respostas ficam"""
+
+    @abstractmethod
+    async def reservar(self, chave: str, impressao: str, prazo: float) -> Optional[Registro]:
+        """
+        Reserva a chave para quem chamou por até `prazo` segundos
+
+        Returns:
+            None se a reserva foi feita (quem chamou executa); senão o
+            registro existente (concluído ou em execução por outro)
+        """
+
+    @abstractmethod
+    async def concluir(self, chave: str, impressao: str, resposta: RespostaGuardada):
+        """Guarda a resposta da execução reservada (vale por `ttl`)"""
+
+    @abstractmethod
+    async def descartar(self, chave: str, impressao: str):
+        """Desfaz a reserva sem resposta (a próxima repetição executa de novo)"""
+
+
+class ArmazemMemoria(ArmazemIdempotencia):
+    """LRU em memória com TTL, limitado em chaves e em tamanho por resposta"""
+
+    def __init__(self, capacidade: int = 10000, ttl: float = 86400.0, relogio: Callable[[], float] = time.monotonic):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._relogio = relogio
+        # chave → (registro, expira_em)
+        self._itens: "OrderedDict[str, Tuple[Registro, float]]" = OrderedDict()
+
+    async def reservar(self, chave: str, impressao: str, prazo: float) -> Optional[Registro]:
+        agora = self._relogio()
+        existente = self._itens.get(chave)
+        if existente is not None and existente[1] > agora:
+            self._itens.move_to_end(chave)
+            return existente[0]
+
+        self._itens[chave] = (Registro(impressao, None), agora + prazo)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.capacidade:
+            self._itens.popitem(last=False)
+        return None
+
+    async def concluir(self, chave: str, impressao: str, resposta: RespostaGuardada):
+        existente = self._itens.get(chave)
+        if existente is not None and existente[0].impressao == impressao:
+            self._itens[chave] = (Registro(impressao, resposta), self._relogio() + self.ttl)
+
+    async def descartar(self, chave: str, impressao: str):
+        existente = self._itens.get(chave)
+        if existente is not None and existente[0].impressao == impressao and existente[0].resposta is None:
+            del self._itens[chave]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chaves_idempotencia (
+    chave TEXT PRIMARY KEY,
+    impressao TEXT NOT NULL,
+    status INTEGER,
+    cabecalhos TEXT,
+    corpo BLOB,
+    expira_em REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_chaves_idempotencia_expira ON chaves_idempotencia (expira_em);
+"""
+
+
+class ArmazemSQLite(ArmazemIdempotencia):
+    """Chaves num arquivo SQLite compartilhado pelos workers; uma conexão numa thread dedicada"""
+
+    # Reservas entre duas limpezas de chaves expiradas/excedentes
+    LIMPEZA_A_CADA = 200
+
+    def __init__(self, caminho: str, capacidade: int = 10000, ttl: float = 86400.0):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._reservas = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-idempotencia")
+        self._conn: Optional[sqlite3.Connection] = None
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._executor.submit(self._abrir).result()
+
+    def _abrir(self):
+        self._conn = sqlite3.connect(self.caminho, isolation_level=None, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    async def _executar(self, funcao: Callable[[sqlite3.Connection], Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, funcao, self._conn)
+
+    def encerrar(self):
+        self._executor.submit(self._conn.close).result()
+        self._executor.shutdown(wait=True)
+
+    async def reservar(self, chave: str, impressao: str, prazo: float) -> Optional[Registro]:
+        self._reservas += 1
+        limpar = self._reservas % self.LIMPEZA_A_CADA == 0
+
+        def executar(conn: sqlite3.Connection) -> Optional[Registro]:
+            # Relógio de parede: o prazo é comparado entre processos
+            agora = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = conn.execute(
+                    "SELECT impressao, status, cabecalhos, corpo FROM chaves_idempotencia "
+                    "WHERE chave = ? AND expira_em > ?",
+                    (chave, agora)
+                ).fetchone()
+                if linha is None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO chaves_idempotencia (chave, impressao, expira_em) VALUES (?, ?, ?)",
+                        (chave, impressao, agora + prazo)
+                    )
+                    if limpar:
+                        self._limpar(conn, agora)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            if linha is None:
+                return None
+            resposta = None
+            if linha["status"] is not None:
+                cabecalhos = [tuple(par) for par in json.loads(linha["cabecalhos"])]
+                resposta = RespostaGuardada(linha["status"], cabecalhos, bytes(linha["corpo"]))
+            return Registro(linha["impressao"], resposta)
+
+        return await self._executar(executar)
+
+    def _limpar(self, conn: sqlite3.Connection, agora: float):
+        conn.execute("DELETE FROM chaves_idempotencia WHERE expira_em <= ?", (agora,))
+        conn.execute(
+            "DELETE FROM chaves_idempotencia WHERE chave IN ("
+            "SELECT chave FROM chaves_idempotencia ORDER BY expira_em "
+            "LIMIT max(0, (SELECT count(*) FROM chaves_idempotencia) - ?))",
+            (self.capacidade,)
+        )
+
+    async def concluir(self, chave: str, impressao: str, resposta: RespostaGuardada):
+        def executar(conn: sqlite3.Connection):
+            conn.execute(
+                "UPDATE chaves_idempotencia SET status = ?, cabecalhos = ?, corpo = ?, expira_em = ? "
+                "WHERE chave = ? AND impressao = ?",
+                (resposta.status, json.dumps(resposta.cabecalhos), resposta.corpo,
+                 time.time() + self.ttl, chave, impressao)
+            )
+
+        await self._executar(executar)
+
+    async def descartar(self, chave: str, impressao: str):
+        def executar(conn: sqlite3.Connection):
+            conn.execute(
+                "DELETE FROM chaves_idempotencia WHERE chave = ? AND impressao = ? AND status IS NULL",
+                (chave, impressao)
+            )
+
+        await self._executar(executar)
+
+
+class Idempotencia:
+    """Executa cada chave uma vez; repetições recebem a resposta guardada ou esperam a original"""
+
+    def __init__(
+        self,
+        armazem: ArmazemIdempotencia,
+        espera_maxima: float = 120.0,
+        tamanho_maximo: int = 1024 * 1024
+    ):
+        """
+        Args:
+            armazem: Onde guardar chaves e respostas
+            espera_maxima: Segundos que uma repetição espera a original
+                (também o prazo da reserva: depois disso outra pode executar)
+            tamanho_maximo: Respostas maiores (bytes) não são guardadas
+        """
+        self.armazem = armazem
+        self.espera_maxima = espera_maxima
+        self.tamanho_maximo = tamanho_maximo
+        # Execuções deste processo, para as repetições locais esperarem sem consultar o armazém
+        self._em_execucao: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def guardavel(resposta: RespostaGuardada) -> bool:
+        """Erros do servidor e recusas por carga não são definitivos: a repetição executa de novo"""
+        return resposta.status < 500 and resposta.status != 429
+
+    async def executar(
+        self,
+        chave: str,
+        impressao: str,
+        produzir: Callable[[], Awaitable[RespostaGuardada]]
+    ) -> Tuple[str, Optional[RespostaGuardada]]:
+        """
+        Args:
+            chave: Idempotency-Key (já com o escopo de método e rota)
+            impressao: Hash da requisição; a mesma chave com outra requisição é conflito
+            produzir: Executa a requisição e devolve a resposta completa
+
+        Returns:
+            (EXECUTADA | REPETIDA | CONFLITO | EM_ANDAMENTO, resposta)
+        """
+        fim = time.monotonic() + self.espera_maxima
+        intervalo = 0.05
+        while True:
+            registro = await self.armazem.reservar(chave, impressao, self.espera_maxima)
+            if registro is None:
+                resposta = await self._produzir(chave, impressao, produzir)
+                return self._contar(EXECUTADA), resposta
+            if registro.impressao != impressao:
+                return self._contar(CONFLITO), None
+            if registro.resposta is not None:
+                return self._contar(REPETIDA), registro.resposta
+
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return self._contar(EM_ANDAMENTO), None
+            local = self._em_execucao.get(chave)
+            if local is not None:
+                await asyncio.wait((local,), timeout=restante)
+            else:
+                # Executando em outro worker: consulta o armazém com recuo
+                await asyncio.sleep(min(intervalo, restante))
+                intervalo = min(intervalo * 2, 0.5)
+
+    async def _produzir(self, chave: str, impressao: str, produzir) -> RespostaGuardada:
+        concluida = asyncio.get_running_loop().create_future()
+        self._em_execucao[chave] = concluida
+        guardou = False
+        try:
+            resposta = await produzir()
+            if self.guardavel(resposta) and len(resposta.corpo) <= self.tamanho_maximo:
+                await self.armazem.concluir(chave, impressao, resposta)
+                guardou = True
+            return resposta
+        finally:
+            if not guardou:
+                await self.armazem.descartar(chave, impressao)
+            del self._em_execucao[chave]
+            concluida.set_result(None)
+
+    @staticmethod
+    def _contar(resultado: str) -> str:
+        REQUISICOES_IDEMPOTENTES.incrementar(resultado)
+        return resultado
+
+
+def criar_armazem_idempotencia() -> ArmazemIdempotencia:
+    """
+    Cria o armazém configurado em IDEMPOTENCIA_BACKEND:
+    - memoria (padrão): por processo
+    - sqlite: arquivo em SQLITE_IDEMPOTENCIA_PATH, compartilhado pelos workers
+    """
+    backend = os.getenv("IDEMPOTENCIA_BACKEND", "memoria").lower()
+    capacidade = int(os.getenv("IDEMPOTENCIA_CAPACIDADE", "10000"))
+    ttl = float(os.getenv("IDEMPOTENCIA_TTL_SEGUNDOS", "86400"))
+    if backend == "sqlite":
+        return ArmazemSQLite(os.getenv("SQLITE_IDEMPOTENCIA_PATH", "data/idempotencia.db"), capacidade, ttl)
+    return ArmazemMemoria(capacidade, ttl)
+
+
+# Instância global
+idempotencia = Idempotencia(
+    criar_armazem_idempotencia(),
+    espera_maxima=float(os.getenv("IDEMPOTENCIA_ESPERA_MAXIMA", "120"))
+)
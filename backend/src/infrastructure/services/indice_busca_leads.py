@@ -0,0 +1,181 @@
+"""
+Índice de busca de leads em memória
+Índice invertido de trigramas (nome, e-mail e dígitos do telefone),
+usado quando não há pg_trgm disponível (ex.: backend SQLite local)
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+# Colunas devolvidas pela busca (mesma projeção da RPC buscar_leads)
+COLUNAS_BUSCA = [
+    "id", "nome", "whatsapp", "email",
+    "operadora_atual", "status", "created_at"
+]
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Minúsculas e sem acentos, para que 'joão' encontre 'Joao'"""
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def apenas_digitos(texto: Optional[str]) -> str:
+    return re.sub(r"\D", "", texto or "")
+
+
+def trigramas(texto: str) -> Set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBuscaLeads:
+    """
+    Índice invertido trigrama -> documentos.
+
+    As listas de postagem são arrays NumPy ordenados de IDs internos
+    (inteiros crescentes), e a interseção entre trigramas da consulta é
+    feita com np.intersect1d, em C. Inserções vão para um buffer por
+    trigrama que é consolidado na próxima busca; remoções são marcadas
+    e filtradas na verificação dos candidatos.
+    """
+
+    def __init__(self, max_candidatos: int = 5000):
+        """
+        Args:
+            max_candidatos: Quantos candidatos (os mais recentes) são
+                verificados e ranqueados por consulta
+        """
+        self.max_candidatos = max_candidatos
+        self._postagens: Dict[str, np.ndarray] = {}
+        self._pendentes: Dict[str, List[int]] = {}
+        self._documentos: List[Optional[list]] = []
+        self._campos: List[Optional[tuple]] = []
+        self._por_id: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    # ==========================================
+    # Escritas
+    # ==========================================
+
+    def adicionar(self, lead: Dict[str, Any]):
+        """Indexa (ou reindexa) um lead não arquivado"""
+        lead_id = str(lead["id"])
+        if lead_id in self._por_id:
+            self.remover(lead_id)
+        if lead.get("arquivado"):
+            return
+
+        doc = len(self._documentos)
+        nome = normalizar_texto(lead.get("nome"))
+        email = normalizar_texto(lead.get("email"))
+        telefone = apenas_digitos(lead.get("whatsapp"))
+
+        self._documentos.append([lead.get(coluna) for coluna in COLUNAS_BUSCA])
+        self._campos.append((nome, email, telefone))
+        self._por_id[lead_id] = doc
+
+        for trigrama in trigramas(nome) | trigramas(email) | trigramas(telefone):
+            self._pendentes.setdefault(trigrama, []).append(doc)
+
+    def adicionar_varios(self, leads: Iterable[Dict[str, Any]]):
+        """Indexa vários leads; devem vir em ordem crescente de criação"""
+        for lead in leads:
+            self.adicionar(lead)
+
+    def remover(self, lead_id: str):
+        """Remove um lead do índice (ex.: arquivamento)"""
+        doc = self._por_id.pop(str(lead_id), None)
+        if doc is not None:
+            self._documentos[doc] = None
+            self._campos[doc] = None
+
+    def atualizar(self, lead_id: str, **campos):
+        """Atualiza colunas projetadas que não afetam a indexação (ex.: status)"""
+        doc = self._por_id.get(str(lead_id))
+        if doc is not None:
+            for coluna, valor in campos.items():
+                if coluna in COLUNAS_BUSCA:
+                    self._documentos[doc][COLUNAS_BUSCA.index(coluna)] = valor
+
+    # ==========================================
+    # Busca
+    # ==========================================
+
+    def buscar(self, termo: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Busca leads cujo nome, e-mail ou telefone contenha o termo
+
+        Returns:
+            Até `limite` leads ordenados por relevância e recência
+        """
+        texto = normalizar_texto(termo).strip()
+        digitos = apenas_digitos(termo)
+
+        candidatos = self._candidatos(texto)
+        if len(digitos) >= 3 and digitos != texto:
+            candidatos = np.union1d(candidatos, self._candidatos(digitos))
+
+        # IDs internos crescem com a inserção: os maiores são os mais recentes
+        candidatos = candidatos[::-1][:self.max_candidatos]
+
+        resultados = []
+        for doc in candidatos.tolist():
+            campos = self._campos[doc]
+            if campos is None:
+                continue
+            relevancia = self._relevancia(texto, digitos, *campos)
+            if relevancia > 0:
+                resultados.append((relevancia, doc))
+
+        resultados.sort(key=lambda item: (-item[0], -item[1]))
+        return [
+            {**dict(zip(COLUNAS_BUSCA, self._documentos[doc])), "relevancia": round(relevancia, 3)}
+            for relevancia, doc in resultados[:limite]
+        ]
+
+    def _candidatos(self, texto: str) -> np.ndarray:
+        """Documentos que contêm todos os trigramas do texto"""
+        chaves = trigramas(texto)
+        if not chaves:
+            return np.empty(0, dtype=np.int32)
+
+        listas = sorted((self._postagem(chave) for chave in chaves), key=len)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            if not len(resultado):
+                break
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+        return resultado
+
+    def _postagem(self, trigrama: str) -> np.ndarray:
+        """Lista de postagem consolidada (array ordenado) de um trigrama"""
+        pendentes = self._pendentes.pop(trigrama, None)
+        atual = self._postagens.get(trigrama)
+        if pendentes:
+            novos = np.fromiter(pendentes, dtype=np.int32, count=len(pendentes))
+            atual = novos if atual is None else np.concatenate([atual, novos])
+            self._postagens[trigrama] = atual
+        return atual if atual is not None else np.empty(0, dtype=np.int32)
+
+    @staticmethod
+    def _relevancia(texto: str, digitos: str, nome: str, email: str, telefone: str) -> float:
+        """Mesma ideia da RPC: prefixo > início de palavra > fragmento"""
+        pontos = 0.0
+        if texto and texto in nome:
+            if nome.startswith(texto):
+                pontos = 1.5
+            elif f" {texto}" in nome:
+                pontos = 1.0
+            else:
+                pontos = 0.6
+        if texto and texto in email:
+            pontos = max(pontos, 0.8 if email.startswith(texto) else 0.5)
+        if len(digitos) >= 3 and digitos in telefone:
+            pontos = max(pontos, 1.0)
+        return pontos
@@ -0,0 +1,93 @@
+"""
+Liderança entre workers
+Com vários workers (gunicorn.conf.py), as tarefas periódicas que
+escrevem no banco inteiro (recálculo de score, agendador de renovações)
+devem rodar num só. O líder é quem segura um flock exclusivo num
+arquivo; o lock some com o processo, então quando o líder é reciclado
+(max_requests) ou morre, outro worker assume na próxima tentativa.
+
+A mesma trava serve de exclusão mútua para jobs disparados por
+requisição (comissões, reprecificação): o 409 vale para todos os workers.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TravaLideranca:
+    """flock não bloqueante num arquivo compartilhado pelos workers da máquina"""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = None
+
+    @property
+    def lider(self) -> bool:
+        return self._arquivo is not None
+
+    def tentar(self) -> bool:
+        """Tenta assumir a liderança; True se este processo é (ou já era) o líder"""
+        if self._arquivo is not None:
+            return True
+
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        arquivo = open(self.caminho, "a+")
+        try:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+
+        arquivo.seek(0)
+        arquivo.truncate()
+        arquivo.write(str(os.getpid()))
+        arquivo.flush()
+        self._arquivo = arquivo
+        return True
+
+    def ocupante(self) -> Optional[int]:
+        """PID de outro processo que segura a trava agora (None se livre ou se for este)"""
+        if self._arquivo is not None or not os.path.exists(self.caminho):
+            return None
+        with open(self.caminho, "a+") as arquivo:
+            try:
+                fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                arquivo.seek(0)
+                conteudo = arquivo.read().strip()
+                return int(conteudo) if conteudo.isdigit() else 0
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+            return None
+
+    def liberar(self):
+        if self._arquivo is not None:
+            fcntl.flock(self._arquivo.fileno(), fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+
+    async def executar_como_lider(
+        self,
+        iniciar: Callable[[], Awaitable[List[asyncio.Task]]],
+        intervalo: float = 5.0
+    ):
+        """
+        Espera a liderança (tentando a cada `intervalo` segundos) e então
+        inicia as tarefas globais; cancelado, cancela as tarefas e libera o lock
+        """
+        tarefas: Optional[List[asyncio.Task]] = None
+        try:
+            while not self.tentar():
+                await asyncio.sleep(intervalo)
+            logger.info(f"👑 Worker {os.getpid()} assumiu as tarefas periódicas globais")
+            tarefas = await iniciar()
+            await asyncio.Event().wait()
+        finally:
+            for tarefa in tarefas or []:
+                tarefa.cancel()
+            self.liberar()
@@ -0,0 +1,289 @@
+"""
+Métricas da aplicação
+Registro em memória de contadores, gauges e histogramas com rótulos,
+exportado no formato de texto do Prometheus (GET /metrics).
+
+Feito para o caminho quente: observar um valor é uma busca em dict e
+um bisect sobre os limites dos buckets (as contagens acumuladas só são
+montadas na hora da coleta), sem locks nem alocação por observação.
+"""
+import inspect
+import math
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latência de requisições HTTP e chamadas externas (segundos)
+LIMITES_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Cálculos em memória (segundos)
+LIMITES_RAPIDOS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+Rotulos = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class Histograma:
+    """Distribuição de uma série (um conjunto de valores de rótulos)"""
+
+    __slots__ = ("limites", "contagens", "soma")
+
+    def __init__(self, limites: Sequence[float]):
+        self.limites = tuple(limites)
+        # Um bucket por limite + o de +Inf; contagens não acumuladas
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+
+    def observar(self, valor: float):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+
+    @property
+    def total(self) -> int:
+        return sum(self.contagens)
+
+    def quantil(self, q: float) -> Optional[float]:
+        """Estimativa do quantil pelo limite superior do bucket (para /health e testes)"""
+        total = self.total
+        if not total:
+            return None
+        alvo, acumulado = q * total, 0
+        for limite, contagem in zip(self.limites + (math.inf,), self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return math.inf
+
+
+class _Cronometro:
+    """Context manager que observa o tempo decorrido num histograma"""
+
+    __slots__ = ("histograma", "inicio")
+
+    def __init__(self, histograma: Histograma):
+        self.histograma = histograma
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.histograma.observar(time.perf_counter() - self.inicio)
+        return False
+
+
+class FamiliaHistograma:
+    """Histogramas de uma métrica, um por combinação de rótulos"""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Rotulos, limites: Sequence[float]):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self.limites = tuple(sorted(limites))
+        self.series: Dict[Rotulos, Histograma] = {}
+
+    def rotulado(self, *valores: str) -> Histograma:
+        serie = self.series.get(valores)
+        if serie is None:
+            serie = self.series.setdefault(valores, Histograma(self.limites))
+        return serie
+
+    def observar(self, valor: float, *valores: str):
+        self.rotulado(*valores).observar(valor)
+
+    def tempo(self, *valores: str) -> _Cronometro:
+        """`with familia.tempo("rotulo"):` mede o bloco"""
+        return _Cronometro(self.rotulado(*valores))
+
+    def linhas(self) -> Iterable[str]:
+        for valores, serie in sorted(self.series.items()):
+            acumulado = 0
+            for limite, contagem in zip(serie.limites + (math.inf,), serie.contagens):
+                acumulado += contagem
+                le = 'le="' + _formatar_numero(limite) + '"'
+                yield f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, valores, le)} {acumulado}"
+            rotulos = _formatar_rotulos(self.rotulos, valores)
+            yield f"{self.nome}_sum{rotulos} {_formatar_numero(serie.soma)}"
+            yield f"{self.nome}_count{rotulos} {acumulado}"
+
+
+class FamiliaContador:
+    """Contador monotônico por combinação de rótulos"""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Rotulos):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self.series: Dict[Rotulos, float] = {}
+
+    def incrementar(self, *valores: str, quantidade: float = 1):
+        self.series[valores] = self.series.get(valores, 0) + quantidade
+
+    def linhas(self) -> Iterable[str]:
+        for valores, valor in sorted(self.series.items()):
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_formatar_numero(valor)}"
+
+
+class FamiliaGauge:
+    """Valor instantâneo, lido de uma função na hora da coleta"""
+
+    tipo = "gauge"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Rotulos, coletar: Callable[[], Dict[Rotulos, float]]):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, rotulos
+        self.coletar = coletar
+
+    def linhas(self) -> Iterable[str]:
+        for valores, valor in sorted(self.coletar().items()):
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_formatar_numero(valor)}"
+
+
+class RegistroMetricas:
+    """Métricas do processo; pedir de novo uma métrica já criada devolve a mesma"""
+
+    def __init__(self):
+        self._familias: Dict[str, object] = {}
+
+    def _registrar(self, familia):
+        existente = self._familias.get(familia.nome)
+        if existente is not None:
+            if type(existente) is not type(familia) or existente.rotulos != familia.rotulos:
+                raise ValueError(f"Métrica {familia.nome} já registrada com outro tipo ou rótulos")
+            return existente
+        self._familias[familia.nome] = familia
+        return familia
+
+    def histograma(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Rotulos = (),
+        limites: Sequence[float] = LIMITES_PADRAO
+    ) -> FamiliaHistograma:
+        return self._registrar(FamiliaHistograma(nome, ajuda, tuple(rotulos), limites))
+
+    def contador(self, nome: str, ajuda: str, rotulos: Rotulos = ()) -> FamiliaContador:
+        return self._registrar(FamiliaContador(nome, ajuda, tuple(rotulos)))
+
+    def gauge(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Rotulos,
+        coletar: Callable[[], Dict[Rotulos, float]]
+    ) -> FamiliaGauge:
+        return self._registrar(FamiliaGauge(nome, ajuda, tuple(rotulos), coletar))
+
+    def renderizar(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (0.0.4)"""
+        linhas: List[str] = []
+        for nome in sorted(self._familias):
+            familia = self._familias[nome]
+            linhas.append(f"# HELP {nome} {familia.ajuda}")
+            linhas.append(f"# TYPE {nome} {familia.tipo}")
+            linhas.extend(familia.linhas())
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, gauges: bool = True) -> Dict[str, Any]:
+        """
+        Valores atuais em estrutura JSON, para somar com os de outros
+        processos (somar_exportacoes); gauges são lidos na hora
+        """
+        exportacao: Dict[str, Any] = {}
+        for nome, familia in self._familias.items():
+            dados = {"tipo": familia.tipo, "ajuda": familia.ajuda, "rotulos": list(familia.rotulos)}
+            if isinstance(familia, FamiliaHistograma):
+                dados["limites"] = list(familia.limites)
+                dados["series"] = [[list(v), s.contagens, s.soma] for v, s in familia.series.items()]
+            elif isinstance(familia, FamiliaContador):
+                dados["series"] = [[list(v), valor] for v, valor in familia.series.items()]
+            elif gauges:
+                dados["series"] = [[list(v), valor] for v, valor in familia.coletar().items()]
+            else:
+                continue
+            exportacao[nome] = dados
+        return exportacao
+
+
+def somar_exportacoes(exportacoes: Iterable[Dict[str, Any]]) -> RegistroMetricas:
+    """Registro com a soma, série a série, das exportações de vários processos"""
+    registro = RegistroMetricas()
+    gauges: Dict[str, Dict[Rotulos, float]] = {}
+
+    for exportacao in exportacoes:
+        for nome, dados in exportacao.items():
+            rotulos = tuple(dados["rotulos"])
+            try:
+                if dados["tipo"] == "histogram":
+                    familia = registro.histograma(nome, dados["ajuda"], rotulos, dados["limites"])
+                    if list(familia.limites) != list(dados["limites"]):
+                        continue  # buckets mudaram entre versões do código
+                    for valores, contagens, soma in dados["series"]:
+                        serie = familia.rotulado(*valores)
+                        serie.contagens = [a + b for a, b in zip(serie.contagens, contagens)]
+                        serie.soma += soma
+                elif dados["tipo"] == "counter":
+                    familia = registro.contador(nome, dados["ajuda"], rotulos)
+                    for valores, valor in dados["series"]:
+                        familia.incrementar(*valores, quantidade=valor)
+                else:
+                    series = gauges.setdefault(nome, {})
+                    registro.gauge(nome, dados["ajuda"], rotulos, lambda series=series: series)
+                    for valores, valor in dados["series"]:
+                        series[tuple(valores)] = series.get(tuple(valores), 0) + valor
+            except ValueError:
+                continue  # mesma métrica com outro tipo ou rótulos (versões diferentes)
+    return registro
+
+
+def cronometrado(familia: FamiliaHistograma, *valores: str):
+    """
+    Decorator que mede cada chamada da função (síncrona ou async)
+    no histograma `familia` com os rótulos `valores`
+    """
+    serie = familia.rotulado(*valores)
+
+    def decorar(funcao):
+        if inspect.iscoroutinefunction(funcao):
+            @wraps(funcao)
+            async def medir_async(*args, **kwargs):
+                inicio = time.perf_counter()
+                try:
+                    return await funcao(*args, **kwargs)
+                finally:
+                    serie.observar(time.perf_counter() - inicio)
+            return medir_async
+
+        @wraps(funcao)
+        def medir(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                serie.observar(time.perf_counter() - inicio)
+        return medir
+
+    return decorar
+
+
+# Registro global do processo
+metricas = RegistroMetricas()
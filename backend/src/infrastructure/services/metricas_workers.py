@@ -0,0 +1,124 @@
+"""
+Métricas somadas entre os workers
+Cada worker do gunicorn tem o seu RegistroMetricas; o Prometheus, por
+trás do balanceador, cai num worker qualquer a cada coleta. Com
+METRICAS_WORKERS_DIR configurado (padrão do gunicorn.conf.py com mais de
+um worker), cada worker grava periodicamente a exportação do seu
+registro em <diretório>/<pid>.json e GET /metrics responde a soma de
+todos os arquivos.
+
+- Contadores e histogramas de workers que já saíram (reciclados por
+  max_requests, mortos) continuam na soma, para as séries não
+  regredirem: o arquivo é incorporado a acumulado.json e removido.
+- Gauges são instantâneos: só entram os dos workers vivos.
+- O worker que responde usa os próprios valores do momento; os dos
+  outros têm até `intervalo` segundos de atraso.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+from .metricas import RegistroMetricas, metricas, somar_exportacoes
+
+logger = logging.getLogger(__name__)
+
+ACUMULADO = "acumulado.json"
+
+
+def _processo_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _ler(caminho: str) -> Dict[str, Any]:
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar(caminho: str, conteudo: Dict[str, Any]):
+    """Escrita atômica (quem lê nunca vê um arquivo pela metade)"""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(conteudo, arquivo, separators=(",", ":"))
+    os.replace(temporario, caminho)
+
+
+def _sem_gauges(exportacao: Dict[str, Any]) -> Dict[str, Any]:
+    return {nome: dados for nome, dados in exportacao.items() if dados["tipo"] != "gauge"}
+
+
+class MetricasWorkers:
+    """Exportação do registro deste worker e soma com as dos demais"""
+
+    def __init__(self, diretorio: str, registro: RegistroMetricas = metricas, intervalo: float = 5.0):
+        self.diretorio = diretorio
+        self.registro = registro
+        self.intervalo = intervalo
+        self.pid = os.getpid()
+        os.makedirs(diretorio, exist_ok=True)
+
+    @property
+    def _arquivo(self) -> str:
+        return os.path.join(self.diretorio, f"{self.pid}.json")
+
+    async def exportar(self):
+        # O registro é lido no event loop (onde é alterado); só a escrita vai para a thread
+        await asyncio.to_thread(_gravar, self._arquivo, self.registro.exportar())
+
+    async def exportar_periodicamente(self):
+        while True:
+            try:
+                await self.exportar()
+            except Exception as e:
+                logger.error(f"❌ Erro ao exportar métricas do worker: {e}")
+            await asyncio.sleep(self.intervalo)
+
+    def encerrar(self):
+        """Última exportação, sem gauges (o worker está saindo)"""
+        _gravar(self._arquivo, _sem_gauges(self.registro.exportar()))
+
+    def _incorporar_encerrados(self, encerrados: List[str]):
+        """Soma os arquivos de workers que saíram em acumulado.json (com lock)"""
+        with open(os.path.join(self.diretorio, "acumulado.lock"), "a") as trava:
+            fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+            caminho_acumulado = os.path.join(self.diretorio, ACUMULADO)
+            presentes = [caminho for caminho in encerrados if os.path.exists(caminho)]
+            if not presentes:
+                return
+            exportacoes = [_ler(caminho_acumulado)] + [_sem_gauges(_ler(caminho)) for caminho in presentes]
+            _gravar(caminho_acumulado, somar_exportacoes(exportacoes).exportar())
+            for caminho in presentes:
+                os.remove(caminho)
+
+    async def renderizar(self) -> str:
+        """Soma de todos os workers no formato de texto do Prometheus"""
+        return await asyncio.to_thread(self._somar, self.registro.exportar())
+
+    def _somar(self, propria: Dict[str, Any]) -> str:
+        exportacoes = [propria]
+        encerrados = []
+        for nome in os.listdir(self.diretorio):
+            pid, extensao = os.path.splitext(nome)
+            if extensao != ".json" or not pid.isdigit() or int(pid) == self.pid:
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            if _processo_vivo(int(pid)):
+                exportacoes.append(_ler(caminho))
+            else:
+                encerrados.append(caminho)
+
+        if encerrados:
+            self._incorporar_encerrados(encerrados)
+        exportacoes.append(_ler(os.path.join(self.diretorio, ACUMULADO)))
+        return somar_exportacoes(exportacoes).renderizar()
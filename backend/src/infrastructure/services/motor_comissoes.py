@@ -0,0 +1,299 @@
+"""
+Motor de comissões dos corretores
+Lê as produções com vigência no mês de referência, aplica a grade de
+parcelas de cada modalidade e o percentual padrão de cada corretor de
+forma vetorizada (pandas/NumPy) e grava em lote as parcelas de comissão
+e um relatório por corretor.
+
+Reprocessar o mesmo mês é seguro: os IDs das parcelas e relatórios são
+derivados da produção/corretor e do mês, as linhas pendentes do mês são
+substituídas e as já pagas são preservadas.
+"""
+import asyncio
+import logging
+import os
+import time
+import unicodedata
+import uuid
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .lideranca import TravaLideranca
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Percentual (sobre a mensalidade x comissão do corretor) de cada parcela,
+# por modalidade: a grade de 100%, 200% ou 300% vira 1, 2 ou 3 parcelas mensais
+GRADE_PARCELAS: Dict[str, List[float]] = {
+    "individual": [100.0],
+    "individual odonto": [100.0],
+    "familiar": [100.0, 100.0],
+    "adesao": [100.0, 100.0],
+    "pme": [100.0, 100.0, 100.0],
+}
+GRADE_PADRAO = [100.0]
+
+# Só produções implantadas geram comissão
+STATUS_COMISSIONAVEL = "Implantada"
+
+# IDs determinísticos (uuid5) das linhas geradas pelo motor
+NAMESPACE_COMISSOES = uuid.UUID("6f1c2b9e-3d4a-5e8f-9a0b-1c2d3e4f5a6b")
+
+ORIGEM = "motor_comissoes"
+
+
+def _normalizar_modalidade(modalidade: Any) -> str:
+    texto = unicodedata.normalize("NFKD", str(modalidade or "")).encode("ascii", "ignore").decode()
+    return " ".join(texto.lower().split())
+
+
+def periodo_do_mes(mes_referencia: str) -> Tuple[str, str]:
+    """"AAAA-MM" -> (primeiro dia do mês, primeiro dia do mês seguinte)"""
+    inicio = date.fromisoformat(f"{mes_referencia}-01")
+    fim = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio.isoformat(), fim.isoformat()
+
+
+def calcular_comissoes(
+    producoes: "pd.DataFrame",
+    percentuais: Dict[str, float],
+    mes_referencia: str,
+    grades: Optional[Dict[str, List[float]]] = None,
+    data_geracao: Optional[str] = None
+) -> Tuple["pd.DataFrame", "pd.DataFrame", Dict[str, int]]:
+    """
+    Calcula parcelas e relatórios do mês
+
+    Args:
+        producoes: Colunas de COLUNAS_PRODUCAO
+        percentuais: comissao_padrao_pct por corretor_id
+        mes_referencia: "AAAA-MM"
+        grades: Grade por modalidade normalizada (padrão: GRADE_PARCELAS)
+        data_geracao: Data dos relatórios (padrão: hoje)
+
+    Returns:
+        (parcelas, relatórios, produções descartadas por motivo)
+    """
+    import pandas as pd
+
+    grades = grades or GRADE_PARCELAS
+    data_geracao = data_geracao or date.today().isoformat()
+
+    valor = pd.to_numeric(producoes["valor_mensalidade"], errors="coerce").fillna(0).to_numpy(float)
+    pct_corretor = producoes["corretor_id"].map(percentuais).to_numpy(float)
+    vigencia = pd.to_datetime(producoes["data_vigencia"], errors="coerce").to_numpy("datetime64[D]")
+
+    implantada = (producoes["status"] == STATUS_COMISSIONAVEL).to_numpy()
+    com_corretor = ~np.isnan(pct_corretor)
+    com_valor = (valor > 0) & ~np.isnat(vigencia)
+    valida = implantada & com_corretor & com_valor
+    descartes = {
+        "nao_implantadas": int((~implantada).sum()),
+        "sem_corretor": int((implantada & ~com_corretor).sum()),
+        "sem_valor_ou_vigencia": int((implantada & com_corretor & ~com_valor).sum()),
+    }
+
+    ids = producoes["id"].to_numpy(object)[valida]
+    corretores = producoes["corretor_id"].to_numpy(object)[valida]
+    valor, pct_corretor, vigencia = valor[valida], pct_corretor[valida], vigencia[valida]
+
+    # Grade de cada produção: categorias normalizadas uma vez só
+    modalidades = pd.Categorical(producoes["modalidade"].fillna("").to_numpy(object)[valida])
+    tabelas = [grades.get(_normalizar_modalidade(m), GRADE_PADRAO) for m in modalidades.categories]
+    tamanhos = np.array([len(t) for t in tabelas] + [len(GRADE_PADRAO)], dtype=np.int64)
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    percentuais_grade = np.concatenate([np.array(t, dtype=float) for t in tabelas] + [GRADE_PADRAO])
+    grade = np.asarray(modalidades.codes, dtype=np.int64)
+    grade[grade < 0] = len(tabelas)
+
+    # Uma linha por parcela
+    quantidade = tamanhos[grade]
+    linha = np.repeat(np.arange(len(ids)), quantidade)
+    indice = np.arange(len(linha)) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+    percentual = percentuais_grade[inicios[grade][linha] + indice]
+
+    # Vencimento: parcela 1 na vigência, as demais no mesmo dia dos meses seguintes
+    mes_vigencia = vigencia.astype("datetime64[M]")
+    dia = vigencia - mes_vigencia.astype("datetime64[D]")
+    mes_parcela = mes_vigencia[linha] + indice
+    ultimo_dia = (mes_parcela + 1).astype("datetime64[D]") - 1
+    vencimento = np.minimum(mes_parcela.astype("datetime64[D]") + dia[linha], ultimo_dia)
+
+    numero = indice + 1
+    parcelas = pd.DataFrame({
+        "id": [str(uuid.uuid5(NAMESPACE_COMISSOES, f"{p}:{n}")) for p, n in zip(ids[linha], numero)],
+        "producao_id": ids[linha],
+        "corretor_id": corretores[linha],
+        "numero_parcela": numero,
+        "valor_parcela": np.round(valor[linha] * pct_corretor[linha] / 100 * percentual / 100, 2),
+        "data_vencimento": np.datetime_as_string(vencimento, unit="D"),
+        "percentual_comissao": percentual,
+        "status_comissao": "pendente",
+        "mes_referencia": mes_referencia,
+    })
+
+    resumo = parcelas.groupby("corretor_id", sort=True).agg(
+        valor_bruto=("valor_parcela", "sum"),
+        parcelas=("id", "size"),
+        producoes=("producao_id", "nunique"),
+    ).reset_index()
+    competencia = mes_referencia.replace("-", "")
+    relatorios = pd.DataFrame({
+        "id": [str(uuid.uuid5(NAMESPACE_COMISSOES, f"{c}:{mes_referencia}")) for c in resumo["corretor_id"]],
+        "corretor_id": resumo["corretor_id"],
+        "numero_relatorio": [f"COM-{competencia}-{str(c)[:8].upper()}" for c in resumo["corretor_id"]],
+        "data_geracao": data_geracao,
+        "valor_bruto": resumo["valor_bruto"].round(2),
+        "valor_liquido": resumo["valor_bruto"].round(2),
+        "status": "gerado",
+        "mes_referencia": mes_referencia,
+        "producoes": resumo["producoes"],
+        "parcelas": resumo["parcelas"],
+    })
+
+    return parcelas, relatorios, descartes
+
+
+def _para_registros(
+    parcelas: "pd.DataFrame",
+    relatorios: "pd.DataFrame"
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """DataFrames -> linhas das tabelas (tipos nativos, contagens no metadata)"""
+    registros_parcelas = parcelas.assign(metadata=[{"origem": ORIGEM}] * len(parcelas))\
+        .to_dict("records")
+    registros_relatorios = [
+        {
+            **{k: v for k, v in r.items() if k not in ("producoes", "parcelas")},
+            "metadata": {"origem": ORIGEM, "producoes": r["producoes"], "parcelas": r["parcelas"]},
+        }
+        for r in relatorios.to_dict("records")
+    ]
+    return registros_parcelas, registros_relatorios
+
+
+class JobComissoes:
+    """Processamento de um mês de comissões em background (um por vez)"""
+
+    def __init__(self, repositorio=None, tamanho_pagina: int = 5000, trava: Optional[TravaLideranca] = None):
+        """
+        Args:
+            repositorio: ComissaoRepository (padrão: comissao_repository)
+            tamanho_pagina: Produções lidas por página
+            trava: flock compartilhado pelos workers; sem ela, um por processo
+        """
+        self._repositorio = repositorio
+        self.tamanho_pagina = tamanho_pagina
+        self.trava = trava
+        self._tarefa: Optional[asyncio.Task] = None
+        self._estado: Dict[str, Any] = {"estado": "ocioso"}
+
+    @property
+    def repositorio(self):
+        if self._repositorio is None:
+            from ..repositories.comissao_repository import comissao_repository
+            self._repositorio = comissao_repository
+        return self._repositorio
+
+    @property
+    def em_execucao(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    def iniciar(self, mes_referencia: str) -> bool:
+        """Dispara o processamento em background; False se já houver um rodando (em qualquer worker)"""
+        if self.em_execucao:
+            return False
+        if self.trava is not None and not self.trava.tentar():
+            return False
+        self._tarefa = asyncio.create_task(self.executar(mes_referencia))
+        if self.trava is not None:
+            self._tarefa.add_done_callback(lambda _: self.trava.liberar())
+        return True
+
+    async def executar(self, mes_referencia: str) -> Dict[str, Any]:
+        """Processa o mês inteiro: leitura, cálculo e gravação"""
+        import pandas as pd
+
+        inicio_periodo, fim_periodo = periodo_do_mes(mes_referencia)
+        estado: Dict[str, Any] = {
+            "estado": "executando",
+            "mes_referencia": mes_referencia,
+            "etapa": "leitura",
+            "producoes": 0,
+            "iniciado_em": datetime.now(timezone.utc).isoformat(),
+        }
+        self._estado = estado
+        inicio = time.perf_counter()
+
+        try:
+            colunas: Dict[str, List[Any]] = {}
+            async for pagina in self.repositorio.iterar_producoes(
+                inicio_periodo, fim_periodo, self.tamanho_pagina
+            ):
+                for chave in pagina[0]:
+                    colunas.setdefault(chave, []).extend(p[chave] for p in pagina)
+                estado["producoes"] += len(pagina)
+            producoes = pd.DataFrame(colunas, columns=[
+                "id", "corretor_id", "valor_mensalidade", "data_vigencia", "modalidade", "status"
+            ])
+            estado["leitura_segundos"] = round(time.perf_counter() - inicio, 2)
+
+            estado["etapa"] = "calculo"
+            marco = time.perf_counter()
+            corretor_ids = sorted(producoes["corretor_id"].dropna().unique().tolist())
+            percentuais = await self.repositorio.obter_percentuais_corretores(corretor_ids)
+            parcelas, relatorios, descartes = await asyncio.to_thread(
+                calcular_comissoes, producoes, percentuais, mes_referencia
+            )
+            estado["calculo_segundos"] = round(time.perf_counter() - marco, 2)
+
+            estado["etapa"] = "gravacao"
+            marco = time.perf_counter()
+            registros_parcelas, registros_relatorios = await asyncio.to_thread(
+                _para_registros, parcelas, relatorios
+            )
+            await self.repositorio.gravar_comissoes_mes(
+                mes_referencia, registros_parcelas, registros_relatorios
+            )
+            estado["gravacao_segundos"] = round(time.perf_counter() - marco, 2)
+
+        except asyncio.CancelledError:
+            estado["estado"] = "cancelado"
+            raise
+        except Exception as e:
+            estado.update({"estado": "falhou", "erro": str(e)})
+            logger.error(f"❌ Erro ao processar comissões de {mes_referencia}: {e}")
+            return dict(estado)
+
+        estado.update({
+            "estado": "concluido",
+            "etapa": None,
+            "parcelas": len(parcelas),
+            "corretores": len(relatorios),
+            "valor_bruto_total": round(float(relatorios["valor_bruto"].sum()), 2),
+            "descartadas": descartes,
+            "duracao_segundos": round(time.perf_counter() - inicio, 2),
+            "concluido_em": datetime.now(timezone.utc).isoformat(),
+        })
+        logger.info(
+            f"💰 Comissões de {mes_referencia}: {estado['producoes']} produções, "
+            f"{estado['parcelas']} parcelas, {estado['corretores']} corretores "
+            f"em {estado['duracao_segundos']} s"
+        )
+        return dict(estado)
+
+    def progresso(self) -> Dict[str, Any]:
+        """Estado do processamento atual (ou do último) deste worker"""
+        ocupante = self.trava.ocupante() if self.trava is not None and not self.em_execucao else None
+        if ocupante is not None:
+            # O progresso detalhado fica no worker que executa
+            return {"estado": "executando_em_outro_worker", "pid": ocupante}
+        return dict(self._estado)
+
+
+# Instância global do job
+job_comissoes = JobComissoes(trava=TravaLideranca(os.getenv("COMISSOES_LOCK", "data/comissoes.lock")))
@@ -0,0 +1,403 @@
+"""
+Motor de regras de automação
+Compila as automações e regras de IA ativas num índice por tipo de
+evento de lead (lead_criado, lead_status, lead_arquivado): as condições
+de todas as regras de um evento viram uma única função Python gerada a
+partir da AST validada (predicados_regras).
+
+Cada evento do lead_controller só é avaliado contra as regras do seu
+tipo, numa chamada; as ações das regras que disparam vão para uma fila
+atendida por tarefas em background. Uma regra conta em
+execucoes/ultima_execucao só quando ao menos uma das suas ações foi de
+fato executada por um executor registrado (`registrar_acao`); disparos
+descartados com a fila cheia ou sem executor não contam. Os contadores
+são acumulados em memória e gravados em lote a cada poucos segundos.
+
+Gatilhos e condições em texto livre sem evento de lead correspondente
+("CPL < meta por 3 dias", "Lead sem contato > 48h") ficam fora do
+índice e aparecem em `metricas()["nao_suportadas"]`.
+"""
+import asyncio
+import logging
+import os
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .eventos_leads import LEAD_ARQUIVADO, LEAD_CRIADO, LEAD_STATUS
+from .predicados_regras import Avaliador, ExpressaoInvalida, compilar_avaliador, traduzir_predicado
+
+logger = logging.getLogger(__name__)
+
+EVENTOS_LEAD = (LEAD_CRIADO, LEAD_STATUS, LEAD_ARQUIVADO)
+
+# Condição sem gatilho reconhecido: vale para criação e mudança de status
+EVENTOS_PADRAO = (LEAD_CRIADO, LEAD_STATUS)
+
+# Textos de gatilho cadastrados pelo painel -> (evento, condição)
+GATILHOS: Dict[str, Tuple[str, Optional[str]]] = {
+    "novo lead cadastrado": (LEAD_CRIADO, None),
+    "novo lead criado": (LEAD_CRIADO, None),
+    "lead criado": (LEAD_CRIADO, None),
+    "status do lead alterado": (LEAD_STATUS, None),
+    "lead marcado como perdido": (LEAD_STATUS, "status == 'perdido'"),
+    "lead marcado como ganho": (LEAD_STATUS, "status == 'ganho'"),
+    "lead arquivado": (LEAD_ARQUIVADO, None),
+}
+
+AcaoHandler = Callable[[str, "RegraCompilada", Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class RegraCompilada:
+    """Regra pronta para avaliação (condição já traduzida para Python)"""
+    tabela: str
+    id: str
+    nome: str
+    condicao: str
+    acoes: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class IndiceEvento:
+    """Regras de um tipo de evento e a função que avalia todas de uma vez"""
+    regras: Tuple[RegraCompilada, ...]
+    avaliar: Avaliador
+
+
+def _normalizar(texto: Any) -> str:
+    sem_acento = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.lower().split())
+
+
+def compilar_regra(tabela: str, registro: Dict[str, Any]) -> Tuple[Tuple[str, ...], RegraCompilada]:
+    """
+    Eventos que disparam a regra e a regra compilada
+
+    metadata.evento e metadata.condicao, se presentes, fixam o evento e
+    acrescentam uma condição ao gatilho em texto.
+
+    Raises:
+        ExpressaoInvalida: Gatilho/condição sem evento de lead ou fora da linguagem
+    """
+    metadata = registro.get("metadata") or {}
+    if tabela == "automacoes":
+        gatilho = registro.get("trigger_evento") or ""
+        acoes = tuple(registro.get("acoes") or ())
+    else:
+        gatilho = registro.get("condicao") or ""
+        acoes = (registro["acao"],) if registro.get("acao") else ()
+
+    conhecido = GATILHOS.get(_normalizar(gatilho))
+    if conhecido is None and gatilho in EVENTOS_LEAD:
+        conhecido = (gatilho, None)
+
+    if conhecido:
+        eventos, condicoes = (conhecido[0],), [conhecido[1]]
+    elif tabela == "regras_ia" or metadata.get("evento"):
+        # Sem gatilho reconhecido o texto é a própria condição
+        eventos, condicoes = EVENTOS_PADRAO, [None if tabela == "automacoes" else gatilho]
+    else:
+        raise ExpressaoInvalida(f"Gatilho sem evento de lead: {gatilho}")
+
+    if metadata.get("evento"):
+        if metadata["evento"] not in EVENTOS_LEAD:
+            raise ExpressaoInvalida(f"Evento desconhecido: {metadata['evento']}")
+        eventos = (metadata["evento"],)
+
+    fontes = [traduzir_predicado(c) for c in condicoes + [metadata.get("condicao")] if c]
+
+    return eventos, RegraCompilada(
+        tabela=tabela,
+        id=str(registro["id"]),
+        nome=registro.get("nome") or "",
+        condicao=" and ".join(f"({f})" for f in fontes) or "True",
+        acoes=acoes
+    )
+
+
+def compilar_indice(
+    regras: Dict[str, List[Dict[str, Any]]]
+) -> Tuple[Dict[str, IndiceEvento], List[Dict[str, str]]]:
+    """
+    Índice evento -> regras e a lista das regras que ficaram de fora
+
+    Returns:
+        (índice, [{tabela, id, nome, motivo}])
+    """
+    indice: Dict[str, List[RegraCompilada]] = {evento: [] for evento in EVENTOS_LEAD}
+    nao_suportadas = []
+    for tabela, registros in regras.items():
+        for registro in registros:
+            try:
+                eventos, regra = compilar_regra(tabela, registro)
+            except (ExpressaoInvalida, KeyError) as e:
+                nao_suportadas.append({
+                    "tabela": tabela,
+                    "id": str(registro.get("id")),
+                    "nome": registro.get("nome") or "",
+                    "motivo": str(e)
+                })
+                continue
+            for evento in eventos:
+                indice[evento].append(regra)
+    return {
+        evento: IndiceEvento(tuple(r), compilar_avaliador([regra.condicao for regra in r]))
+        for evento, r in indice.items()
+    }, nao_suportadas
+
+
+class MotorRegras:
+    """Avaliação em processo das regras ativas sobre os eventos de leads"""
+
+    def __init__(
+        self,
+        repositorio=None,
+        trabalhadores: int = 4,
+        capacidade_fila: int = 10000,
+        intervalo_gravacao: float = 5.0
+    ):
+        """
+        Args:
+            repositorio: RegraRepository (padrão: regra_repository)
+            trabalhadores: Tarefas que executam as ações em paralelo
+            capacidade_fila: Eventos com ações pendentes antes de começar a descartar
+            intervalo_gravacao: Segundos entre gravações dos contadores
+        """
+        self._repositorio = repositorio
+        self.trabalhadores = trabalhadores
+        self.intervalo_gravacao = intervalo_gravacao
+        self._fila: asyncio.Queue = asyncio.Queue(maxsize=capacidade_fila)
+        self._handlers: Dict[str, AcaoHandler] = {}
+        self._tarefas: List[asyncio.Task] = []
+
+        self._indice: Dict[str, IndiceEvento] = {}
+        self._nao_suportadas: List[Dict[str, str]] = []
+        self._carregado_em: Optional[float] = None
+
+        # Contadores pendentes de gravação: (tabela, id) -> execuções / última
+        self._execucoes: Counter = Counter()
+        self._ultima_execucao: Dict[Tuple[str, str], str] = {}
+
+        self._totais: Counter = Counter()
+        self._acoes_por_tipo: Counter = Counter()
+
+    @property
+    def repositorio(self):
+        if self._repositorio is None:
+            from ..repositories.regra_repository import regra_repository
+            self._repositorio = regra_repository
+        return self._repositorio
+
+    def registrar_acao(self, tipo: str, handler: AcaoHandler):
+        """
+        Executor das ações de um tipo ("WhatsApp: ..." -> "whatsapp")
+
+        Ações sem executor registrado são só registradas no log e não
+        contam como execução da regra.
+        """
+        self._handlers[_normalizar(tipo)] = handler
+
+    # ==========================================
+    # Compilação
+    # ==========================================
+
+    async def carregar(self) -> Dict[str, Any]:
+        """Lê as regras ativas e troca o índice de uma vez"""
+        inicio = time.perf_counter()
+        regras = await self.repositorio.listar_regras_ativas()
+        self._indice, self._nao_suportadas = compilar_indice(regras)
+        self._carregado_em = time.time()
+
+        resumo = {
+            "regras": sum(len(r) for r in regras.values()),
+            "indexadas": {evento: len(i.regras) for evento, i in self._indice.items()},
+            "nao_suportadas": len(self._nao_suportadas),
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        }
+        logger.info(
+            f"🧩 Motor de regras: {resumo['regras']} regras ativas, "
+            f"{resumo['nao_suportadas']} sem evento de lead compatível"
+        )
+        return resumo
+
+    # ==========================================
+    # Avaliação
+    # ==========================================
+
+    def processar(
+        self,
+        evento: str,
+        lead: Dict[str, Any],
+        status_anterior: Optional[str] = None
+    ) -> int:
+        """
+        Avalia um evento de lead contra as regras do seu tipo e enfileira
+        as ações das que dispararem (não espera as ações)
+
+        Returns:
+            Quantidade de regras disparadas
+        """
+        indice = self._indice.get(evento)
+        self._totais["eventos"] += 1
+        if indice is None or not indice.regras:
+            return 0
+
+        contexto = {
+            **lead,
+            "evento": evento,
+            "status_anterior": status_anterior,
+            "vidas": len(lead.get("idades") or ()),
+        }
+        try:
+            indices = indice.avaliar(contexto)
+        except Exception as e:
+            self._totais["erros_avaliacao"] += 1
+            logger.warning(f"⚠️ Erro ao avaliar as regras de {evento}: {e}")
+            return 0
+        if not indices:
+            return 0
+
+        disparadas = [indice.regras[i] for i in indices]
+
+        # Um item por evento: as ações das regras disparadas seguem juntas
+        try:
+            self._fila.put_nowait((disparadas, contexto))
+        except asyncio.QueueFull:
+            self._totais["acoes_descartadas"] += sum(len(r.acoes) for r in disparadas)
+
+        self._totais["disparos"] += len(disparadas)
+        return len(disparadas)
+
+    # ==========================================
+    # Ações
+    # ==========================================
+
+    async def _executar_acao(self, acao: str, regra: RegraCompilada, contexto: Dict[str, Any]) -> bool:
+        """True se um executor registrado rodou a ação sem erro"""
+        tipo = _normalizar(acao.split(":", 1)[0]) if ":" in acao else ""
+        handler = self._handlers.get(tipo)
+        if handler is None:
+            self._totais["acoes_sem_executor"] += 1
+            logger.info(f"⚡ Regra '{regra.nome}' → {acao} (lead {contexto.get('id')}, sem executor)")
+            return False
+        try:
+            await handler(acao, regra, contexto)
+        except Exception as e:
+            self._totais["acoes_com_falha"] += 1
+            logger.error(f"❌ Ação '{acao}' da regra '{regra.nome}' falhou: {e}")
+            return False
+        self._acoes_por_tipo[tipo] += 1
+        return True
+
+    def _contar_execucao(self, regra: RegraCompilada):
+        chave = (regra.tabela, regra.id)
+        self._execucoes[chave] += 1
+        self._ultima_execucao[chave] = datetime.now(timezone.utc).isoformat()
+
+    async def _trabalhador(self):
+        while True:
+            disparadas, contexto = await self._fila.get()
+            try:
+                for regra in disparadas:
+                    executadas = [await self._executar_acao(acao, regra, contexto) for acao in regra.acoes]
+                    if any(executadas):
+                        self._contar_execucao(regra)
+            finally:
+                self._fila.task_done()
+
+    async def aguardar_acoes(self):
+        """Espera a fila de ações esvaziar"""
+        await self._fila.join()
+
+    # ==========================================
+    # Contadores
+    # ==========================================
+
+    async def gravar_contadores(self) -> int:
+        """Grava em lote as execuções acumuladas desde a última gravação"""
+        if not self._execucoes:
+            return 0
+
+        execucoes, self._execucoes = self._execucoes, Counter()
+        ultimas, self._ultima_execucao = self._ultima_execucao, {}
+        contagens = [
+            {"tabela": tabela, "id": regra_id, "execucoes": n, "ultima_execucao": ultimas[(tabela, regra_id)]}
+            for (tabela, regra_id), n in execucoes.items()
+        ]
+        try:
+            await self.repositorio.incrementar_execucoes(contagens)
+        except Exception as e:
+            # Devolve para a próxima gravação (sem perder o que chegou nesse meio tempo)
+            self._execucoes.update(execucoes)
+            for chave, ultima in ultimas.items():
+                self._ultima_execucao.setdefault(chave, ultima)
+            logger.error(f"❌ Erro ao gravar contadores das regras: {e}")
+            return 0
+
+        self._totais["gravacoes"] += 1
+        return len(contagens)
+
+    async def _gravar_periodicamente(self):
+        while True:
+            await asyncio.sleep(self.intervalo_gravacao)
+            await self.gravar_contadores()
+
+    async def _recarregar_periodicamente(self, intervalo: float):
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await self.carregar()
+            except Exception as e:
+                logger.error(f"❌ Erro ao recarregar as regras (índice anterior mantido): {e}")
+
+    # ==========================================
+    # Ciclo de vida
+    # ==========================================
+
+    async def iniciar(self, intervalo_recarga: float = 300):
+        """Compila as regras e sobe os trabalhadores, a gravação e a recarga periódica"""
+        try:
+            await self.carregar()
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar as regras de automação: {e}")
+
+        self._tarefas = [asyncio.create_task(self._trabalhador()) for _ in range(self.trabalhadores)]
+        self._tarefas.append(asyncio.create_task(self._gravar_periodicamente()))
+        self._tarefas.append(asyncio.create_task(self._recarregar_periodicamente(intervalo_recarga)))
+
+    async def encerrar(self):
+        """Para as tarefas e grava os contadores pendentes"""
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas.clear()
+        await self.gravar_contadores()
+
+    def metricas(self) -> Dict[str, Any]:
+        """Regras indexadas, eventos, disparos e ações"""
+        return {
+            "regras_por_evento": {evento: len(i.regras) for evento, i in self._indice.items()},
+            "nao_suportadas": list(self._nao_suportadas),
+            "carregado_em": self._carregado_em,
+            "eventos": self._totais["eventos"],
+            "disparos": self._totais["disparos"],
+            "erros_avaliacao": self._totais["erros_avaliacao"],
+            "eventos_pendentes": self._fila.qsize(),
+            "acoes_executadas": dict(self._acoes_por_tipo),
+            "acoes_descartadas": self._totais["acoes_descartadas"],
+            "acoes_sem_executor": self._totais["acoes_sem_executor"],
+            "acoes_com_falha": self._totais["acoes_com_falha"],
+            "contadores_pendentes": len(self._execucoes),
+            "gravacoes": self._totais["gravacoes"],
+        }
+
+
+# Instância global do motor
+motor_regras = MotorRegras(
+    trabalhadores=int(os.getenv("REGRAS_TRABALHADORES", "4")),
+    intervalo_gravacao=float(os.getenv("REGRAS_GRAVACAO_SEGUNDOS", "5"))
+)
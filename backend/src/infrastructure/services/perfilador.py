@@ -0,0 +1,406 @@
+"""
+Perfilamento sob demanda
+Perfil de uma requisição específica (cProfile ou amostragem de pilhas),
+diferença de alocações com tracemalloc (feito para o caminho do PDF) e
+sessões de amostragem do processo inteiro por tempo limitado.
+
+A amostragem gera pilhas no formato "folded" (uma linha por pilha,
+funções separadas por ";" e a contagem no fim), aceito direto pelo
+flamegraph.pl, speedscope e inferno.
+
+Nada aqui roda sem ser pedido: o middleware só é montado com
+PERFILAMENTO_TOKEN configurado e cada captura é explícita. Só uma
+captura por requisição roda por vez (cProfile e tracemalloc são
+globais ao processo/thread).
+"""
+import cProfile
+import io
+import itertools
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("cprofile", "amostragem", "memoria")
+
+# Limites das sessões de amostragem do processo
+SESSAO_MAXIMA_SEGUNDOS = 300.0
+INTERVALO_MINIMO = 0.001
+
+# Frames de tracemalloc e importação não interessam na comparação
+FILTROS_MEMORIA = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class PerfiladorOcupado(RuntimeError):
+    """Já existe uma captura de requisição em andamento"""
+
+
+class AmostradorPilhas:
+    """
+    Thread que lê a pilha de todas as threads a cada `intervalo` e conta
+    as pilhas iguais; para sozinha ao chegar em `duracao` (se informada)
+    """
+
+    def __init__(
+        self,
+        intervalo: float = 0.005,
+        duracao: Optional[float] = None,
+        ao_terminar: Optional[Callable[["AmostradorPilhas"], None]] = None
+    ):
+        self.intervalo = max(intervalo, INTERVALO_MINIMO)
+        self.duracao = duracao
+        self.ao_terminar = ao_terminar
+        self.pilhas: Counter = Counter()
+        self.amostras = 0
+        self.inicio = 0.0
+        self.fim = 0.0
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _pilha(self, frame) -> List[str]:
+        funcoes = []
+        while frame is not None:
+            codigo = frame.f_code
+            funcoes.append(
+                f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+            )
+            frame = frame.f_back
+        funcoes.reverse()
+        return funcoes
+
+    def _coletar(self):
+        propria = threading.get_ident()
+        limite = self.inicio + self.duracao if self.duracao else None
+        while not self._parar.wait(self.intervalo):
+            nomes = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == propria:
+                    continue
+                pilha = [nomes.get(thread_id, str(thread_id))] + self._pilha(frame)
+                self.pilhas[";".join(pilha)] += 1
+            self.amostras += 1
+            if limite and time.perf_counter() >= limite:
+                break
+
+        self.fim = time.perf_counter()
+        if self.ao_terminar:
+            self.ao_terminar(self)
+
+    def iniciar(self) -> "AmostradorPilhas":
+        self.inicio = time.perf_counter()
+        self._thread = threading.Thread(target=self._coletar, name="amostrador-pilhas", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> "AmostradorPilhas":
+        self._parar.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self
+
+    def folded(self) -> str:
+        """Pilhas no formato folded (flamegraph.pl / speedscope)"""
+        return "".join(f"{pilha} {contagem}\n" for pilha, contagem in self.pilhas.most_common())
+
+
+ID_PERFIL = re.compile(r"^[0-9]+-[0-9]+-[0-9]+$")
+
+
+class ResultadosPerfil:
+    """
+    Os últimos perfis capturados (os mais antigos saem primeiro)
+
+    Em memória, por processo. Com `diretorio` (vários workers: o GET do
+    resultado pode cair em outro worker), os concluídos também são
+    gravados em disco, como <id>.json e, para o cProfile, <id>.prof.
+    """
+
+    def __init__(self, capacidade: int = 50, diretorio: Optional[str] = None):
+        self.capacidade = capacidade
+        self.diretorio = diretorio
+        self._itens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequencia = itertools.count(1)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def criar(self, tipo: str, **dados) -> Dict[str, Any]:
+        with self._lock:
+            perfil = {
+                "id": f"{int(time.time())}-{os.getpid()}-{next(self._sequencia)}",
+                "tipo": tipo,
+                "status": "em_andamento",
+                "criado_em": datetime.now(timezone.utc).isoformat(),
+                **dados,
+            }
+            self._itens[perfil["id"]] = perfil
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+            return perfil
+
+    def concluir(self, perfil: Dict[str, Any], **dados):
+        with self._lock:
+            perfil.update(dados, status="concluido")
+        if self.diretorio:
+            try:
+                self._gravar(perfil)
+            except OSError as e:
+                logger.error(f"❌ Erro ao gravar perfil {perfil['id']}: {e}")
+
+    def obter(self, perfil_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            perfil = self._itens.get(perfil_id)
+        if perfil is None and self.diretorio and ID_PERFIL.match(perfil_id):
+            perfil = self._ler(perfil_id)
+        return perfil
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """Resumo dos perfis guardados (sem o conteúdo)"""
+        with self._lock:
+            perfis = {
+                p["id"]: {k: v for k, v in p.items() if k not in ("texto", "binario")}
+                for p in self._itens.values()
+            }
+        if self.diretorio:
+            for caminho in self._arquivos():
+                perfil_id = os.path.basename(caminho)[:-len(".json")]
+                if perfil_id not in perfis:
+                    resumo = self._ler(perfil_id, conteudo=False)
+                    if resumo:
+                        perfis[perfil_id] = resumo
+        return sorted(perfis.values(), key=lambda p: p["criado_em"], reverse=True)[:self.capacidade]
+
+    # Arquivos (compartilhados pelos workers)
+
+    def _arquivos(self) -> List[str]:
+        """<id>.json do diretório, do mais antigo ao mais recente"""
+        caminhos = [
+            os.path.join(self.diretorio, nome)
+            for nome in os.listdir(self.diretorio)
+            if nome.endswith(".json") and ID_PERFIL.match(nome[:-len(".json")])
+        ]
+        return sorted(
+            caminhos,
+            key=lambda caminho: tuple(int(parte) for parte in os.path.basename(caminho)[:-len(".json")].split("-"))
+        )
+
+    def _gravar(self, perfil: Dict[str, Any]):
+        base = os.path.join(self.diretorio, perfil["id"])
+        if "binario" in perfil:
+            with open(f"{base}.prof", "wb") as arquivo:
+                arquivo.write(perfil["binario"])
+        dados = {k: v for k, v in perfil.items() if k != "binario"}
+        dados["tem_binario"] = "binario" in perfil
+        with open(f"{base}.json.tmp", "w", encoding="utf-8") as arquivo:
+            json.dump(dados, arquivo, ensure_ascii=False)
+        os.replace(f"{base}.json.tmp", f"{base}.json")
+
+        for antigo in self._arquivos()[:-self.capacidade]:
+            for caminho in (antigo, antigo[:-len(".json")] + ".prof"):
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+
+    def _ler(self, perfil_id: str, conteudo: bool = True) -> Optional[Dict[str, Any]]:
+        base = os.path.join(self.diretorio, perfil_id)
+        try:
+            with open(f"{base}.json", encoding="utf-8") as arquivo:
+                perfil = json.load(arquivo)
+            if not conteudo:
+                perfil.pop("texto", None)
+            elif perfil.pop("tem_binario", False):
+                with open(f"{base}.prof", "rb") as arquivo:
+                    perfil["binario"] = arquivo.read()
+            perfil.pop("tem_binario", None)
+            return perfil
+        except (OSError, ValueError):
+            return None
+
+
+class Perfilador:
+    """Capturas de requisições e sessões de amostragem do processo"""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        capacidade: int = 50,
+        linhas: int = 60,
+        diretorio: Optional[str] = None
+    ):
+        """
+        Args:
+            token: Token de administrador exigido para qualquer captura;
+                sem ele o perfilamento fica desligado
+            capacidade: Quantos perfis ficam guardados
+            linhas: Funções/linhas listadas nos relatórios de texto
+            diretorio: Onde gravar os perfis concluídos para os outros workers
+        """
+        self.token = token or None
+        self.linhas = linhas
+        self.resultados = ResultadosPerfil(capacidade, diretorio)
+        self._ocupado = False
+        self._sessao: Optional[AmostradorPilhas] = None
+
+    @property
+    def habilitado(self) -> bool:
+        return self.token is not None
+
+    @property
+    def ocupado(self) -> bool:
+        return self._ocupado
+
+    # ==========================================
+    # Requisição individual
+    # ==========================================
+
+    async def perfilar(
+        self,
+        modo: str,
+        executar: Callable[[Dict[str, Any]], Awaitable[Any]],
+        rota: str,
+        intervalo: float = 0.001
+    ) -> Dict[str, Any]:
+        """
+        Executa `executar(perfil)` sob o modo pedido e guarda o resultado
+        (o perfil já criado é passado para o id poder ir na resposta)
+
+        O perfil cobre tudo que rodar no processo durante a requisição
+        (outras requisições concorrentes incluídas); para isolar, use
+        num momento de pouco tráfego ou num worker fora do balanceador.
+
+        Raises:
+            ValueError: Modo desconhecido
+            PerfiladorOcupado: Outra captura em andamento
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo de perfil desconhecido: {modo} (use {', '.join(MODOS)})")
+        if self._ocupado:
+            raise PerfiladorOcupado("Já existe uma captura em andamento")
+
+        self._ocupado = True
+        perfil = self.resultados.criar(modo, rota=rota)
+        inicio = time.perf_counter()
+        try:
+            if modo == "cprofile":
+                await self._cprofile(perfil, lambda: executar(perfil))
+            elif modo == "amostragem":
+                await self._amostragem(perfil, lambda: executar(perfil), intervalo)
+            else:
+                await self._memoria(perfil, lambda: executar(perfil))
+        finally:
+            self._ocupado = False
+            perfil["duracao_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+            logger.info(f"🔬 Perfil {perfil['id']} ({modo}) de {rota} em {perfil['duracao_ms']} ms")
+        return perfil
+
+    async def _cprofile(self, perfil: Dict[str, Any], executar):
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+        try:
+            await executar()
+        finally:
+            perfilador.disable()
+            saida = io.StringIO()
+            estatisticas = pstats.Stats(perfilador, stream=saida)
+            estatisticas.sort_stats("cumulative").print_stats(self.linhas)
+            perfilador.create_stats()
+            self.resultados.concluir(
+                perfil,
+                texto=saida.getvalue(),
+                # Mesmo formato do `cProfile -o` (snakeviz, pstats.Stats(arquivo))
+                binario=marshal.dumps(perfilador.stats)
+            )
+
+    async def _amostragem(self, perfil: Dict[str, Any], executar, intervalo: float):
+        amostrador = AmostradorPilhas(intervalo).iniciar()
+        try:
+            await executar()
+        finally:
+            amostrador.parar()
+            self.resultados.concluir(perfil, texto=amostrador.folded(), amostras=amostrador.amostras)
+
+    async def _memoria(self, perfil: Dict[str, Any], executar):
+        iniciado_aqui = not tracemalloc.is_tracing()
+        if iniciado_aqui:
+            tracemalloc.start(25)
+        tracemalloc.reset_peak()
+        antes = tracemalloc.take_snapshot().filter_traces(FILTROS_MEMORIA)
+        try:
+            await executar()
+        finally:
+            depois = tracemalloc.take_snapshot().filter_traces(FILTROS_MEMORIA)
+            atual, pico = tracemalloc.get_traced_memory()
+            if iniciado_aqui:
+                tracemalloc.stop()
+
+            diferencas = depois.compare_to(antes, "lineno")
+            linhas = [
+                f"Pico durante a requisição: {pico / 1024:.1f} KiB (atual: {atual / 1024:.1f} KiB)",
+                f"Maiores diferenças por linha (top {self.linhas}):",
+            ]
+            linhas += [str(d) for d in diferencas[:self.linhas]]
+            self.resultados.concluir(perfil, texto="\n".join(linhas) + "\n", pico_bytes=pico)
+
+    # ==========================================
+    # Sessões do processo inteiro
+    # ==========================================
+
+    def iniciar_sessao(self, segundos: float, intervalo: float = 0.005) -> Dict[str, Any]:
+        """
+        Amostra todas as threads por `segundos` (até SESSAO_MAXIMA_SEGUNDOS)
+        em background; o resultado (folded) fica em resultados ao terminar
+
+        Raises:
+            PerfiladorOcupado: Outra sessão em andamento
+        """
+        if self._sessao is not None:
+            raise PerfiladorOcupado("Já existe uma sessão de amostragem em andamento")
+
+        segundos = min(max(segundos, intervalo), SESSAO_MAXIMA_SEGUNDOS)
+        perfil = self.resultados.criar("sessao", segundos=segundos, intervalo_ms=intervalo * 1000)
+
+        def terminar(amostrador: AmostradorPilhas):
+            self.resultados.concluir(
+                perfil,
+                texto=amostrador.folded(),
+                amostras=amostrador.amostras,
+                duracao_ms=round((amostrador.fim - amostrador.inicio) * 1000, 2)
+            )
+            self._sessao = None
+            logger.info(f"🔬 Sessão de amostragem {perfil['id']}: {amostrador.amostras} amostras")
+
+        self._sessao = AmostradorPilhas(intervalo, duracao=segundos, ao_terminar=terminar).iniciar()
+        return perfil
+
+    def encerrar_sessao(self) -> bool:
+        """Interrompe a sessão em andamento (o que foi amostrado é guardado)"""
+        sessao = self._sessao
+        if sessao is None:
+            return False
+        sessao.parar()
+        return True
+
+
+# Instância global do perfilador
+perfilador = Perfilador(
+    token=os.getenv("PERFILAMENTO_TOKEN"),
+    capacidade=int(os.getenv("PERFILAMENTO_RESULTADOS", "50")),
+    diretorio=os.getenv("PERFILAMENTO_DIR") or None
+)
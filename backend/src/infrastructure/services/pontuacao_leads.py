@@ -0,0 +1,177 @@
+"""
+Pontuação (score) de leads
+Nota de 0 a 100 para priorizar o atendimento dos corretores, a partir
+do tamanho da economia, da família (vidas e idades), de a operadora
+atual ser conhecida, do tempo desde a última atividade e da etapa do
+funil.
+
+O score é calculado de forma vetorizada (NumPy) para qualquer número
+de leads; o mesmo cálculo serve para um lead recém-criado ou com status
+alterado e para o recálculo completo da base, que corrige o
+decaimento por tempo dos leads parados.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada sinal no score (soma 100)
+PESOS = {
+    "economia": 30.0,
+    "vidas": 15.0,
+    "idades": 10.0,
+    "operadora": 10.0,
+    "recencia": 20.0,
+    "etapa": 15.0,
+}
+
+# Economia mensal (R$) que já vale a nota máxima no sinal de economia
+ECONOMIA_REFERENCIA = 2000.0
+
+# Famílias a partir deste tamanho valem a nota máxima no sinal de vidas
+VIDAS_REFERENCIA = 5
+
+# Meia-vida (horas) do sinal de recência desde a última atividade
+MEIA_VIDA_HORAS = 72.0
+
+# Quanto cada status em aberto vale no sinal de etapa
+PESO_ETAPA = {
+    "novo": 0.4,
+    "contatado": 0.6,
+    "negociacao": 0.8,
+    "proposta_enviada": 1.0,
+    "pausado": 0.1,
+}
+
+# Leads encerrados não entram na fila dos corretores
+STATUS_ENCERRADOS = {"ganho", "perdido"}
+
+# Colunas necessárias para pontuar um lead
+COLUNAS_PONTUACAO = (
+    "id,created_at,status,operadora_atual,valor_atual,"
+    "economia_estimada,idades,historico,score"
+)
+
+NS_POR_HORA = 3600 * 10**9
+NAT = np.iinfo(np.int64).min
+
+
+def _momento_ns(valor: Any) -> int:
+    """ISO 8601 (sem fuso = UTC) -> ns desde a época; NAT se ausente/inválido"""
+    if not valor:
+        return NAT
+    try:
+        momento = valor if isinstance(valor, datetime) else datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return NAT
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return int(momento.timestamp() * 10**6) * 1000
+
+
+def _ultima_atividade(lead: Dict[str, Any]) -> int:
+    historico = lead.get("historico") or []
+    if historico:
+        return _momento_ns(historico[-1].get("timestamp") or lead.get("created_at"))
+    return _momento_ns(lead.get("created_at"))
+
+
+def pontuar_leads(leads: Sequence[Dict[str, Any]], agora: Optional[Any] = None) -> np.ndarray:
+    """
+    Calcula o score de vários leads de uma vez
+
+    Args:
+        leads: Leads com as colunas de COLUNAS_PONTUACAO
+        agora: Referência para a recência (padrão: agora, UTC)
+
+    Returns:
+        Array com o score (0-100, uma casa decimal) de cada lead, na mesma ordem
+    """
+    if not leads:
+        return np.zeros(0)
+
+    referencia = _momento_ns(agora or datetime.now(timezone.utc))
+
+    economia = np.array([float(l.get("economia_estimada") or 0) for l in leads])
+    valor_atual = np.array([float(l.get("valor_atual") or 0) for l in leads])
+    vidas = np.array([len(l.get("idades") or []) for l in leads])
+    idade_maxima = np.array([max(l.get("idades") or [0]) for l in leads])
+    operadora = np.array([bool(l.get("operadora_atual")) for l in leads])
+    status = [l.get("status") or "novo" for l in leads]
+    etapa = np.array([PESO_ETAPA.get(s, 0.0) for s in status])
+    encerrado = np.array([s in STATUS_ENCERRADOS for s in status])
+    atividade = np.array([_ultima_atividade(l) for l in leads], dtype=np.int64)
+
+    # Economia absoluta (escala log) e relativa ao que o lead paga hoje
+    sinal_economia = np.clip(np.log1p(economia) / np.log1p(ECONOMIA_REFERENCIA), 0, 1)
+    relativa = np.divide(economia, valor_atual, out=np.zeros_like(economia), where=valor_atual > 0)
+    sinal_economia = 0.7 * sinal_economia + 0.3 * np.clip(relativa / 0.3, 0, 1)
+
+    sinal_vidas = np.clip(vidas / VIDAS_REFERENCIA, 0, 1)
+    # Famílias sem idosos: aceitação mais fácil e sem carências longas
+    sinal_idades = np.where(vidas == 0, 0.0, np.where(idade_maxima < 59, 1.0, 0.5))
+
+    # Sem data (lead ainda não gravado): tratado como recém-criado
+    horas = np.where(
+        atividade == NAT, 0.0, np.maximum(referencia - atividade, 0) / NS_POR_HORA
+    )
+    sinal_recencia = np.exp2(-horas / MEIA_VIDA_HORAS)
+
+    score = (
+        PESOS["economia"] * sinal_economia
+        + PESOS["vidas"] * sinal_vidas
+        + PESOS["idades"] * sinal_idades
+        + PESOS["operadora"] * operadora
+        + PESOS["recencia"] * sinal_recencia
+        + PESOS["etapa"] * etapa
+    )
+    return np.round(np.where(encerrado, 0.0, score), 1)
+
+
+def pontuar_lead(lead: Dict[str, Any], agora: Optional[Any] = None) -> float:
+    """Score de um único lead (criação ou mudança de status)"""
+    return float(pontuar_leads([lead], agora)[0])
+
+
+async def recalcular_scores(repositorio, tamanho_pagina: int = 5000) -> Dict[str, Any]:
+    """
+    Recalcula o score de todos os leads ativos e grava só os que mudaram
+
+    Returns:
+        Leads processados, atualizados e duração
+    """
+    inicio = time.perf_counter()
+    agora = datetime.now(timezone.utc).isoformat()
+    processados = atualizados = 0
+
+    async for pagina in repositorio.iterar_leads(tamanho_pagina=tamanho_pagina, colunas=COLUNAS_PONTUACAO):
+        scores = pontuar_leads(pagina, agora)
+        anteriores = np.array([
+            np.nan if l.get("score") is None else float(l["score"]) for l in pagina
+        ])
+        mudou = np.isnan(anteriores) | (np.abs(scores - anteriores) >= 0.1)
+
+        alteracoes: List[tuple] = [(pagina[i]["id"], float(scores[i])) for i in np.flatnonzero(mudou)]
+        if alteracoes:
+            await repositorio.atualizar_scores_lote(alteracoes)
+        processados += len(pagina)
+        atualizados += len(alteracoes)
+
+    duracao = time.perf_counter() - inicio
+    logger.info(f"🎯 Scores recalculados: {processados} leads, {atualizados} atualizados em {duracao:.1f} s")
+    return {"processados": processados, "atualizados": atualizados, "duracao_segundos": round(duracao, 2)}
+
+
+async def recalcular_periodicamente(repositorio, intervalo: float):
+    """Recálculo completo em segundo plano, já na subida (leads sem score) e a cada intervalo"""
+    while True:
+        try:
+            await recalcular_scores(repositorio)
+        except Exception as e:
+            logger.error(f"❌ Erro ao recalcular scores: {e}")
+        await asyncio.sleep(intervalo)
@@ -0,0 +1,181 @@
+"""
+Predicados das regras de automação
+Compila uma condição textual ("status == 'perdido' and valor_atual > 1000",
+"Lead status = novo") em código Python, uma vez só, a partir da AST.
+
+A AST é validada nó a nó antes de virar código: só comparações,
+and/or/not, constantes, listas de constantes, len() e os campos do lead
+em CAMPOS_CONTEXTO (lidos de um dict). O código gerado roda sem
+builtins; comparar um campo ausente (None) com número torna a regra falsa.
+"""
+import ast
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+Predicado = Callable[[Dict[str, Any]], bool]
+Avaliador = Callable[[Dict[str, Any]], List[int]]
+
+# Campos que uma condição pode ler (colunas do lead + dados do evento)
+CAMPOS_CONTEXTO = frozenset({
+    "evento", "status", "status_anterior", "nome", "email", "whatsapp",
+    "operadora_atual", "valor_atual", "idades", "vidas", "economia_estimada",
+    "valor_proposto", "tipo_contratacao", "origem", "prioridade", "score",
+    "atribuido_a",
+})
+
+TAMANHO_MAXIMO = 500
+
+OPERADORES = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn)
+
+# "Lead status = novo": forma curta usada nas regras cadastradas pelo painel
+FORMA_CURTA = re.compile(r"^\s*lead\s+(\w+)\s*(==|=|!=|>=|<=|>|<)\s*(.+?)\s*$", re.IGNORECASE)
+IGUAL_SIMPLES = re.compile(r"(?<![=!<>])=(?!=)")
+LITERAIS = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+
+
+class ExpressaoInvalida(ValueError):
+    """Condição fora da linguagem aceita pelo motor de regras"""
+
+
+def _tamanho(valor: Any) -> Optional[int]:
+    return len(valor) if valor is not None else None
+
+
+# Únicos nomes visíveis ao código gerado
+GLOBAIS = {"__builtins__": {}, "_len": _tamanho, "_bool": bool, "_ErroTipo": TypeError}
+
+
+def _forma_curta(expressao: str) -> str:
+    encontrado = FORMA_CURTA.match(expressao)
+    if not encontrado:
+        return expressao
+    campo, operador, valor = encontrado.groups()
+    try:
+        float(valor)
+    except ValueError:
+        if not (valor[0] == valor[-1] and valor[0] in "'\""):
+            valor = repr(valor)
+    return f"{campo.lower()} {'==' if operador == '=' else operador} {valor}"
+
+
+def _igualdade(expressao: str) -> str:
+    """"=" vira "==" fora dos literais de texto"""
+    partes = LITERAIS.split(expressao)
+    return "".join(
+        IGUAL_SIMPLES.sub("==", parte) if i % 2 == 0 else parte
+        for i, parte in enumerate(partes)
+    )
+
+
+def _constante(no: ast.AST) -> Any:
+    if isinstance(no, ast.Constant) and isinstance(no.value, (str, int, float, bool, type(None))):
+        return no.value
+    if isinstance(no, ast.UnaryOp) and isinstance(no.op, ast.USub) \
+            and isinstance(no.operand, ast.Constant) and isinstance(no.operand.value, (int, float)):
+        return -no.operand.value
+    raise ExpressaoInvalida(f"Valor não permitido: {ast.dump(no)[:60]}")
+
+
+def _campo(nome: str) -> ast.AST:
+    if nome not in CAMPOS_CONTEXTO:
+        raise ExpressaoInvalida(f"Campo desconhecido: {nome}")
+    return ast.Call(
+        func=ast.Attribute(value=ast.Name(id="_c", ctx=ast.Load()), attr="get", ctx=ast.Load()),
+        args=[ast.Constant(value=nome)],
+        keywords=[]
+    )
+
+
+def _traduzir(no: ast.AST) -> ast.AST:
+    """Nó validado da condição -> nó equivalente lendo os campos de `_c`"""
+    if isinstance(no, ast.BoolOp):
+        return ast.BoolOp(op=no.op, values=[_traduzir(v) for v in no.values])
+
+    if isinstance(no, ast.UnaryOp) and isinstance(no.op, ast.Not):
+        return ast.UnaryOp(op=no.op, operand=_traduzir(no.operand))
+
+    if isinstance(no, ast.Compare):
+        for op in no.ops:
+            if not isinstance(op, OPERADORES):
+                raise ExpressaoInvalida(f"Operador não permitido: {type(op).__name__}")
+        return ast.Compare(
+            left=_traduzir(no.left), ops=no.ops, comparators=[_traduzir(c) for c in no.comparators]
+        )
+
+    if isinstance(no, ast.Name):
+        return _campo(no.id)
+
+    if isinstance(no, ast.Attribute) and isinstance(no.value, ast.Name) and no.value.id == "lead":
+        return _campo(no.attr)
+
+    if isinstance(no, (ast.List, ast.Tuple, ast.Set)):
+        return ast.Constant(value=tuple(_constante(e) for e in no.elts))
+
+    if isinstance(no, ast.Call) and isinstance(no.func, ast.Name) and no.func.id == "len" \
+            and len(no.args) == 1 and not no.keywords:
+        return ast.Call(func=ast.Name(id="_len", ctx=ast.Load()), args=[_traduzir(no.args[0])], keywords=[])
+
+    return ast.Constant(value=_constante(no))
+
+
+def traduzir_predicado(expressao: Optional[str]) -> str:
+    """
+    Código Python (sobre o dict `_c`) equivalente à condição
+
+    Raises:
+        ExpressaoInvalida: Sintaxe, campo, operador ou valor fora da linguagem
+    """
+    if not expressao or not expressao.strip():
+        return "True"
+    if len(expressao) > TAMANHO_MAXIMO:
+        raise ExpressaoInvalida(f"Condição com mais de {TAMANHO_MAXIMO} caracteres")
+
+    texto = _igualdade(_forma_curta(expressao.strip()))
+    try:
+        arvore = ast.parse(texto, mode="eval")
+    except SyntaxError as e:
+        raise ExpressaoInvalida(f"Condição inválida: {e.msg}") from None
+    return ast.unparse(_traduzir(arvore.body))
+
+
+def _definir(nome: str, codigo: str) -> Callable:
+    escopo: Dict[str, Any] = {}
+    exec(compile(codigo, f"<regras:{nome}>", "exec"), dict(GLOBAIS), escopo)
+    return escopo[nome]
+
+
+def compilar_predicado(expressao: Optional[str]) -> Predicado:
+    """
+    Compila uma condição isolada
+
+    Raises:
+        ExpressaoInvalida: Sintaxe, campo, operador ou valor fora da linguagem
+    """
+    return _definir("_predicado", (
+        "def _predicado(_c):\n"
+        "    try:\n"
+        f"        return _bool({traduzir_predicado(expressao)})\n"
+        "    except _ErroTipo:\n"
+        "        return False\n"
+    ))
+
+
+def compilar_avaliador(fontes: List[str]) -> Avaliador:
+    """
+    Uma função que avalia várias condições já traduzidas de uma vez
+
+    Returns:
+        Função contexto -> índices (em `fontes`) das condições verdadeiras;
+        erro de tipo numa condição só torna aquela condição falsa
+    """
+    linhas = ["def _avaliar(_c):", "    _r = []"]
+    for indice, fonte in enumerate(fontes):
+        linhas += [
+            "    try:",
+            f"        if {fonte}:",
+            f"            _r.append({indice})",
+            "    except _ErroTipo:",
+            "        pass",
+        ]
+    linhas.append("    return _r")
+    return _definir("_avaliar", "\n".join(linhas) + "\n")
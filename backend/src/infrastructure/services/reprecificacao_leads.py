@@ -0,0 +1,301 @@
+"""
+Reprecificação de leads
+Recalcula, em lotes vetorizados, a economia estimada de todos os leads
+ativos com as tabelas de preços atuais (melhor operadora após o desconto
+por quantidade de beneficiários) e grava só o que mudou.
+
+A execução guarda um checkpoint (cursor keyset + contadores) a cada
+lote; se o processo cair, a próxima execução retoma de onde parou desde
+que as tabelas de preços não tenham mudado. O checkpoint é compartilhado
+pelos workers: um flock ao lado dele (<checkpoint>.lock) garante uma
+execução por vez na máquina.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...domain.entities.cotacao import DESCONTOS_POR_QUANTIDADE
+from .lideranca import TravaLideranca
+from .servico_calculo_cotacao import ServicoCalculoCotacao
+
+logger = logging.getLogger(__name__)
+
+# Colunas lidas por lead: cálculo + o que os contadores do funil usam
+COLUNAS_REPRECIFICACAO = (
+    "id,created_at,updated_at,whatsapp,status,origem,operadora_atual,"
+    "valor_atual,idades,tipo_contratacao,economia_estimada,valor_proposto"
+)
+
+# tipo_contratacao do lead -> tabela de preços
+TIPOS_TABELA = {"PME": "pme", "EMPRESARIAL": "empresarial"}
+
+# Diferença mínima (R$) para considerar que a economia mudou
+TOLERANCIA = 0.005
+
+
+def calcular_melhores_ofertas(
+    registros: List[Dict[str, Any]],
+    servico: ServicoCalculoCotacao
+) -> Tuple[List[Dict[str, Any]], Dict[str, np.ndarray], int]:
+    """
+    Cota de uma vez registros com valor_atual, idades e tipo_contratacao
+    (leads, renovações) e escolhe a operadora mais barata de cada um
+
+    Returns:
+        (registros cotáveis, arrays alinhados a eles com operadora,
+        valor_proposto e economia, quantidade de registros ignorados por
+        falta de valor atual/idades ou idade inválida)
+    """
+    validos: List[Dict[str, Any]] = []
+    idades: List[int] = []
+    cotacao: List[int] = []
+    tipos: List[str] = []
+    ignorados = 0
+
+    for registro in registros:
+        lista = registro.get("idades") or []
+        if not registro.get("valor_atual") or not lista:
+            ignorados += 1
+            continue
+        try:
+            lista = [int(i) for i in lista]
+        except (TypeError, ValueError):
+            ignorados += 1
+            continue
+        if min(lista) < 0 or max(lista) > 120:
+            ignorados += 1
+            continue
+
+        indice = len(validos)
+        validos.append(registro)
+        idades.extend(lista)
+        cotacao.extend([indice] * len(lista))
+        tipos.append(TIPOS_TABELA.get(str(registro.get("tipo_contratacao") or "").upper(), "adesao"))
+
+    if not validos:
+        return [], {}, ignorados
+
+    cotacao_arr = np.array(cotacao, dtype=np.int64)
+    totais = servico.calcular_lote(np.array(idades, dtype=np.int64), cotacao_arr, tipos)
+
+    quantidade = np.bincount(cotacao_arr, minlength=len(validos))
+    desconto = np.select(
+        [quantidade >= minimo for minimo, _ in DESCONTOS_POR_QUANTIDADE],
+        [float(percentual) for _, percentual in DESCONTOS_POR_QUANTIDADE],
+        default=0.0
+    )
+    com_desconto = totais.to_numpy() * (1 - desconto)[:, None]
+    escolhida = com_desconto.argmin(axis=1)
+    melhor = np.round(com_desconto[np.arange(len(validos)), escolhida], 2)
+
+    valor_atual = np.array([float(r["valor_atual"]) for r in validos])
+    ofertas = {
+        "operadora": totais.columns.to_numpy()[escolhida],
+        "valor_proposto": melhor,
+        "economia": np.round(np.maximum(valor_atual - melhor, 0.0), 2),
+    }
+    return validos, ofertas, ignorados
+
+
+def calcular_economias(
+    leads: List[Dict[str, Any]],
+    servico: ServicoCalculoCotacao
+) -> Tuple[List[Tuple[Dict[str, Any], float]], int]:
+    """
+    Calcula a economia de uma página de leads
+
+    Returns:
+        (pares (lead, nova economia) só dos que mudaram, quantidade de
+        leads ignorados por falta de valor atual/idades ou idade inválida)
+    """
+    validos, ofertas, ignorados = calcular_melhores_ofertas(leads, servico)
+    if not validos:
+        return [], ignorados
+
+    economia = ofertas["economia"]
+    anterior = np.array([
+        np.nan if l.get("economia_estimada") is None else float(l["economia_estimada"])
+        for l in validos
+    ])
+    mudou = np.isnan(anterior) | (np.abs(economia - anterior) >= TOLERANCIA)
+
+    return [(validos[i], float(economia[i])) for i in np.flatnonzero(mudou)], ignorados
+
+
+class JobReprecificacao:
+    """Job em background (um por vez entre os workers) que reprecifica todos os leads ativos"""
+
+    def __init__(
+        self,
+        servico: Optional[ServicoCalculoCotacao] = None,
+        caminho_checkpoint: str = "data/reprecificacao.json",
+        tamanho_lote: int = 5000
+    ):
+        self._servico = servico
+        self.caminho_checkpoint = caminho_checkpoint
+        self.tamanho_lote = tamanho_lote
+        self._tarefa: Optional[asyncio.Task] = None
+        self._estado: Dict[str, Any] = {"estado": "ocioso"}
+        self.trava = TravaLideranca(f"{caminho_checkpoint}.lock")
+
+    @property
+    def servico(self) -> ServicoCalculoCotacao:
+        if self._servico is None:
+            from ..container import container
+            self._servico = container.servico_calculo_cotacao
+        return self._servico
+
+    @property
+    def em_execucao(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    def iniciar(self, repositorio) -> bool:
+        """Dispara a execução em background; False se já houver uma rodando (em qualquer worker)"""
+        if self.em_execucao or not self.trava.tentar():
+            return False
+        self._tarefa = asyncio.create_task(self.executar(repositorio))
+        self._tarefa.add_done_callback(lambda _: self.trava.liberar())
+        return True
+
+    async def cancelar(self):
+        """Interrompe a execução atual; o checkpoint do último lote é mantido"""
+        if not self.em_execucao:
+            return
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+
+    async def executar(self, repositorio) -> Dict[str, Any]:
+        """Percorre todos os leads ativos (retomando do checkpoint, se houver)"""
+        versao = self.servico.versao_tabelas()
+        checkpoint = self._ler_checkpoint()
+        if checkpoint and checkpoint.get("versao_tabelas") != versao:
+            logger.info("💲 Tabelas de preços mudaram desde o checkpoint; reprecificação recomeça do início")
+            checkpoint = None
+
+        estado = checkpoint or {
+            "versao_tabelas": versao,
+            "cursor": None,
+            "processados": 0,
+            "atualizados": 0,
+            "ignorados": 0,
+            "iniciado_em": datetime.now(timezone.utc).isoformat()
+        }
+        estado.update({"estado": "executando", "retomado": checkpoint is not None})
+        self._estado = estado
+
+        processados_inicio = estado["processados"]
+        inicio = time.perf_counter()
+        cursor = tuple(estado["cursor"]) if estado["cursor"] else None
+
+        try:
+            while True:
+                pagina = await repositorio.listar_leads_cursor(
+                    cursor=cursor, limite=self.tamanho_lote, colunas=COLUNAS_REPRECIFICACAO
+                )
+                if not pagina:
+                    break
+
+                alteracoes, ignorados = await asyncio.to_thread(
+                    calcular_economias, pagina, self.servico
+                )
+                if alteracoes:
+                    await repositorio.atualizar_economia_lote(alteracoes)
+
+                cursor = (pagina[-1]["created_at"], pagina[-1]["id"])
+                estado["cursor"] = list(cursor)
+                estado["processados"] += len(pagina)
+                estado["atualizados"] += len(alteracoes)
+                estado["ignorados"] += ignorados
+                self._gravar_checkpoint(estado)
+
+                decorrido = time.perf_counter() - inicio
+                estado["leads_por_segundo"] = round((estado["processados"] - processados_inicio) / decorrido, 1)
+                logger.info(
+                    f"💲 Reprecificação: {estado['processados']} leads "
+                    f"({estado['atualizados']} atualizados, {estado['leads_por_segundo']} leads/s)"
+                )
+
+                if len(pagina) < self.tamanho_lote:
+                    break
+
+        except asyncio.CancelledError:
+            estado["estado"] = "cancelado"
+            raise
+        except Exception as e:
+            estado.update({"estado": "falhou", "erro": str(e)})
+            logger.error(f"❌ Reprecificação interrompida (retomável pelo checkpoint): {e}")
+            return dict(estado)
+
+        estado.update({
+            "estado": "concluido",
+            "concluido_em": datetime.now(timezone.utc).isoformat(),
+            "duracao_segundos": round(time.perf_counter() - inicio, 2)
+        })
+        self._remover_checkpoint()
+        logger.info(
+            f"✅ Reprecificação concluída: {estado['processados']} leads, "
+            f"{estado['atualizados']} atualizados em {estado['duracao_segundos']} s"
+        )
+        return dict(estado)
+
+    def progresso(self) -> Dict[str, Any]:
+        """Estado da execução atual (ou da última) para a API"""
+        progresso = {k: v for k, v in self._estado.items() if k != "cursor"}
+        ocupante = None if self.em_execucao else self.trava.ocupante()
+        if ocupante is not None:
+            # Executando em outro worker: o checkpoint mostra até onde chegou
+            checkpoint = self._ler_checkpoint() or {}
+            return {
+                "estado": "executando_em_outro_worker",
+                "pid": ocupante,
+                "processados": checkpoint.get("processados", 0)
+            }
+        if self._estado.get("estado") == "ocioso":
+            checkpoint = self._ler_checkpoint()
+            if checkpoint:
+                progresso.update({"checkpoint_pendente": True, "processados": checkpoint["processados"]})
+        return progresso
+
+    def _ler_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.caminho_checkpoint, encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Checkpoint de reprecificação ilegível, ignorado: {e}")
+            return None
+
+    def _gravar_checkpoint(self, estado: Dict[str, Any]):
+        """Grava de forma atômica (arquivo temporário + rename)"""
+        diretorio = os.path.dirname(self.caminho_checkpoint)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{self.caminho_checkpoint}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(estado, arquivo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, self.caminho_checkpoint)
+
+    def _remover_checkpoint(self):
+        try:
+            os.remove(self.caminho_checkpoint)
+        except FileNotFoundError:
+            pass
+
+
+# Instância global do job
+job_reprecificacao = JobReprecificacao(
+    caminho_checkpoint=os.getenv("REPRECIFICACAO_CHECKPOINT", "data/reprecificacao.json"),
+    tamanho_lote=int(os.getenv("REPRECIFICACAO_LOTE", "5000"))
+)
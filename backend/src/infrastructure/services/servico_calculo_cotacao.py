@@ -2,10 +2,24 @@
 Serviço de Cálculo de Cotação
 Implementa a lógica de cálculo de valores de planos de saúde
 """
-import pandas as pd
+import hashlib
+import json
+import numpy as np
 from decimal import Decimal
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Sequence
 from ...domain.entities.cotacao import Cotacao
+from .metricas import LIMITES_RAPIDOS, cronometrado, metricas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Tempo de cálculo por operação (GET /metrics)
+TEMPO_CALCULO = metricas.histograma(
+    "cotacao_calculo_seconds",
+    "Duração do cálculo de cotações",
+    ("operacao",),
+    limites=LIMITES_RAPIDOS
+)
 
 
 class ServicoCalculoCotacao:
@@ -20,6 +34,11 @@ class ServicoCalculoCotacao:
     
     def _carregar_tabelas_precos(self):
         """Carrega tabelas de preços fictícias (futuramente pode vir de CSV/DB)"""
+        # pandas só é importado quando o serviço é criado (container)
+        import pandas as pd
+        
+        self._versao_tabelas = None
+        
         # Tabela de preços base por faixa etária
         self.tabela_precos = pd.DataFrame({
             'faixa_inicio': [0, 18, 30, 40, 50, 60],
@@ -39,6 +58,7 @@ class ServicoCalculoCotacao:
             'HAPVIDA': 1.00
         }
     
+    @cronometrado(TEMPO_CALCULO, "calcular")
     async def calcular(self, cotacao: Cotacao) -> Dict:
         """
         Calcula os valores da cotação
@@ -103,7 +123,68 @@ class ServicoCalculoCotacao:
         
         return Decimal(str(round(valor_final, 2)))
     
-    def obter_faixas_etarias(self) -> pd.DataFrame:
+    @cronometrado(TEMPO_CALCULO, "calcular_lote")
+    def calcular_lote(
+        self,
+        idades: np.ndarray,
+        cotacao: np.ndarray,
+        tipos_contratacao: Sequence[str],
+    ) -> "pd.DataFrame":
+        """
+        Calcula de uma vez o valor total de muitas cotações em todas as operadoras
+        
+        Mesmo resultado de calcular() para cada par cotação/operadora
+        (arredondamento por beneficiário), mas vetorizado com NumPy.
+        
+        Args:
+            idades: Idades de todos os beneficiários, concatenadas
+            cotacao: Índice da cotação (0..n-1) de cada idade
+            tipos_contratacao: Tipo de contratação de cada cotação
+            
+        Returns:
+            DataFrame (uma linha por cotação, uma coluna por operadora) com o valor total
+        """
+        import pandas as pd
+        
+        idades = np.asarray(idades)
+        cotacao = np.asarray(cotacao)
+        quantidade = len(tipos_contratacao)
+        
+        inicio = self.tabela_precos['faixa_inicio'].to_numpy()
+        fim = self.tabela_precos['faixa_fim'].to_numpy()
+        faixa = np.searchsorted(inicio, idades, side='right') - 1
+        fora = (faixa < 0) | (idades > fim[faixa.clip(0)])
+        if fora.any():
+            raise ValueError(f"Faixa etária não encontrada para idade {idades[fora][0]}")
+        
+        tipos = ['adesao', 'pme', 'empresarial']
+        bases = self.tabela_precos[[f'valor_base_{tipo}' for tipo in tipos]].to_numpy()
+        tipo_cotacao = np.array([tipos.index(t.lower()) for t in tipos_contratacao], dtype=np.int64)
+        valor_base = bases[faixa, tipo_cotacao[cotacao]]
+        
+        return pd.DataFrame({
+            operadora: np.bincount(
+                cotacao, weights=np.round(valor_base * multiplicador, 2), minlength=quantidade
+            )
+            for operadora, multiplicador in self.multiplicadores_operadora.items()
+        })
+    
+    def versao_tabelas(self) -> str:
+        """
+        Identificador das tabelas de preços em uso (muda quando os preços mudam)
+        
+        Calculado uma vez por carga das tabelas: vai na ETag do catálogo
+        a cada requisição.
+        """
+        if self._versao_tabelas is None:
+            conteudo = json.dumps({
+                'tabela_precos': self.tabela_precos.to_dict(orient='list'),
+                'multiplicadores': self.multiplicadores_operadora
+            }, sort_keys=True)
+            self._versao_tabelas = hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+        return self._versao_tabelas
+    
+    def obter_faixas_etarias(self) -> "pd.DataFrame":
         """Retorna as faixas etárias disponíveis"""
         return self.tabela_precos[['faixa_inicio', 'faixa_fim']].copy()
     
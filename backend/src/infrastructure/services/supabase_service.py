@@ -4,10 +4,18 @@ Gerencia a conexão e operações com o banco de dados
 """
 
 import os
-from typing import Optional, List, Dict, Any
+import asyncio
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, AsyncIterator, Tuple
 from dotenv import load_dotenv
-from supabase import create_client, Client
 import logging
+from .cache_estatisticas import CacheSWR
+from .contadores_funil import ContadoresFunil
+from .cache_leads import CacheLeads
+from .pontuacao_leads import pontuar_lead
+from .metricas import cronometrado, metricas
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +24,25 @@ logger = logging.getLogger(__name__)
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Colunas lidas para reconstruir os contadores do funil
+COLUNAS_CONTADORES = (
+    "id,created_at,updated_at,status,origem,operadora_atual,"
+    "valor_atual,economia_estimada,valor_proposto"
+)
+
+# SQLSTATE de unique_violation (PostgREST repassa em APIError.code)
+CODIGO_VIOLACAO_UNICA = "23505"
+
+# Releituras de atualizar_status_lead quando o lead muda entre a leitura e o UPDATE
+TENTATIVAS_ATUALIZACAO = 3
+
+# Tempo das chamadas ao banco, por operação (GET /metrics)
+TEMPO_BANCO = metricas.histograma(
+    "supabase_operacao_seconds",
+    "Duração das operações no Supabase",
+    ("operacao",)
+)
+
 class SupabaseService:
     """Serviço para gerenciar operações com Supabase"""
     
@@ -26,14 +53,32 @@ class SupabaseService:
         
         if not self.url or not self.key:
             logger.warning("⚠️ Supabase não configurado. Configure SUPABASE_URL e SUPABASE_KEY no .env")
-            self.client: Optional[Client] = None
+            self.client: Optional["Client"] = None
         else:
             try:
-                self.client: Client = create_client(self.url, self.key)
+                # O cliente (e o pacote supabase) só é carregado com o serviço
+                from supabase import create_client
+                self.client: "Client" = create_client(self.url, self.key)
                 logger.info("✅ Conexão com Supabase estabelecida")
             except Exception as e:
                 logger.error(f"❌ Erro ao conectar com Supabase: {e}")
                 self.client = None
+
+        # Cache das views agregadas (dashboard_stats, pipeline_vendas, ...)
+        self.cache_estatisticas = CacheSWR(
+            ttl=float(os.getenv("STATS_CACHE_TTL", "30")),
+            janela_stale=float(os.getenv("STATS_CACHE_STALE", "300")),
+            local="estatisticas"
+        )
+        
+        # Contadores incrementais do funil (carregados em reconstruir_contadores)
+        self.contadores = ContadoresFunil()
+        
+        # Cache LRU de leads individuais (por ID e por WhatsApp)
+        self.cache_leads = CacheLeads(
+            capacidade=int(os.getenv("LEAD_CACHE_CAPACIDADE", "10000")),
+            ttl=float(os.getenv("LEAD_CACHE_TTL", "60"))
+        )
     
     def is_connected(self) -> bool:
         """Verifica se está conectado ao Supabase"""
@@ -43,6 +88,7 @@ class SupabaseService:
     # CRUD - Leads
     # ==========================================
     
+    @cronometrado(TEMPO_BANCO, "criar_lead")
     async def criar_lead(
         self,
         nome: str,
@@ -96,11 +142,15 @@ class SupabaseService:
                 "status": "novo",
                 "origem": "scanner_pdf"
             }
+            lead_data["score"] = pontuar_lead(lead_data)
             
             response = self.client.table("insurance_leads").insert(lead_data).execute()
             
             if response.data:
                 lead_criado = response.data[0]
+                self.cache_estatisticas.invalidar()
+                self.contadores.registrar_criacao(lead_criado)
+                self.cache_leads.armazenar(lead_criado, indexar_whatsapp=True)
                 logger.info(f"✅ Lead criado: {lead_criado['id']} - {nome}")
                 return lead_criado
             else:
@@ -108,14 +158,63 @@ class SupabaseService:
                 return None
                 
         except Exception as e:
+            if getattr(e, "code", None) == CODIGO_VIOLACAO_UNICA:
+                # WhatsApp já usado por lead ativo (uq_leads_whatsapp_ativo)
+                raise
             logger.error(f"❌ Erro ao criar lead: {e}")
             return None
-    
+
+    @cronometrado(TEMPO_BANCO, "criar_leads_lote")
+    async def criar_leads_lote(self, leads: List[Dict[str, Any]]) -> int:
+        """
+        Insere vários leads (com id e created_at já definidos) num único INSERT
+
+        Idempotente: IDs já gravados são ignorados, então reenviar um lote
+        após falha ou queda do processo não duplica leads.
+
+        Returns:
+            Quantidade de leads efetivamente inseridos
+
+        Raises:
+            Exception: Se o Supabase não estiver conectado ou o INSERT falhar
+        """
+        if not self.is_connected():
+            raise RuntimeError("Supabase não conectado")
+
+        response = self.client.table("insurance_leads")\
+            .upsert(leads, on_conflict="id", ignore_duplicates=True)\
+            .execute()
+
+        inseridos = response.data or []
+        if inseridos:
+            self.cache_estatisticas.invalidar()
+        for lead in inseridos:
+            self.contadores.registrar_criacao(lead)
+            self.cache_leads.armazenar(lead, indexar_whatsapp=True)
+
+        return len(inseridos)
+
     async def buscar_lead_por_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
-        """Busca um lead pelo ID"""
+        """Busca um lead pelo ID (read-through no cache de leads)"""
+        if not self.is_connected():
+            return None
+        
+        return await self.cache_leads.obter_por_id(
+            lead_id, lambda: self._consultar_lead_por_id(lead_id)
+        )
+    
+    async def buscar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
+        """Busca um lead pelo WhatsApp (read-through no cache de leads)"""
         if not self.is_connected():
             return None
         
+        return await self.cache_leads.obter_por_whatsapp(
+            whatsapp, lambda: self._consultar_lead_por_whatsapp(whatsapp)
+        )
+    
+    @cronometrado(TEMPO_BANCO, "consultar_lead_por_id")
+    async def _consultar_lead_por_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        """Consulta um lead pelo ID diretamente no banco"""
         try:
             response = self.client.table("insurance_leads")\
                 .select("*")\
@@ -127,11 +226,9 @@ class SupabaseService:
             logger.error(f"❌ Erro ao buscar lead: {e}")
             return None
     
-    async def buscar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
-        """Busca um lead pelo WhatsApp"""
-        if not self.is_connected():
-            return None
-        
+    @cronometrado(TEMPO_BANCO, "consultar_lead_por_whatsapp")
+    async def _consultar_lead_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
+        """Consulta o lead ativo mais recente de um WhatsApp no banco"""
         try:
             response = self.client.table("insurance_leads")\
                 .select("*")\
@@ -146,11 +243,13 @@ class SupabaseService:
             logger.error(f"❌ Erro ao buscar lead: {e}")
             return None
     
+    @cronometrado(TEMPO_BANCO, "listar_leads")
     async def listar_leads(
         self,
         status: Optional[str] = None,
         limite: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        ordenar: str = "recentes"
     ) -> List[Dict[str, Any]]:
         """
         Lista leads com filtros opcionais
@@ -159,6 +258,7 @@ class SupabaseService:
             status: Filtrar por status (novo, contatado, etc)
             limite: Número máximo de resultados
             offset: Offset para paginação
+            ordenar: "recentes" (created_at) ou "score" (maior primeiro)
             
         Returns:
             Lista de leads
@@ -169,8 +269,11 @@ class SupabaseService:
         try:
             query = self.client.table("insurance_leads")\
                 .select("*")\
-                .eq("arquivado", False)\
-                .order("created_at", desc=True)\
+                .eq("arquivado", False)
+            
+            if ordenar == "score":
+                query = query.order("score", desc=True, nullsfirst=False)
+            query = query.order("created_at", desc=True)\
                 .range(offset, offset + limite - 1)
             
             if status:
@@ -181,7 +284,141 @@ class SupabaseService:
         except Exception as e:
             logger.error(f"❌ Erro ao listar leads: {e}")
             return []
+
+    @cronometrado(TEMPO_BANCO, "listar_leads_cursor")
+    async def listar_leads_cursor(
+        self,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        cursor: Optional[Tuple[str, str]] = None,
+        limite: int = 1000,
+        colunas: str = "*"
+    ) -> List[Dict[str, Any]]:
+        """
+        Lista uma página de leads usando paginação por cursor (keyset)
+
+        Diferente do offset, o custo de cada página não cresce com a
+        posição na tabela: o filtro (created_at, id) < cursor usa o
+        índice idx_insurance_leads_keyset.
+
+        Args:
+            status: Filtrar por status
+            data_inicio: Data/hora mínima de criação (ISO 8601, inclusiva)
+            data_fim: Data/hora máxima de criação (ISO 8601, exclusiva)
+            cursor: Tupla (created_at, id) do último lead da página anterior
+            limite: Tamanho da página
+            colunas: Colunas a projetar (select do PostgREST)
+
+        Returns:
+            Lista de leads ordenada por created_at e id decrescentes
+
+        Raises:
+            Exception: Erros de consulta são propagados para que uma
+                exportação não seja truncada em silêncio
+        """
+        if not self.is_connected():
+            return []
+
+        try:
+            query = self.client.table("insurance_leads")\
+                .select(colunas)\
+                .eq("arquivado", False)
+
+            if status:
+                query = query.eq("status", status)
+            if data_inicio:
+                query = query.gte("created_at", data_inicio)
+            if data_fim:
+                query = query.lt("created_at", data_fim)
+            if cursor:
+                created_at, lead_id = cursor
+                query = query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt.{lead_id})'
+                )
+
+            query = query\
+                .order("created_at", desc=True)\
+                .order("id", desc=True)\
+                .limit(limite)
+            # Páginas grandes (exportação, análise): a requisição síncrona vai para uma thread
+            response = await asyncio.to_thread(query.execute)
+            return response.data or []
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar leads por cursor: {e}")
+            raise
+
+    async def iterar_leads(
+        self,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        tamanho_pagina: int = 1000,
+        colunas: str = "*"
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Percorre todos os leads página a página (keyset)
+
+        Apenas uma página fica em memória por vez, então o consumo
+        independe do tamanho da tabela. As colunas projetadas precisam
+        incluir created_at e id, usados como cursor.
+
+        Yields:
+            Páginas de leads (listas com até tamanho_pagina itens)
+        """
+        cursor: Optional[Tuple[str, str]] = None
+
+        while True:
+            pagina = await self.listar_leads_cursor(
+                status=status,
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                cursor=cursor,
+                limite=tamanho_pagina,
+                colunas=colunas
+            )
+            if not pagina:
+                return
+
+            yield pagina
+
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo = pagina[-1]
+            cursor = (ultimo["created_at"], ultimo["id"])
+
+    @cronometrado(TEMPO_BANCO, "buscar_leads")
+    async def buscar_leads(self, termo: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Busca leads por fragmento de nome, e-mail ou telefone
+        
+        Usa a RPC buscar_leads (índices trigram do pg_trgm, sem acentos),
+        que já devolve os resultados ranqueados, limitados e com colunas
+        enxutas.
+        
+        Args:
+            termo: Texto digitado (mínimo 3 caracteres)
+            limite: Número máximo de resultados (até 50)
+            
+        Returns:
+            Lista de leads ordenada por relevância
+        """
+        if not self.is_connected():
+            return []
+        
+        try:
+            response = self.client.rpc(
+                "buscar_leads",
+                {"p_termo": termo, "p_limite": limite}
+            ).execute()
+            
+            return response.data or []
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar leads: {e}")
+            return []
     
+    @cronometrado(TEMPO_BANCO, "atualizar_status_lead")
     async def atualizar_status_lead(
         self,
         lead_id: str,
@@ -202,53 +439,132 @@ class SupabaseService:
         if not self.is_connected():
             return False
         
+        import datetime
         try:
-            # Buscar lead atual para o histórico
-            lead_atual = await self.buscar_lead_por_id(lead_id)
-            if not lead_atual:
-                return False
-            
-            # Preparar histórico
-            import datetime
-            historico = lead_atual.get("historico", [])
-            historico.append({
-                "timestamp": datetime.datetime.now().isoformat(),
-                "evento": "mudanca_status",
-                "status_anterior": lead_atual["status"],
-                "status_novo": novo_status,
-                "observacao": observacao
-            })
-            
-            # Atualizar
-            response = self.client.table("insurance_leads")\
-                .update({
-                    "status": novo_status,
-                    "historico": historico
-                })\
-                .eq("id", lead_id)\
-                .execute()
+            for _ in range(TENTATIVAS_ATUALIZACAO):
+                # Leitura direta no banco (o cache pode ter até 60 s): o histórico
+                # e a transição dos contadores partem do status atual de fato
+                lead_atual = await self._consultar_lead_por_id(lead_id)
+                if not lead_atual:
+                    return False
+                
+                # Preparar histórico
+                historico = list(lead_atual.get("historico") or [])
+                historico.append({
+                    "timestamp": datetime.datetime.now().isoformat(),
+                    "evento": "mudanca_status",
+                    "status_anterior": lead_atual["status"],
+                    "status_novo": novo_status,
+                    "observacao": observacao
+                })
+                
+                # Atualizar só se ninguém escreveu no lead desde a leitura
+                # (updated_at muda a cada UPDATE pelo trigger); senão, relê
+                consulta = self.client.table("insurance_leads")\
+                    .update({
+                        "status": novo_status,
+                        "historico": historico,
+                        "score": pontuar_lead({**lead_atual, "status": novo_status, "historico": historico})
+                    })\
+                    .eq("id", lead_id)
+                if lead_atual.get("updated_at"):
+                    consulta = consulta.eq("updated_at", lead_atual["updated_at"])
+                else:
+                    consulta = consulta.is_("updated_at", "null")
+                response = consulta.execute()
+                
+                if response.data:
+                    self.cache_estatisticas.invalidar()
+                    self.contadores.registrar_mudanca_status(lead_atual, novo_status)
+                    self.cache_leads.armazenar(response.data[0])
+                    logger.info(f"✅ Status atualizado: {lead_id} -> {novo_status}")
+                    return True
             
-            if response.data:
-                logger.info(f"✅ Status atualizado: {lead_id} -> {novo_status}")
-                return True
+            logger.error(f"❌ Lead {lead_id} alterado por outra requisição a cada tentativa, status não atualizado")
             return False
             
         except Exception as e:
             logger.error(f"❌ Erro ao atualizar status: {e}")
             return False
     
+    @cronometrado(TEMPO_BANCO, "atualizar_economia_lote")
+    async def atualizar_economia_lote(self, atualizacoes: List[Tuple[Dict[str, Any], float]]) -> int:
+        """
+        Atualiza economia_estimada de vários leads com um único UPDATE (RPC)
+
+        Args:
+            atualizacoes: Pares (lead como foi lido, nova economia)
+
+        Returns:
+            Quantidade de leads atualizados
+
+        Raises:
+            Exception: Se o Supabase não estiver conectado ou a RPC falhar
+        """
+        if not self.is_connected():
+            raise RuntimeError("Supabase não conectado")
+        if not atualizacoes:
+            return 0
+
+        response = self.client.rpc("atualizar_economia_leads", {
+            "p_atualizacoes": [
+                {"id": lead["id"], "economia_estimada": economia}
+                for lead, economia in atualizacoes
+            ]
+        }).execute()
+
+        self.cache_estatisticas.invalidar()
+        for lead, economia in atualizacoes:
+            self.contadores.registrar_atualizacao(lead, economia_estimada=economia)
+            self.cache_leads.invalidar(lead["id"], whatsapp=lead.get("whatsapp"))
+
+        return int(response.data or 0)
+
+    @cronometrado(TEMPO_BANCO, "atualizar_scores_lote")
+    async def atualizar_scores_lote(self, scores: List[Tuple[str, float]]) -> int:
+        """
+        Grava o score de vários leads com um único UPDATE (RPC)
+
+        Raises:
+            Exception: Se o Supabase não estiver conectado ou a RPC falhar
+        """
+        if not self.is_connected():
+            raise RuntimeError("Supabase não conectado")
+        if not scores:
+            return 0
+
+        response = self.client.rpc("atualizar_scores_leads", {
+            "p_scores": [{"id": lead_id, "score": score} for lead_id, score in scores]
+        }).execute()
+
+        for lead_id, _ in scores:
+            self.cache_leads.invalidar(lead_id)
+
+        return int(response.data or 0)
+
+    @cronometrado(TEMPO_BANCO, "arquivar_lead")
     async def arquivar_lead(self, lead_id: str) -> bool:
-        """Arquiva um lead"""
+        """Arquiva um lead (idempotente)"""
         if not self.is_connected():
             return False
         
         try:
+            # O filtro arquivado = FALSE garante que só uma transição real
+            # retorne a linha, para não descontar o lead duas vezes
             response = self.client.table("insurance_leads")\
                 .update({"arquivado": True})\
                 .eq("id", lead_id)\
+                .eq("arquivado", False)\
                 .execute()
             
-            return bool(response.data)
+            if not response.data:
+                lead = await self._consultar_lead_por_id(lead_id)
+                return bool(lead and lead.get("arquivado"))
+            
+            self.cache_leads.invalidar(lead_id, whatsapp=response.data[0].get("whatsapp"))
+            self.cache_estatisticas.invalidar()
+            self.contadores.registrar_arquivamento({**response.data[0], "arquivado": False})
+            return True
         except Exception as e:
             logger.error(f"❌ Erro ao arquivar lead: {e}")
             return False
@@ -261,27 +577,62 @@ class SupabaseService:
         """
         Obtém estatísticas do dashboard
         
+        Lidas dos contadores incrementais quando carregados (O(1));
+        caso contrário, da view via cache (TTL + stale-while-revalidate).
+        
         Returns:
             Dicionário com estatísticas ou None em caso de erro
         """
         if not self.is_connected():
             return None
         
+        if self.contadores.carregado:
+            return self.contadores.dashboard_stats()
+        
+        return await self.cache_estatisticas.obter(
+            "dashboard_stats", self._consultar_dashboard_stats
+        )
+    
+    async def obter_leads_por_operadora(self) -> List[Dict[str, Any]]:
+        """Obtém estatísticas agrupadas por operadora (contadores ou cache)"""
+        if not self.is_connected():
+            return []
+        
+        if self.contadores.carregado:
+            return self.contadores.leads_por_operadora()
+        
+        return await self.cache_estatisticas.obter(
+            "leads_por_operadora", self._consultar_leads_por_operadora
+        ) or []
+    
+    async def obter_pipeline_vendas(self) -> List[Dict[str, Any]]:
+        """Obtém visão do funil de vendas (contadores ou cache)"""
+        if not self.is_connected():
+            return []
+        
+        if self.contadores.carregado:
+            return self.contadores.pipeline_vendas()
+        
+        return await self.cache_estatisticas.obter(
+            "pipeline_vendas", self._consultar_pipeline_vendas
+        ) or []
+    
+    @cronometrado(TEMPO_BANCO, "consultar_dashboard_stats")
+    async def _consultar_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        """Consulta a view dashboard_stats diretamente no banco"""
         try:
             response = self.client.table("dashboard_stats")\
                 .select("*")\
                 .execute()
             
-            return response.data[0] if response.data else None
+            return response.data[0] if response.data else {}
         except Exception as e:
             logger.error(f"❌ Erro ao obter estatísticas: {e}")
             return None
     
-    async def obter_leads_por_operadora(self) -> List[Dict[str, Any]]:
-        """Obtém estatísticas agrupadas por operadora"""
-        if not self.is_connected():
-            return []
-        
+    @cronometrado(TEMPO_BANCO, "consultar_leads_por_operadora")
+    async def _consultar_leads_por_operadora(self) -> Optional[List[Dict[str, Any]]]:
+        """Consulta a view leads_por_operadora diretamente no banco"""
         try:
             response = self.client.table("leads_por_operadora")\
                 .select("*")\
@@ -290,13 +641,11 @@ class SupabaseService:
             return response.data or []
         except Exception as e:
             logger.error(f"❌ Erro ao obter leads por operadora: {e}")
-            return []
+            return None
     
-    async def obter_pipeline_vendas(self) -> List[Dict[str, Any]]:
-        """Obtém visão do funil de vendas"""
-        if not self.is_connected():
-            return []
-        
+    @cronometrado(TEMPO_BANCO, "consultar_pipeline_vendas")
+    async def _consultar_pipeline_vendas(self) -> Optional[List[Dict[str, Any]]]:
+        """Consulta a view pipeline_vendas diretamente no banco"""
         try:
             response = self.client.table("pipeline_vendas")\
                 .select("*")\
@@ -305,8 +654,78 @@ class SupabaseService:
             return response.data or []
         except Exception as e:
             logger.error(f"❌ Erro ao obter pipeline de vendas: {e}")
-            return []
-
+            return None
+    
+    def idade_estatisticas(self, chave: str) -> Optional[float]:
+        """Idade em segundos das estatísticas servidas (0 para contadores)"""
+        if self.contadores.carregado:
+            return 0.0
+        return self.cache_estatisticas.idade(chave)
+    
+    # ==========================================
+    # Contadores do funil
+    # ==========================================
+    
+    async def reconstruir_contadores(self) -> bool:
+        """
+        Reconstrói os contadores do funil lendo todos os leads ativos
+        
+        A leitura é paginada (keyset) e acumulada numa instância nova,
+        que só substitui a atual quando completa. Escritas deste processo
+        durante a leitura também chegam à instância nova.
+        
+        Returns:
+            True se os contadores foram carregados
+        """
+        if not self.is_connected():
+            return False
+        
+        atuais = self.contadores
+        novos = atuais.iniciar_reconstrucao()
+        try:
+            async for pagina in self.iterar_leads(colunas=COLUNAS_CONTADORES):
+                novos.incluir_existentes(pagina)
+        except Exception as e:
+            logger.error(f"❌ Erro ao reconstruir contadores do funil: {e}")
+            return False
+        finally:
+            atuais.concluir_reconstrucao()
+        
+        novos.carregado = True
+        self.contadores = novos
+        logger.info(f"📊 Contadores do funil carregados: {novos.total.quantidade} leads")
+        return True
+    
+    async def reconciliar_contadores(self) -> Dict[str, Any]:
+        """
+        Confere os contadores contra a view pipeline_vendas
+        
+        Havendo divergência (escritas de outros processos, falhas
+        parciais), os contadores são reconstruídos.
+        
+        Returns:
+            Dicionário com o resultado da conferência
+        """
+        if not self.is_connected() or not self.contadores.carregado:
+            return {"consistente": None, "divergencias": {}}
+        
+        pipeline = await self._consultar_pipeline_vendas()
+        if pipeline is None:
+            return {"consistente": None, "divergencias": {}}
+        
+        divergencias = self.contadores.divergencias(pipeline)
+        if divergencias:
+            logger.warning(f"⚠️ Contadores do funil divergentes: {divergencias}")
+            await self.reconstruir_contadores()
+        
+        return {"consistente": not divergencias, "divergencias": divergencias}
+    
+    async def reconciliar_periodicamente(self, intervalo: float):
+        """Executa reconciliar_contadores a cada `intervalo` segundos"""
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await self.reconciliar_contadores()
+            except Exception as e:
+                logger.error(f"❌ Erro na reconciliação dos contadores: {e}")
 
-# Instância global do serviço
-supabase_service = SupabaseService()
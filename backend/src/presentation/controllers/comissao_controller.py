@@ -0,0 +1,42 @@
+"""
+Controller para o processamento de comissões dos corretores
+"""
+import re
+from fastapi import HTTPException
+from src.infrastructure.repositories.comissao_repository import comissao_repository
+from src.infrastructure.services.motor_comissoes import job_comissoes
+
+FORMATO_MES = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+async def processar_mes(mes_referencia: str):
+    """Dispara o cálculo das comissões do mês em background"""
+    
+    if not comissao_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    if not FORMATO_MES.match(mes_referencia):
+        raise HTTPException(
+            status_code=400,
+            detail="Mês de referência inválido. Use: AAAA-MM"
+        )
+    
+    if not job_comissoes.iniciar(mes_referencia):
+        raise HTTPException(
+            status_code=409,
+            detail="Processamento de comissões já em andamento"
+        )
+    
+    return {
+        "mensagem": "Processamento de comissões iniciado",
+        "mes_referencia": mes_referencia
+    }
+
+
+async def obter_progresso():
+    """Estado do processamento atual (ou do último)"""
+    
+    return job_comissoes.progresso()
@@ -2,19 +2,30 @@
 Controller de Cotação
 Gerencia as requisições relacionadas a cotações
 """
+from typing import Optional
 from fastapi import HTTPException
 from ...application.use_cases.calcular_cotacao_use_case import CalcularCotacaoUseCase
 from ...application.dtos.cotacao_dto import CotacaoInputDTO, CotacaoOutputDTO
-from ...infrastructure.services.servico_calculo_cotacao import ServicoCalculoCotacao
+from ...infrastructure.container import container
 
 
 class CotacaoController:
     """Controller para operações de cotação"""
     
-    def __init__(self):
-        """Inicializa o controller com suas dependências"""
-        self.servico_calculo = ServicoCalculoCotacao()
-        self.use_case = CalcularCotacaoUseCase(self.servico_calculo)
+    def __init__(self, use_case: Optional[CalcularCotacaoUseCase] = None):
+        """
+        Inicializa o controller; sem use_case, o do container é usado
+        (criado no primeiro uso, junto com as tabelas de preços)
+        """
+        self._use_case = use_case
+    
+    @property
+    def use_case(self) -> CalcularCotacaoUseCase:
+        return self._use_case or container.calcular_cotacao_use_case
+    
+    @property
+    def servico_calculo(self):
+        return self.use_case.servico_calculo
     
     async def calcular_cotacao(self, input_dto: CotacaoInputDTO) -> CotacaoOutputDTO:
         """
@@ -34,6 +45,10 @@ class CotacaoController:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erro ao calcular cotação: {str(e)}")
     
+    def versao_catalogo(self) -> str:
+        """Versão das tabelas de preços (base da ETag dos endpoints de catálogo)"""
+        return self.servico_calculo.versao_tabelas()
+    
     async def listar_operadoras(self):
         """Lista operadoras disponíveis"""
         try:
@@ -2,13 +2,40 @@
 Controller para gerenciar leads
 """
 
-from typing import Optional, List
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Optional, List, AsyncIterator
 from fastapi import HTTPException
-from src.infrastructure.services.supabase_service import supabase_service
+from fastapi.responses import StreamingResponse
+from src.infrastructure.repositories.lead_repository import ORDENACOES, LeadDuplicadoError, lead_repository
+from src.infrastructure.repositories.buffer_escrita_leads import BufferCheioError, GravacaoPendenteError
+from src.infrastructure.services.filtro_telefones import filtro_telefones
+from src.infrastructure.services.analise_funil import analise_funil
+from src.infrastructure.services.reprecificacao_leads import job_reprecificacao
+from src.infrastructure.services.eventos_leads import (
+    eventos_leads, LEAD_CRIADO, LEAD_STATUS, LEAD_ARQUIVADO
+)
+from src.infrastructure.services.motor_regras import motor_regras
+from src.domain.value_objects.telefone import normalizar_telefone
+from src.presentation.serializacao import RespostaJSON
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Colunas enviadas na exportação (dados_pdf e historico ficam de fora
+# por serem blobs JSON grandes que não interessam aos relatórios)
+COLUNAS_EXPORTACAO = [
+    "id", "created_at", "updated_at", "nome", "whatsapp", "email",
+    "operadora_atual", "valor_atual", "idades", "economia_estimada",
+    "valor_proposto", "tipo_contratacao", "status", "origem",
+    "prioridade", "observacoes", "atribuido_a"
+]
+
 
 async def criar_lead_do_pdf(
     nome: str,
@@ -25,35 +52,53 @@ async def criar_lead_do_pdf(
 ):
     """Cria um lead a partir dos dados extraídos do PDF"""
     
-    if not supabase_service.is_connected():
+    if not lead_repository.is_connected():
         raise HTTPException(
             status_code=503,
             detail="Banco de dados não configurado. Configure SUPABASE_URL e SUPABASE_KEY no .env"
         )
     
-    # Verificar se já existe lead com este WhatsApp
-    lead_existente = await supabase_service.buscar_lead_por_whatsapp(whatsapp)
-    if lead_existente:
-        logger.warning(f"⚠️ Lead já existe: {whatsapp}")
-        return {
-            "mensagem": "Lead já existe no sistema",
-            "lead_existente": lead_existente
-        }
+    try:
+        whatsapp = normalizar_telefone(whatsapp)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    # Verificar se já existe lead com este WhatsApp (números que o filtro
+    # garante nunca terem sido vistos dispensam a consulta; o índice único
+    # do banco cobre os criados por outros workers desde a última reconstrução)
+    if filtro_telefones.pode_existir(whatsapp):
+        lead_existente = await lead_repository.buscar_lead_por_whatsapp(whatsapp)
+        filtro_telefones.registrar_consulta(encontrado=lead_existente is not None)
+        if lead_existente:
+            return _lead_ja_existe(lead_existente)
     
     # Criar novo lead
-    lead_criado = await supabase_service.criar_lead(
-        nome=nome,
-        whatsapp=whatsapp,
-        email=email,
-        operadora_atual=operadora_atual,
-        valor_atual=valor_atual,
-        idades=idades,
-        economia_estimada=economia_estimada,
-        valor_proposto=valor_proposto,
-        tipo_contratacao=tipo_contratacao,
-        observacoes=observacoes,
-        dados_pdf=dados_pdf
-    )
+    try:
+        lead_criado = await lead_repository.criar_lead(
+            nome=nome,
+            whatsapp=whatsapp,
+            email=email,
+            operadora_atual=operadora_atual,
+            valor_atual=valor_atual,
+            idades=idades,
+            economia_estimada=economia_estimada,
+            valor_proposto=valor_proposto,
+            tipo_contratacao=tipo_contratacao,
+            observacoes=observacoes,
+            dados_pdf=dados_pdf
+        )
+    except LeadDuplicadoError:
+        # Criado entre a verificação acima e o INSERT (ou por outro worker)
+        filtro_telefones.adicionar(whatsapp)
+        lead_existente = await lead_repository.buscar_lead_por_whatsapp(whatsapp)
+        return _lead_ja_existe(lead_existente)
+    except BufferCheioError as e:
+        logger.warning(f"⚠️ {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Muitos leads sendo processados, tente novamente em instantes",
+            headers={"Retry-After": "2"}
+        )
     
     if not lead_criado:
         raise HTTPException(
@@ -61,49 +106,199 @@ async def criar_lead_do_pdf(
             detail="Erro ao salvar lead no banco de dados"
         )
     
+    filtro_telefones.adicionar(whatsapp)
+    eventos_leads.publicar(LEAD_CRIADO, lead_criado)
+    motor_regras.processar(LEAD_CRIADO, lead_criado)
+    
     return {
         "mensagem": "Lead criado com sucesso",
         "lead": lead_criado
     }
 
 
+def _lead_ja_existe(lead_existente: Optional[dict]) -> dict:
+    """Resposta de criação para WhatsApp que já tem lead ativo"""
+    logger.warning(f"⚠️ Lead já existe: {(lead_existente or {}).get('whatsapp')}")
+    return {
+        "mensagem": "Lead já existe no sistema",
+        "lead_existente": lead_existente
+    }
+
+
 async def listar_todos_leads(
     status: Optional[str] = None,
     limite: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    ordenar: str = "recentes"
 ):
     """Lista leads com filtros opcionais"""
     
-    if not supabase_service.is_connected():
+    if not lead_repository.is_connected():
         raise HTTPException(
             status_code=503,
             detail="Banco de dados não configurado"
         )
     
-    leads = await supabase_service.listar_leads(
+    if ordenar not in ORDENACOES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação inválida. Use: {', '.join(ORDENACOES)}"
+        )
+    
+    leads = await lead_repository.listar_leads(
         status=status,
         limite=limite,
-        offset=offset
+        offset=offset,
+        ordenar=ordenar
     )
     
-    return {
+    # Leads já vêm do repositório no formato JSON (dados_pdf, historico):
+    # serializados direto, sem o jsonable_encoder percorrer cada blob
+    return RespostaJSON({
         "total": len(leads),
         "limite": limite,
         "offset": offset,
+        "ordenar": ordenar,
         "leads": leads
+    })
+
+
+async def exportar_leads(
+    formato: str = "csv",
+    status: Optional[str] = None,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    tamanho_pagina: int = 1000
+) -> StreamingResponse:
+    """
+    Exporta leads em streaming (CSV ou NDJSON)
+
+    As linhas são escritas conforme as páginas chegam do banco, então o
+    consumo de memória fica limitado a uma página, qualquer que seja o
+    tamanho da base.
+    """
+
+    if not lead_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+
+    if formato not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=400,
+            detail="Formato inválido. Use: csv, ndjson"
+        )
+
+    paginas = lead_repository.iterar_leads(
+        status=status,
+        data_inicio=data_inicio.isoformat() if data_inicio else None,
+        data_fim=(data_fim + timedelta(days=1)).isoformat() if data_fim else None,
+        tamanho_pagina=tamanho_pagina,
+        colunas=",".join(COLUNAS_EXPORTACAO)
+    )
+
+    if formato == "csv":
+        corpo = _gerar_csv(paginas)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        corpo = _gerar_ndjson(paginas)
+        media_type = "application/x-ndjson"
+
+    nome_arquivo = f"leads_{date.today().isoformat()}.{formato}"
+    return StreamingResponse(
+        _medir_vazao(corpo),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
+
+
+async def _gerar_csv(paginas: AsyncIterator[List[dict]]) -> AsyncIterator[tuple]:
+    """Serializa páginas de leads em CSV, uma página por chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(COLUNAS_EXPORTACAO)
+    yield buffer.getvalue().encode("utf-8"), 0
+
+    async for pagina in paginas:
+        buffer.seek(0)
+        buffer.truncate()
+        for lead in pagina:
+            writer.writerow([_valor_csv(lead.get(coluna)) for coluna in COLUNAS_EXPORTACAO])
+        yield buffer.getvalue().encode("utf-8"), len(pagina)
+
+
+async def _gerar_ndjson(paginas: AsyncIterator[List[dict]]) -> AsyncIterator[tuple]:
+    """Serializa páginas de leads em NDJSON (um objeto JSON por linha)"""
+    async for pagina in paginas:
+        linhas = "".join(
+            json.dumps(lead, ensure_ascii=False, default=str) + "\n"
+            for lead in pagina
+        )
+        yield linhas.encode("utf-8"), len(pagina)
+
+
+def _valor_csv(valor):
+    """Converte listas/dicts em JSON e None em célula vazia"""
+    if valor is None:
+        return ""
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+async def _medir_vazao(chunks: AsyncIterator[tuple]) -> AsyncIterator[bytes]:
+    """Repassa os chunks ao cliente e registra a vazão (linhas/s) ao final"""
+    inicio = time.perf_counter()
+    total_linhas = 0
+
+    try:
+        async for dados, linhas in chunks:
+            total_linhas += linhas
+            yield dados
+    except Exception as e:
+        logger.error(f"❌ Exportação interrompida após {total_linhas} linhas: {e}")
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        vazao = total_linhas / duracao if duracao > 0 else 0.0
+        logger.info(
+            f"📤 Exportação: {total_linhas} linhas em {duracao:.2f}s "
+            f"({vazao:,.0f} linhas/s)"
+        )
+
+
+async def pesquisar_leads(termo: str, limite: int = 20):
+    """Busca leads por nome, e-mail ou fragmento de telefone"""
+    
+    if not lead_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    inicio = time.perf_counter()
+    resultados = await lead_repository.buscar_leads(termo=termo, limite=limite)
+    
+    return {
+        "q": termo,
+        "total": len(resultados),
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        "leads": resultados
     }
 
 
 async def buscar_lead(lead_id: str):
     """Busca um lead específico por ID"""
     
-    if not supabase_service.is_connected():
+    if not lead_repository.is_connected():
         raise HTTPException(
             status_code=503,
             detail="Banco de dados não configurado"
         )
     
-    lead = await supabase_service.buscar_lead_por_id(lead_id)
+    lead = await lead_repository.buscar_lead_por_id(lead_id)
     
     if not lead:
         raise HTTPException(
@@ -111,7 +306,17 @@ async def buscar_lead(lead_id: str):
             detail="Lead não encontrado"
         )
     
-    return lead
+    return RespostaJSON(lead)
+
+
+def _lead_pendente(erro: GravacaoPendenteError) -> HTTPException:
+    """Lead ainda só no journal (banco fora): o cliente tenta de novo"""
+    logger.warning(f"⚠️ {erro}")
+    return HTTPException(
+        status_code=503,
+        detail="Lead ainda sendo gravado, tente novamente em instantes",
+        headers={"Retry-After": "5"}
+    )
 
 
 async def atualizar_status(
@@ -121,7 +326,7 @@ async def atualizar_status(
 ):
     """Atualiza o status de um lead"""
     
-    if not supabase_service.is_connected():
+    if not lead_repository.is_connected():
         raise HTTPException(
             status_code=503,
             detail="Banco de dados não configurado"
@@ -139,11 +344,17 @@ async def atualizar_status(
             detail=f"Status inválido. Use: {', '.join(status_validos)}"
         )
     
-    sucesso = await supabase_service.atualizar_status_lead(
-        lead_id=lead_id,
-        novo_status=novo_status,
-        observacao=observacao
-    )
+    # Estado anterior para o evento (normalmente servido pelo cache de leads)
+    lead = await lead_repository.buscar_lead_por_id(lead_id)
+    
+    try:
+        sucesso = await lead_repository.atualizar_status_lead(
+            lead_id=lead_id,
+            novo_status=novo_status,
+            observacao=observacao
+        )
+    except GravacaoPendenteError as e:
+        raise _lead_pendente(e)
     
     if not sucesso:
         raise HTTPException(
@@ -151,6 +362,11 @@ async def atualizar_status(
             detail="Erro ao atualizar status do lead"
         )
     
+    if lead:
+        lead_atualizado = {**lead, "status": novo_status}
+        eventos_leads.publicar(LEAD_STATUS, lead_atualizado, status_anterior=lead.get("status"))
+        motor_regras.processar(LEAD_STATUS, lead_atualizado, status_anterior=lead.get("status"))
+    
     return {
         "mensagem": "Status atualizado com sucesso",
         "lead_id": lead_id,
@@ -158,37 +374,205 @@ async def atualizar_status(
     }
 
 
+async def arquivar(lead_id: str):
+    """Arquiva um lead (some das listagens, estatísticas e buscas)"""
+    
+    if not lead_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    lead = await lead_repository.buscar_lead_por_id(lead_id)
+    if not lead:
+        raise HTTPException(
+            status_code=404,
+            detail="Lead não encontrado"
+        )
+    
+    if not lead.get("arquivado"):
+        try:
+            arquivado = await lead_repository.arquivar_lead(lead_id)
+        except GravacaoPendenteError as e:
+            raise _lead_pendente(e)
+        if not arquivado:
+            raise HTTPException(
+                status_code=500,
+                detail="Erro ao arquivar lead"
+            )
+        eventos_leads.publicar(LEAD_ARQUIVADO, lead)
+        motor_regras.processar(LEAD_ARQUIVADO, lead)
+    
+    return {
+        "mensagem": "Lead arquivado com sucesso",
+        "lead_id": lead_id
+    }
+
+
+async def stream_eventos(
+    status: Optional[List[str]] = None,
+    ultimo_evento_id: Optional[str] = None
+):
+    """
+    Stream SSE de criação, mudança de status e arquivamento de leads
+    
+    Retoma a partir do Last-Event-ID enquanto os eventos estiverem no
+    buffer; caso contrário envia um evento "reset" e o dashboard deve
+    recarregar os dados. Comentários de heartbeat mantêm a conexão viva
+    através de proxies.
+    """
+    try:
+        ultimo_id = int(ultimo_evento_id) if ultimo_evento_id else None
+    except ValueError:
+        ultimo_id = sys.maxsize  # ID inválido: força o reset
+    
+    filtro = set(status) if status else None
+    heartbeat = float(os.getenv("SSE_HEARTBEAT_SEGUNDOS", "15"))
+    
+    async def gerar() -> AsyncIterator[str]:
+        yield "retry: 3000\n: conectado\n\n"
+        async for evento in eventos_leads.assinar(ultimo_id, filtro, heartbeat):
+            if evento is None:
+                yield ": heartbeat\n\n"
+                continue
+            dados = json.dumps(evento.para_dict(), ensure_ascii=False, default=str)
+            yield f"id: {evento.id}\nevent: {evento.tipo}\ndata: {dados}\n\n"
+    
+    return StreamingResponse(
+        gerar(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Nginx: não segurar os eventos em buffer
+        }
+    )
+
+
 async def obter_estatisticas():
     """Obtém estatísticas do dashboard"""
     
-    if not supabase_service.is_connected():
+    if not lead_repository.is_connected():
         raise HTTPException(
             status_code=503,
             detail="Banco de dados não configurado"
         )
     
-    stats = await supabase_service.obter_dashboard_stats()
+    stats = await lead_repository.obter_dashboard_stats()
+    idade = lead_repository.idade_estatisticas("dashboard_stats")
     
     if not stats:
         return {
             "mensagem": "Nenhuma estatística disponível",
-            "stats": {}
+            "stats": {},
+            "cache_idade_segundos": _arredondar_idade(idade)
         }
     
-    return stats
+    return {**stats, "cache_idade_segundos": _arredondar_idade(idade)}
 
 
 async def obter_pipeline():
     """Obtém visão do funil de vendas"""
     
-    if not supabase_service.is_connected():
+    if not lead_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    pipeline = await lead_repository.obter_pipeline_vendas()
+    idade = lead_repository.idade_estatisticas("pipeline_vendas")
+    
+    return {
+        "pipeline": pipeline,
+        "cache_idade_segundos": _arredondar_idade(idade)
+    }
+
+
+async def obter_analise_funil(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    coorte: str = "mes"
+):
+    """Conversão por coorte, tempo em status e perdas por operadora/origem"""
+    
+    if not lead_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    if coorte not in ("mes", "semana"):
+        raise HTTPException(
+            status_code=400,
+            detail="Coorte inválida. Use: mes, semana"
+        )
+    
+    inicio = data_inicio.isoformat() if data_inicio else None
+    # data_fim é inclusiva: filtra até o início do dia seguinte
+    fim = (data_fim + timedelta(days=1)).isoformat() if data_fim else None
+    
+    analise = await analise_funil.obter(lead_repository, inicio, fim, coorte)
+    if analise is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Erro ao calcular a análise do funil"
+        )
+    
+    return {
+        **analise,
+        "cache_idade_segundos": _arredondar_idade(analise_funil.idade(inicio, fim, coorte))
+    }
+
+
+async def iniciar_reprecificacao():
+    """Dispara a reprecificação de todos os leads em background"""
+    
+    if not lead_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    if not job_reprecificacao.iniciar(lead_repository):
+        raise HTTPException(
+            status_code=409,
+            detail="Reprecificação já em andamento"
+        )
+    
+    return {
+        "mensagem": "Reprecificação iniciada",
+        "versao_tabelas": job_reprecificacao.servico.versao_tabelas()
+    }
+
+
+async def obter_progresso_reprecificacao():
+    """Progresso da reprecificação atual (ou da última)"""
+    
+    return job_reprecificacao.progresso()
+
+
+async def reconciliar_estatisticas():
+    """Confere os contadores do funil contra as views do banco"""
+    
+    if not lead_repository.is_connected():
         raise HTTPException(
             status_code=503,
             detail="Banco de dados não configurado"
         )
     
-    pipeline = await supabase_service.obter_pipeline_vendas()
+    return await lead_repository.reconciliar_contadores()
+
+
+async def obter_metricas_cache():
+    """Métricas dos caches de leads e de estatísticas"""
     
     return {
-        "pipeline": pipeline
+        **lead_repository.metricas_cache(),
+        "filtro_telefones": filtro_telefones.metricas(),
+        "eventos": eventos_leads.metricas()
     }
+
+
+def _arredondar_idade(idade: Optional[float]) -> Optional[float]:
+    """Idade do cache em segundos, com uma casa decimal"""
+    return round(idade, 1) if idade is not None else None
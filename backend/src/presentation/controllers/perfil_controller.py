@@ -0,0 +1,73 @@
+"""
+Controller para o perfilamento sob demanda (administração)
+"""
+import hmac
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from src.infrastructure.services.perfilador import PerfiladorOcupado, perfilador
+
+
+def _autorizar(token: Optional[str]):
+    """Perfilamento desligado parece rota inexistente; token errado é 401"""
+    
+    if not perfilador.habilitado:
+        raise HTTPException(status_code=404, detail="Perfilamento desabilitado")
+    
+    if not token or not hmac.compare_digest(token.encode(), perfilador.token.encode()):
+        raise HTTPException(status_code=401, detail="Token de perfilamento inválido")
+
+
+async def listar_perfis(token: Optional[str]):
+    """Perfis guardados, do mais recente ao mais antigo"""
+    
+    _autorizar(token)
+    return {"perfis": perfilador.resultados.listar()}
+
+
+async def obter_perfil(perfil_id: str, formato: str, token: Optional[str]):
+    """Relatório de um perfil (texto/folded ou o binário do cProfile)"""
+    
+    _autorizar(token)
+    
+    perfil = perfilador.resultados.obter(perfil_id)
+    if not perfil:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    
+    if perfil["status"] != "concluido":
+        raise HTTPException(status_code=409, detail="Perfil ainda em andamento")
+    
+    if formato == "prof":
+        if "binario" not in perfil:
+            raise HTTPException(status_code=400, detail="Formato prof só existe para perfis cprofile")
+        return Response(
+            perfil["binario"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.prof"'}
+        )
+    
+    return PlainTextResponse(perfil["texto"])
+
+
+async def iniciar_sessao(segundos: float, intervalo_ms: float, token: Optional[str]):
+    """Amostragem do processo inteiro por tempo limitado"""
+    
+    _autorizar(token)
+    
+    try:
+        perfil = perfilador.iniciar_sessao(segundos, intervalo_ms / 1000)
+    except PerfiladorOcupado as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {k: v for k, v in perfil.items() if k != "texto"}
+
+
+async def encerrar_sessao(token: Optional[str]):
+    """Interrompe a sessão de amostragem em andamento"""
+    
+    _autorizar(token)
+    
+    if not perfilador.encerrar_sessao():
+        raise HTTPException(status_code=404, detail="Nenhuma sessão em andamento")
+    return {"encerrada": True}
@@ -0,0 +1,30 @@
+"""
+Controller para o motor de regras de automação
+"""
+from fastapi import HTTPException
+from src.infrastructure.repositories.regra_repository import regra_repository
+from src.infrastructure.services.motor_regras import motor_regras
+
+
+async def recarregar_regras():
+    """Recompila as automações e regras de IA ativas"""
+    
+    if not regra_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    try:
+        return await motor_regras.carregar()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao carregar as regras: {e}"
+        )
+
+
+async def obter_metricas():
+    """Regras indexadas por evento, disparos e ações"""
+    
+    return motor_regras.metricas()
@@ -0,0 +1,31 @@
+"""
+Controller para o agendador de avisos de renovação
+"""
+from fastapi import HTTPException
+from src.infrastructure.repositories.renovacao_repository import renovacao_repository
+from src.infrastructure.services.agendador_renovacoes import agendador_renovacoes
+
+
+async def executar_tick(recarregar: bool = False):
+    """Roda um tick do agendador agora (além do periódico)"""
+    
+    if not renovacao_repository.is_connected():
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados não configurado"
+        )
+    
+    # O heap e o envio ficam no worker que segura TAREFAS_GLOBAIS_LOCK
+    if not agendador_renovacoes.neste_worker:
+        raise HTTPException(
+            status_code=409,
+            detail="Agendador de renovações em execução em outro worker"
+        )
+    
+    return await agendador_renovacoes.tick(recarregar=recarregar)
+
+
+async def obter_metricas():
+    """Totais de avisos e ofertas, tamanho do heap e o último tick"""
+    
+    return agendador_renovacoes.metricas()
@@ -0,0 +1,124 @@
+"""
+Middleware de controle de admissão
+Classifica a requisição (cara: extração de PDF; barata: o resto), aplica
+o limite de taxa do cliente e só chama a aplicação depois de conseguir
+uma vaga em src/infrastructure/services/admissao.py. Recusas respondem
+429/503 com Retry-After, no mesmo formato de erro do FastAPI.
+
+Health checks e /metrics passam direto: o balanceador e o Prometheus
+precisam deles justamente quando o worker está saturado.
+
+A vaga é devolvida quando a resposta começa (ou quando a aplicação
+termina sem responder): o corpo de respostas em stream, como o SSE de
+GET /api/v1/leads/stream e GET /api/v1/leads/export, pode levar minutos
+e não conta como requisição em andamento.
+"""
+import json
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.infrastructure.services.admissao import (
+    BARATA,
+    CARA,
+    AdmissaoRecusada,
+    BaldeTokens,
+    ControleAdmissao,
+    controle_admissao,
+    limites_por_cliente,
+)
+
+# (método, caminho) das rotas caras
+ROTAS_CARAS = frozenset({("POST", "/api/v1/pdf/extrair")})
+
+MENSAGENS = {
+    "taxa": "Limite de requisições excedido para este cliente",
+    "fila_cheia": "Servidor ocupado: fila de processamento cheia",
+    "prazo": "Servidor ocupado: tempo de espera esgotado",
+}
+
+
+def _isenta(caminho: str) -> bool:
+    return caminho == "/metrics" or caminho.endswith("/health")
+
+
+def _cliente(scope, confiar_proxy: bool) -> str:
+    """Identidade do cliente para o limite de taxa (IP; X-Forwarded-For atrás de proxy)"""
+    if confiar_proxy:
+        for nome, valor in scope["headers"]:
+            if nome == b"x-forwarded-for":
+                return valor.decode("latin-1").split(",")[0].strip()
+    cliente = scope.get("client")
+    return cliente[0] if cliente else "desconhecido"
+
+
+async def _responder_recusa(send, recusa: AdmissaoRecusada):
+    corpo = json.dumps({"detail": MENSAGENS.get(recusa.motivo, str(recusa))}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": recusa.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode()),
+            (b"retry-after", str(recusa.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": corpo})
+
+
+class AdmissaoMiddleware:
+    """Admissão priorizada por classe de rota e limite de taxa por cliente"""
+
+    def __init__(
+        self,
+        app,
+        controle: ControleAdmissao = None,
+        limites: Optional[Dict[str, BaldeTokens]] = None,
+        rotas_caras: Iterable[Tuple[str, str]] = ROTAS_CARAS,
+        confiar_proxy: bool = False
+    ):
+        self.app = app
+        self.controle = controle or controle_admissao
+        self.limites = limites_por_cliente if limites is None else limites
+        self.rotas_caras = frozenset(rotas_caras)
+        self.confiar_proxy = confiar_proxy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _isenta(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        classe = CARA if (scope["method"], scope["path"]) in self.rotas_caras else BARATA
+        limite = self.limites.get(classe)
+        if limite is not None:
+            espera = limite.consumir(_cliente(scope, self.confiar_proxy))
+            if espera:
+                recusa = self.controle.recusar(classe, "taxa", 429, max(1, int(espera + 0.999)))
+                await _responder_recusa(send, recusa)
+                return
+
+        try:
+            await self.controle.adquirir(classe)
+        except AdmissaoRecusada as recusa:
+            await _responder_recusa(send, recusa)
+            return
+
+        inicio = time.perf_counter()
+        liberada = False
+
+        def liberar():
+            nonlocal liberada
+            if not liberada:
+                liberada = True
+                self.controle.liberar(classe, time.perf_counter() - inicio)
+
+        async def enviar(mensagem):
+            # A vaga cobre o processamento até o início da resposta: streams
+            # longos (SSE de leads, exportação) não a seguram enquanto duram
+            if mensagem["type"] == "http.response.start":
+                liberar()
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            liberar()
@@ -0,0 +1,143 @@
+"""
+Middleware de idempotência
+POSTs com o cabeçalho Idempotency-Key são executados uma vez por chave
+(src/infrastructure/services/idempotencia.py): a repetição recebe o
+mesmo status e corpo da primeira execução, com Idempotency-Replayed:
+true. A chave vale por método + rota; a mesma chave com outro corpo é
+erro do cliente (422). Sem o cabeçalho nada muda.
+
+Fica fora do controle de admissão: repetições respondidas do armazém
+não ocupam vaga nem consomem o limite de taxa do cliente.
+"""
+import hashlib
+import json
+from typing import Iterable, List, Optional
+
+from src.infrastructure.services.idempotencia import (
+    CONFLITO,
+    EM_ANDAMENTO,
+    REPETIDA,
+    Idempotencia,
+    RespostaGuardada,
+    idempotencia as idempotencia_padrao,
+)
+
+CABECALHO = b"idempotency-key"
+TAMANHO_MAXIMO_CHAVE = 255
+
+MENSAGENS = {
+    CONFLITO: "Idempotency-Key já usada com outra requisição",
+    EM_ANDAMENTO: "Requisição com esta Idempotency-Key ainda em processamento",
+}
+
+
+def _cabecalho(scope, nome: bytes) -> Optional[str]:
+    for chave, valor in scope["headers"]:
+        if chave == nome:
+            return valor.decode("latin-1")
+    return None
+
+
+def _impressao(scope, corpo: bytes) -> str:
+    """Hash da requisição; o boundary do multipart muda a cada envio e não entra"""
+    tipo = _cabecalho(scope, b"content-type") or ""
+    if tipo.startswith("multipart/"):
+        for parametro in tipo.split(";")[1:]:
+            nome, _, valor = parametro.strip().partition("=")
+            if nome == "boundary" and valor:
+                corpo = corpo.replace(valor.strip('"').encode("latin-1"), b"")
+    resumo = hashlib.sha256()
+    resumo.update(f"{scope['method']} {scope['path']}?".encode())
+    resumo.update(scope.get("query_string", b""))
+    resumo.update(b"\n")
+    resumo.update(corpo)
+    return resumo.hexdigest()
+
+
+async def _ler_corpo(receive) -> Optional[bytes]:
+    """Corpo inteiro da requisição (None se o cliente desconectou)"""
+    partes: List[bytes] = []
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "http.disconnect":
+            return None
+        partes.append(mensagem.get("body", b""))
+        if not mensagem.get("more_body", False):
+            return b"".join(partes)
+
+
+async def _responder(send, resposta: RespostaGuardada, repetida: bool = False):
+    cabecalhos = [(nome.encode("latin-1"), valor.encode("latin-1")) for nome, valor in resposta.cabecalhos]
+    if repetida:
+        cabecalhos.append((b"idempotency-replayed", b"true"))
+    await send({"type": "http.response.start", "status": resposta.status, "headers": cabecalhos})
+    await send({"type": "http.response.body", "body": resposta.corpo})
+
+
+def _erro(status: int, mensagem: str, retry_after: Optional[int] = None) -> RespostaGuardada:
+    corpo = json.dumps({"detail": mensagem}, ensure_ascii=False).encode()
+    cabecalhos = [("content-type", "application/json"), ("content-length", str(len(corpo)))]
+    if retry_after is not None:
+        cabecalhos.append(("retry-after", str(retry_after)))
+    return RespostaGuardada(status, cabecalhos, corpo)
+
+
+class IdempotenciaMiddleware:
+    """Primeira resposta por Idempotency-Key guardada e repetida para as duplicatas"""
+
+    def __init__(self, app, idempotencia: Idempotencia = None, metodos: Iterable[str] = ("POST",)):
+        self.app = app
+        self.idempotencia = idempotencia or idempotencia_padrao
+        self.metodos = frozenset(metodos)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.metodos:
+            await self.app(scope, receive, send)
+            return
+        chave = _cabecalho(scope, CABECALHO)
+        if chave is None:
+            await self.app(scope, receive, send)
+            return
+
+        chave = chave.strip()
+        if not chave or len(chave) > TAMANHO_MAXIMO_CHAVE:
+            await _responder(send, _erro(400, f"Idempotency-Key deve ter de 1 a {TAMANHO_MAXIMO_CHAVE} caracteres"))
+            return
+
+        corpo = await _ler_corpo(receive)
+        if corpo is None:
+            return
+
+        async def produzir() -> RespostaGuardada:
+            entregue = False
+
+            async def receive_guardado():
+                nonlocal entregue
+                if not entregue:
+                    entregue = True
+                    return {"type": "http.request", "body": corpo, "more_body": False}
+                return await receive()
+
+            inicio = {}
+            partes: List[bytes] = []
+
+            async def send_capturado(mensagem):
+                if mensagem["type"] == "http.response.start":
+                    inicio.update(mensagem)
+                elif mensagem["type"] == "http.response.body":
+                    partes.append(mensagem.get("body", b""))
+
+            await self.app(scope, receive_guardado, send_capturado)
+            cabecalhos = [
+                (nome.decode("latin-1"), valor.decode("latin-1")) for nome, valor in inicio.get("headers", [])
+            ]
+            return RespostaGuardada(inicio.get("status", 500), cabecalhos, b"".join(partes))
+
+        resultado, resposta = await self.idempotencia.executar(
+            f"{scope['method']} {scope['path']} {chave}", _impressao(scope, corpo), produzir
+        )
+        if resultado == CONFLITO:
+            resposta = _erro(422, MENSAGENS[CONFLITO])
+        elif resultado == EM_ANDAMENTO:
+            resposta = _erro(409, MENSAGENS[EM_ANDAMENTO], retry_after=1)
+        await _responder(send, resposta, repetida=resultado == REPETIDA)
@@ -0,0 +1,87 @@
+"""
+Middleware de métricas HTTP
+Latência, requisições em andamento e contagem por status de cada rota,
+rotuladas pelo template da rota ("/api/v1/leads/{lead_id}") e não pela
+URL, para a cardinalidade não crescer com os ids.
+
+ASGI puro (sem BaseHTTPMiddleware): por requisição são dois
+perf_counter, um dict de escopos ativos e duas atualizações de métricas.
+"""
+import time
+from typing import Dict, Tuple
+
+from src.infrastructure.services.metricas import RegistroMetricas, metricas as registro_padrao
+
+# Requisições que não casaram com nenhuma rota (404, 405 de rota inexistente)
+SEM_ROTA = "<sem_rota>"
+
+
+def _rota(scope) -> str:
+    """Template completo da rota que atendeu a requisição"""
+    # FastAPI mais recente não achata os routers incluídos: route.path vem
+    # sem o prefixo e o template completo fica no contexto efetivo da rota
+    contexto = (scope.get("fastapi") or {}).get("effective_route_context")
+    caminho = getattr(contexto, "path_format", None)
+    if caminho:
+        return caminho
+    return getattr(scope.get("route"), "path", None) or SEM_ROTA
+
+
+class MetricasHTTPMiddleware:
+    """Métricas por método e template de rota das requisições HTTP"""
+
+    def __init__(self, app, registro: RegistroMetricas = None):
+        self.app = app
+        registro = registro or registro_padrao
+        self.duracao = registro.histograma(
+            "http_request_duration_seconds",
+            "Latência das requisições HTTP por rota",
+            ("method", "route")
+        )
+        self.requisicoes = registro.contador(
+            "http_requests_total",
+            "Requisições HTTP por rota e status",
+            ("method", "route", "status")
+        )
+        # Escopos das requisições em andamento; o template só é conhecido
+        # depois do roteamento, então o gauge é agrupado na coleta
+        self._ativos: Dict[int, dict] = {}
+        gauge = registro.gauge(
+            "http_requests_in_progress",
+            "Requisições HTTP em andamento por rota",
+            ("method", "route"),
+            self._em_andamento
+        )
+        # A pilha de middlewares pode ser remontada: vale a instância mais nova
+        gauge.coletar = self._em_andamento
+
+    def _em_andamento(self) -> Dict[Tuple[str, str], float]:
+        grupos: Dict[Tuple[str, str], float] = {}
+        for scope in list(self._ativos.values()):
+            chave = (scope["method"], _rota(scope))
+            grupos[chave] = grupos.get(chave, 0) + 1
+        return grupos
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            await send(mensagem)
+
+        chave = id(scope)
+        self._ativos[chave] = scope
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            del self._ativos[chave]
+            metodo, rota = scope["method"], _rota(scope)
+            self.duracao.observar(duracao, metodo, rota)
+            self.requisicoes.incrementar(metodo, rota, str(status[0]))
@@ -0,0 +1,84 @@
+"""
+Middleware de perfilamento sob demanda
+Com o token de administrador, uma requisição pode pedir o próprio perfil:
+
+    X-Perfil: cprofile | amostragem | memoria
+    X-Perfil-Token: <PERFILAMENTO_TOKEN>
+
+O modo também pode vir da URL (?perfil=...), mas o token só é aceito
+no cabeçalho: na query string ele acabaria em logs de acesso, histórico
+e Referer. A resposta volta normalmente, com o id do perfil em
+X-Perfil-Id; o relatório fica em GET /api/v1/debug/perfis/{id}.
+
+Só é montado em main.py quando PERFILAMENTO_TOKEN está definido; sem
+pedido de perfil o custo é uma varredura dos cabeçalhos.
+"""
+import hmac
+import logging
+from urllib.parse import parse_qs
+
+from src.infrastructure.services.perfilador import MODOS, Perfilador, perfilador as perfilador_padrao
+
+logger = logging.getLogger(__name__)
+
+
+def _pedido(scope):
+    """(modo, token): modo pelo cabeçalho ou pela query string, token só pelo cabeçalho"""
+    modo = token = None
+    for nome, valor in scope["headers"]:
+        if nome == b"x-perfil":
+            modo = valor.decode("latin-1").strip().lower()
+        elif nome == b"x-perfil-token":
+            token = valor.decode("latin-1").strip()
+
+    query = scope.get("query_string") or b""
+    if modo is None and b"perfil=" in query:
+        parametros = parse_qs(query.decode("latin-1"))
+        modo = (parametros.get("perfil") or [""])[0].strip().lower() or None
+    return modo, token
+
+
+class PerfilamentoMiddleware:
+    """Perfil da requisição quando pedido com o token de administrador"""
+
+    def __init__(self, app, perfilador: Perfilador = None):
+        self.app = app
+        self.perfilador = perfilador or perfilador_padrao
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.perfilador.habilitado:
+            await self.app(scope, receive, send)
+            return
+
+        modo, token = _pedido(scope)
+        if modo is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not token or not hmac.compare_digest(token.encode(), self.perfilador.token.encode()):
+            logger.warning(f"⚠️ Pedido de perfil com token inválido em {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        def enviar_com(cabecalho: bytes, valor: str):
+            async def enviar(mensagem):
+                if mensagem["type"] == "http.response.start":
+                    mensagem = {
+                        **mensagem,
+                        "headers": list(mensagem.get("headers", [])) + [(cabecalho, valor.encode())]
+                    }
+                await send(mensagem)
+            return enviar
+
+        # Perfil não capturado: a requisição segue normalmente
+        if modo not in MODOS:
+            await self.app(scope, receive, enviar_com(b"x-perfil-erro", f"modo desconhecido: {modo}"))
+            return
+        if self.perfilador.ocupado:
+            await self.app(scope, receive, enviar_com(b"x-perfil-erro", "outra captura em andamento"))
+            return
+
+        async def executar(perfil):
+            await self.app(scope, receive, enviar_com(b"x-perfil-id", perfil["id"]))
+
+        await self.perfilador.perfilar(modo, executar, rota=f"{scope['method']} {scope['path']}")
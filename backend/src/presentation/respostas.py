@@ -0,0 +1,201 @@
+"""
+Respostas cacheáveis
+Endpoints de catálogo (operadoras, informações da API, catálogo de
+planos) mudam só quando a versão dos dados muda. Para cada recurso o
+corpo JSON é montado uma vez por versão, já comprimido em gzip e brotli
+(quando o pacote brotli está instalado), e servido com ETag forte e
+Cache-Control; um If-None-Match que casa responde 304 sem corpo.
+
+A ETag deriva da versão informada pelo endpoint (ex.: versão das
+tabelas de preços) e do conteúdo, e cada codificação tem a sua (RFC 9110:
+validadores fortes diferem entre representações).
+"""
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+
+from ..infrastructure.services.metricas import metricas
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+# Ordem de preferência quando o cliente aceita várias com o mesmo peso
+CODIFICACOES = ("br", "gzip")
+
+RESPOSTAS_CATALOGO = metricas.contador(
+    "catalogo_respostas_total",
+    "Respostas dos endpoints de catálogo por resultado (200/304) e codificação",
+    ("recurso", "resultado", "codificacao")
+)
+BYTES_CATALOGO = metricas.contador(
+    "catalogo_bytes_enviados_total",
+    "Bytes de corpo enviados pelos endpoints de catálogo",
+    ("recurso",)
+)
+
+
+@dataclass
+class Representacao:
+    """Corpo de um recurso numa versão, em cada codificação disponível"""
+    versao: str
+    etag_base: str
+    corpos: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag(self, codificacao: str) -> str:
+        if codificacao == "identity":
+            return f'"{self.etag_base}"'
+        return f'"{self.etag_base}-{codificacao}"'
+
+    @property
+    def etags(self) -> List[str]:
+        return [self.etag(c) for c in self.corpos]
+
+
+def _pesos_codificacao(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding → {codificação: q}; identity é aceita salvo q=0 explícito"""
+    pesos: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        partes = item.strip().split(";")
+        nome = partes[0].strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in partes[1:]:
+            chave, _, valor = parametro.strip().partition("=")
+            if chave.strip() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        pesos[nome] = q
+    return pesos
+
+
+def escolher_codificacao(accept_encoding: Optional[str], disponiveis) -> str:
+    """Melhor codificação disponível para o Accept-Encoding do cliente"""
+    if not accept_encoding:
+        return "identity"
+    pesos = _pesos_codificacao(accept_encoding)
+    curinga = pesos.get("*", 0.0)
+    melhor, melhor_q = "identity", 0.0
+    for codificacao in CODIFICACOES:
+        if codificacao not in disponiveis:
+            continue
+        q = pesos.get(codificacao, curinga)
+        if q > melhor_q:
+            melhor, melhor_q = codificacao, q
+    return melhor
+
+
+def _casa_if_none_match(cabecalho: str, etags: List[str]) -> bool:
+    """Comparação fraca do If-None-Match (W/ ignorado), como pede a RFC"""
+    if cabecalho.strip() == "*":
+        return True
+    pedidas = {e.strip().removeprefix("W/") for e in cabecalho.split(",")}
+    return any(etag in pedidas for etag in etags)
+
+
+class CacheRepresentacoes:
+    """Representações prontas por recurso, trocadas quando a versão muda"""
+
+    def __init__(
+        self,
+        max_age: int = 300,
+        stale_while_revalidate: int = 3600,
+        nivel_gzip: int = 9,
+        qualidade_brotli: int = 11
+    ):
+        """
+        Args:
+            max_age: Segundos em que o cliente/CDN usa a cópia sem revalidar
+            stale_while_revalidate: Segundos extras servindo a cópia antiga
+                enquanto revalida em segundo plano
+            nivel_gzip: Compressão gzip (feita uma vez por versão: usa o máximo)
+            qualidade_brotli: Compressão brotli (idem)
+        """
+        self.cache_control = f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+        self.nivel_gzip = nivel_gzip
+        self.qualidade_brotli = qualidade_brotli
+        self._representacoes: Dict[str, Representacao] = {}
+
+    def _montar(self, versao: str, conteudo: Any) -> Representacao:
+        # Mesma serialização do JSONResponse do FastAPI, sem espaços
+        corpo = json.dumps(
+            jsonable_encoder(conteudo), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        hash_corpo = hashlib.sha256(corpo).hexdigest()[:12]
+        representacao = Representacao(versao, f"{versao}-{hash_corpo}", {"identity": corpo})
+
+        # Corpos pequenos podem crescer comprimidos: só guarda o que ganha
+        comprimidos = {"gzip": gzip.compress(corpo, compresslevel=self.nivel_gzip, mtime=0)}
+        if brotli is not None:
+            comprimidos["br"] = brotli.compress(corpo, quality=self.qualidade_brotli)
+        for codificacao, comprimido in comprimidos.items():
+            if len(comprimido) < len(corpo):
+                representacao.corpos[codificacao] = comprimido
+        return representacao
+
+    async def obter(
+        self,
+        recurso: str,
+        versao: str,
+        montar: Callable[[], Awaitable[Any]]
+    ) -> Representacao:
+        """Representação do recurso na versão pedida, montada só se mudou"""
+        representacao = self._representacoes.get(recurso)
+        if representacao is None or representacao.versao != versao:
+            representacao = self._montar(versao, await montar())
+            self._representacoes[recurso] = representacao
+        return representacao
+
+    async def responder(
+        self,
+        request: Request,
+        recurso: str,
+        versao: str,
+        montar: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """
+        Resposta condicional do recurso
+
+        Args:
+            request: Requisição (If-None-Match, Accept-Encoding)
+            recurso: Nome do recurso (chave do cache e rótulo das métricas)
+            versao: Versão dos dados; ao mudar, o corpo é remontado
+            montar: Corrotina que devolve o conteúdo (chamada uma vez por versão)
+        """
+        representacao = await self.obter(recurso, versao, montar)
+        codificacao = escolher_codificacao(request.headers.get("accept-encoding"), representacao.corpos)
+        cabecalhos = {
+            "ETag": representacao.etag(codificacao),
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _casa_if_none_match(if_none_match, representacao.etags):
+            RESPOSTAS_CATALOGO.incrementar(recurso, "304", codificacao)
+            return Response(status_code=304, headers=cabecalhos)
+
+        corpo = representacao.corpos[codificacao]
+        if codificacao != "identity":
+            cabecalhos["Content-Encoding"] = codificacao
+        RESPOSTAS_CATALOGO.incrementar(recurso, "200", codificacao)
+        BYTES_CATALOGO.incrementar(recurso, quantidade=len(corpo))
+        return Response(corpo, media_type="application/json", headers=cabecalhos)
+
+
+# Cache global das respostas de catálogo
+representacoes = CacheRepresentacoes(
+    max_age=int(os.getenv("CATALOGO_MAX_AGE", "300")),
+    stale_while_revalidate=int(os.getenv("CATALOGO_STALE_WHILE_REVALIDATE", "3600"))
+)
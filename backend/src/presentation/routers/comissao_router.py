@@ -0,0 +1,37 @@
+"""
+Router para o processamento de comissões dos corretores
+"""
+
+from fastapi import APIRouter, Query
+from src.presentation.controllers import comissao_controller
+
+router = APIRouter(
+    prefix="/api/v1/comissoes",
+    tags=["Comissões"]
+)
+
+
+@router.post("/processar", summary="Processar Comissões do Mês", status_code=202)
+async def processar_comissoes(
+    mes: str = Query(..., description="Mês de referência (AAAA-MM) pela data de vigência")
+):
+    """
+    Calcula as comissões das produções implantadas com vigência no mês
+    
+    - Aplica a grade de parcelas da modalidade e o percentual padrão do corretor
+    - Grava as parcelas em `parcelas_comissao` e um relatório por corretor em `relatorios_comissao`
+    - Roda em segundo plano: acompanhe em `GET /api/v1/comissoes/processar`
+    
+    Reprocessar o mesmo mês substitui as parcelas pendentes e os
+    relatórios não pagos; o que já foi pago é preservado.
+    """
+    return await comissao_controller.processar_mes(mes)
+
+
+@router.get("/processar", summary="Progresso do Processamento")
+async def obter_progresso_comissoes():
+    """
+    Estado do processamento: etapa (leitura, calculo, gravacao), produções
+    lidas, parcelas geradas, corretores e tempo de cada etapa
+    """
+    return await comissao_controller.obter_progresso()
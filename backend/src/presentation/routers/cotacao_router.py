@@ -2,8 +2,9 @@
 Router de Cotação
 Define as rotas da API relacionadas a cotações
 """
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Request, status
 from ..controllers.cotacao_controller import CotacaoController
+from ..respostas import representacoes
 from ...application.dtos.cotacao_dto import CotacaoInputDTO, CotacaoOutputDTO
 
 # Criar router
@@ -50,13 +51,23 @@ async def calcular_cotacao(input_dto: CotacaoInputDTO):
     "/operadoras",
     status_code=status.HTTP_200_OK,
     summary="Listar Operadoras Disponíveis",
-    description="Retorna a lista de operadoras disponíveis para cotação"
+    description="""
+    Retorna a lista de operadoras disponíveis para cotação.
+    
+    Resposta com ETag (versão das tabelas de preços) e Cache-Control:
+    envie If-None-Match para receber 304 quando nada mudou.
+    """
 )
-async def listar_operadoras():
+async def listar_operadoras(request: Request):
     """
     Endpoint GET /cotacao/operadoras
     """
-    return await cotacao_controller.listar_operadoras()
+    return await representacoes.responder(
+        request,
+        "operadoras",
+        cotacao_controller.versao_catalogo(),
+        cotacao_controller.listar_operadoras
+    )
 
 
 @router.get(
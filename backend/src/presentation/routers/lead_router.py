@@ -2,9 +2,10 @@
 Router para gerenciar leads
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from datetime import date
 from src.presentation.controllers import lead_controller
 
 router = APIRouter(
@@ -84,11 +85,16 @@ async def criar_lead(lead: CriarLeadRequest):
 async def listar_leads(
     status: Optional[str] = Query(None, description="Filtrar por status"),
     limite: int = Query(50, ge=1, le=100, description="Número de resultados"),
-    offset: int = Query(0, ge=0, description="Offset para paginação")
+    offset: int = Query(0, ge=0, description="Offset para paginação"),
+    ordenar: str = Query("recentes", description="recentes ou score (maior prioridade primeiro)")
 ):
     """
     Lista leads com filtros opcionais
     
+    Com `ordenar=score`, os leads vêm pela nota de prioridade (0-100),
+    calculada a partir da economia, família, operadora atual, tempo
+    desde a última atividade e etapa do funil.
+    
     **Status válidos:**
     - novo
     - contatado
@@ -101,10 +107,98 @@ async def listar_leads(
     return await lead_controller.listar_todos_leads(
         status=status,
         limite=limite,
-        offset=offset
+        offset=offset,
+        ordenar=ordenar
+    )
+
+
+@router.get("/search", summary="Buscar Leads")
+async def pesquisar_leads(
+    q: str = Query(..., min_length=3, max_length=100, description="Nome, e-mail ou parte do telefone"),
+    limite: int = Query(20, ge=1, le=50, description="Número de resultados")
+):
+    """
+    Busca leads por fragmento de nome, e-mail ou telefone
+    
+    Resultados ranqueados por relevância, com colunas enxutas
+    (sem `dados_pdf` e `historico`).
+    
+    **Exemplos:** `?q=silva`, `?q=99887`, `?q=@empresa.com`
+    """
+    return await lead_controller.pesquisar_leads(termo=q, limite=limite)
+
+
+@router.get("/export", summary="Exportar Leads")
+async def exportar_leads(
+    formato: str = Query("csv", description="Formato do arquivo: csv ou ndjson"),
+    status: Optional[str] = Query(None, description="Filtrar por status"),
+    data_inicio: Optional[date] = Query(None, description="Criados a partir de (AAAA-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Criados até (AAAA-MM-DD, inclusive)")
+):
+    """
+    Exporta toda a base de leads em streaming
+
+    O arquivo é gerado página a página (cursor por `created_at`/`id`),
+    sem limite de quantidade e com memória constante no servidor.
+
+    **Exemplo:** `GET /api/v1/leads/export?formato=ndjson&status=ganho&data_inicio=2026-01-01`
+    """
+    return await lead_controller.exportar_leads(
+        formato=formato,
+        status=status,
+        data_inicio=data_inicio,
+        data_fim=data_fim
     )
 
 
+@router.get("/stream", summary="Stream de Eventos de Leads")
+async def stream_eventos_leads(
+    status: Optional[List[str]] = Query(None, description="Receber só eventos destes status (repetível)"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    ultimo_id: Optional[str] = Query(None, description="Alternativa ao header Last-Event-ID")
+):
+    """
+    Server-Sent Events com as mudanças nos leads, para dashboards ao vivo
+    
+    Eventos: `lead_criado`, `lead_status`, `lead_arquivado` e `reset`
+    (quando não é possível retomar do Last-Event-ID: recarregue os dados).
+    O filtro de status considera o status novo e o anterior, então um
+    painel de "novo" também recebe os leads que saíram de "novo".
+    
+    **Exemplo (JavaScript):**
+    ```js
+    const fonte = new EventSource("/api/v1/leads/stream?status=novo&status=contatado");
+    fonte.addEventListener("lead_criado", (e) => console.log(JSON.parse(e.data)));
+    ```
+    """
+    return await lead_controller.stream_eventos(
+        status=status,
+        ultimo_evento_id=last_event_id or ultimo_id
+    )
+
+
+@router.post("/reprecificacao", summary="Reprecificar Leads", status_code=202)
+async def iniciar_reprecificacao():
+    """
+    Recalcula a economia estimada de todos os leads com as tabelas de preços atuais
+    
+    Roda em segundo plano, em lotes, gravando só os leads cuja economia
+    mudou. Se for interrompida, a próxima chamada retoma do último lote
+    concluído (desde que as tabelas de preços não tenham mudado).
+    Acompanhe em `GET /api/v1/leads/reprecificacao`.
+    """
+    return await lead_controller.iniciar_reprecificacao()
+
+
+@router.get("/reprecificacao", summary="Progresso da Reprecificação")
+async def obter_progresso_reprecificacao():
+    """
+    Estado da reprecificação: processados, atualizados, ignorados
+    (sem valor atual ou idades) e vazão em leads/s
+    """
+    return await lead_controller.obter_progresso_reprecificacao()
+
+
 @router.get("/{lead_id}", summary="Buscar Lead por ID")
 async def buscar_lead_por_id(lead_id: str):
     """Busca um lead específico pelo ID"""
@@ -131,6 +225,12 @@ async def atualizar_status_lead(lead_id: str, request: AtualizarStatusRequest):
     )
 
 
+@router.delete("/{lead_id}", summary="Arquivar Lead")
+async def arquivar_lead(lead_id: str):
+    """Arquiva um lead (idempotente); o registro é mantido no banco"""
+    return await lead_controller.arquivar(lead_id)
+
+
 @router.get("/estatisticas/dashboard", summary="Estatísticas do Dashboard")
 async def obter_estatisticas_dashboard():
     """
@@ -142,6 +242,9 @@ async def obter_estatisticas_dashboard():
     - Economia total e média
     - Taxa de conversão
     - E mais...
+    
+    Os valores vêm de um cache em memória; `cache_idade_segundos`
+    indica há quanto tempo foram calculados.
     """
     return await lead_controller.obter_estatisticas()
 
@@ -155,5 +258,52 @@ async def obter_pipeline_vendas():
     - Quantidade de leads por status
     - Valor total por status
     - Percentual do funil
+    - Idade do cache (`cache_idade_segundos`)
     """
     return await lead_controller.obter_pipeline()
+
+
+@router.get("/estatisticas/analise", summary="Análise do Funil")
+async def obter_analise_funil(
+    data_inicio: Optional[date] = Query(None, description="Leads criados a partir de (AAAA-MM-DD)"),
+    data_fim: Optional[date] = Query(None, description="Leads criados até (AAAA-MM-DD, inclusive)"),
+    coorte: str = Query("mes", description="Agrupamento das coortes: mes ou semana")
+):
+    """
+    Análise do funil a partir do histórico de status dos leads
+    
+    - **coortes**: leads criados por mês/semana, ganhos, perdidos e taxa de conversão
+    - **tempo_em_status**: mediana e p90 (horas) de permanência em cada status
+    - **em_aberto**: leads em cada status hoje e há quanto tempo estão nele
+    - **funil_por_operadora** / **funil_por_origem**: quantos chegaram a cada etapa e a perda entre etapas
+    
+    Calculada num processo separado e mantida em cache por período.
+    """
+    return await lead_controller.obter_analise_funil(
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        coorte=coorte
+    )
+
+
+@router.get("/estatisticas/cache", summary="Métricas de Cache")
+async def obter_metricas_cache():
+    """
+    Métricas dos caches em memória
+    
+    **Retorna:**
+    - Cache de leads: capacidade, tamanho, hits, misses e hit ratio
+    - Estatísticas: fonte (contadores ou cache) e TTLs
+    """
+    return await lead_controller.obter_metricas_cache()
+
+
+@router.post("/estatisticas/reconciliar", summary="Reconciliar Contadores do Funil")
+async def reconciliar_estatisticas():
+    """
+    Confere os contadores em memória contra a view `pipeline_vendas`
+    
+    Se houver divergência, os contadores são reconstruídos a partir
+    da tabela. A mesma conferência roda periodicamente em segundo plano.
+    """
+    return await lead_controller.reconciliar_estatisticas()
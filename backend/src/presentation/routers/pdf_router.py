@@ -3,7 +3,7 @@ Router para processamento de PDFs
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException, status
 from ...application.dtos.pdf_dto import PDFExtraidoDTO
-from ...infrastructure.services.ai_service import ai_service
+from ...infrastructure.container import container
 
 # Criar router
 router = APIRouter(
@@ -52,6 +52,15 @@ async def extrair_dados_pdf(
             detail="Arquivo muito grande. Máximo: 10MB"
         )
     
+    # Serviço de IA criado no primeiro uso (ou no aquecimento do lifespan)
+    try:
+        ai_service = container.ai_service
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Serviço de IA indisponível: {str(e)}"
+        )
+    
     try:
         # Processar PDF com IA
         dados_extraidos = await ai_service.processar_pdf_completo(content)
@@ -0,0 +1,64 @@
+"""
+Router para o perfilamento sob demanda (exige X-Perfil-Token)
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query
+from src.presentation.controllers import perfil_controller
+
+router = APIRouter(
+    prefix="/api/v1/debug/perfis",
+    tags=["Perfilamento"]
+)
+
+
+@router.get("/", summary="Listar Perfis")
+async def listar_perfis(x_perfil_token: Optional[str] = Header(None)):
+    """
+    Perfis capturados (requisições e sessões), do mais recente ao mais antigo
+    
+    Para perfilar uma requisição, envie nela `X-Perfil: cprofile`,
+    `amostragem` ou `memoria` (tracemalloc, pensado para /api/v1/pdf/extrair)
+    junto com `X-Perfil-Token`; o id volta no cabeçalho `X-Perfil-Id`.
+    """
+    return await perfil_controller.listar_perfis(x_perfil_token)
+
+
+@router.post("/sessao", summary="Iniciar Sessão de Amostragem")
+async def iniciar_sessao(
+    segundos: float = Query(30, gt=0, le=300, description="Duração da sessão"),
+    intervalo_ms: float = Query(5, ge=1, le=1000, description="Intervalo entre amostras"),
+    x_perfil_token: Optional[str] = Header(None)
+):
+    """
+    Amostra as pilhas de todas as threads do processo pelo tempo pedido;
+    o resultado sai no formato folded (flamegraph.pl, speedscope, inferno)
+    em GET /api/v1/debug/perfis/{id}
+    
+    Com vários workers, a sessão amostra o worker que recebeu este POST
+    e o DELETE só a encerra se cair no mesmo worker (senão ela termina
+    sozinha ao fim de `segundos`); o resultado aparece em qualquer worker
+    (PERFILAMENTO_DIR).
+    """
+    return await perfil_controller.iniciar_sessao(segundos, intervalo_ms, x_perfil_token)
+
+
+@router.delete("/sessao", summary="Encerrar Sessão de Amostragem")
+async def encerrar_sessao(x_perfil_token: Optional[str] = Header(None)):
+    """Interrompe a sessão em andamento, guardando o que já foi amostrado"""
+    return await perfil_controller.encerrar_sessao(x_perfil_token)
+
+
+@router.get("/{perfil_id}", summary="Obter Perfil")
+async def obter_perfil(
+    perfil_id: str,
+    formato: str = Query("texto", pattern="^(texto|prof)$"),
+    x_perfil_token: Optional[str] = Header(None)
+):
+    """
+    Relatório do perfil: estatísticas do cProfile, pilhas folded da
+    amostragem ou diferenças de alocação do tracemalloc.
+    `formato=prof` devolve o arquivo do cProfile (snakeviz, pstats).
+    """
+    return await perfil_controller.obter_perfil(perfil_id, formato, x_perfil_token)
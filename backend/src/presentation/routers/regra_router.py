@@ -0,0 +1,34 @@
+"""
+Router para o motor de regras de automação (automacoes e regras_ia)
+"""
+
+from fastapi import APIRouter
+from src.presentation.controllers import regra_controller
+
+router = APIRouter(
+    prefix="/api/v1/regras",
+    tags=["Regras de Automação"]
+)
+
+
+@router.post("/recarregar", summary="Recarregar Regras")
+async def recarregar_regras():
+    """
+    Recompila agora as automações e regras de IA ativas (além da recarga periódica)
+    
+    Gatilhos reconhecidos: "Novo lead cadastrado", "Lead marcado como perdido",
+    "Lead marcado como ganho", "Lead arquivado", os nomes dos eventos
+    (`lead_criado`, `lead_status`, `lead_arquivado`) ou condições sobre o lead
+    como `status == 'novo' and valor_atual > 1000` (`Lead status = novo` também vale).
+    `metadata.evento` e `metadata.condicao` refinam qualquer regra.
+    """
+    return await regra_controller.recarregar_regras()
+
+
+@router.get("/motor", summary="Métricas do Motor de Regras")
+async def obter_metricas_motor():
+    """
+    Regras indexadas por evento, regras sem evento de lead compatível,
+    eventos avaliados, disparos e ações executadas/descartadas
+    """
+    return await regra_controller.obter_metricas()
@@ -0,0 +1,36 @@
+"""
+Router para o agendador de avisos de renovação
+"""
+
+from fastapi import APIRouter, Query
+from src.presentation.controllers import renovacao_controller
+
+router = APIRouter(
+    prefix="/api/v1/renovacoes",
+    tags=["Renovações"]
+)
+
+
+@router.post("/agendador/tick", summary="Executar Tick do Agendador")
+async def executar_tick_agendador(
+    recarregar: bool = Query(False, description="Recarrega do banco toda a janela de 60 dias")
+):
+    """
+    Envia agora os avisos de renovação devidos
+    
+    - Aviso de 60 dias e de 30 dias antes de `data_vencimento`
+    - Cada aviso grava em `metadata.oferta_renovacao` a melhor operadora
+      das tabelas atuais para as idades do contrato e a economia sobre o `valor_atual`
+    - Marca `notificacao_60d`/`notificacao_30d` em lote; avisos já marcados não são reenviados
+    - Com vários workers, só o que segura `TAREFAS_GLOBAIS_LOCK` executa (409 nos outros)
+    """
+    return await renovacao_controller.executar_tick(recarregar)
+
+
+@router.get("/agendador", summary="Métricas do Agendador")
+async def obter_metricas_agendador():
+    """
+    Avisos enviados, ofertas calculadas, renovações agendadas no heap,
+    próximo disparo e o resumo do último tick
+    """
+    return await renovacao_controller.obter_metricas()
@@ -0,0 +1,68 @@
+"""
+Serialização JSON das respostas
+RespostaJSON é a classe de resposta padrão da aplicação: serializa com
+orjson (quando instalado) direto para bytes, tratando Decimal, UUID,
+datetime/date e modelos pydantic.
+
+No FastAPI fixado em requirements.txt, o retorno das rotas passa antes
+pelo serialize_response (dump_python do pydantic nas rotas com
+response_model, jsonable_encoder nas demais) e só os bytes saem do
+orjson. Rotas que devolvem dicts grandes vindos do repositório
+(listagem de leads, com dados_pdf e historico) devolvem RespostaJSON
+diretamente: o conteúdo já está no formato JSON e não precisa ser
+percorrido em Python antes de serializar.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, json da biblioteca padrão
+    orjson = None
+
+
+def _padrao(obj: Any) -> Any:
+    """Tipos que o orjson não serializa sozinho"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+def _padrao_json(obj: Any) -> Any:
+    """_padrao mais o que o orjson já trata nativamente (datetime, UUID)"""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    return _padrao(obj)
+
+
+if orjson is not None:
+    OPCOES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def serializar_json(conteudo: Any) -> bytes:
+        """Conteúdo → bytes JSON (UTF-8, sem espaços)"""
+        return orjson.dumps(conteudo, default=_padrao, option=OPCOES_ORJSON)
+else:
+    def serializar_json(conteudo: Any) -> bytes:
+        """Conteúdo → bytes JSON (UTF-8, sem espaços)"""
+        return json.dumps(
+            conteudo, default=_padrao_json, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class RespostaJSON(JSONResponse):
+    """JSONResponse serializada por serializar_json"""
+
+    def render(self, content: Any) -> bytes:
+        return serializar_json(content)
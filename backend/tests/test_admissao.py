@@ -0,0 +1,186 @@
+"""
+Testes do controle de admissão (teto de PDF, prioridade, fila com prazo, taxa)
+"""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from src.infrastructure.services.admissao import BARATA, CARA, AdmissaoRecusada, BaldeTokens, ControleAdmissao
+from src.infrastructure.services.metricas import RegistroMetricas
+from src.presentation.middlewares.admissao import AdmissaoMiddleware
+
+
+def _controle(**parametros) -> ControleAdmissao:
+    return ControleAdmissao(registro=RegistroMetricas(), **parametros)
+
+
+def test_teto_de_caras_reserva_e_prioridade_das_baratas():
+    """Caras limitadas e fora da reserva; vaga liberada vai primeiro para a barata"""
+    async def cenario():
+        controle = _controle(capacidade=4, reserva_baratas=0.5, limite_caras=3, fila_maxima=1, espera_maxima=0.2)
+        # Reserva de 2 vagas: no máximo 2 caras mesmo com limite 3
+        assert controle.limite_caras == 2
+
+        await controle.adquirir(CARA)
+        await controle.adquirir(CARA)
+        cara_na_fila = asyncio.create_task(controle.adquirir(CARA))
+        await asyncio.sleep(0)
+
+        try:
+            await controle.adquirir(CARA)
+            assert False, "fila cheia deveria recusar"
+        except AdmissaoRecusada as recusa:
+            assert (recusa.status, recusa.motivo) == (429, "fila_cheia")
+            assert recusa.retry_after >= 1
+
+        # As baratas usam a reserva; a terceira espera
+        await controle.adquirir(BARATA)
+        await controle.adquirir(BARATA)
+        barata_na_fila = asyncio.create_task(controle.adquirir(BARATA))
+        await asyncio.sleep(0)
+
+        controle.liberar(CARA, duracao=1.0)
+        await barata_na_fila
+        assert controle.ativos == {BARATA: 3, CARA: 1}
+
+        try:
+            await cara_na_fila
+            assert False, "prazo deveria esgotar"
+        except AdmissaoRecusada as recusa:
+            assert (recusa.status, recusa.motivo) == (503, "prazo")
+        assert len(controle.filas[CARA]) == 0
+
+    asyncio.run(cenario())
+
+
+def test_espera_cancelada_nao_vaza_vaga():
+    """Cliente que desiste na fila sai dela; a vaga segue para o próximo"""
+    async def cenario():
+        controle = _controle(capacidade=2, reserva_baratas=0.5, limite_caras=1, espera_maxima=5)
+        await controle.adquirir(CARA)
+        desistente = asyncio.create_task(controle.adquirir(CARA))
+        seguinte = asyncio.create_task(controle.adquirir(CARA))
+        await asyncio.sleep(0)
+
+        desistente.cancel()
+        await asyncio.gather(desistente, return_exceptions=True)
+        controle.liberar(CARA)
+        await seguinte
+        assert controle.ativos[CARA] == 1 and not controle.filas[CARA]
+
+    asyncio.run(cenario())
+
+
+def test_balde_de_tokens_por_cliente():
+    agora = [0.0]
+    balde = BaldeTokens(taxa=1.0, rajada=2, relogio=lambda: agora[0])
+
+    assert balde.consumir("a") == 0 and balde.consumir("a") == 0
+    assert balde.consumir("a") == 1.0
+    assert balde.consumir("b") == 0
+
+    agora[0] = 1.0
+    assert balde.consumir("a") == 0
+
+
+def test_middleware_recusa_pdf_excedente_sem_afetar_rotas_baratas():
+    """Com o teto de PDF ocupado: PDF → 429 + Retry-After, cotação segue 200"""
+    liberar = asyncio.Event()
+    app = FastAPI()
+
+    @app.post("/api/v1/pdf/extrair")
+    async def extrair():
+        await liberar.wait()
+        return {"ok": True}
+
+    @app.get("/api/v1/cotacao/operadoras")
+    async def operadoras():
+        return {"operadoras": []}
+
+    registro = RegistroMetricas()
+    controle = ControleAdmissao(capacidade=4, limite_caras=1, fila_maxima=0, registro=registro)
+    app.add_middleware(
+        AdmissaoMiddleware,
+        controle=controle,
+        limites={CARA: BaldeTokens(taxa=0.01, rajada=2)}
+    )
+
+    async def cenario():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            primeira = asyncio.create_task(cliente.post("/api/v1/pdf/extrair"))
+            await asyncio.sleep(0.05)
+
+            ocupado = await cliente.post("/api/v1/pdf/extrair")
+            assert ocupado.status_code == 429
+            assert int(ocupado.headers["retry-after"]) >= 1
+            assert (await cliente.get("/api/v1/cotacao/operadoras")).status_code == 200
+
+            liberar.set()
+            assert (await primeira).status_code == 200
+
+            # Rajada de 2 consumida: o cliente é limitado pela taxa
+            limitado = await cliente.post("/api/v1/pdf/extrair")
+            assert limitado.status_code == 429
+            assert limitado.json()["detail"].startswith("Limite de requisições")
+
+    asyncio.run(cenario())
+
+    texto = registro.renderizar()
+    assert 'admissao_recusas_total{classe="cara",motivo="fila_cheia"} 1' in texto
+    assert 'admissao_recusas_total{classe="cara",motivo="taxa"} 1' in texto
+    assert 'admissao_em_andamento{classe="cara"} 0' in texto
+
+
+def test_stream_aberto_nao_segura_vaga():
+    """Com a única vaga barata ocupada por um stream aberto, outra requisição ainda entra"""
+    from fastapi.responses import StreamingResponse
+
+    fechar = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/api/v1/leads/stream")
+    async def stream():
+        async def eventos():
+            yield b": conectado\n\n"
+            await fechar.wait()
+
+        return StreamingResponse(eventos(), media_type="text/event-stream")
+
+    @app.get("/api/v1/cotacao/operadoras")
+    async def operadoras():
+        return {"operadoras": []}
+
+    controle = _controle(capacidade=2, reserva_baratas=0.5, limite_caras=1, fila_maxima=0)
+    middleware = AdmissaoMiddleware(app, controle=controle, limites={})
+
+    async def cenario():
+        inicio = asyncio.Event()
+
+        async def receber():
+            await fechar.wait()
+            return {"type": "http.disconnect"}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.body" and mensagem.get("body"):
+                inicio.set()
+
+        escopo = {
+            "type": "http", "method": "GET", "path": "/api/v1/leads/stream", "raw_path": b"/api/v1/leads/stream",
+            "query_string": b"", "headers": [], "client": ("10.0.0.1", 1234), "server": ("teste", 80),
+            "scheme": "http", "http_version": "1.1", "root_path": "",
+        }
+        conexao = asyncio.create_task(middleware(escopo, receber, enviar))
+        await asyncio.wait_for(inicio.wait(), 1)
+        assert controle.ativos[BARATA] == 0
+
+        transporte = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            assert (await cliente.get("/api/v1/cotacao/operadoras")).status_code == 200
+
+        fechar.set()
+        await asyncio.wait_for(conexao, 1)
+        assert controle.ativos[BARATA] == 0
+
+    asyncio.run(cenario())
@@ -0,0 +1,188 @@
+"""
+Testes para o agendador de avisos de renovação
+"""
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.infrastructure.repositories.sqlite_renovacao_repository import SQLiteRenovacaoRepository
+from src.infrastructure.services.agendador_renovacoes import AgendadorRenovacoes
+from src.infrastructure.services.lideranca import TravaLideranca
+from src.presentation.controllers import renovacao_controller
+
+
+def _renovacao(renovacao_id, vencimento, **campos):
+    return {
+        "id": renovacao_id, "corretor_id": "c1", "nome_cliente": f"Cliente {renovacao_id}",
+        "operadora_nome": "AMIL", "valor_atual": 2000.0, "data_vencimento": vencimento,
+        "metadata": {"idades": [30, 40]}, **campos
+    }
+
+
+def test_avisos_de_60_e_30_dias_com_oferta(tmp_path):
+    """Aviso de 60 dias, de 30 dias (cobrindo o de 60 quando já está perto) e oferta gravada"""
+    async def cenario():
+        leads = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        await leads.iniciar()
+        lead = novo_lead(nome="Lead", whatsapp="+5511999990001", idades=[30, 40],
+                         tipo_contratacao="ADESAO")
+        await leads.criar_leads_lote([lead])
+
+        repo = SQLiteRenovacaoRepository(str(tmp_path / "renovacoes.db"))
+        await repo.inserir_renovacoes([
+            _renovacao("r1", "2026-12-10"),
+            _renovacao("r2", "2026-11-05", lead_id=lead["id"], metadata={"origem": "crm"}),
+            _renovacao("r3", "2027-01-30"),
+            _renovacao("r4", "2026-11-01", status="renovado"),
+            _renovacao("r5", "2026-12-10", notificacao_60d=True),
+            _renovacao("r6", "2026-12-15", valor_atual=None),
+        ])
+
+        agendador = AgendadorRenovacoes(repositorio=repo, repositorio_leads=leads)
+        primeiro = await agendador.tick(date(2026, 10, 19))
+        assert (primeiro["carregadas"], primeiro["avisos_60d"], primeiro["avisos_30d"]) == (4, 2, 1)
+        assert primeiro["ofertas"] == 2
+
+        r1 = await repo.buscar_renovacao("r1")
+        assert (r1["notificacao_60d"], r1["notificacao_30d"]) == (True, False)
+        # Idades 30 e 40 na adesão: melhor operadora a R$ 800
+        assert r1["metadata"]["idades"] == [30, 40]
+        assert r1["metadata"]["oferta_renovacao"]["valor_proposto"] == 800.0
+        assert r1["metadata"]["oferta_renovacao"]["economia"] == 1200.0
+
+        r2 = await repo.buscar_renovacao("r2")
+        assert (r2["notificacao_60d"], r2["notificacao_30d"]) == (True, True)
+        assert r2["metadata"] == {"origem": "crm", "oferta_renovacao": r2["metadata"]["oferta_renovacao"]}
+
+        r6 = await repo.buscar_renovacao("r6")
+        assert r6["notificacao_60d"] and "oferta_renovacao" not in r6["metadata"]
+
+        # Mesmo dia: nada novo na janela, nada devido
+        segundo = await agendador.tick(date(2026, 10, 19))
+        assert (segundo["carregadas"], segundo["avisos_60d"], segundo["avisos_30d"]) == (0, 0, 0)
+
+        # 30 dias antes de 10/12: r1 e r5
+        terceiro = await agendador.tick(date(2026, 11, 10))
+        assert (terceiro["carregadas"], terceiro["avisos_30d"]) == (0, 2)
+
+        # r3 entra na janela de 60 dias só agora; r6 recebe o de 30 dias atrasado
+        quarto = await agendador.tick(date(2026, 12, 3))
+        assert (quarto["carregadas"], quarto["avisos_60d"], quarto["avisos_30d"]) == (1, 1, 1)
+        assert (await repo.buscar_renovacao("r3"))["notificacao_60d"]
+
+        assert (await repo.buscar_renovacao("r4"))["notificacao_60d"] is False
+        metricas = agendador.metricas()
+        assert (metricas["avisos_60d"], metricas["avisos_30d"], metricas["ticks"]) == (3, 4, 4)
+
+        repo.encerrar()
+        await leads.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_recarga_reagenda_renovacao_alterada(tmp_path):
+    """Vencimento alterado depois de carregado: a recarga descarta a entrada antiga"""
+    async def cenario():
+        repo = SQLiteRenovacaoRepository(str(tmp_path / "renovacoes.db"))
+        await repo.inserir_renovacoes([_renovacao("r1", "2026-12-30")])
+
+        agendador = AgendadorRenovacoes(repositorio=repo)
+        assert (await agendador.tick(date(2026, 10, 31)))["avisos_60d"] == 1
+
+        # Prorrogado: o aviso de 30 dias passa de 30/11 para 30/12
+        await repo.inserir_renovacoes([_renovacao("r1", "2027-01-29", notificacao_60d=True)])
+        recarga = await agendador.tick(date(2026, 11, 30), recarregar=True)
+        assert (recarga["carregadas"], recarga["avisos_30d"]) == (1, 0)
+        assert agendador.metricas()["proximo_disparo"] == "2026-12-30"
+
+        repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+class RepositorioFalhaUmaVez(SQLiteRenovacaoRepository):
+    """A primeira gravação dos avisos falha"""
+
+    falhar = True
+
+    async def marcar_notificacoes(self, avisos):
+        if self.falhar:
+            self.falhar = False
+            raise ConnectionError("banco indisponível")
+        return await super().marcar_notificacoes(avisos)
+
+
+def test_tick_com_falha_devolve_avisos_ao_heap(tmp_path):
+    """Gravação que falha: os avisos devidos voltam ao heap e saem no tick seguinte"""
+    async def cenario():
+        repo = RepositorioFalhaUmaVez(str(tmp_path / "renovacoes.db"))
+        await repo.inserir_renovacoes([_renovacao("r1", "2026-12-10"), _renovacao("r2", "2026-11-05")])
+
+        agendador = AgendadorRenovacoes(repositorio=repo)
+        with pytest.raises(ConnectionError):
+            await agendador.tick(date(2026, 10, 19))
+        assert agendador.metricas()["agendadas"] == 2
+
+        resumo = await agendador.tick(date(2026, 10, 19))
+        assert (resumo["avisos_60d"], resumo["avisos_30d"]) == (1, 1)
+        assert (await repo.buscar_renovacao("r2"))["notificacao_30d"]
+
+        repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_aviso_ja_marcado_nao_e_reenviado(tmp_path):
+    """Outro worker marcou o aviso depois da carga: não é regravado nem contado"""
+    async def cenario():
+        repo = RepositorioFalhaUmaVez(str(tmp_path / "renovacoes.db"))
+        await repo.inserir_renovacoes([_renovacao("r1", "2026-12-10")])
+
+        # O primeiro tick falha e deixa o aviso no heap deste agendador
+        agendador = AgendadorRenovacoes(repositorio=repo)
+        with pytest.raises(ConnectionError):
+            await agendador.tick(date(2026, 10, 19))
+
+        outro = AgendadorRenovacoes(repositorio=repo)
+        assert (await outro.tick(date(2026, 10, 19)))["avisos_60d"] == 1
+        marcada = await repo.buscar_renovacao("r1")
+
+        repetido = await agendador.tick(date(2026, 10, 19))
+        assert (repetido["avisos_60d"], repetido["ofertas"]) == (0, 0)
+        assert agendador.metricas()["avisos_60d"] == 0
+        assert await repo.buscar_renovacao("r1") == marcada
+        assert await repo.marcar_notificacoes([
+            {"id": "r1", "notificacao_60d": True, "notificacao_30d": False, "oferta": None}
+        ]) == []
+
+        repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_tick_manual_fora_do_lider(tmp_path, monkeypatch):
+    """Com a trava das tarefas globais, o tick manual só roda no worker líder"""
+    repo = SQLiteRenovacaoRepository(str(tmp_path / "renovacoes.db"))
+    lider = TravaLideranca(str(tmp_path / "tarefas.lock"))
+    assert lider.tentar()
+
+    agendador = AgendadorRenovacoes(repositorio=repo, trava=TravaLideranca(str(tmp_path / "tarefas.lock")))
+    monkeypatch.setattr(renovacao_controller, "renovacao_repository", repo)
+    monkeypatch.setattr(renovacao_controller, "agendador_renovacoes", agendador)
+    client = TestClient(app)
+
+    assert client.post("/api/v1/renovacoes/agendador/tick").status_code == 409
+
+    lider.liberar()
+    assert agendador.trava.tentar()
+    resposta = client.post("/api/v1/renovacoes/agendador/tick")
+    assert resposta.status_code == 200
+    assert resposta.json()["avisos_60d"] == 0
+
+    agendador.trava.liberar()
+    repo.encerrar()
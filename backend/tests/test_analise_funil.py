@@ -0,0 +1,129 @@
+"""
+Testes para a análise vetorizada do funil de leads
+"""
+import asyncio
+import threading
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.infrastructure.services.analise_funil import (
+    AnaliseFunil,
+    ColetorEventos,
+    calcular_metricas
+)
+
+
+def evento(momento, status_novo):
+    return {"timestamp": momento, "evento": "mudanca_status", "status_novo": status_novo}
+
+
+LEADS = [
+    {
+        "id": "1", "created_at": "2026-01-10T00:00:00+00:00", "status": "ganho",
+        "operadora_atual": "Amil", "origem": "meta_ads",
+        "historico": [
+            evento("2026-01-10T10:00:00", "contatado"),
+            evento("2026-01-11T10:00:00", "proposta_enviada"),
+            evento("2026-01-12T10:00:00", "ganho"),
+        ]
+    },
+    {
+        "id": "2", "created_at": "2026-01-20T00:00:00+00:00", "status": "perdido",
+        "operadora_atual": "Amil", "origem": "scanner_pdf",
+        "historico": [
+            evento("2026-01-20T02:00:00", "contatado"),
+            evento("2026-01-21T02:00:00", "perdido"),
+        ]
+    },
+    {
+        "id": "3", "created_at": "2026-02-01T00:00:00+00:00", "status": "novo",
+        "operadora_atual": None, "origem": "meta_ads", "historico": []
+    },
+]
+
+
+def calcular():
+    coletor = ColetorEventos()
+    coletor.adicionar(LEADS)
+    return calcular_metricas(coletor.colunas(), "mes", agora="2026-02-02T00:00:00+00:00")
+
+
+def test_conversao_por_coorte():
+    """Coorte pelo mês de criação, ganho pelo status ou pelo histórico"""
+    coortes = {c["coorte"]: c for c in calcular()["coortes"]}
+
+    assert coortes["2026-01"] == {
+        "coorte": "2026-01", "leads": 2, "ganhos": 1, "perdidos": 1, "taxa_conversao": 0.5
+    }
+    assert coortes["2026-02"]["taxa_conversao"] == 0.0
+
+
+def test_tempo_mediano_em_status_e_em_aberto():
+    """Intervalos entre transições consecutivas do mesmo lead"""
+    resultado = calcular()
+    tempos = {t["status"]: t for t in resultado["tempo_em_status"]}
+
+    # novo: 10h (lead 1) e 2h (lead 2); contatado: 24h e 24h
+    assert tempos["novo"]["mediana_horas"] == 6.0
+    assert tempos["novo"]["transicoes"] == 2
+    assert tempos["contatado"]["mediana_horas"] == 24.0
+
+    em_aberto = {e["status"]: e for e in resultado["em_aberto"]}
+    assert em_aberto["novo"] == {"status": "novo", "leads": 1, "idade_mediana_horas": 24.0}
+    assert resultado["total_eventos"] == 5
+
+
+def test_perdas_por_etapa_por_operadora():
+    """Etapa máxima alcançada define o funil de cada grupo"""
+    funil = {f["operadora"]: f for f in calcular()["funil_por_operadora"]}
+
+    assert funil["Amil"]["etapas"] == {
+        "novo": 2, "contatado": 2, "negociacao": 1, "proposta_enviada": 1, "ganho": 1
+    }
+    assert funil["Amil"]["perda_por_etapa"]["contatado->negociacao"] == 0.5
+    assert funil["Não informada"]["perda_por_etapa"]["contatado->negociacao"] is None
+
+
+def test_analise_no_pool_de_processos_com_cache(tmp_path):
+    """Cálculo roda em outro processo e a segunda chamada vem do cache"""
+    async def cenario():
+        repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        lead = await repo.criar_lead(nome="Lead Análise", whatsapp="+5511977778888")
+        await repo.atualizar_status_lead(lead["id"], "contatado")
+
+        analise = AnaliseFunil(processos=1)
+        try:
+            primeira = await analise.obter(repo)
+            segunda = await analise.obter(repo)
+        finally:
+            analise.encerrar()
+            await repo.encerrar()
+
+        assert primeira["total_leads"] == 1
+        assert primeira["total_eventos"] == 1
+        assert segunda is primeira
+
+    asyncio.run(cenario())
+
+
+def test_coleta_fora_do_event_loop(monkeypatch):
+    """Achatamento das páginas roda em threads: o event loop fica livre durante a coleta"""
+    threads = []
+    original = ColetorEventos.adicionar
+
+    def adicionar(self, leads):
+        threads.append(threading.get_ident())
+        original(self, leads)
+
+    monkeypatch.setattr(ColetorEventos, "adicionar", adicionar)
+
+    class Repositorio:
+        async def iterar_leads(self, **kwargs):
+            for lead in LEADS:
+                yield [lead]
+
+    async def cenario():
+        analise = AnaliseFunil(processos=0)
+        resultado = await analise.obter(Repositorio())
+        assert resultado["total_leads"] == 3
+        assert threads and threading.get_ident() not in threads
+
+    asyncio.run(cenario())
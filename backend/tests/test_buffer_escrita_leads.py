@@ -0,0 +1,164 @@
+"""
+Testes para a criação de leads em write-behind
+"""
+import asyncio
+import sqlite3
+import pytest
+from src.infrastructure.repositories.buffer_escrita_leads import (
+    BufferCheioError,
+    GravacaoPendenteError,
+    LeadRepositoryComBuffer
+)
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+
+
+class BancoFora(SQLiteLeadRepository):
+    """SQLite cuja gravação em lote sempre falha"""
+
+    async def criar_leads_lote(self, leads):
+        raise ConnectionError("banco indisponível")
+
+
+class BancoComCheck(SQLiteLeadRepository):
+    """SQLite que recusa o lote inteiro se houver um WhatsApp fora do formato (CHECK)"""
+
+    async def criar_leads_lote(self, leads):
+        if any(not lead["whatsapp"].startswith("+55") for lead in leads):
+            raise sqlite3.IntegrityError("CHECK constraint failed: whatsapp_format")
+        return await super().criar_leads_lote(leads)
+
+
+def test_buffer_confirma_e_grava_em_lote(tmp_path):
+    """Leads confirmados na hora chegam ao banco em lotes"""
+    async def cenario():
+        banco = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        repo = LeadRepositoryComBuffer(banco, str(tmp_path / "journal.db"), lote=50, intervalo=0.05)
+        await repo.iniciar()
+
+        criados = await asyncio.gather(*(
+            repo.criar_lead(nome=f"Lead {i}", whatsapp=f"+55119888800{i:02d}") for i in range(120)
+        ))
+        assert len({lead["id"] for lead in criados}) == 120
+        assert (await repo.buscar_lead_por_whatsapp("+5511988880007"))["nome"] == "Lead 7"
+
+        for _ in range(100):
+            if repo.metricas_buffer()["profundidade"] == 0:
+                break
+            await asyncio.sleep(0.02)
+
+        metricas = repo.metricas_buffer()
+        assert metricas["leads_gravados"] == 120
+        assert metricas["lotes_gravados"] >= 3
+        assert metricas["descarga_p50_ms"] is not None
+        assert (await banco.buscar_lead_por_id(criados[0]["id"]))["nome"] == "Lead 0"
+        assert (await banco.obter_dashboard_stats())["total_leads"] == 120
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_buffer_recupera_journal_apos_queda(tmp_path):
+    """Leads não gravados sobrevivem ao processo e são enviados na volta"""
+    journal = str(tmp_path / "journal.db")
+
+    async def antes_da_queda():
+        repo = LeadRepositoryComBuffer(BancoFora(str(tmp_path / "leads.db")), journal, intervalo=0.05)
+        lead = await repo.criar_lead(nome="Ana Rocha", whatsapp="+5521977776666")
+        await asyncio.sleep(0.1)
+        assert repo.metricas_buffer()["falhas"] >= 1
+        # Queda: nada de encerrar(), só a conexão é abandonada
+        repo._descarregador.cancel()
+        return lead["id"]
+
+    async def depois_da_queda(lead_id):
+        banco = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        repo = LeadRepositoryComBuffer(banco, journal, intervalo=0.05)
+        assert repo.metricas_buffer()["profundidade"] == 1
+        await repo.encerrar()
+
+        banco = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        assert (await banco.buscar_lead_por_id(lead_id))["nome"] == "Ana Rocha"
+        await banco.encerrar()
+
+    lead_id = asyncio.run(antes_da_queda())
+    asyncio.run(depois_da_queda(lead_id))
+
+
+def test_buffer_cheio_aplica_backpressure(tmp_path):
+    """Com o journal cheio e o banco fora, novos leads são recusados"""
+    async def cenario():
+        repo = LeadRepositoryComBuffer(
+            BancoFora(str(tmp_path / "leads.db")), str(tmp_path / "journal.db"),
+            capacidade=2, espera_maxima=0.1
+        )
+        await repo.criar_lead(nome="Lead 1", whatsapp="+5511900000001")
+        await repo.criar_lead(nome="Lead 2", whatsapp="+5511900000002")
+
+        with pytest.raises(BufferCheioError):
+            await repo.criar_lead(nome="Lead 3", whatsapp="+5511900000003")
+        assert repo.metricas_buffer()["rejeitados"] == 1
+        repo._descarregador.cancel()
+
+    asyncio.run(cenario())
+
+
+def test_gravacao_em_lote_ignora_ids_repetidos(tmp_path):
+    """Reenviar um lote após falha não duplica leads"""
+    async def cenario():
+        banco = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        lead = await banco.criar_lead(nome="Bia Costa", whatsapp="+5531966665555")
+
+        assert await banco.criar_leads_lote([lead]) == 0
+        assert (await banco.obter_dashboard_stats())["total_leads"] == 1
+        await banco.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_linha_recusada_e_isolada_sem_bloquear_o_lote(tmp_path):
+    """Um lead recusado pelo banco vai para os rejeitados; os demais do lote são gravados"""
+    journal = str(tmp_path / "journal.db")
+
+    async def cenario():
+        banco = BancoComCheck(str(tmp_path / "leads.db"))
+        repo = LeadRepositoryComBuffer(banco, journal, lote=50, intervalo=0.05)
+        await repo.iniciar()
+        for i in range(20):
+            whatsapp = "11 98888-0000" if i == 13 else f"+55119888800{i:02d}"
+            await repo.criar_lead(nome=f"Lead {i}", whatsapp=whatsapp)
+
+        for _ in range(100):
+            if repo.metricas_buffer()["profundidade"] == 0:
+                break
+            await asyncio.sleep(0.02)
+
+        metricas = repo.metricas_buffer()
+        assert metricas["leads_gravados"] == 19
+        assert metricas["recusados_banco"] == 1
+        assert (await banco.obter_dashboard_stats())["total_leads"] == 19
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+    conn = sqlite3.connect(journal)
+    rejeitados = conn.execute("SELECT lead, erro FROM journal_leads_rejeitados").fetchall()
+    assert len(rejeitados) == 1 and "Lead 13" in rejeitados[0][0] and "whatsapp_format" in rejeitados[0][1]
+    assert conn.execute("SELECT count(*) FROM journal_leads").fetchone()[0] == 0
+    conn.close()
+
+
+def test_atualizacao_de_lead_nao_gravado_falha_em_vez_de_seguir(tmp_path):
+    """Com o banco fora, atualizar um lead que só está no journal não é feito em silêncio"""
+    async def cenario():
+        repo = LeadRepositoryComBuffer(
+            BancoFora(str(tmp_path / "leads.db")), str(tmp_path / "journal.db"),
+            intervalo=0.05, espera_maxima=0.2
+        )
+        lead = await repo.criar_lead(nome="Ana Rocha", whatsapp="+5521977776666")
+        with pytest.raises(GravacaoPendenteError):
+            await repo.atualizar_status_lead(lead["id"], "contatado")
+        with pytest.raises(GravacaoPendenteError):
+            await repo.arquivar_lead(lead["id"])
+        repo._descarregador.cancel()
+
+    asyncio.run(cenario())
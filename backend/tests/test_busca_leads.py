@@ -0,0 +1,50 @@
+"""
+Testes para o índice de busca de leads em memória
+"""
+from src.infrastructure.services.indice_busca_leads import IndiceBuscaLeads
+
+
+def criar_indice():
+    indice = IndiceBuscaLeads()
+    indice.adicionar_varios([
+        {"id": "1", "nome": "João da Silva", "email": "joao@empresa.com", "whatsapp": "+5511999990001", "status": "novo"},
+        {"id": "2", "nome": "Maria Silveira", "email": "maria@gmail.com", "whatsapp": "+5521988887777", "status": "novo"},
+        {"id": "3", "nome": "Silvana Costa", "email": None, "whatsapp": "+5531977776666", "status": "ganho"},
+    ])
+    return indice
+
+
+def test_busca_por_nome_parcial_sem_acento():
+    """Fragmento do nome encontra o lead, ignorando acentos e caixa"""
+    resultados = criar_indice().buscar("JOAO")
+
+    assert [r["id"] for r in resultados] == ["1"]
+    assert "dados_pdf" not in resultados[0]
+
+
+def test_busca_ranqueia_prefixo_primeiro():
+    """Nome que começa com o termo vem antes de ocorrências no meio"""
+    resultados = criar_indice().buscar("silv")
+
+    assert [r["id"] for r in resultados] == ["3", "2", "1"]
+
+
+def test_busca_por_fragmento_de_telefone_e_email():
+    """Dígitos buscam no telefone e texto busca no e-mail"""
+    indice = criar_indice()
+
+    assert [r["id"] for r in indice.buscar("(21) 98888")] == ["2"]
+    assert [r["id"] for r in indice.buscar("@empresa")] == ["1"]
+
+
+def test_busca_reflete_remocao_e_atualizacao():
+    """Leads arquivados somem e o status projetado é atualizado"""
+    indice = criar_indice()
+    indice.remover("1")
+    indice.atualizar("2", status="contatado")
+
+    resultados = indice.buscar("silv")
+
+    assert [r["id"] for r in resultados] == ["3", "2"]
+    assert resultados[1]["status"] == "contatado"
+    assert len(indice) == 2
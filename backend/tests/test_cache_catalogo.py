@@ -0,0 +1,93 @@
+"""
+Testes das respostas cacheáveis dos endpoints de catálogo (ETag / 304)
+"""
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from main import app
+from src.presentation.respostas import CacheRepresentacoes, escolher_codificacao
+
+client = TestClient(app)
+
+
+def test_operadoras_com_etag_e_304():
+    """ETag da versão das tabelas; If-None-Match igual → 304 sem corpo"""
+    resposta = client.get("/api/v1/cotacao/operadoras")
+    etag = resposta.headers["etag"]
+
+    assert resposta.status_code == 200
+    assert "AMIL" in resposta.json()["operadoras"]
+    assert resposta.headers["cache-control"].startswith("public, max-age=")
+    assert "Accept-Encoding" in resposta.headers["vary"]
+
+    repetida = client.get("/api/v1/cotacao/operadoras", headers={"If-None-Match": f'"outra", W/{etag}'})
+    assert repetida.status_code == 304
+    assert repetida.content == b""
+    assert repetida.headers["etag"] == etag
+
+    assert client.get("/api/v1/cotacao/operadoras", headers={"If-None-Match": '"outra"'}).status_code == 200
+
+
+def test_info_pre_comprimida_por_codificacao():
+    """gzip quando aceito (ETag própria), identidade com q=0 ou sem Accept-Encoding"""
+    identidade = client.get("/api/v1/info", headers={"Accept-Encoding": "identity"})
+    comprimida = client.get("/api/v1/info", headers={"Accept-Encoding": "gzip"})
+    recusada = client.get("/api/v1/info", headers={"Accept-Encoding": "gzip;q=0"})
+
+    assert "content-encoding" not in identidade.headers
+    assert comprimida.headers["content-encoding"] == "gzip"
+    assert comprimida.json() == identidade.json()
+    assert int(comprimida.headers["content-length"]) < len(identidade.content)
+    assert comprimida.headers["etag"] != identidade.headers["etag"]
+    assert "content-encoding" not in recusada.headers
+
+    # Qualquer ETag do recurso valida (o cache pode ter guardado outra codificação)
+    repetida = client.get(
+        "/api/v1/info",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": identidade.headers["etag"]}
+    )
+    assert repetida.status_code == 304
+
+
+def test_representacao_remontada_so_quando_versao_muda():
+    """O conteúdo é montado (e comprimido) uma vez por versão; versão nova → ETag nova"""
+    cache = CacheRepresentacoes(max_age=60, stale_while_revalidate=0)
+    estado = {"versao": "v1", "montagens": 0}
+
+    async def montar():
+        estado["montagens"] += 1
+        return {"planos": [{"nome": f"Plano {i}", "versao": estado["versao"]} for i in range(50)]}
+
+    local = FastAPI()
+
+    @local.get("/planos")
+    async def planos(request: Request):
+        return await cache.responder(request, "planos", estado["versao"], montar)
+
+    cliente = TestClient(local)
+    primeira = cliente.get("/planos", headers={"Accept-Encoding": "gzip"})
+    cliente.get("/planos", headers={"Accept-Encoding": "identity"})
+    assert estado["montagens"] == 1
+    assert primeira.headers["cache-control"] == "public, max-age=60, stale-while-revalidate=0"
+
+    estado["versao"] = "v2"
+    nova = cliente.get("/planos", headers={"Accept-Encoding": "gzip", "If-None-Match": primeira.headers["etag"]})
+    assert nova.status_code == 200
+    assert nova.headers["etag"] != primeira.headers["etag"]
+    assert nova.json()["planos"][0]["versao"] == "v2"
+    assert estado["montagens"] == 2
+
+    corpo = cache._representacoes["planos"].corpos
+    assert gzip.decompress(corpo["gzip"]) == corpo["identity"]
+
+
+def test_escolher_codificacao():
+    disponiveis = {"identity": b"", "gzip": b"", "br": b""}
+
+    assert escolher_codificacao(None, disponiveis) == "identity"
+    assert escolher_codificacao("gzip, deflate, br", disponiveis) == "br"
+    assert escolher_codificacao("br;q=0.5, gzip", disponiveis) == "gzip"
+    assert escolher_codificacao("*", {"identity": b"", "gzip": b""}) == "gzip"
+    assert escolher_codificacao("br", {"identity": b""}) == "identity"
@@ -0,0 +1,104 @@
+"""
+Testes para o cache de estatísticas (TTL + stale-while-revalidate)
+"""
+import asyncio
+from src.infrastructure.services.cache_estatisticas import CacheSWR
+
+
+class Relogio:
+    """Relógio manual para controlar a idade das entradas"""
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def criar_carregador(valores):
+    """Cria um carregador que conta chamadas e devolve valores em sequência"""
+    estado = {"chamadas": 0}
+
+    async def carregar():
+        estado["chamadas"] += 1
+        await asyncio.sleep(0.01)
+        return valores[min(estado["chamadas"], len(valores)) - 1]
+
+    return carregar, estado
+
+
+def test_cache_serve_valor_fresco():
+    """Dentro do TTL o valor é servido sem nova consulta"""
+    async def cenario():
+        relogio = Relogio()
+        cache = CacheSWR(ttl=10, janela_stale=60, relogio=relogio)
+        carregar, estado = criar_carregador([1, 2])
+
+        assert await cache.obter("stats", carregar) == 1
+        relogio.agora = 5
+        assert await cache.obter("stats", carregar) == 1
+        assert estado["chamadas"] == 1
+        assert cache.idade("stats") == 5
+
+    asyncio.run(cenario())
+
+
+def test_cache_stale_while_revalidate():
+    """Valor vencido é servido na hora e recarregado em segundo plano"""
+    async def cenario():
+        relogio = Relogio()
+        cache = CacheSWR(ttl=10, janela_stale=60, relogio=relogio)
+        carregar, estado = criar_carregador([1, 2])
+
+        await cache.obter("stats", carregar)
+        relogio.agora = 20
+        assert await cache.obter("stats", carregar) == 1
+        await asyncio.sleep(0.05)
+        assert await cache.obter("stats", carregar) == 2
+        assert estado["chamadas"] == 2
+
+    asyncio.run(cenario())
+
+
+def test_cache_coalesce_recargas_concorrentes():
+    """Chamadas simultâneas sem valor em cache geram uma única consulta"""
+    async def cenario():
+        cache = CacheSWR(ttl=10, janela_stale=60)
+        carregar, estado = criar_carregador([42])
+
+        resultados = await asyncio.gather(*[cache.obter("stats", carregar) for _ in range(20)])
+
+        assert resultados == [42] * 20
+        assert estado["chamadas"] == 1
+
+    asyncio.run(cenario())
+
+
+def test_cache_invalidacao_descarta_recarga_em_andamento():
+    """Escrita durante a recarga impede que o valor antigo seja gravado"""
+    async def cenario():
+        cache = CacheSWR(ttl=10, janela_stale=60)
+        carregar, estado = criar_carregador([1, 2])
+
+        tarefa = asyncio.ensure_future(cache.obter("stats", carregar))
+        await asyncio.sleep(0)
+        cache.invalidar()
+        assert await tarefa == 1
+        assert cache.idade("stats") is None
+
+        assert await cache.obter("stats", carregar) == 2
+        assert estado["chamadas"] == 2
+
+    asyncio.run(cenario())
+
+
+def test_cache_nao_armazena_erro():
+    """Consultas que retornam None (erro) não são armazenadas"""
+    async def cenario():
+        cache = CacheSWR(ttl=10, janela_stale=60)
+        carregar, estado = criar_carregador([None, {"total_leads": 3}])
+
+        assert await cache.obter("stats", carregar) is None
+        assert await cache.obter("stats", carregar) == {"total_leads": 3}
+        assert estado["chamadas"] == 2
+
+    asyncio.run(cenario())
@@ -0,0 +1,99 @@
+"""
+Testes para o cache LRU de leads
+"""
+import asyncio
+from src.infrastructure.services.cache_leads import CacheLeads
+
+
+def criar_lead(i, whatsapp="+5511999999999", status="novo"):
+    return {"id": f"lead-{i}", "nome": f"Lead {i}", "whatsapp": whatsapp, "status": status}
+
+
+def criar_carregador(resultado, atraso=0.0):
+    """Carregador que conta chamadas ao 'banco'"""
+    estado = {"chamadas": 0}
+
+    async def carregar():
+        estado["chamadas"] += 1
+        await asyncio.sleep(atraso)
+        return resultado
+
+    return carregar, estado
+
+
+def test_cache_leads_read_through_e_hit_ratio():
+    """Segunda leitura do mesmo ID vem do cache"""
+    async def cenario():
+        cache = CacheLeads(capacidade=10)
+        carregar, estado = criar_carregador(criar_lead(1))
+
+        assert (await cache.obter_por_id("lead-1", carregar))["nome"] == "Lead 1"
+        assert (await cache.obter_por_id("lead-1", carregar))["nome"] == "Lead 1"
+
+        assert estado["chamadas"] == 1
+        assert cache.metricas()["hit_ratio"] == 0.5
+
+    asyncio.run(cenario())
+
+
+def test_cache_leads_whatsapp_normalizado():
+    """Formatos diferentes do mesmo número usam a mesma entrada"""
+    async def cenario():
+        cache = CacheLeads(capacidade=10)
+        cache.armazenar(criar_lead(1, whatsapp="+55 (11) 99999-9999"), indexar_whatsapp=True)
+        carregar, estado = criar_carregador(None)
+
+        lead = await cache.obter_por_whatsapp("5511999999999", carregar)
+
+        assert lead["id"] == "lead-1"
+        assert estado["chamadas"] == 0
+
+    asyncio.run(cenario())
+
+
+def test_cache_leads_lru_limitado():
+    """Entradas menos usadas são descartadas ao atingir a capacidade"""
+    cache = CacheLeads(capacidade=2)
+    for i in range(3):
+        cache.armazenar(criar_lead(i, whatsapp=f"+55119999900{i:02d}"), indexar_whatsapp=True)
+
+    assert cache.metricas()["tamanho"] == 2
+    assert "lead-0" not in cache._leads
+    assert len(cache._por_whatsapp) == 2
+
+
+def test_cache_leads_escritas_atualizam_e_invalidam():
+    """Atualização substitui a entrada e arquivamento a remove"""
+    async def cenario():
+        cache = CacheLeads(capacidade=10)
+        cache.armazenar(criar_lead(1), indexar_whatsapp=True)
+        cache.armazenar(criar_lead(1, status="contatado"))
+
+        carregar, estado = criar_carregador(None)
+        assert (await cache.obter_por_id("lead-1", carregar))["status"] == "contatado"
+
+        cache.invalidar("lead-1")
+        assert await cache.obter_por_whatsapp("+5511999999999", carregar) is None
+        assert estado["chamadas"] == 1
+
+    asyncio.run(cenario())
+
+
+def test_cache_leads_concorrencia():
+    """Leituras simultâneas compartilham a consulta; invalidação descarta o resultado"""
+    async def cenario():
+        cache = CacheLeads(capacidade=10)
+        carregar, estado = criar_carregador(criar_lead(1), atraso=0.01)
+
+        resultados = await asyncio.gather(*[cache.obter_por_id("lead-1", carregar) for _ in range(10)])
+        assert estado["chamadas"] == 1
+        assert all(r["id"] == "lead-1" for r in resultados)
+
+        cache.invalidar("lead-1")
+        tarefa = asyncio.ensure_future(cache.obter_por_id("lead-1", carregar))
+        await asyncio.sleep(0)
+        cache.invalidar("lead-1")
+        await tarefa
+        assert "lead-1" not in cache._leads
+
+    asyncio.run(cenario())
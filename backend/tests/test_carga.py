@@ -0,0 +1,64 @@
+"""
+Testes do harness de carga: PDF gerado + LLM falso de ponta a ponta e resumo
+"""
+import random
+
+from fastapi.testclient import TestClient
+
+from benchmarks.carga.executar import percentil, resumir
+from benchmarks.carga.gerador import documento_para_pdf, gerar_cotacao, gerar_documento
+from benchmarks.carga.llm_falso import ServidorLLMFalso
+from main import app
+from src.infrastructure.container import container
+
+
+def test_extracao_de_pdf_gerado_com_llm_falso(monkeypatch):
+    """POST /pdf/extrair com PDF sintético e LLM local: sem chave real, dados coerentes"""
+    llm = ServidorLLMFalso(latencia=0.01).iniciar()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-teste")
+    monkeypatch.setenv("OPENAI_BASE_URL", llm.url)
+    documento = gerar_documento(random.Random(7))
+
+    from src.infrastructure.services.ai_service import AIService
+    container.substituir("ai_service", AIService())
+    try:
+        resposta = TestClient(app).post(
+            "/api/v1/pdf/extrair",
+            files={"file": ("proposta.pdf", documento_para_pdf(documento, paginas_minimas=2), "application/pdf")}
+        )
+    finally:
+        container.substituir("ai_service", None)
+        llm.parar()
+
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert dados["idades"] == documento.idades
+    assert dados["operadora"] == documento.operadora
+    assert dados["valor_atual"] == documento.valor_atual
+    assert dados["nome_beneficiarios"] == documento.nome_beneficiarios
+    assert llm.chamadas == 1
+
+
+def test_cotacoes_geradas_sao_aceitas():
+    cliente = TestClient(app)
+    rng = random.Random(1)
+    for _ in range(20):
+        assert cliente.post("/api/v1/cotacao/calcular", json=gerar_cotacao(rng)).status_code == 200
+
+
+def test_resumo_com_percentis_e_recusas():
+    latencias = [i / 1000 for i in range(1, 101)]
+    assert percentil(latencias, 50) == 0.05
+    assert percentil(latencias, 99) == 0.099
+    assert percentil([], 50) is None
+
+    resultado = resumir({
+        "rapido": [(200, s) for s in latencias],
+        "caro": [(200, 1.0), (429, 0.001), (500, 0.5)],
+    }, segundos=10)
+
+    assert resultado["cenarios"]["rapido"]["p95_ms"] == 95.0
+    assert resultado["cenarios"]["rapido"]["vazao_rps"] == 10.0
+    assert resultado["cenarios"]["caro"]["recusadas"] == 1
+    assert resultado["cenarios"]["caro"]["erros"] == 1
+    assert resultado["total"]["requisicoes"] == 103
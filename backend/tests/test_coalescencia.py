@@ -0,0 +1,125 @@
+"""
+Testes da coalescência de chamadas concorrentes (single-flight)
+"""
+import asyncio
+from decimal import Decimal
+
+from src.application.dtos.cotacao_dto import CotacaoInputDTO
+from src.application.use_cases.calcular_cotacao_use_case import CalcularCotacaoUseCase
+from src.infrastructure.services.coalescencia import Coalescencia
+from src.infrastructure.services.metricas import RegistroMetricas
+
+
+def _trabalho(estado, resultado=None, duracao=0.02, erro=None):
+    async def executar():
+        estado["execucoes"] += 1
+        try:
+            await asyncio.sleep(duracao)
+        except asyncio.CancelledError:
+            estado["canceladas"] += 1
+            raise
+        if erro is not None:
+            raise erro
+        return resultado
+
+    return executar
+
+
+def test_chamadas_concorrentes_compartilham_execucao():
+    registro = RegistroMetricas()
+    coalescencia = Coalescencia("teste", registro=registro)
+    estado = {"execucoes": 0, "canceladas": 0}
+
+    async def cenario():
+        resultados = await asyncio.gather(
+            *[coalescencia.executar("a", _trabalho(estado, "A")) for _ in range(5)],
+            coalescencia.executar("b", _trabalho(estado, "B")),
+        )
+        assert resultados == ["A"] * 5 + ["B"]
+        assert estado["execucoes"] == 2 and not coalescencia.chaves()
+
+        # Terminada a execução, a próxima chamada executa de novo
+        assert await coalescencia.executar("a", _trabalho(estado, "A2")) == "A2"
+
+    asyncio.run(cenario())
+
+    texto = registro.renderizar()
+    assert 'coalescencia_chamadas_total{local="teste",resultado="executada"} 3' in texto
+    assert 'coalescencia_chamadas_total{local="teste",resultado="coalescida"} 4' in texto
+
+
+def test_erro_chega_a_todos_e_nao_fica_guardado():
+    coalescencia = Coalescencia("teste", registro=RegistroMetricas())
+    estado = {"execucoes": 0, "canceladas": 0}
+
+    async def cenario():
+        resultados = await asyncio.gather(
+            *[coalescencia.executar("a", _trabalho(estado, erro=ValueError("falhou"))) for _ in range(3)],
+            return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in resultados)
+        assert await coalescencia.executar("a", _trabalho(estado, "ok")) == "ok"
+        assert estado["execucoes"] == 2
+
+    asyncio.run(cenario())
+
+
+def test_cancelamento_de_um_chamador_nao_afeta_os_demais():
+    """Quem desiste só para de esperar; sem ninguém esperando a execução é cancelada"""
+    coalescencia = Coalescencia("teste", registro=RegistroMetricas())
+    estado = {"execucoes": 0, "canceladas": 0}
+
+    async def cenario():
+        desistente = asyncio.ensure_future(coalescencia.executar("a", _trabalho(estado, "A")))
+        paciente = asyncio.ensure_future(coalescencia.executar("a", _trabalho(estado, "A")))
+        await asyncio.sleep(0)
+        desistente.cancel()
+        assert await paciente == "A"
+        assert desistente.cancelled() and estado == {"execucoes": 1, "canceladas": 0}
+
+        chamadas = [asyncio.ensure_future(coalescencia.executar("b", _trabalho(estado, "B"))) for _ in range(2)]
+        await asyncio.sleep(0)
+        for chamada in chamadas:
+            chamada.cancel()
+        await asyncio.gather(*chamadas, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert estado["canceladas"] == 1 and not coalescencia.chaves()
+
+    asyncio.run(cenario())
+
+
+def test_execucao_sem_interessados_pode_ir_ate_o_fim():
+    coalescencia = Coalescencia("teste", cancelar_sem_interessados=False, registro=RegistroMetricas())
+    estado = {"execucoes": 0, "canceladas": 0}
+
+    async def cenario():
+        chamada = asyncio.ensure_future(coalescencia.executar("a", _trabalho(estado, "A")))
+        await asyncio.sleep(0)
+        chamada.cancel()
+        await asyncio.sleep(0.05)
+        assert estado == {"execucoes": 1, "canceladas": 0} and not coalescencia.chaves()
+
+    asyncio.run(cenario())
+
+
+def test_cotacoes_identicas_simultaneas_calculam_uma_vez():
+    class ServicoContado:
+        chamadas = 0
+
+        async def calcular(self, cotacao):
+            ServicoContado.chamadas += 1
+            await asyncio.sleep(0.01)
+            valores = [Decimal("100.00")] * cotacao.quantidade_beneficiarios
+            return {"valores_individuais": valores, "valor_total": sum(valores)}
+
+    use_case = CalcularCotacaoUseCase(ServicoContado(), Coalescencia("cotacao", registro=RegistroMetricas()))
+    familia = CotacaoInputDTO(idades=[35, 8], tipo="PME", operadora="AMIL")
+    individual = CotacaoInputDTO(idades=[35], tipo="PME", operadora="AMIL")
+
+    async def cenario():
+        resultados = await asyncio.gather(*[use_case.execute(familia) for _ in range(4)], use_case.execute(individual))
+        assert ServicoContado.chamadas == 2
+        assert resultados[0] is resultados[3]
+        assert resultados[0].valor_total == Decimal("200.00") and resultados[4].valor_total == Decimal("100.00")
+
+    asyncio.run(cenario())
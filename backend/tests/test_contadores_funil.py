@@ -0,0 +1,129 @@
+"""
+Testes para os contadores incrementais do funil
+"""
+from datetime import datetime, timedelta, timezone
+from src.infrastructure.services.contadores_funil import ContadoresFunil
+
+AGORA = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def criar_lead(i, status="novo", dias_atras=0, operadora="AMIL", economia=100.0, proposto=900.0):
+    """Cria um lead no formato retornado pelo banco"""
+    criado = (AGORA - timedelta(days=dias_atras)).isoformat()
+    return {
+        "id": f"lead-{i}",
+        "created_at": criado,
+        "updated_at": criado,
+        "status": status,
+        "origem": "scanner_pdf",
+        "operadora_atual": operadora,
+        "valor_atual": 1000.0,
+        "economia_estimada": economia,
+        "valor_proposto": proposto,
+    }
+
+
+def carregar(leads):
+    contadores = ContadoresFunil()
+    contadores.incluir_existentes(leads)
+    contadores.carregado = True
+    return contadores
+
+
+def test_contadores_reconstrucao():
+    """Agregados iniciais equivalem às views"""
+    leads = [
+        criar_lead(1, "novo", dias_atras=0),
+        criar_lead(2, "ganho", dias_atras=3, operadora="UNIMED"),
+        criar_lead(3, "ganho", dias_atras=40, economia=None),
+    ]
+    stats = carregar(leads).dashboard_stats(agora=AGORA)
+
+    assert stats["total_leads"] == 3
+    assert stats["leads_hoje"] == 1
+    assert stats["leads_semana_atual"] == 2
+    assert stats["leads_mes_atual"] == 2
+    assert stats["leads_ganhos"] == 2
+    assert stats["economia_total"] == 200.0
+    assert stats["economia_media"] == 100.0
+    assert stats["taxa_conversao"] == 66.67
+
+
+def test_contadores_escritas_incrementais():
+    """Criação, mudança de status e arquivamento mantêm o funil correto"""
+    contadores = carregar([criar_lead(1), criar_lead(2)])
+
+    novo = criar_lead(3, operadora="UNIMED")
+    contadores.registrar_criacao(novo)
+    contadores.registrar_mudanca_status(criar_lead(1), "ganho")
+    contadores.registrar_arquivamento(criar_lead(2))
+
+    pipeline = {linha["status"]: linha for linha in contadores.pipeline_vendas()}
+    assert pipeline["novo"]["quantidade"] == 1
+    assert pipeline["ganho"]["quantidade"] == 1
+    assert pipeline["ganho"]["percentual_total"] == 50.0
+    assert list(pipeline) == ["novo", "ganho"]
+
+    operadoras = contadores.leads_por_operadora()
+    assert {o["operadora_atual"]: o["leads_convertidos"] for o in operadoras} == {"AMIL": 1, "UNIMED": 0}
+
+
+def test_contadores_divergencias():
+    """Divergência com a view é detectada por status"""
+    contadores = carregar([criar_lead(1), criar_lead(2, "ganho")])
+
+    banco = [
+        {"status": "novo", "quantidade": 1, "valor_total": 900.0},
+        {"status": "ganho", "quantidade": 2, "valor_total": 1800.0},
+    ]
+    divergencias = contadores.divergencias(banco)
+
+    assert list(divergencias) == ["ganho"]
+    assert divergencias["ganho"]["contadores"] == (1, 900.0)
+
+
+def test_contadores_ignorados_antes_da_carga():
+    """Escritas antes da carga inicial não geram contagens parciais"""
+    contadores = ContadoresFunil()
+    contadores.registrar_criacao(criar_lead(1))
+
+    assert contadores.total.quantidade == 0
+
+
+def test_contadores_janelas_e_origens_da_view():
+    """Semana e mês têm 7 e 30 dias (contando hoje); todas as origens da view aparecem"""
+    leads = [criar_lead(i, dias_atras=dias) for i, dias in enumerate([0, 6, 7, 29, 30])]
+    leads[0]["origem"] = "landing"
+    leads[1]["origem"] = "calculadora_economia"
+    stats = carregar(leads).dashboard_stats(agora=AGORA)
+
+    assert stats["leads_semana_atual"] == 2
+    assert stats["leads_mes_atual"] == 4
+    assert stats["leads_landing_page"] == 1
+    assert stats["leads_calculadora"] == 1
+    assert stats["leads_scanner_pdf"] == 3
+
+
+def test_escritas_durante_a_reconstrucao_nao_se_perdem():
+    """Leads já varridos recebem a escrita; os que faltam são lidos com o valor novo"""
+    banco = [criar_lead(i, dias_atras=i) for i in range(4)]  # ordem keyset decrescente
+    atuais = carregar(banco)
+    novos = atuais.iniciar_reconstrucao()
+
+    novos.incluir_existentes(banco[:2])
+    # Escritas entre uma página e outra
+    atuais.registrar_mudanca_status(banco[0], "ganho")
+    atuais.registrar_mudanca_status(banco[3], "contatado")
+    banco[0] = {**banco[0], "status": "ganho"}
+    banco[3] = {**banco[3], "status": "contatado"}
+    criado = criar_lead(9)
+    atuais.registrar_criacao(criado)
+    banco.insert(0, criado)
+
+    novos.incluir_existentes(banco[3:])
+    atuais.concluir_reconstrucao()
+    novos.carregado = True
+
+    esperado = carregar(banco)
+    assert novos.pipeline_vendas() == esperado.pipeline_vendas()
+    assert novos.total.quantidade == atuais.total.quantidade == 5
@@ -0,0 +1,60 @@
+"""
+Testes do container de serviços e do orçamento de tempo de import
+"""
+import asyncio
+import os
+
+from fastapi.testclient import TestClient
+
+from benchmarks.bench_importacao import medir_importacao
+from main import app
+from src.infrastructure.container import Container, container
+
+# Orçamento do `import main` (ms, medido com -X importtime); antes do
+# container passava de 2 s só com openai, pandas e supabase
+ORCAMENTO_IMPORTACAO_MS = float(os.getenv("IMPORTACAO_ORCAMENTO_MS", "1500"))
+
+
+def test_import_de_main_respeita_orcamento():
+    """import main sem chaves configuradas: rápido e sem dependências pesadas"""
+    medicao = medir_importacao("main")
+
+    assert medicao["tardias_carregadas"] == []
+    assert medicao["total_ms"] <= ORCAMENTO_IMPORTACAO_MS, medicao["modulos"][:10]
+
+
+def test_container_cria_uma_vez_e_tolera_falha_no_aquecimento():
+    """Fábrica chamada só no primeiro uso; falha não derruba o aquecimento"""
+    chamadas = []
+    local = Container()
+    local.registrar("rapido", lambda: chamadas.append(1) or object())
+
+    def quebrado():
+        raise ValueError("sem chave")
+
+    local.registrar("quebrado", quebrado)
+
+    assert not local.criado("rapido")
+    assert local.rapido is local.obter("rapido")
+    assert chamadas == [1]
+
+    tempos = asyncio.run(local.aquecer())
+    assert tempos["quebrado"] is None
+    assert tempos["rapido"] is not None
+    assert not local.criado("quebrado")
+
+
+def test_pdf_sem_chave_da_openai_responde_503(monkeypatch):
+    """AIService só é criado na rota; sem OPENAI_API_KEY a rota responde 503"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    container.substituir("ai_service", None)
+    client = TestClient(app)
+
+    resposta = client.post(
+        "/api/v1/pdf/extrair",
+        files={"file": ("proposta.pdf", b"%PDF-1.4 conteudo", "application/pdf")}
+    )
+
+    assert resposta.status_code == 503
+    assert "OPENAI_API_KEY" in resposta.json()["detail"]
+    assert not container.criado("ai_service")
@@ -0,0 +1,108 @@
+"""
+Testes para o barramento de eventos de leads (stream SSE)
+"""
+import asyncio
+from src.infrastructure.services.eventos_leads import (
+    BarramentoEventosLeads,
+    DiarioEventosSQLite,
+    LEAD_CRIADO,
+    LEAD_STATUS
+)
+
+
+def lead(i, status="novo"):
+    return {"id": f"lead-{i}", "nome": f"Lead {i}", "status": status, "dados_pdf": {"grande": True}}
+
+
+async def coletar(iterador, quantidade, timeout=1.0):
+    eventos = []
+    async def consumir():
+        async for evento in iterador:
+            eventos.append(evento)
+            if len(eventos) == quantidade:
+                return
+    try:
+        await asyncio.wait_for(consumir(), timeout)
+    finally:
+        await iterador.aclose()
+    return eventos
+
+
+def test_assinante_recebe_eventos_filtrados_por_status():
+    """Filtro vale para o status novo e o anterior; projeção sem dados_pdf"""
+    async def cenario():
+        barramento = BarramentoEventosLeads()
+        iterador = barramento.assinar(ultimo_id=0, status={"ganho"}, heartbeat=5)
+        tarefa = asyncio.create_task(coletar(iterador, 2))
+        await asyncio.sleep(0)
+
+        barramento.publicar(LEAD_CRIADO, lead(1))
+        barramento.publicar(LEAD_STATUS, lead(1, "ganho"), status_anterior="proposta_enviada")
+        barramento.publicar(LEAD_STATUS, lead(1, "pausado"), status_anterior="ganho")
+
+        eventos = await tarefa
+        assert [(e.id, e.status) for e in eventos] == [(2, "ganho"), (3, "pausado")]
+        assert "dados_pdf" not in eventos[0].lead
+
+    asyncio.run(cenario())
+
+
+def test_retomada_pelo_last_event_id():
+    """Reconexão recebe só o que perdeu; fora do buffer recebe reset"""
+    async def cenario():
+        barramento = BarramentoEventosLeads(capacidade=3)
+        for i in range(1, 6):
+            barramento.publicar(LEAD_CRIADO, lead(i))
+
+        retomados = await coletar(barramento.assinar(ultimo_id=3), 2)
+        assert [e.id for e in retomados] == [4, 5]
+
+        assert (await coletar(barramento.assinar(ultimo_id=1), 1))[0].tipo == "reset"
+        assert (await coletar(barramento.assinar(ultimo_id=99), 1))[0].tipo == "reset"
+
+    asyncio.run(cenario())
+
+
+def test_heartbeat_sem_trafego():
+    """Sem eventos, o assinante recebe apenas heartbeats (None)"""
+    async def cenario():
+        barramento = BarramentoEventosLeads()
+        eventos = await coletar(barramento.assinar(heartbeat=0.01), 2)
+
+        assert eventos == [None, None]
+        assert barramento.assinantes == 0
+
+    asyncio.run(cenario())
+
+
+def test_diario_compartilha_eventos_entre_workers(tmp_path):
+    """Dois barramentos no mesmo diário: mesmos IDs, retomada em qualquer um"""
+    async def cenario():
+        caminho = str(tmp_path / "eventos.db")
+        diarios = [DiarioEventosSQLite(caminho), DiarioEventosSQLite(caminho)]
+        worker_a, worker_b = BarramentoEventosLeads(), BarramentoEventosLeads()
+        conexoes = [
+            asyncio.create_task(worker_a.conectar(diarios[0], intervalo=0.01)),
+            asyncio.create_task(worker_b.conectar(diarios[1], intervalo=0.01)),
+        ]
+        await asyncio.sleep(0.05)
+
+        tarefa = asyncio.create_task(coletar(worker_b.assinar(), 2))
+        await asyncio.sleep(0)
+        worker_a.publicar(LEAD_CRIADO, lead(1))
+        worker_b.publicar(LEAD_STATUS, lead(1, "ganho"), status_anterior="novo")
+        recebidos = await tarefa
+
+        assert sorted(e.id for e in recebidos) == [1, 2]
+        assert {e.tipo for e in recebidos} == {LEAD_CRIADO, LEAD_STATUS}
+        await asyncio.sleep(0.05)
+        # Last-Event-ID emitido pelo outro worker continua a sequência
+        assert [e.id for e in worker_a.eventos_desde(1)[0]] == [2]
+
+        for conexao in conexoes:
+            conexao.cancel()
+        await asyncio.gather(*conexoes, return_exceptions=True)
+        for diario in diarios:
+            diario.encerrar()
+
+    asyncio.run(cenario())
@@ -0,0 +1,116 @@
+"""
+Testes da exportação de leads (GET /api/v1/leads/export) e da paginação keyset
+"""
+import asyncio
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.presentation.controllers import lead_controller
+
+# Três leads no mesmo instante: o empate em created_at cai na fronteira das páginas de 2
+LEADS = [
+    ("2026-01-05T10:00:00.000000+00:00", "novo"),
+    ("2026-01-10T10:00:00.000000+00:00", "ganho"),
+    ("2026-01-10T10:00:00.000000+00:00", "novo"),
+    ("2026-01-10T10:00:00.000000+00:00", "ganho"),
+    ("2026-01-20T10:00:00.000000+00:00", "ganho"),
+]
+
+
+class RepositorioPaginasPequenas(SQLiteLeadRepository):
+    """Força páginas de 2 leads na exportação"""
+
+    def iterar_leads(self, **kwargs):
+        kwargs["tamanho_pagina"] = 2
+        return super().iterar_leads(**kwargs)
+
+
+async def popular(repo):
+    leads = []
+    for i, (criado_em, status) in enumerate(LEADS):
+        lead = novo_lead(nome=f"Lead {i}", whatsapp=f"+55119999900{i:02d}", idades=[30, i])
+        lead.update(id=f"00000000-0000-4000-8000-00000000000{i}", created_at=criado_em, status=status)
+        leads.append(lead)
+    await repo.criar_leads_lote(leads)
+
+
+def test_iterar_leads_com_empate_na_fronteira_da_pagina(tmp_path):
+    """Empates em created_at são desempatados pelo id: nenhum lead some ou repete"""
+    async def cenario():
+        repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        await popular(repo)
+
+        primeira = await repo.listar_leads_cursor(limite=2, colunas="id,created_at")
+        segunda = await repo.listar_leads_cursor(
+            cursor=(primeira[-1]["created_at"], primeira[-1]["id"]), limite=2, colunas="id,created_at"
+        )
+        assert primeira[-1]["created_at"] == segunda[0]["created_at"]
+
+        paginas = [p async for p in repo.iterar_leads(tamanho_pagina=2, colunas="id,created_at")]
+        ids = [lead["id"][-1] for pagina in paginas for lead in pagina]
+        assert [len(p) for p in paginas] == [2, 2, 1]
+        assert ids == ["4", "3", "2", "1", "0"]
+
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_iterar_leads_combina_filtros(tmp_path):
+    """Status + intervalo de datas (início inclusivo, fim exclusivo) através das páginas"""
+    async def cenario():
+        repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        await popular(repo)
+
+        async def nomes(**filtros):
+            return [
+                lead["nome"]
+                async for pagina in repo.iterar_leads(tamanho_pagina=1, colunas="id,created_at,nome", **filtros)
+                for lead in pagina
+            ]
+
+        assert await nomes(status="ganho") == ["Lead 4", "Lead 3", "Lead 1"]
+        assert await nomes(status="ganho", data_inicio="2026-01-10", data_fim="2026-01-20") == ["Lead 3", "Lead 1"]
+        assert await nomes(data_fim="2026-01-10T10:00:00.000000+00:00") == ["Lead 0"]
+        assert await nomes(status="perdido") == []
+
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_exportacao_csv_e_ndjson(tmp_path, monkeypatch):
+    """Mesmas linhas nos dois formatos, paginando através do empate, com filtros"""
+    repo = RepositorioPaginasPequenas(str(tmp_path / "leads.db"))
+    asyncio.run(popular(repo))
+    monkeypatch.setattr(lead_controller, "lead_repository", repo)
+    client = TestClient(app)
+
+    resposta = client.get("/api/v1/leads/export")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/csv")
+    assert "attachment" in resposta.headers["content-disposition"]
+    linhas = list(csv.DictReader(io.StringIO(resposta.text)))
+    assert [linha["nome"] for linha in linhas] == [f"Lead {i}" for i in range(4, -1, -1)]
+    assert json.loads(linhas[0]["idades"]) == [30, 4]
+    assert "dados_pdf" not in linhas[0]
+
+    resposta = client.get("/api/v1/leads/export", params={"formato": "ndjson", "status": "ganho"})
+    assert resposta.headers["content-type"] == "application/x-ndjson"
+    leads = [json.loads(linha) for linha in resposta.text.splitlines()]
+    assert [lead["nome"] for lead in leads] == ["Lead 4", "Lead 3", "Lead 1"]
+    assert leads[0]["idades"] == [30, 4]
+
+    # data_fim é inclusiva (o dia inteiro)
+    resposta = client.get("/api/v1/leads/export", params={
+        "formato": "ndjson", "status": "ganho", "data_inicio": "2026-01-10", "data_fim": "2026-01-10"
+    })
+    assert [json.loads(linha)["nome"] for linha in resposta.text.splitlines()] == ["Lead 3", "Lead 1"]
+
+    assert client.get("/api/v1/leads/export", params={"formato": "xlsx"}).status_code == 400
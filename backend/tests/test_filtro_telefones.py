@@ -0,0 +1,94 @@
+"""
+Testes para a normalização de telefones e o filtro de duplicidade
+"""
+import asyncio
+import pytest
+from src.domain.value_objects.telefone import normalizar_telefone
+from src.infrastructure.services.filtro_telefones import FiltroBloom, FiltroTelefones
+
+
+@pytest.mark.parametrize("entrada", [
+    "+55 11 99999-9999",
+    "11999999999",
+    "(11) 9999-9999",
+    "011 99999 9999",
+    "0 21 11 99999-9999",
+    "0055 11 999999999",
+])
+def test_normalizar_celular_sp(entrada):
+    """Formas usuais de digitação chegam ao mesmo E.164"""
+    assert normalizar_telefone(entrada) == "+5511999999999"
+
+
+def test_normalizar_fixo_e_invalidos():
+    """Fixos mantêm 8 dígitos; DDD inexistente e tamanhos errados falham"""
+    assert normalizar_telefone("(21) 3333-4444") == "+552133334444"
+    assert normalizar_telefone("55 55 99988-7766") == "+5555999887766"
+
+    for invalido in ["(20) 99999-9999", "9999-9999", "+1 415 555 0100", "(11) 89999-9999"]:
+        with pytest.raises(ValueError):
+            normalizar_telefone(invalido)
+
+
+def test_bloom_sem_falsos_negativos_e_taxa_proxima_da_configurada():
+    """Todo item adicionado é encontrado; falsos positivos ficam perto de 1%"""
+    filtro = FiltroBloom(capacidade=5000, taxa_erro=0.01)
+    for i in range(5000):
+        filtro.adicionar(f"+55119{i:08d}")
+
+    assert all(f"+55119{i:08d}" in filtro for i in range(5000))
+    falsos = sum(f"+55219{i:08d}" in filtro for i in range(20000))
+    assert falsos / 20000 < 0.02
+    assert 0.005 < filtro.taxa_erro_estimada() < 0.015
+
+
+def test_filtro_evita_consultas_de_numeros_novos():
+    """Números desconhecidos dispensam a consulta e entram nas métricas"""
+    class Repositorio:
+        async def iterar_leads(self, **_):
+            yield [{"whatsapp": "11 99999-0001"}, {"whatsapp": "+5521988880002"}]
+
+    filtro = FiltroTelefones(capacidade=1000)
+    assert filtro.pode_existir("+5511999990001")  # ainda não carregado
+
+    assert asyncio.run(filtro.reconstruir(Repositorio())) == 2
+    assert filtro.pode_existir("+5511999990001")
+    filtro.registrar_consulta(encontrado=True)
+    assert not filtro.pode_existir("+5531977770003")
+
+    filtro.adicionar("+5531977770003")
+    assert filtro.pode_existir("(31) 97777-0003")
+
+    metricas = filtro.metricas()
+    assert metricas["consultas_evitadas"] == 1
+    assert metricas["duplicados_encontrados"] == 1
+    assert metricas["taxa_falso_positivo"] == 0.0
+
+
+def test_banco_recusa_whatsapp_repetido_que_o_filtro_deixou_passar(tmp_path):
+    """Outro worker criou o número depois da última reconstrução: o índice único decide"""
+    from src.infrastructure.repositories.lead_repository import LeadDuplicadoError
+    from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+
+    async def cenario():
+        outro_worker = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        este_worker = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        filtro = FiltroTelefones(capacidade=1000)
+        await filtro.reconstruir(este_worker)
+
+        await outro_worker.criar_lead(nome="Ana", whatsapp="+5511999990001")
+        assert not filtro.pode_existir("+5511999990001")
+        with pytest.raises(LeadDuplicadoError):
+            await este_worker.criar_lead(nome="Ana de novo", whatsapp="+5511999990001")
+
+        # A consulta normaliza o número como a criação
+        existente = await este_worker.buscar_lead_por_whatsapp("(11) 99999-0001")
+        assert existente["nome"] == "Ana"
+
+        await outro_worker.arquivar_lead(existente["id"])
+        assert await este_worker.criar_lead(nome="Ana", whatsapp="+5511999990001")
+
+        await outro_worker.encerrar()
+        await este_worker.encerrar()
+
+    asyncio.run(cenario())
@@ -0,0 +1,138 @@
+"""
+Testes de idempotência (Idempotency-Key): repetição, duplicatas concorrentes e armazéns
+"""
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from src.infrastructure.services.idempotencia import (
+    ArmazemMemoria,
+    ArmazemSQLite,
+    Idempotencia,
+    Registro,
+    RespostaGuardada,
+)
+from src.presentation.middlewares.idempotencia import IdempotenciaMiddleware
+
+
+def _app(idempotencia: Idempotencia):
+    app = FastAPI()
+    execucoes = {"leads": 0, "instavel": 0}
+
+    @app.post("/api/v1/leads")
+    async def criar_lead(dados: dict):
+        execucoes["leads"] += 1
+        await asyncio.sleep(0.05)
+        return {"id": execucoes["leads"], "nome": dados["nome"]}
+
+    @app.post("/api/v1/instavel")
+    async def instavel():
+        execucoes["instavel"] += 1
+        if execucoes["instavel"] == 1:
+            raise HTTPException(status_code=503, detail="indisponível")
+        return {"tentativa": execucoes["instavel"]}
+
+    app.add_middleware(IdempotenciaMiddleware, idempotencia=idempotencia)
+    return app, execucoes
+
+
+def test_duplicatas_concorrentes_executam_uma_vez_e_repetem_a_resposta():
+    app, execucoes = _app(Idempotencia(ArmazemMemoria(), espera_maxima=5))
+
+    async def cenario():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            cabecalhos = {"Idempotency-Key": "envio-1"}
+            respostas = await asyncio.gather(*[
+                cliente.post("/api/v1/leads", json={"nome": "Ana"}, headers=cabecalhos) for _ in range(3)
+            ])
+            assert execucoes["leads"] == 1
+            assert {r.status_code for r in respostas} == {200}
+            assert all(r.json() == {"id": 1, "nome": "Ana"} for r in respostas)
+            assert sum(r.headers.get("idempotency-replayed") == "true" for r in respostas) == 2
+
+            # Mais tarde: a mesma resposta, sem executar de novo
+            repetida = await cliente.post("/api/v1/leads", json={"nome": "Ana"}, headers=cabecalhos)
+            assert repetida.json() == {"id": 1, "nome": "Ana"} and execucoes["leads"] == 1
+
+            # Mesma chave com outro corpo é erro do cliente
+            conflito = await cliente.post("/api/v1/leads", json={"nome": "Bia"}, headers=cabecalhos)
+            assert conflito.status_code == 422
+
+            # Sem a chave, cada POST executa
+            await cliente.post("/api/v1/leads", json={"nome": "Ana"})
+            assert execucoes["leads"] == 2
+
+    asyncio.run(cenario())
+
+
+def test_erro_do_servidor_nao_e_guardado():
+    """503 não é definitivo: a repetição com a mesma chave executa de novo"""
+    app, execucoes = _app(Idempotencia(ArmazemMemoria()))
+
+    async def cenario():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            cabecalhos = {"Idempotency-Key": "k"}
+            assert (await cliente.post("/api/v1/instavel", headers=cabecalhos)).status_code == 503
+            segunda = await cliente.post("/api/v1/instavel", headers=cabecalhos)
+            assert segunda.status_code == 200 and "idempotency-replayed" not in segunda.headers
+            terceira = await cliente.post("/api/v1/instavel", headers=cabecalhos)
+            assert terceira.json() == {"tentativa": 2} and terceira.headers["idempotency-replayed"] == "true"
+            assert execucoes["instavel"] == 2
+
+    asyncio.run(cenario())
+
+
+def test_armazem_memoria_limitado_com_ttl():
+    agora = [0.0]
+    armazem = ArmazemMemoria(capacidade=2, ttl=10, relogio=lambda: agora[0])
+    resposta = RespostaGuardada(200, [], b"{}")
+
+    async def cenario():
+        for chave in ("a", "b", "c"):
+            assert await armazem.reservar(chave, "i", prazo=5) is None
+            await armazem.concluir(chave, "i", resposta)
+        # "a" saiu pela capacidade; "c" continua guardada
+        assert await armazem.reservar("a", "i", prazo=5) is None
+        assert await armazem.reservar("c", "i", prazo=5) == Registro("i", resposta)
+
+        agora[0] = 11.0
+        assert await armazem.reservar("c", "i", prazo=5) is None
+
+    asyncio.run(cenario())
+
+
+def test_armazem_sqlite_compartilhado_entre_workers(tmp_path):
+    """Dois armazéns no mesmo arquivo (dois workers): reserva, espera e prazo da reserva"""
+    caminho = str(tmp_path / "idempotencia.db")
+    worker_a, worker_b = ArmazemSQLite(caminho), ArmazemSQLite(caminho)
+    resposta = RespostaGuardada(201, [("content-type", "application/json")], b'{"id":7}')
+
+    async def cenario():
+        assert await worker_a.reservar("k", "i", prazo=30) is None
+        assert await worker_b.reservar("k", "i", prazo=30) == Registro("i", None)
+
+        # O worker B espera a execução do A (consultando o arquivo)
+        idempotencia_b = Idempotencia(worker_b, espera_maxima=5)
+
+        async def nao_deve_executar():
+            raise AssertionError("a chave está reservada pelo worker A")
+
+        espera = asyncio.create_task(idempotencia_b.executar("k", "i", nao_deve_executar))
+        await asyncio.sleep(0.1)
+        await worker_a.concluir("k", "i", resposta)
+        assert await espera == ("repetida", resposta)
+
+        # Reserva de um worker que morreu expira e outro assume
+        assert await worker_a.reservar("orfa", "i", prazo=0.05) is None
+        time.sleep(0.06)
+        assert await worker_b.reservar("orfa", "i", prazo=30) is None
+
+    try:
+        asyncio.run(cenario())
+    finally:
+        worker_a.encerrar()
+        worker_b.encerrar()
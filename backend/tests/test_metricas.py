@@ -0,0 +1,144 @@
+"""
+Testes das métricas (registro, formato Prometheus e middleware HTTP)
+"""
+import asyncio
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.infrastructure.services.metricas import RegistroMetricas, cronometrado
+from src.presentation.middlewares.metricas_http import MetricasHTTPMiddleware
+
+client = TestClient(app)
+
+
+def _valor(texto: str, prefixo: str) -> float:
+    for linha in texto.splitlines():
+        if linha.startswith(prefixo + " "):
+            return float(linha.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histograma_formato_prometheus():
+    """Buckets acumulados, +Inf, _sum e _count por série"""
+    registro = RegistroMetricas()
+    latencia = registro.histograma("latencia_seconds", "Latência", ("rota",), limites=(0.1, 1.0))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        latencia.observar(valor, "/a")
+    registro.contador("erros_total", "Erros", ("tipo",)).incrementar('x"y')
+
+    texto = registro.renderizar()
+
+    assert "# TYPE latencia_seconds histogram" in texto
+    assert 'latencia_seconds_bucket{rota="/a",le="0.1"} 2' in texto
+    assert 'latencia_seconds_bucket{rota="/a",le="1"} 3' in texto
+    assert 'latencia_seconds_bucket{rota="/a",le="+Inf"} 4' in texto
+    assert 'latencia_seconds_count{rota="/a"} 4' in texto
+    assert 'latencia_seconds_sum{rota="/a"} 3.65' in texto
+    assert 'erros_total{tipo="x\\"y"} 1' in texto
+    assert latencia.rotulado("/a").quantil(0.5) == 0.1
+
+    # Pedir a mesma métrica de novo devolve a mesma família
+    assert registro.histograma("latencia_seconds", "Latência", ("rota",)) is latencia
+
+
+def test_cronometrado_funcoes_sincronas_e_async():
+    """O decorator mede as duas formas e também as chamadas que falham"""
+    registro = RegistroMetricas()
+    tempo = registro.histograma("tempo_seconds", "Tempo", ("operacao",))
+
+    @cronometrado(tempo, "sync")
+    def dobrar(x):
+        return 2 * x
+
+    @cronometrado(tempo, "async")
+    async def falhar():
+        raise RuntimeError("falha")
+
+    async def cenario():
+        try:
+            await falhar()
+        except RuntimeError:
+            pass
+
+    assert dobrar(2) == 4
+    asyncio.run(cenario())
+
+    assert tempo.rotulado("sync").total == 1
+    assert tempo.rotulado("async").total == 1
+
+
+def test_endpoint_metrics_rotula_pelo_template_da_rota():
+    """/metrics expõe latência e status por template, não pela URL"""
+    antes = client.get("/metrics").text
+    prefixo = 'http_requests_total{method="POST",route="/api/v1/cotacao/calcular",status="200"}'
+
+    client.post("/api/v1/cotacao/calcular", json={"idades": [30], "tipo": "ADESAO", "operadora": "AMIL"})
+    client.post("/api/v1/cotacao/calcular", json={"idades": [150], "tipo": "ADESAO", "operadora": "AMIL"})
+    client.get("/rota-que-nao-existe/123")
+
+    resposta = client.get("/metrics")
+    texto = resposta.text
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert _valor(texto, prefixo) == _valor(antes, prefixo) + 1
+    assert 'route="/api/v1/cotacao/calcular",status="422"}' in texto
+    assert 'http_requests_total{method="GET",route="<sem_rota>",status="404"}' in texto
+    assert "/rota-que-nao-existe/123" not in texto
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/v1/cotacao/calcular"}' in texto
+    assert 'cotacao_calculo_seconds_count{operacao="calcular"}' in texto
+    # A própria coleta está em andamento enquanto o texto é montado
+    assert 'http_requests_in_progress{method="GET",route="/metrics"} 1' in texto
+
+
+def test_middleware_conta_excecao_como_500():
+    """Exceção não tratada na aplicação vira status 500 na métrica"""
+    registro = RegistroMetricas()
+
+    async def aplicacao(scope, receive, send):
+        raise RuntimeError("falha")
+
+    middleware = MetricasHTTPMiddleware(aplicacao, registro)
+
+    async def cenario():
+        async def receber():
+            return {"type": "http.request", "body": b""}
+
+        async def enviar(mensagem):
+            pass
+
+        try:
+            await middleware({"type": "http", "method": "GET", "path": "/x"}, receber, enviar)
+        except RuntimeError:
+            pass
+
+    asyncio.run(cenario())
+
+    assert middleware.requisicoes.series == {("GET", "<sem_rota>", "500"): 1}
+    assert middleware._ativos == {}
+
+
+def test_soma_das_metricas_dos_workers(tmp_path):
+    """/metrics com vários workers: soma os vivos e guarda os contadores dos que saíram"""
+    from src.infrastructure.services.metricas_workers import MetricasWorkers
+
+    def registro(requisicoes, conexoes):
+        r = RegistroMetricas()
+        r.contador("requisicoes_total", "Requisições", ("rota",)).incrementar("/a", quantidade=requisicoes)
+        r.gauge("conexoes", "Conexões", (), lambda: {(): conexoes})
+        return r
+
+    proprio = MetricasWorkers(str(tmp_path), registro=registro(2, 1))
+    # Outro worker vivo (o pid do processo pai) e um que já saiu (pid inexistente)
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(registro(3, 4).exportar()))
+    (tmp_path / "999999999.json").write_text(json.dumps(registro(5, 7).exportar()))
+
+    texto = asyncio.run(proprio.renderizar())
+
+    assert 'requisicoes_total{rota="/a"} 10' in texto
+    assert _valor(texto, "conexoes") == 5
+    assert not (tmp_path / "999999999.json").exists()
+    assert 'requisicoes_total{rota="/a"} 10' in asyncio.run(proprio.renderizar())
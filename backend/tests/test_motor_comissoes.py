@@ -0,0 +1,115 @@
+"""
+Testes para o motor de comissões dos corretores
+"""
+import asyncio
+import pandas as pd
+from src.infrastructure.repositories.sqlite_comissao_repository import SQLiteComissaoRepository
+from src.infrastructure.services.motor_comissoes import (
+    JobComissoes,
+    calcular_comissoes,
+    periodo_do_mes
+)
+
+COLUNAS = ["id", "corretor_id", "valor_mensalidade", "data_vigencia", "modalidade", "status"]
+
+PRODUCOES = [
+    ("p1", "c1", 1000.0, "2026-01-31", "PME", "Implantada"),
+    ("p2", "c1", 500.0, "2026-01-10", "Adesão", "Implantada"),
+    ("p3", "c2", 300.0, "2026-01-05", "Outra", "Implantada"),
+    ("p4", "c2", 300.0, "2026-01-05", "PME", "Cancelada"),
+    ("p5", "c9", 300.0, "2026-01-05", "PME", "Implantada"),
+]
+
+
+def test_parcelas_pela_grade_e_percentual_do_corretor():
+    """PME em 3 parcelas, adesão em 2, modalidade desconhecida em 1"""
+    producoes = pd.DataFrame(PRODUCOES, columns=COLUNAS)
+    parcelas, relatorios, descartes = calcular_comissoes(
+        producoes, {"c1": 80.0, "c2": 100.0}, "2026-01", data_geracao="2026-02-01"
+    )
+
+    pme = parcelas[parcelas["producao_id"] == "p1"]
+    assert pme["valor_parcela"].tolist() == [800.0, 800.0, 800.0]
+    # Vigência no dia 31: vencimentos no último dia dos meses curtos
+    assert pme["data_vencimento"].tolist() == ["2026-01-31", "2026-02-28", "2026-03-31"]
+    assert parcelas[parcelas["producao_id"] == "p2"]["numero_parcela"].tolist() == [1, 2]
+    assert parcelas[parcelas["producao_id"] == "p3"]["valor_parcela"].tolist() == [300.0]
+    assert descartes == {"nao_implantadas": 1, "sem_corretor": 1, "sem_valor_ou_vigencia": 0}
+
+    resumo = relatorios.set_index("corretor_id")
+    assert resumo.loc["c1", "valor_bruto"] == 3 * 800.0 + 2 * 400.0
+    assert (resumo.loc["c1", "producoes"], resumo.loc["c1", "parcelas"]) == (2, 5)
+    assert resumo.loc["c2", "numero_relatorio"] == "COM-202601-C2"
+
+
+def test_periodo_do_mes():
+    assert periodo_do_mes("2026-12") == ("2026-12-01", "2027-01-01")
+
+
+def test_reprocessar_mes_preserva_parcelas_pagas(tmp_path):
+    """Mesmo mês duas vezes: nada duplica, o que foi pago não muda"""
+    async def cenario():
+        repo = SQLiteComissaoRepository(str(tmp_path / "comissoes.db"))
+        await repo.inserir_corretores([
+            {"id": "c1", "nome": "Corretor 1", "comissao_padrao_pct": 80.0},
+            {"id": "c2", "nome": "Corretor 2", "comissao_padrao_pct": 100.0},
+        ])
+        await repo.inserir_producoes([
+            {**dict(zip(COLUNAS, p)), "nome_segurado": f"Segurado {p[0]}"} for p in PRODUCOES
+        ] + [{
+            "id": "fora", "corretor_id": "c1", "nome_segurado": "Outro mês",
+            "valor_mensalidade": 100.0, "data_vigencia": "2026-02-01", "status": "Implantada"
+        }])
+
+        job = JobComissoes(repositorio=repo, tamanho_pagina=2)
+        primeiro = await job.executar("2026-01")
+        assert primeiro["estado"] == "concluido"
+        assert (primeiro["producoes"], primeiro["parcelas"], primeiro["corretores"]) == (5, 6, 2)
+
+        parcelas = await repo.listar_parcelas("2026-01")
+        await repo.marcar_parcela_paga(parcelas[0]["id"])
+
+        # Corretor 1 muda de percentual: só as parcelas pendentes são recalculadas
+        await repo._transacao(lambda conn: conn.execute(
+            "UPDATE corretores SET comissao_padrao_pct = 100 WHERE id = 'c1'"
+        ))
+        segundo = await job.executar("2026-01")
+        assert segundo["parcelas"] == 6
+
+        regravadas = await repo.listar_parcelas("2026-01")
+        assert [p["id"] for p in regravadas] == [p["id"] for p in parcelas]
+        assert (regravadas[0]["status_comissao"], regravadas[0]["valor_parcela"]) == ("paga", 800.0)
+        assert regravadas[1]["valor_parcela"] == 1000.0
+
+        relatorios = await repo.listar_relatorios("2026-01")
+        assert [r["corretor_id"] for r in relatorios] == ["c1", "c2"]
+        assert relatorios[0]["metadata"] == {"origem": "motor_comissoes", "producoes": 2, "parcelas": 5}
+
+        repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_job_exclusivo_entre_workers(tmp_path):
+    """Com a trava compartilhada, o segundo worker recusa (409) e aponta quem executa"""
+    from src.infrastructure.services.lideranca import TravaLideranca
+
+    async def cenario():
+        caminho = str(tmp_path / "comissoes.lock")
+        worker_a = JobComissoes(trava=TravaLideranca(caminho))
+        worker_b = JobComissoes(trava=TravaLideranca(caminho))
+        liberar = asyncio.Event()
+
+        async def executar(mes_referencia):
+            await liberar.wait()
+
+        worker_a.executar = executar
+        assert worker_a.iniciar("2026-01") is True
+        assert worker_b.iniciar("2026-01") is False
+        assert worker_b.progresso()["estado"] == "executando_em_outro_worker"
+
+        liberar.set()
+        await asyncio.sleep(0.01)
+        assert worker_b.trava.ocupante() is None
+
+    asyncio.run(cenario())
@@ -0,0 +1,127 @@
+"""
+Testes para o motor de regras de automação
+"""
+import asyncio
+import pytest
+from src.infrastructure.repositories.sqlite_regra_repository import SQLiteRegraRepository
+from src.infrastructure.services.motor_regras import MotorRegras, compilar_indice
+from src.infrastructure.services.predicados_regras import ExpressaoInvalida, compilar_predicado
+
+# Mesmos textos do seed de 20260210_create_automacoes_regras_tables.sql
+AUTOMACOES = [
+    {"id": "a1", "nome": "Boas-vindas Lead", "trigger_evento": "Novo lead cadastrado",
+     "acoes": ["WhatsApp: Mensagem de boas-vindas", "Notificação: Alerta equipe"]},
+    {"id": "a2", "nome": "Follow-up Automático", "trigger_evento": "Lead sem contato > 48h",
+     "acoes": ["Notificação: Alerta corretor"]},
+    {"id": "a3", "nome": "Lead Perdido - Reengajamento", "trigger_evento": "Lead marcado como perdido",
+     "acoes": ["Tarefa: Recontato em 30d"]},
+    {"id": "a4", "nome": "Perdido caro", "trigger_evento": "Lead marcado como perdido",
+     "acoes": ["Notificação: Gestor"], "metadata": {"condicao": "valor_atual >= 3000"}},
+]
+REGRAS_IA = [
+    {"id": "r1", "nome": "Auto-resposta Lead Novo", "condicao": "Lead status = novo",
+     "acao": "Enviar template WhatsApp de boas-vindas"},
+    {"id": "r2", "nome": "Escalar Campanha", "condicao": "CPL < meta por 3 dias consecutivos",
+     "acao": "Aumentar daily_budget em 20%"},
+    {"id": "r3", "nome": "Família grande", "condicao": "vidas >= 4 and tipo_contratacao != 'PME'",
+     "acao": "Tarefa: Priorizar"},
+]
+
+
+def test_predicados_seguros():
+    assert compilar_predicado("Lead status = novo")({"status": "novo"})
+    assert compilar_predicado("status in ['ganho', 'perdido'] and not valor_atual < 100")(
+        {"status": "perdido", "valor_atual": 150}
+    )
+    # Campo ausente não quebra a comparação
+    assert not compilar_predicado("economia_estimada > 500")({})
+    assert compilar_predicado("nome == 'a=b'")({"nome": "a=b"})
+
+    for expressao in ["__import__('os').system('x')", "status.upper() == 'NOVO'",
+                      "CPL > 2", "(lambda: 1)()", "[x for x in idades]"]:
+        with pytest.raises(ExpressaoInvalida):
+            compilar_predicado(expressao)
+
+
+def test_indice_por_evento():
+    """Só as regras com evento de lead entram no índice"""
+    indice, nao_suportadas = compilar_indice({"automacoes": AUTOMACOES, "regras_ia": REGRAS_IA})
+
+    assert [r.id for r in indice["lead_criado"].regras] == ["a1", "r1", "r3"]
+    assert [r.id for r in indice["lead_status"].regras] == ["a3", "a4", "r1", "r3"]
+    assert indice["lead_arquivado"].regras == ()
+    assert sorted(r["id"] for r in nao_suportadas) == ["a2", "r2"]
+
+
+def test_eventos_disparam_acoes_e_contadores_em_lote(tmp_path):
+    async def cenario():
+        repo = SQLiteRegraRepository(str(tmp_path / "regras.db"))
+        await repo.inserir_regras("automacoes", AUTOMACOES)
+        await repo.inserir_regras("regras_ia", REGRAS_IA + [
+            {"id": "r9", "nome": "Inativa", "condicao": "lead_criado", "acao": "X", "ativa": False}
+        ])
+
+        motor = MotorRegras(repositorio=repo, trabalhadores=2, intervalo_gravacao=3600)
+        executadas = []
+
+        async def whatsapp(acao, regra, contexto):
+            executadas.append((regra.id, contexto["id"]))
+
+        async def tarefa(acao, regra, contexto):
+            pass
+
+        async def notificacao(acao, regra, contexto):
+            raise RuntimeError("serviço de notificação fora do ar")
+
+        motor.registrar_acao("WhatsApp", whatsapp)
+        motor.registrar_acao("Tarefa", tarefa)
+        motor.registrar_acao("Notificação", notificacao)
+        await motor.iniciar()
+
+        assert motor.processar("lead_criado", {"id": "L1", "status": "novo", "idades": [30]}) == 2
+        assert motor.processar("lead_status", {"id": "L1", "status": "perdido", "valor_atual": 5000},
+                               status_anterior="novo") == 2
+        assert motor.processar("lead_status", {"id": "L2", "status": "perdido", "valor_atual": 100}) == 1
+        assert motor.processar("lead_criado", {"id": "L3", "status": "novo", "idades": [1, 2, 30, 40]}) == 3
+        await motor.aguardar_acoes()
+
+        assert executadas == [("a1", "L1"), ("a1", "L3")]
+        metricas = motor.metricas()
+        assert metricas["disparos"] == 8
+        assert metricas["acoes_executadas"] == {"whatsapp": 2, "tarefa": 3}
+        assert (metricas["acoes_com_falha"], metricas["acoes_sem_executor"]) == (3, 2)
+
+        # Só contam as regras com ao menos uma ação executada; nada gravado até
+        # a gravação em lote (aqui, no encerramento)
+        assert (await repo.obter_contadores("automacoes"))["a1"]["execucoes"] == 0
+        await motor.encerrar()
+
+        automacoes = await repo.obter_contadores("automacoes")
+        regras = await repo.obter_contadores("regras_ia")
+        assert {k: v["execucoes"] for k, v in automacoes.items()} == {"a1": 2, "a2": 0, "a3": 2, "a4": 0}
+        assert {k: v["execucoes"] for k, v in regras.items()} == {"r1": 0, "r2": 0, "r3": 1, "r9": 0}
+        assert automacoes["a1"]["ultima_execucao"].startswith("20")
+
+        repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_disparo_descartado_nao_conta_execucao():
+    """Fila cheia: as ações são descartadas e a regra não conta como executada"""
+    async def cenario():
+        motor = MotorRegras(repositorio=object(), capacidade_fila=1)
+        motor._indice, _ = compilar_indice({"automacoes": AUTOMACOES})
+
+        async def whatsapp(acao, regra, contexto):
+            pass
+
+        motor.registrar_acao("WhatsApp", whatsapp)
+        for i in range(3):
+            motor.processar("lead_criado", {"id": f"L{i}", "status": "novo"})
+
+        metricas = motor.metricas()
+        assert (metricas["disparos"], metricas["acoes_descartadas"]) == (3, 4)
+        assert metricas["contadores_pendentes"] == 0
+
+    asyncio.run(cenario())
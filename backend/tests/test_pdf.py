@@ -1,12 +1,19 @@
 """
 Testes para o serviço de extração de PDF
 """
+import os
 import pytest
 from src.infrastructure.services.ai_service import AIService
 import io
 from pypdf import PdfWriter
 
 
+@pytest.fixture(autouse=True)
+def chave_openai(monkeypatch):
+    """AIService só exige a chave para montar o cliente; nenhum teste daqui chama a API"""
+    monkeypatch.setenv("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY") or "sk-teste")
+
+
 def criar_pdf_teste() -> bytes:
     """Cria um PDF de teste simples"""
     writer = PdfWriter()
@@ -0,0 +1,135 @@
+"""
+Testes do perfilamento sob demanda (middleware, perfilador e rotas de debug)
+"""
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from main import app as app_principal
+from src.infrastructure.services.perfilador import AmostradorPilhas, Perfilador, perfilador
+from src.presentation.middlewares.perfilamento import PerfilamentoMiddleware
+
+
+def _app_com_perfilador(perfil: Perfilador) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/calculo")
+    async def calculo():
+        return {"soma": sum(i * i for i in range(20000))}
+
+    @app.post("/alocar")
+    async def alocar():
+        blocos = [bytearray(1024) for _ in range(200)]
+        return {"blocos": len(blocos)}
+
+    app.add_middleware(PerfilamentoMiddleware, perfilador=perfil)
+    return app
+
+
+def test_requisicao_sem_pedido_ou_token_invalido_nao_e_perfilada():
+    """Sem X-Perfil, ou com token errado, nada é capturado"""
+    perfil = Perfilador(token="segredo")
+    client = TestClient(_app_com_perfilador(perfil))
+
+    assert client.get("/calculo").status_code == 200
+    resposta = client.get("/calculo", headers={"X-Perfil": "cprofile", "X-Perfil-Token": "errado"})
+
+    assert resposta.status_code == 200
+    assert "x-perfil-id" not in resposta.headers
+    assert perfil.resultados.listar() == []
+
+
+def test_cprofile_da_requisicao_pelo_cabecalho():
+    """O perfil fica guardado com o id devolvido em X-Perfil-Id"""
+    perfil = Perfilador(token="segredo")
+    client = TestClient(_app_com_perfilador(perfil))
+
+    resposta = client.get("/calculo", headers={"X-Perfil": "cprofile", "X-Perfil-Token": "segredo"})
+
+    assert resposta.status_code == 200
+    assert resposta.json()["soma"] > 0
+    capturado = perfil.resultados.obter(resposta.headers["x-perfil-id"])
+    assert capturado["status"] == "concluido"
+    assert capturado["rota"] == "GET /calculo"
+    assert "calculo" in capturado["texto"]
+    assert capturado["binario"]
+
+
+def test_memoria_e_modo_invalido_pela_query():
+    """Modo pela query string, token só no cabeçalho; modo desconhecido não derruba a requisição"""
+    perfil = Perfilador(token="segredo")
+    client = TestClient(_app_com_perfilador(perfil))
+
+    # Token na URL vazaria em logs de acesso: é ignorado
+    resposta = client.post("/alocar?perfil=memoria&perfil_token=segredo")
+    assert "x-perfil-id" not in resposta.headers
+
+    resposta = client.post("/alocar?perfil=memoria", headers={"X-Perfil-Token": "segredo"})
+    capturado = perfil.resultados.obter(resposta.headers["x-perfil-id"])
+    assert capturado["tipo"] == "memoria"
+    assert capturado["texto"].startswith("Pico durante a requisição")
+    assert capturado["pico_bytes"] > 0
+
+    resposta = client.get("/calculo", headers={"X-Perfil": "gprof", "X-Perfil-Token": "segredo"})
+    assert resposta.status_code == 200
+    assert "modo desconhecido" in resposta.headers["x-perfil-erro"]
+
+
+def test_amostrador_gera_pilhas_folded():
+    """Sessão por tempo limitado para sozinha e gera linhas 'pilha contagem'"""
+    terminou = []
+    amostrador = AmostradorPilhas(0.001, duracao=0.05, ao_terminar=terminou.append).iniciar()
+
+    fim = time.perf_counter() + 0.2
+    while not terminou and time.perf_counter() < fim:
+        sum(i for i in range(1000))
+
+    assert terminou == [amostrador]
+    assert amostrador.amostras > 0
+    linha = amostrador.folded().splitlines()[0]
+    pilha, contagem = linha.rsplit(" ", 1)
+    assert int(contagem) >= 1
+    assert pilha.startswith("MainThread;")
+
+
+def test_rotas_de_debug_exigem_token(monkeypatch):
+    """Desligado responde 404; ligado exige o token e serve a sessão"""
+    client = TestClient(app_principal)
+
+    monkeypatch.setattr(perfilador, "token", None)
+    assert client.get("/api/v1/debug/perfis/").status_code == 404
+
+    monkeypatch.setattr(perfilador, "token", "segredo")
+    assert client.get("/api/v1/debug/perfis/").status_code == 401
+
+    cabecalhos = {"X-Perfil-Token": "segredo"}
+    resposta = client.post("/api/v1/debug/perfis/sessao?segundos=0.05&intervalo_ms=1", headers=cabecalhos)
+    assert resposta.status_code == 200
+    perfil_id = resposta.json()["id"]
+
+    fim = time.perf_counter() + 2
+    while perfilador.resultados.obter(perfil_id)["status"] != "concluido" and time.perf_counter() < fim:
+        time.sleep(0.01)
+
+    resposta = client.get(f"/api/v1/debug/perfis/{perfil_id}", headers=cabecalhos)
+    assert resposta.status_code == 200
+    assert resposta.text.strip()
+    assert client.get(f"/api/v1/debug/perfis/{perfil_id}?formato=prof", headers=cabecalhos).status_code == 400
+    assert client.get("/api/v1/debug/perfis/inexistente", headers=cabecalhos).status_code == 404
+
+
+def test_perfis_compartilhados_entre_workers(tmp_path):
+    """Com diretório, o perfil capturado num worker é lido e listado por outro"""
+    from src.infrastructure.services.perfilador import ResultadosPerfil
+
+    worker_a = ResultadosPerfil(capacidade=2, diretorio=str(tmp_path))
+    worker_b = ResultadosPerfil(capacidade=2, diretorio=str(tmp_path))
+    for i in range(3):
+        perfil = worker_a.criar("cprofile", rota=f"GET /{i}")
+        worker_a.concluir(perfil, texto="pilhas", binario=b"\x00prof")
+
+    lido = worker_b.obter(perfil["id"])
+    assert lido["rota"] == "GET /2" and lido["binario"] == b"\x00prof"
+    assert [p["rota"] for p in worker_b.listar()] == ["GET /2", "GET /1"]
+    assert worker_b.obter("../fora-do-diretorio") is None
@@ -0,0 +1,100 @@
+"""
+Testes para o score de priorização de leads
+"""
+import asyncio
+import sqlite3
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.infrastructure.services.pontuacao_leads import (
+    pontuar_lead,
+    pontuar_leads,
+    recalcular_scores
+)
+
+AGORA = "2026-10-19T12:00:00+00:00"
+
+
+def lead(**campos):
+    return {
+        "id": "1", "created_at": AGORA, "status": "novo", "operadora_atual": "Amil",
+        "valor_atual": 1500.0, "economia_estimada": 400.0, "idades": [35, 33, 5],
+        "historico": [], **campos
+    }
+
+
+def test_score_pelos_sinais_do_lead():
+    """Mais economia, família maior e atividade recente pontuam mais"""
+    base = pontuar_lead(lead(), AGORA)
+
+    assert pontuar_lead(lead(economia_estimada=1500.0), AGORA) > base
+    assert pontuar_lead(lead(idades=[35]), AGORA) < base
+    assert pontuar_lead(lead(idades=[35, 70]), AGORA) < pontuar_lead(lead(idades=[35, 30]), AGORA)
+    assert pontuar_lead(lead(operadora_atual=None), AGORA) == base - 10
+    assert pontuar_lead(lead(created_at="2026-10-16T12:00:00+00:00"), AGORA) == base - 10
+    assert pontuar_lead(lead(status="ganho"), AGORA) == 0.0
+    assert 0 < base <= 100
+
+
+def test_recencia_pela_ultima_mudanca_de_status():
+    """Histórico recente conta como atividade, mesmo em lead antigo"""
+    antigo = lead(created_at="2026-09-01T00:00:00+00:00")
+    reativado = {
+        **antigo, "status": "contatado",
+        "historico": [{"timestamp": "2026-10-19T11:00:00", "status_novo": "contatado"}]
+    }
+
+    assert pontuar_lead(reativado, AGORA) > pontuar_lead(antigo, AGORA) + 15
+    assert list(pontuar_leads([antigo, reativado], AGORA)) == [
+        pontuar_lead(antigo, AGORA), pontuar_lead(reativado, AGORA)
+    ]
+
+
+def test_score_gravado_e_listagem_ordenada(tmp_path):
+    """Score na criação e na mudança de status; recálculo só grava o que mudou"""
+    caminho = str(tmp_path / "leads.db")
+
+    # Banco de uma versão anterior, sem a coluna score
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("CREATE TABLE insurance_leads (id TEXT PRIMARY KEY, created_at TEXT NOT NULL, "
+                    "updated_at TEXT, nome TEXT NOT NULL, whatsapp TEXT NOT NULL, email TEXT, "
+                    "operadora_atual TEXT, valor_atual REAL, idades TEXT NOT NULL DEFAULT '[]', "
+                    "economia_estimada REAL, valor_proposto REAL, tipo_contratacao TEXT, "
+                    "status TEXT NOT NULL DEFAULT 'novo', origem TEXT, prioridade TEXT, "
+                    "observacoes TEXT, dados_pdf TEXT, historico TEXT DEFAULT '[]', "
+                    "atribuido_a TEXT, arquivado INTEGER NOT NULL DEFAULT 0)")
+    conexao.execute("INSERT INTO insurance_leads (id, created_at, nome, whatsapp) "
+                    "VALUES ('antigo', '2026-01-01T00:00:00+00:00', 'Lead Antigo', '+5511911112222')")
+    conexao.commit()
+    conexao.close()
+
+    async def cenario():
+        repo = SQLiteLeadRepository(caminho)
+        await repo.iniciar()
+
+        pequeno = await repo.criar_lead(nome="Pequeno", whatsapp="+5511911110001", idades=[40])
+        grande = await repo.criar_lead(
+            nome="Grande", whatsapp="+5511911110002", idades=[40, 38, 10, 8],
+            valor_atual=3000.0, economia_estimada=900.0, operadora_atual="Amil"
+        )
+        await repo.criar_leads_lote([novo_lead(nome="Lote", whatsapp="+5511911110003", idades=[30, 2])])
+
+        assert grande["score"] > pequeno["score"]
+        ordenados = await repo.listar_leads(ordenar="score")
+        assert [l["nome"] for l in ordenados] == ["Grande", "Lote", "Pequeno", "Lead Antigo"]
+        assert ordenados[-1]["score"] is None
+
+        assert await repo.atualizar_status_lead(pequeno["id"], "proposta_enviada")
+        assert (await repo.buscar_lead_por_id(pequeno["id"]))["score"] > pequeno["score"]
+
+        assert await repo.atualizar_status_lead(grande["id"], "ganho")
+        # Encerrado vale 0; sem score (antes do recálculo) fica por último
+        assert [l["nome"] for l in await repo.listar_leads(ordenar="score")][-2:] == ["Grande", "Lead Antigo"]
+
+        primeiro = await recalcular_scores(repo)
+        assert (primeiro["processados"], primeiro["atualizados"]) == (4, 1)
+        assert (await repo.buscar_lead_por_id("antigo"))["score"] is not None
+        assert (await recalcular_scores(repo))["atualizados"] == 0
+
+        await repo.encerrar()
+
+    asyncio.run(cenario())
@@ -0,0 +1,138 @@
+"""
+Testes para a reprecificação em lote da economia estimada dos leads
+"""
+import asyncio
+import os
+import random
+import numpy as np
+from src.domain.entities.cotacao import Beneficiario, Cotacao
+from src.infrastructure.repositories.lead_repository import novo_lead
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.infrastructure.services.reprecificacao_leads import JobReprecificacao, calcular_economias
+from src.infrastructure.services.servico_calculo_cotacao import ServicoCalculoCotacao
+
+
+def test_calcular_lote_igual_ao_calculo_individual():
+    """Mesmo total de calcular() para cada cotação e operadora"""
+    servico = ServicoCalculoCotacao()
+    aleatorio = random.Random(7)
+    cotacoes = [
+        ([aleatorio.randint(0, 120) for _ in range(aleatorio.randint(1, 6))],
+         aleatorio.choice(["ADESAO", "PME", "EMPRESARIAL"]))
+        for _ in range(50)
+    ]
+
+    idades = np.array([i for lista, _ in cotacoes for i in lista])
+    indice = np.array([n for n, (lista, _) in enumerate(cotacoes) for _ in lista])
+    lote = servico.calcular_lote(idades, indice, [tipo for _, tipo in cotacoes])
+
+    for n, (lista, tipo) in enumerate(cotacoes):
+        for operadora in servico.obter_operadoras_disponiveis():
+            cotacao = Cotacao(
+                beneficiarios=[Beneficiario(idade=i, tipo_vinculo="TITULAR") for i in lista],
+                tipo_contratacao=tipo,
+                operadora=operadora
+            )
+            esperado = asyncio.run(servico.calcular(cotacao))["valor_total"]
+            assert round(lote.loc[n, operadora], 2) == float(esperado)
+
+
+def test_economia_pela_operadora_mais_barata_com_desconto():
+    """Menor total entre as operadoras, desconto por quantidade, só o que mudou"""
+    servico = ServicoCalculoCotacao()
+    leads = [
+        {"id": "1", "valor_atual": 2000.0, "idades": [30, 40], "economia_estimada": None},
+        # 5 vidas de 18-29 anos: 5 x 250 (HAPVIDA) com 10% de desconto = 1125
+        {"id": "2", "valor_atual": 1000.0, "idades": [20] * 5, "economia_estimada": 50.0},
+        {"id": "3", "valor_atual": 2000.0, "idades": [30, 40], "economia_estimada": 1200.0},
+        {"id": "4", "valor_atual": None, "idades": [30]},
+        {"id": "5", "valor_atual": 500.0, "idades": [130]},
+    ]
+
+    alteracoes, ignorados = calcular_economias(leads, servico)
+
+    assert [(lead["id"], economia) for lead, economia in alteracoes] == [("1", 1200.0), ("2", 0.0)]
+    assert ignorados == 2
+
+
+class RepositorioComFalha:
+    """Repositório que falha na N-ésima gravação em lote"""
+
+    def __init__(self, repositorio, falhar_na: int):
+        self.repositorio = repositorio
+        self.falhar_na = falhar_na
+        self.gravacoes = 0
+
+    async def listar_leads_cursor(self, **kwargs):
+        return await self.repositorio.listar_leads_cursor(**kwargs)
+
+    async def atualizar_economia_lote(self, atualizacoes):
+        self.gravacoes += 1
+        if self.gravacoes == self.falhar_na:
+            raise RuntimeError("conexão perdida")
+        return await self.repositorio.atualizar_economia_lote(atualizacoes)
+
+
+def test_reprecificacao_retoma_do_checkpoint(tmp_path):
+    """Falha no meio: a próxima execução continua do último lote gravado"""
+    async def cenario():
+        repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        await repo.iniciar()
+        await repo.criar_leads_lote([
+            novo_lead(nome=f"Lead {i}", whatsapp=f"+55119999900{i:02d}",
+                      valor_atual=2000.0, idades=[30, 40])
+            for i in range(12)
+        ])
+
+        checkpoint = str(tmp_path / "reprecificacao.json")
+        job = JobReprecificacao(caminho_checkpoint=checkpoint, tamanho_lote=5)
+
+        falhou = await job.executar(RepositorioComFalha(repo, falhar_na=2))
+        assert falhou["estado"] == "falhou"
+        assert falhou["processados"] == 5
+        assert os.path.exists(checkpoint)
+
+        concluido = await job.executar(repo)
+        assert concluido["estado"] == "concluido"
+        assert concluido["retomado"] is True
+        assert (concluido["processados"], concluido["atualizados"]) == (12, 12)
+        assert not os.path.exists(checkpoint)
+
+        leads = await repo.listar_leads(limite=100)
+        assert {lead["economia_estimada"] for lead in leads} == {1200.0}
+        assert (await repo.obter_dashboard_stats())["economia_total"] == 12 * 1200.0
+
+        repetido = await job.executar(repo)
+        assert (repetido["processados"], repetido["atualizados"]) == (12, 0)
+
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_reprecificacao_exclusiva_entre_workers(tmp_path):
+    """Dois workers com o mesmo checkpoint: só um executa; o outro recebe 409 e vê o progresso"""
+    async def cenario():
+        checkpoint = str(tmp_path / "reprecificacao.json")
+        worker_a = JobReprecificacao(caminho_checkpoint=checkpoint)
+        worker_b = JobReprecificacao(caminho_checkpoint=checkpoint)
+        liberar = asyncio.Event()
+
+        async def executar(repositorio):
+            worker_a._gravar_checkpoint({"processados": 5000})
+            await liberar.wait()
+
+        worker_a.executar = executar
+        assert worker_a.iniciar(None) is True
+        await asyncio.sleep(0)
+        assert worker_b.iniciar(None) is False
+        assert worker_b.progresso() == {
+            "estado": "executando_em_outro_worker", "pid": os.getpid(), "processados": 5000
+        }
+
+        liberar.set()
+        await asyncio.sleep(0.01)
+        assert worker_b.trava.tentar() is True
+        worker_b.trava.liberar()
+
+    asyncio.run(cenario())
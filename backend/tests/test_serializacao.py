@@ -0,0 +1,45 @@
+"""
+Testes da serialização JSON das respostas (RespostaJSON, valores monetários)
+"""
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from main import app
+from src.application.dtos.cotacao_dto import ValorBeneficiarioDTO
+from src.presentation.serializacao import RespostaJSON, serializar_json
+
+client = TestClient(app)
+
+
+def test_serializa_tipos_sem_jsonable_encoder():
+    """Decimal, UUID, datas e modelos saem como o jsonable_encoder (Decimal como número)"""
+    conteudo = {
+        "id": UUID("00000000-0000-4000-8000-000000000001"),
+        "criado_em": datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc),
+        "dia": date(2026, 3, 1),
+        "valor": Decimal("402.50"),
+        "beneficiario": ValorBeneficiarioDTO(idade=30, valor=Decimal("402.50"), faixa_etaria="30-39 anos"),
+        "dados_pdf": {"idades": [30, 5], "operadora": "AMIL", "nome": "João"},
+    }
+
+    assert json.loads(serializar_json(conteudo)) == jsonable_encoder(conteudo)
+    assert "João".encode() in RespostaJSON(conteudo).body
+
+
+def test_cotacao_devolve_valores_como_numero():
+    """Todos os valores monetários (inclusive por beneficiário) são number no JSON"""
+    response = client.post(
+        "/api/v1/cotacao/calcular",
+        json={"idades": [30, 5], "tipo": "ADESAO", "operadora": "AMIL"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert all(isinstance(v["valor"], float) for v in data["valores_individuais"])
+    assert isinstance(data["valor_total"], float) and isinstance(data["desconto_aplicado"], float)
+    assert response.headers["content-type"] == "application/json"
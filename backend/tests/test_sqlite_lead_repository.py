@@ -0,0 +1,116 @@
+"""
+Testes para o repositório de leads em SQLite
+"""
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from src.infrastructure.repositories.sqlite_lead_repository import SQLiteLeadRepository
+from src.presentation.controllers import lead_controller
+
+
+def test_sqlite_crud_e_paginacao_keyset(tmp_path):
+    """Cria, busca, atualiza e percorre leads pelo cursor"""
+    async def cenario():
+        repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        await repo.iniciar()
+
+        criados = []
+        for i in range(5):
+            criados.append(await repo.criar_lead(
+                nome=f"Lead {i}", whatsapp=f"+55119999900{i:02d}",
+                idades=[30, i], valor_proposto=100.0, dados_pdf={"pagina": i}
+            ))
+
+        lead = await repo.buscar_lead_por_id(criados[0]["id"])
+        assert lead["idades"] == [30, 0]
+        assert lead["dados_pdf"] == {"pagina": 0}
+        assert lead["arquivado"] is False
+        assert (await repo.buscar_lead_por_whatsapp("+5511999990003"))["nome"] == "Lead 3"
+
+        assert await repo.atualizar_status_lead(criados[1]["id"], "contatado", "ligação")
+        atualizado = await repo.buscar_lead_por_id(criados[1]["id"])
+        assert atualizado["status"] == "contatado"
+        assert atualizado["historico"][0]["status_anterior"] == "novo"
+
+        paginas = [p async for p in repo.iterar_leads(tamanho_pagina=2, colunas="id,created_at,nome")]
+        assert [len(p) for p in paginas] == [2, 2, 1]
+        assert [l["nome"] for p in paginas for l in p] == [f"Lead {i}" for i in range(4, -1, -1)]
+        assert set(paginas[0][0]) == {"id", "created_at", "nome"}
+
+        assert [l["nome"] for l in await repo.listar_leads(status="contatado")] == ["Lead 1"]
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_sqlite_contadores_e_busca_acompanham_escritas(tmp_path):
+    """Estatísticas e busca refletem criação, status e arquivamento"""
+    async def cenario():
+        caminho = str(tmp_path / "leads.db")
+        repo = SQLiteLeadRepository(caminho)
+        joao = await repo.criar_lead(nome="João Silva", whatsapp="+5511911112222", valor_proposto=300.0)
+        await repo.criar_lead(nome="Maria Souza", whatsapp="+5521933334444", valor_proposto=200.0)
+
+        await repo.atualizar_status_lead(joao["id"], "ganho")
+        pipeline = {p["status"]: p for p in await repo.obter_pipeline_vendas()}
+        assert pipeline["ganho"]["quantidade"] == 1
+        assert pipeline["novo"]["valor_total"] == 200.0
+        assert [l["nome"] for l in await repo.buscar_leads("joao")] == ["João Silva"]
+
+        assert await repo.arquivar_lead(joao["id"])
+        assert await repo.arquivar_lead(joao["id"])
+        assert await repo.buscar_leads("joao") == []
+        assert (await repo.obter_dashboard_stats())["total_leads"] == 1
+        assert (await repo.reconciliar_contadores())["consistente"]
+        await repo.encerrar()
+
+        # Reabrir o arquivo reconstrói os contadores a partir do banco
+        reaberto = SQLiteLeadRepository(caminho)
+        assert (await reaberto.obter_dashboard_stats())["total_leads"] == 1
+        assert [l["nome"] for l in await reaberto.buscar_leads("souza")] == ["Maria Souza"]
+        await reaberto.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_sqlite_reutilizavel_depois_de_encerrar(tmp_path):
+    """encerrar() seguido de iniciar() (lifespan reiniciado) volta a funcionar"""
+    async def cenario():
+        repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+        await repo.iniciar()
+        await repo.criar_lead(nome="Ana Lima", whatsapp="+5511911113333")
+        await repo.encerrar()
+
+        await repo.iniciar()
+        await repo.criar_lead(nome="Bruno Lima", whatsapp="+5511911114444")
+        assert (await repo.obter_dashboard_stats())["total_leads"] == 2
+        await repo.encerrar()
+
+        # Mesmo sem iniciar(), o primeiro uso recria as threads
+        assert (await repo.buscar_lead_por_whatsapp("+5511911113333"))["nome"] == "Ana Lima"
+        await repo.encerrar()
+
+    asyncio.run(cenario())
+
+
+def test_api_leads_com_backend_sqlite(tmp_path, monkeypatch):
+    """Endpoints de leads funcionam sem Supabase usando o SQLite"""
+    repo = SQLiteLeadRepository(str(tmp_path / "leads.db"))
+    monkeypatch.setattr(lead_controller, "lead_repository", repo)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/leads/", json={
+        "nome": "Carlos Lima",
+        "whatsapp": "+5531955556666",
+        "idades": [40],
+        "valor_proposto": 450.0
+    })
+    assert response.status_code == 200
+    lead_id = response.json()["lead"]["id"]
+
+    assert client.get(f"/api/v1/leads/{lead_id}").json()["nome"] == "Carlos Lima"
+    assert client.get("/api/v1/leads/search", params={"q": "lima"}).json()["total"] == 1
+    assert client.patch(f"/api/v1/leads/{lead_id}/status", json={"novo_status": "contatado"}).status_code == 200
+    assert client.get("/api/v1/leads/estatisticas/cache").json()["backend"] == "sqlite"
+    assert client.delete(f"/api/v1/leads/{lead_id}").status_code == 200
+    assert client.get("/api/v1/leads/search", params={"q": "lima"}).json()["total"] == 0
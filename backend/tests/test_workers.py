@@ -0,0 +1,118 @@
+"""
+Testes do modo produção: configuração do gunicorn e liderança entre workers
+"""
+import asyncio
+import os
+import runpy
+
+from src.infrastructure.services.lideranca import TravaLideranca
+
+CONFIGURACAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+# Variáveis que a configuração define com setdefault; o monkeypatch desfaz ao final
+PADROES_MULTIWORKER = (
+    "TAREFAS_GLOBAIS_LOCK", "IDEMPOTENCIA_BACKEND", "METRICAS_WORKERS_DIR", "PERFILAMENTO_DIR",
+    "EVENTOS_LEADS_SQLITE_PATH", "FUNIL_CONTADORES", "LEAD_CACHE_TTL", "LEADS_BACKEND"
+)
+
+
+def _carregar_configuracao(monkeypatch, **ambiente):
+    for nome in PADROES_MULTIWORKER:
+        monkeypatch.delenv(nome, raising=False)
+    for nome, valor in ambiente.items():
+        monkeypatch.setenv(nome, valor)
+    return runpy.run_path(CONFIGURACAO)
+
+
+def test_configuracao_gunicorn_le_ambiente(monkeypatch):
+    """Workers, backlog, keep-alive e reciclagem vêm do ambiente"""
+    configuracao = _carregar_configuracao(
+        monkeypatch,
+        WEB_CONCURRENCY="3", BACKLOG="512", KEEPALIVE="10",
+        MAX_REQUESTS="500", MAX_REQUESTS_JITTER="50", PORT="9000",
+        TAREFAS_GLOBAIS_LOCK="/tmp/teste-lideranca.lock"
+    )
+
+    assert configuracao["workers"] == 3
+    assert configuracao["backlog"] == 512
+    assert configuracao["keepalive"] == 10
+    assert configuracao["max_requests"] == 500
+    assert configuracao["max_requests_jitter"] == 50
+    assert configuracao["bind"] == "0.0.0.0:9000"
+    assert configuracao["worker_class"] == "uvicorn.workers.UvicornWorker"
+    assert configuracao["preload_app"] is False
+
+
+def test_configuracao_gunicorn_usa_padroes_com_variaveis_vazias(monkeypatch):
+    """WEB_CONCURRENCY vazio (como no .env.example) cai no número de núcleos"""
+    configuracao = _carregar_configuracao(monkeypatch, WEB_CONCURRENCY="", BACKLOG="")
+
+    assert configuracao["workers"] >= 1
+    assert configuracao["backlog"] == 2048
+
+
+def test_configuracao_gunicorn_compartilha_estado_entre_workers(monkeypatch):
+    """Com vários workers, o estado por processo é compartilhado ou desligado"""
+    configuracao = _carregar_configuracao(monkeypatch, WEB_CONCURRENCY="4")
+
+    assert configuracao["workers"] == 4
+    assert os.environ["METRICAS_WORKERS_DIR"] and os.environ["PERFILAMENTO_DIR"]
+    assert os.environ["EVENTOS_LEADS_SQLITE_PATH"]
+    assert os.environ["FUNIL_CONTADORES"] == "false"
+    # O master não importa a aplicação (o HUP precisa trazer código novo)
+    assert "from src" not in open(CONFIGURACAO).read()
+
+    # Backend SQLite de leads: estado em memória, um worker só
+    configuracao = _carregar_configuracao(monkeypatch, WEB_CONCURRENCY="4", LEADS_BACKEND="sqlite")
+    assert configuracao["workers"] == 1
+
+
+def test_trava_lideranca_tem_um_dono_por_vez(tmp_path):
+    """Só um processo/instância segura o lock; liberado, outro assume"""
+    caminho = str(tmp_path / "lider.lock")
+    primeira, segunda = TravaLideranca(caminho), TravaLideranca(caminho)
+
+    assert primeira.tentar() is True
+    assert segunda.tentar() is False
+    assert open(caminho).read() == str(os.getpid())
+
+    assert segunda.ocupante() == os.getpid() and primeira.ocupante() is None
+
+    primeira.liberar()
+    assert segunda.ocupante() is None
+    assert segunda.tentar() is True
+    assert segunda.lider and not primeira.lider
+    segunda.liberar()
+
+
+def test_executar_como_lider_inicia_e_cancela_tarefas(tmp_path):
+    """O líder inicia as tarefas globais; cancelado, cancela-as e libera o lock"""
+    caminho = str(tmp_path / "lider.lock")
+
+    async def cenario():
+        ocupante = TravaLideranca(caminho)
+        ocupante.tentar()
+        trava = TravaLideranca(caminho)
+        iniciadas = []
+
+        async def iniciar():
+            tarefa = asyncio.create_task(asyncio.sleep(3600))
+            iniciadas.append(tarefa)
+            return [tarefa]
+
+        lider = asyncio.create_task(trava.executar_como_lider(iniciar, intervalo=0.01))
+        await asyncio.sleep(0.05)
+        assert iniciadas == []
+
+        ocupante.liberar()
+        await asyncio.sleep(0.05)
+        assert len(iniciadas) == 1 and trava.lider
+
+        lider.cancel()
+        await asyncio.gather(lider, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert iniciadas[0].cancelled()
+        assert not trava.lider
+
+    asyncio.run(cenario())
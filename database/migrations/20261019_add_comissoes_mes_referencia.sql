@@ -0,0 +1,28 @@
+-- =====================================================
+-- MIGRATION: Mês de referência nas comissões geradas
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: O motor de comissões do backend (POST /api/v1/comissoes/processar)
+--           precisa reprocessar um mês sem duplicar parcelas nem apagar
+--           lançamentos manuais ou parcelas já pagas
+-- SOLUÇÃO: mes_referencia (AAAA-MM) nas linhas geradas pelo motor; as
+--          pendentes do mês são substituídas e as demais preservadas
+-- =====================================================
+
+ALTER TABLE public.parcelas_comissao
+  ADD COLUMN IF NOT EXISTS mes_referencia TEXT;
+
+ALTER TABLE public.relatorios_comissao
+  ADD COLUMN IF NOT EXISTS mes_referencia TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_parcelas_mes_referencia
+  ON public.parcelas_comissao (mes_referencia, status_comissao)
+  WHERE mes_referencia IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_relatorios_mes_referencia
+  ON public.relatorios_comissao (mes_referencia, status)
+  WHERE mes_referencia IS NOT NULL;
+
+-- Leitura das produções do mês pelo cursor (data_vigencia, id)
+CREATE INDEX IF NOT EXISTS idx_producoes_vigencia_id
+  ON public.producoes_corretor (data_vigencia, id);
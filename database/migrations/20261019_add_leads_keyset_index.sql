@@ -0,0 +1,11 @@
+-- =====================================================
+-- MIGRATION: Índice para paginação keyset de leads
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: Exportação paginada por OFFSET fica O(n²) em tabelas grandes
+-- SOLUÇÃO: Cursor (created_at, id) servido por um índice composto
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_insurance_leads_keyset
+  ON public.insurance_leads (created_at DESC, id DESC)
+  WHERE arquivado = FALSE;
@@ -0,0 +1,65 @@
+-- =====================================================
+-- MIGRATION: Score de priorização dos leads
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: Corretores priorizam leads no feeling; ordenar por uma nota
+--           calculada na hora exigiria recalcular a base inteira por listagem
+-- SOLUÇÃO: Coluna score (0-100) gravada na criação / mudança de status pela
+--          API (src/infrastructure/services/pontuacao_leads.py), índices para
+--          ORDER BY score e RPC para o recálculo completo em lote. O trigger
+--          de updated_at deixa de disparar quando só o score muda
+-- =====================================================
+
+ALTER TABLE public.insurance_leads
+  ADD COLUMN IF NOT EXISTS score NUMERIC(4, 1);
+
+CREATE INDEX IF NOT EXISTS idx_insurance_leads_score
+  ON public.insurance_leads (score DESC NULLS LAST, created_at DESC)
+  WHERE arquivado = FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_insurance_leads_status_score
+  ON public.insurance_leads (status, score DESC NULLS LAST, created_at DESC)
+  WHERE arquivado = FALSE;
+
+CREATE OR REPLACE FUNCTION public.atualizar_scores_leads(p_scores JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_atualizados INTEGER;
+BEGIN
+  UPDATE public.insurance_leads AS l
+     SET score = (s->>'score')::NUMERIC
+    FROM jsonb_array_elements(p_scores) AS s
+   WHERE l.id = (s->>'id')::UUID
+     AND l.arquivado = FALSE;
+
+  GET DIAGNOSTICS v_atualizados = ROW_COUNT;
+  RETURN v_atualizados;
+END;
+$$;
+
+-- O recálculo do score não é uma edição do lead: dashboard_stats.ultima_atualizacao,
+-- os contadores do funil e o controle otimista de atualizar_status_lead leem
+-- updated_at. O trigger passa a disparar só com as outras colunas no SET
+-- (uma coluna criada depois desta migration precisa recriá-lo)
+DO $$
+DECLARE
+  v_colunas TEXT;
+BEGIN
+  SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+    INTO v_colunas
+    FROM information_schema.columns
+   WHERE table_schema = 'public'
+     AND table_name = 'insurance_leads'
+     AND column_name <> 'score';
+
+  DROP TRIGGER IF EXISTS update_insurance_leads_updated_at ON public.insurance_leads;
+  EXECUTE format(
+    'CREATE TRIGGER update_insurance_leads_updated_at
+       BEFORE UPDATE OF %s ON public.insurance_leads
+       FOR EACH ROW
+       EXECUTE FUNCTION public.update_updated_at_column()',
+    v_colunas
+  );
+END $$;
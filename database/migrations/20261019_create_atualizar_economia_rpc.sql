@@ -0,0 +1,28 @@
+-- =====================================================
+-- MIGRATION: Atualização em lote da economia estimada
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: A reprecificação dos leads (POST /api/v1/leads/reprecificacao)
+--           grava milhares de economias por lote; um UPDATE por lead via
+--           PostgREST custa um round-trip cada
+-- SOLUÇÃO: Um único UPDATE ... FROM jsonb_array_elements por lote
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.atualizar_economia_leads(p_atualizacoes JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_atualizados INTEGER;
+BEGIN
+  UPDATE public.insurance_leads AS l
+     SET economia_estimada = (a->>'economia_estimada')::NUMERIC,
+         updated_at = NOW()
+    FROM jsonb_array_elements(p_atualizacoes) AS a
+   WHERE l.id = (a->>'id')::UUID
+     AND l.arquivado = FALSE;
+
+  GET DIAGNOSTICS v_atualizados = ROW_COUNT;
+  RETURN v_atualizados;
+END;
+$$;
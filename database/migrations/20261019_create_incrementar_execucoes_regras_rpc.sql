@@ -0,0 +1,39 @@
+-- =====================================================
+-- MIGRATION: Contadores de execução das regras em lote
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: O motor de regras do backend avalia automacoes e regras_ia
+--           a cada evento de lead; um UPDATE por disparo multiplicaria
+--           as escritas pelo número de regras
+-- SOLUÇÃO: O motor acumula as execuções em memória e grava a cada poucos
+--          segundos com um único UPDATE ... FROM jsonb_array_elements
+--          por tabela. ultima_execucao passa a receber ISO 8601.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.incrementar_execucoes_regras(p_contagens JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_automacoes INTEGER;
+  v_regras INTEGER;
+BEGIN
+  UPDATE public.automacoes AS a
+     SET execucoes = a.execucoes + (c->>'execucoes')::INTEGER,
+         ultima_execucao = c->>'ultima_execucao'
+    FROM jsonb_array_elements(p_contagens) AS c
+   WHERE c->>'tabela' = 'automacoes'
+     AND a.id = (c->>'id')::UUID;
+  GET DIAGNOSTICS v_automacoes = ROW_COUNT;
+
+  UPDATE public.regras_ia AS r
+     SET execucoes = r.execucoes + (c->>'execucoes')::INTEGER,
+         ultima_execucao = c->>'ultima_execucao'
+    FROM jsonb_array_elements(p_contagens) AS c
+   WHERE c->>'tabela' = 'regras_ia'
+     AND r.id = (c->>'id')::UUID;
+  GET DIAGNOSTICS v_regras = ROW_COUNT;
+
+  RETURN v_automacoes + v_regras;
+END;
+$$;
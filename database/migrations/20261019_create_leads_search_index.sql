@@ -0,0 +1,96 @@
+-- =====================================================
+-- MIGRATION: Busca de leads por nome, e-mail e telefone
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: Não há busca; corretores paginam listar_leads e filtram no cliente
+-- SOLUÇÃO: Índices trigram (pg_trgm) + RPC buscar_leads com ranking,
+--          limite e projeção enxuta (sem dados_pdf/historico)
+--          Nome e e-mail comparados sem acentos (unaccent), como o
+--          índice em memória do backend SQLite (NFKD em indice_busca_leads.py):
+--          'joao' encontra 'João' nos dois backends
+-- =====================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() é STABLE (depende do search_path): o wrapper fixa o
+-- dicionário e o search_path para poder ser IMMUTABLE e entrar em índices
+CREATE OR REPLACE FUNCTION public.normalizar_busca(p_texto TEXT)
+RETURNS TEXT AS $$
+  SELECT lower(unaccent('unaccent'::regdictionary, p_texto))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+SET search_path = public, extensions;
+
+-- Índices trigram: atendem LIKE '%fragmento%' sem varrer a tabela
+CREATE INDEX IF NOT EXISTS idx_insurance_leads_nome_trgm
+  ON public.insurance_leads USING GIN (public.normalizar_busca(nome) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_insurance_leads_email_trgm
+  ON public.insurance_leads USING GIN (public.normalizar_busca(email) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_insurance_leads_whatsapp_trgm
+  ON public.insurance_leads USING GIN (regexp_replace(whatsapp, '\D', '', 'g') gin_trgm_ops);
+
+-- =====================================================
+-- RPC: buscar_leads(termo, limite)
+-- Relevância: similaridade com o nome/e-mail, fragmento de telefone
+-- e bônus para nomes que começam com o termo
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.buscar_leads(
+  p_termo TEXT,
+  p_limite INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+  id UUID,
+  nome VARCHAR,
+  whatsapp VARCHAR,
+  email VARCHAR,
+  operadora_atual VARCHAR,
+  status VARCHAR,
+  created_at TIMESTAMPTZ,
+  relevancia REAL
+) AS $$
+DECLARE
+  v_texto TEXT := public.normalizar_busca(trim(p_termo));
+  v_padrao TEXT;
+  v_digitos TEXT := regexp_replace(p_termo, '\D', '', 'g');
+BEGIN
+  -- Escapar curingas do LIKE digitados pelo usuário
+  v_padrao := '%' || replace(replace(replace(v_texto, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+
+  RETURN QUERY
+  SELECT
+    l.id,
+    l.nome,
+    l.whatsapp,
+    l.email,
+    l.operadora_atual,
+    l.status,
+    l.created_at,
+    (
+      GREATEST(
+        word_similarity(v_texto, public.normalizar_busca(l.nome)),
+        COALESCE(similarity(v_texto, public.normalizar_busca(l.email)), 0),
+        CASE
+          WHEN length(v_digitos) >= 3
+           AND regexp_replace(l.whatsapp, '\D', '', 'g') LIKE '%' || v_digitos || '%'
+          THEN 1 ELSE 0
+        END
+      )
+      + CASE WHEN public.normalizar_busca(l.nome) LIKE v_texto || '%' THEN 0.5 ELSE 0 END
+    )::REAL AS relevancia
+  FROM public.insurance_leads l
+  WHERE l.arquivado = FALSE
+    AND (
+      public.normalizar_busca(l.nome) LIKE v_padrao
+      OR public.normalizar_busca(l.email) LIKE v_padrao
+      OR (
+        length(v_digitos) >= 3
+        AND regexp_replace(l.whatsapp, '\D', '', 'g') LIKE '%' || v_digitos || '%'
+      )
+    )
+  ORDER BY relevancia DESC, l.created_at DESC
+  LIMIT LEAST(GREATEST(p_limite, 1), 50);
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,49 @@
+-- =====================================================
+-- MIGRATION: Agendador de avisos de renovação
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: O agendador de renovações lê a cada tick as renovações em
+--           aberto que vencem nos próximos 60 dias e ainda não receberam
+--           o aviso de 30 dias, e marca os avisos de uma vez; um UPDATE
+--           por renovação via PostgREST custa um round-trip cada
+-- SOLUÇÃO: Índice parcial pela data de vencimento só das renovações a
+--          notificar + um único UPDATE ... FROM jsonb_array_elements por lote,
+--          que pula os avisos já marcados e devolve os IDs que marcou
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_renovacoes_a_notificar
+  ON public.renovacoes (data_vencimento, id)
+  WHERE notificacao_30d = FALSE
+    AND status IN ('pendente', 'contato_feito', 'negociando');
+
+CREATE OR REPLACE FUNCTION public.marcar_notificacoes_renovacoes(p_avisos JSONB)
+RETURNS TABLE (renovacao_id UUID)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  -- Só marca o aviso que ainda não foi marcado: um tick repetido (ou de
+  -- outro worker) não regrava a oferta nem o notificacao_enviada_em
+  RETURN QUERY
+  WITH marcadas AS (
+    UPDATE public.renovacoes AS r
+       SET notificacao_60d = r.notificacao_60d OR COALESCE((a->>'notificacao_60d')::BOOLEAN, FALSE),
+           notificacao_30d = r.notificacao_30d OR COALESCE((a->>'notificacao_30d')::BOOLEAN, FALSE),
+           notificacao_enviada_em = NOW(),
+           metadata = CASE
+             WHEN jsonb_typeof(a->'oferta') = 'object'
+               THEN COALESCE(r.metadata, '{}'::jsonb) || jsonb_build_object('oferta_renovacao', a->'oferta')
+             ELSE r.metadata
+           END,
+           updated_at = NOW()
+      FROM jsonb_array_elements(p_avisos) AS a
+     WHERE r.id = (a->>'id')::UUID
+       AND r.status IN ('pendente', 'contato_feito', 'negociando')
+       AND NOT CASE
+             WHEN COALESCE((a->>'notificacao_30d')::BOOLEAN, FALSE) THEN r.notificacao_30d
+             ELSE r.notificacao_60d
+           END
+    RETURNING r.id
+  )
+  SELECT marcadas.id FROM marcadas;
+END;
+$$;
@@ -0,0 +1,76 @@
+-- =====================================================
+-- MIGRATION: Substituição atômica das comissões de um mês
+-- Data: 2026-10-19
+-- =====================================================
+-- PROBLEMA: O motor de comissões apagava as parcelas pendentes e os
+--           relatórios gerados do mês e só depois enviava os novos em
+--           lotes; uma falha no meio deixava o mês sem comissões
+-- SOLUÇÃO: Os lotes vão para uma tabela de preparação (comissoes_preparacao)
+--          identificados por uma geração; a RPC substituir_comissoes_mes
+--          apaga e insere numa única transação. Uma geração interrompida
+--          não toca nas comissões e é descartada na próxima execução
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS public.comissoes_preparacao (
+  geracao UUID NOT NULL,
+  tabela TEXT NOT NULL CHECK (tabela IN ('parcelas_comissao', 'relatorios_comissao')),
+  registro JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_comissoes_preparacao_geracao
+  ON public.comissoes_preparacao (geracao, tabela);
+
+ALTER TABLE public.comissoes_preparacao ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.substituir_comissoes_mes(p_mes_referencia TEXT, p_geracao UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_parcelas INTEGER;
+  v_relatorios INTEGER;
+BEGIN
+  DELETE FROM public.parcelas_comissao
+   WHERE mes_referencia = p_mes_referencia
+     AND status_comissao = 'pendente';
+
+  DELETE FROM public.relatorios_comissao
+   WHERE mes_referencia = p_mes_referencia
+     AND status = 'gerado';
+
+  -- ON CONFLICT: parcelas/relatórios pagos (mesmo ID) ficam como estão
+  INSERT INTO public.parcelas_comissao (
+    id, producao_id, corretor_id, numero_parcela, valor_parcela,
+    data_vencimento, percentual_comissao, status_comissao, mes_referencia, metadata
+  )
+  SELECT r.id, r.producao_id, r.corretor_id, r.numero_parcela, r.valor_parcela,
+         r.data_vencimento, r.percentual_comissao, r.status_comissao, r.mes_referencia,
+         COALESCE(r.metadata, '{}'::jsonb)
+    FROM public.comissoes_preparacao p,
+         jsonb_populate_record(NULL::public.parcelas_comissao, p.registro) AS r
+   WHERE p.geracao = p_geracao AND p.tabela = 'parcelas_comissao'
+  ON CONFLICT (id) DO NOTHING;
+  GET DIAGNOSTICS v_parcelas = ROW_COUNT;
+
+  INSERT INTO public.relatorios_comissao (
+    id, corretor_id, numero_relatorio, data_geracao, data_previsao,
+    valor_bruto, valor_liquido, status, mes_referencia, metadata
+  )
+  SELECT r.id, r.corretor_id, r.numero_relatorio, r.data_geracao, r.data_previsao,
+         r.valor_bruto, r.valor_liquido, r.status, r.mes_referencia,
+         COALESCE(r.metadata, '{}'::jsonb)
+    FROM public.comissoes_preparacao p,
+         jsonb_populate_record(NULL::public.relatorios_comissao, p.registro) AS r
+   WHERE p.geracao = p_geracao AND p.tabela = 'relatorios_comissao'
+  ON CONFLICT (id) DO NOTHING;
+  GET DIAGNOSTICS v_relatorios = ROW_COUNT;
+
+  -- Esta geração e as abandonadas (execuções que falharam antes da RPC)
+  DELETE FROM public.comissoes_preparacao
+   WHERE geracao = p_geracao
+      OR created_at < NOW() - INTERVAL '1 day';
+
+  RETURN jsonb_build_object('parcelas', v_parcelas, 'relatorios', v_relatorios);
+END;
+$$;
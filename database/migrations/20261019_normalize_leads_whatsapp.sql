@@ -0,0 +1,69 @@
+-- =============================================
+-- WhatsApp dos leads em E.164 (+55 DDD número)
+-- =============================================
+-- A API passou a normalizar o telefone em toda criação e consulta de
+-- leads (src/domain/value_objects/telefone.py). Esta migração aplica a
+-- mesma regra aos registros existentes, para que a verificação de
+-- duplicidade (igualdade exata em whatsapp) encontre os leads antigos.
+-- Valores que não são telefones brasileiros válidos ficam como estão.
+
+CREATE OR REPLACE FUNCTION public.normalizar_telefone_br(p_telefone TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  v_digitos TEXT := regexp_replace(COALESCE(p_telefone, ''), '\D', '', 'g');
+  v_ddd INTEGER;
+  v_numero TEXT;
+BEGIN
+  IF v_digitos LIKE '00%' THEN
+    v_digitos := substr(v_digitos, 3);
+  END IF;
+
+  IF length(v_digitos) IN (12, 13) AND v_digitos LIKE '55%' THEN
+    v_digitos := substr(v_digitos, 3);
+  ELSIF length(v_digitos) IN (11, 12) AND v_digitos LIKE '0%' THEN
+    v_digitos := substr(v_digitos, 2);
+  ELSIF length(v_digitos) IN (13, 14) AND v_digitos LIKE '0%' THEN
+    v_digitos := substr(v_digitos, 4);
+  END IF;
+
+  IF length(v_digitos) NOT IN (10, 11) THEN
+    RETURN NULL;
+  END IF;
+
+  v_ddd := substr(v_digitos, 1, 2)::INTEGER;
+  v_numero := substr(v_digitos, 3);
+
+  IF v_ddd NOT IN (
+    11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28,
+    31, 32, 33, 34, 35, 37, 38, 41, 42, 43, 44, 45, 46, 47, 48, 49,
+    51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67, 68, 69,
+    71, 73, 74, 75, 77, 79, 81, 82, 83, 84, 85, 86, 87, 88, 89,
+    91, 92, 93, 94, 95, 96, 97, 98, 99
+  ) THEN
+    RETURN NULL;
+  END IF;
+
+  IF length(v_numero) = 9 THEN
+    IF left(v_numero, 1) <> '9' THEN
+      RETURN NULL;
+    END IF;
+  ELSIF left(v_numero, 1) IN ('6', '7', '8', '9') THEN
+    v_numero := '9' || v_numero;
+  ELSIF left(v_numero, 1) NOT IN ('2', '3', '4', '5') THEN
+    RETURN NULL;
+  END IF;
+
+  RETURN '+55' || v_ddd::TEXT || v_numero;
+END;
+$$;
+
+UPDATE public.insurance_leads
+SET whatsapp = public.normalizar_telefone_br(whatsapp)
+WHERE public.normalizar_telefone_br(whatsapp) IS NOT NULL
+  AND whatsapp <> public.normalizar_telefone_br(whatsapp);
+
+COMMENT ON FUNCTION public.normalizar_telefone_br(TEXT) IS
+  'Telefone brasileiro em E.164, ou NULL se inválido (mesma regra da API)';
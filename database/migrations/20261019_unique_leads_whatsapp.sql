@@ -0,0 +1,39 @@
+-- =============================================
+-- Um lead ativo por WhatsApp
+-- =============================================
+-- A API verifica duplicidade antes de criar o lead, mas a verificação
+-- não é atômica e cada worker pode dispensá-la para números que o seu
+-- filtro de telefones nunca viu (filtro_telefones.py). O índice único
+-- faz o banco decidir: o segundo INSERT recebe unique_violation (23505)
+-- e a API responde com o lead existente.
+--
+-- Depende de 20261019_normalize_leads_whatsapp.sql (números em E.164).
+-- Duplicados ativos já existentes são arquivados, ficando o mais recente
+-- (o mesmo que buscar_lead_por_whatsapp devolvia).
+
+WITH duplicados AS (
+  SELECT id,
+         row_number() OVER (
+           PARTITION BY whatsapp ORDER BY created_at DESC, id DESC
+         ) AS posicao
+  FROM public.insurance_leads
+  WHERE arquivado = FALSE
+)
+UPDATE public.insurance_leads l
+SET arquivado = TRUE,
+    updated_at = now(),
+    historico = COALESCE(l.historico, '[]'::jsonb) || jsonb_build_array(jsonb_build_object(
+      'timestamp', now(),
+      'evento', 'arquivado_duplicado',
+      'observacao', 'WhatsApp repetido (mantido o lead mais recente)'
+    ))
+FROM duplicados d
+WHERE l.id = d.id
+  AND d.posicao > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_leads_whatsapp_ativo
+  ON public.insurance_leads (whatsapp)
+  WHERE arquivado = FALSE;
+
+COMMENT ON INDEX public.uq_leads_whatsapp_ativo IS
+  'Um lead ativo por WhatsApp (duplicidade decidida pelo banco, não pelo filtro da API)';